@@ -31,6 +31,8 @@ EVENT_FAILED_EXTENSION_LOAD = 'MainLoader.OnFailedExtensionLoad'
 class AzCli(CLI):
 
     def __init__(self, **kwargs):
+        from azure.cli.core._query import AzCliQuery
+        kwargs.setdefault('query_cls', AzCliQuery)
         super(AzCli, self).__init__(**kwargs)
 
         from azure.cli.core.commands import register_cache_arguments
@@ -38,7 +40,10 @@ class AzCli(CLI):
             register_ids_argument, register_global_subscription_argument)
         from azure.cli.core.cloud import get_active_cloud
         from azure.cli.core.commands.transform import register_global_transforms
-        from azure.cli.core._session import ACCOUNT, CONFIG, SESSION
+        from azure.cli.core._session import ACCOUNT, CONFIG, SESSION, INDEX, flush_sessions
+        from azure.cli.core.util import reset_shared_connection_pool, log_connection_pool_stats
+        from azure.cli.core.commands.client_factory import reset_client_cache
+        from knack.events import EVENT_CLI_PRE_EXECUTE, EVENT_CLI_POST_EXECUTE
 
         from knack.util import ensure_dir
 
@@ -53,6 +58,7 @@ class AzCli(CLI):
         ACCOUNT.load(os.path.join(azure_folder, 'azureProfile.json'))
         CONFIG.load(os.path.join(azure_folder, 'az.json'))
         SESSION.load(os.path.join(azure_folder, 'az.sess'), max_age=3600)
+        INDEX.load(os.path.join(azure_folder, 'commandIndex.json'))
         self.cloud = get_active_cloud(self)
         logger.debug('Current cloud config:\n%s', str(self.cloud.name))
 
@@ -61,6 +67,13 @@ class AzCli(CLI):
         register_ids_argument(self)  # global subscription must be registered first!
         register_cache_arguments(self)
 
+        # clients of one invocation are reused and share HTTP connections, see _get_mgmt_service_client
+        self.register_event(EVENT_CLI_PRE_EXECUTE, reset_client_cache)
+        self.register_event(EVENT_CLI_PRE_EXECUTE, reset_shared_connection_pool)
+        self.register_event(EVENT_CLI_POST_EXECUTE, log_connection_pool_stats)
+        # the session files are written once per command rather than on every change
+        self.register_event(EVENT_CLI_POST_EXECUTE, flush_sessions)
+
         self.progress_controller = None
 
     def refresh_request_id(self):
@@ -123,11 +136,7 @@ class MainCommandsLoader(CLICommandsLoader):
         from azure.cli.core.extension import (
             get_extensions, get_extension_path, get_extension_modname)
 
-        def _update_command_table_from_modules(args):
-            '''Loads command table(s)
-            When `module_name` is specified, only commands from that module will be loaded.
-            If the module is not found, all commands are loaded.
-            '''
+        def _get_installed_command_modules():
             installed_command_modules = []
             try:
                 mods_ns_pkg = import_module('azure.cli.command_modules')
@@ -136,7 +145,13 @@ class MainCommandsLoader(CLICommandsLoader):
                                              if modname not in BLACKLISTED_MODS]
             except ImportError as e:
                 logger.warning(e)
+            return installed_command_modules
 
+        def _update_command_table_from_modules(args, installed_command_modules):
+            '''Loads command table(s)
+            Only the modules in `installed_command_modules` are loaded. The command index uses this to
+            restrict loading to the modules which provide the requested command.
+            '''
             logger.debug('Installed command modules %s', installed_command_modules)
             cumulative_elapsed_time = 0
             for mod in [m for m in installed_command_modules if m not in BLACKLISTED_MODS]:
@@ -162,7 +177,7 @@ class MainCommandsLoader(CLICommandsLoader):
                          "(note: there's always an overhead with the first module loaded)",
                          cumulative_elapsed_time)
 
-        def _update_command_table_from_extensions(ext_suppressions):
+        def _update_command_table_from_extensions(ext_suppressions, extensions, extension_names=None):
 
             from azure.cli.core.extension.operations import check_version_compatibility
 
@@ -177,7 +192,8 @@ class MainCommandsLoader(CLICommandsLoader):
                         filtered_extensions.append(ext)
                 return filtered_extensions
 
-            extensions = get_extensions()
+            if extension_names is not None:
+                extensions = [ext for ext in extensions if ext.name in extension_names]
             if extensions:
                 logger.debug("Found %s extensions: %s", len(extensions), [e.name for e in extensions])
                 allowed_extensions = _handle_extension_suppressions(extensions)
@@ -245,18 +261,50 @@ class MainCommandsLoader(CLICommandsLoader):
                             res.append(sup)
             return res
 
-        _update_command_table_from_modules(args)
+        def _update_command_table(args, installed_command_modules, extensions, extension_names=None):
+            _update_command_table_from_modules(args, installed_command_modules)
+            try:
+                ext_suppressions = _get_extension_suppressions(self.loaders)
+                # We always load extensions even if the appropriate module has been loaded
+                # as an extension could override the commands already loaded.
+                _update_command_table_from_extensions(ext_suppressions, extensions, extension_names)
+            except Exception:  # pylint: disable=broad-except
+                logger.warning("Unable to load extensions. Use --debug for more information.")
+                logger.debug(traceback.format_exc())
+
+        installed_command_modules = _get_installed_command_modules()
         try:
-            ext_suppressions = _get_extension_suppressions(self.loaders)
-            # We always load extensions even if the appropriate module has been loaded
-            # as an extension could override the commands already loaded.
-            _update_command_table_from_extensions(ext_suppressions)
+            extensions = get_extensions()
         except Exception:  # pylint: disable=broad-except
             logger.warning("Unable to load extensions. Use --debug for more information.")
             logger.debug(traceback.format_exc())
+            extensions = []
+
+        command_index = None
+        if self.cli_ctx and self.cli_ctx.config.getboolean('core', 'use_command_index', fallback=True):
+            command_index = CommandIndex(self.cli_ctx, installed_command_modules, extensions)
+            index_result = command_index.get(args)
+            if index_result:
+                logger.debug("Command index found '%s' in: %s", args[0], index_result)
+                _update_command_table(args, [m for m in installed_command_modules if m in index_result],
+                                      extensions, index_result)
+                if self.command_table:
+                    return self.command_table
+                logger.debug('Command index returned no commands. Falling back to loading all modules.')
+                self._reset_command_table()
+
+        _update_command_table(args, installed_command_modules, extensions)
+        if command_index:
+            command_index.update(self.command_table)
 
         return self.command_table
 
+    def _reset_command_table(self):
+        self.command_table = {}
+        self.command_group_table = {}
+        self.cmd_to_loader_map = {}
+        self.loaders = []
+
     def load_arguments(self, command=None):
         from azure.cli.core.commands.parameters import resource_group_name_type, get_location_type, deployment_name_type
         from knack.arguments import ignore_type
@@ -295,6 +343,62 @@ class MainCommandsLoader(CLICommandsLoader):
                 loader._update_command_definitions()  # pylint: disable=protected-access
 
 
+class CommandIndex(object):
+    """ Persistent map from top-level command names to the command modules and extensions that provide them.
+
+    The index is only valid for the CLI version, cloud profile, command modules and extensions it was built
+    with. Any change to those makes `get` miss, and the next full load rebuilds the index.
+    """
+
+    _COMMAND_INDEX = 'commandIndex'
+    _COMMAND_INDEX_KEY = 'indexKey'
+
+    def __init__(self, cli_ctx, installed_command_modules, extensions):
+        from azure.cli.core._session import INDEX
+        self.INDEX = INDEX
+        self.index_key = {
+            'version': __version__,
+            'cloudProfile': cli_ctx.cloud.profile,
+            'modules': sorted(installed_command_modules),
+            'extensions': sorted('{}=={}'.format(ext.name, getattr(ext, 'version', None)) for ext in extensions)
+        }
+
+    def get(self, args):
+        """ Return the names of the modules and extensions that provide the top-level command in `args`.
+
+        :return: list of module and extension names, or None when the index cannot answer.
+        """
+        # `az`, `az --help` and `az --version` need the whole command table
+        if not args or not args[0] or args[0].startswith('-'):
+            return None
+        if self.INDEX.get(self._COMMAND_INDEX_KEY) != self.index_key:
+            logger.debug('Command index is missing or out of date.')
+            return None
+        return self.INDEX.get(self._COMMAND_INDEX, {}).get(args[0].lower())
+
+    def update(self, command_table):
+        """ Rebuild the index from a fully loaded command table, unless the index already holds all its entries. """
+        from azure.cli.core.commands import ExtensionCommandSource
+        index = {}
+        for command_name, command in command_table.items():
+            top_command = command_name.split()[0]
+            source = command.command_source
+            if isinstance(source, ExtensionCommandSource):
+                source = source.extension_name
+            if source and source not in index.setdefault(top_command, []):
+                index[top_command].append(source)
+        # unknown commands miss an index which is up to date, and do not need to write it again
+        if self.INDEX.get(self._COMMAND_INDEX_KEY) == self.index_key:
+            stored = self.INDEX.get(self._COMMAND_INDEX, {})
+            if all(set(sources) <= set(stored.get(top_command, [])) for top_command, sources in index.items()):
+                logger.debug('Command index is up to date.')
+                return
+        self.INDEX.data[self._COMMAND_INDEX_KEY] = self.index_key
+        self.INDEX.data[self._COMMAND_INDEX] = index
+        self.INDEX.save_with_retry()
+        logger.debug('Updated command index with %d top-level commands.', len(index))
+
+
 class ModExtensionSuppress(object):  # pylint: disable=too-few-public-methods
 
     def __init__(self, mod_name, suppress_extension_name, suppress_up_to_version, reason=None, recommend_remove=False,
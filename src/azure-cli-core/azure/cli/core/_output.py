@@ -11,6 +11,7 @@ class AzOutputProducer(knack.output.OutputProducer):
         super(AzOutputProducer, self).__init__(cli_ctx)
         additional_formats = {
             'yaml': self.format_yaml,
+            'jsonl': self.format_jsonl,
             'none': self.format_none
         }
         super(AzOutputProducer, self)._FORMAT_DICT.update(additional_formats)
@@ -26,6 +27,13 @@ class AzOutputProducer(knack.output.OutputProducer):
             # yaml.safe_dump fails when obj.result is an OrderedDict. knack's --query implementation converts the result to an OrderedDict. https://github.com/microsoft/knack/blob/af674bfea793ff42ae31a381a21478bae4b71d7f/knack/query.py#L46. # pylint: disable=line-too-long
             return safe_dump(json.loads(json.dumps(obj.result)), default_flow_style=False)
 
+    @staticmethod
+    def format_jsonl(obj):
+        """ One compact JSON document per line for each element of a list result. """
+        import json
+        result = obj.result if isinstance(obj.result, list) else [obj.result]
+        return ''.join(json.dumps(item, ensure_ascii=False, sort_keys=True, default=str) + '\n' for item in result)
+
     @staticmethod
     def format_none(_):
         return ""
@@ -12,13 +12,16 @@ import os
 import os.path
 import re
 import string
+import threading
+from contextlib import contextmanager
 from copy import deepcopy
 from enum import Enum
 from six.moves import BaseHTTPServer
 
 from azure.cli.core._environment import get_config_dir
 from azure.cli.core._session import ACCOUNT
-from azure.cli.core.util import get_file_json, in_cloud_console, open_page_in_browser, can_launch_browser
+from azure.cli.core.util import (get_file_json, in_cloud_console, open_page_in_browser, can_launch_browser,
+                                 atomic_write, lock_file)
 from azure.cli.core.cloud import get_active_cloud, set_cloud_subscription
 
 from knack.log import get_logger
@@ -51,6 +54,7 @@ _SERVICE_PRINCIPAL_CERT_THUMBPRINT = 'thumbprint'
 _SERVICE_PRINCIPAL_CERT_SN_ISSUER_AUTH = 'useCertSNIssuerAuth'
 _TOKEN_ENTRY_USER_ID = 'userId'
 _TOKEN_ENTRY_TOKEN_TYPE = 'tokenType'
+_TOKEN_ENTRY_EXPIRES_ON = 'expiresOn'
 # This could mean either real access token, or client secret of a service principal
 # This naming is no good, but can't change because xplat-cli does so.
 _ACCESS_TOKEN = 'accessToken'
@@ -72,6 +76,15 @@ _ASSIGNED_IDENTITY_INFO = 'assignedIdentityInfo'
 
 _AZ_LOGIN_MESSAGE = "Please run 'az login' to setup account."
 
+# seconds a tenant has to issue a token and list its subscriptions when all the tenants of a user are searched
+DEFAULT_TENANT_TIMEOUT = 300
+
+# adal refreshes the access token of a user within 5 minutes of its expiry
+_TOKEN_REFRESH_WINDOW = 300
+# while a command runs, tokens it used are refreshed in the background this many seconds before they expire
+_BACKGROUND_REFRESH_LEAD_TIME = 240
+_TOKEN_FILE_LOCK_SUFFIX = '.lock'
+
 
 def load_subscriptions(cli_ctx, all_clouds=False, refresh=False):
     profile = Profile(cli_ctx=cli_ctx)
@@ -111,6 +124,34 @@ def _load_tokens_from_file(file_path):
     return []
 
 
+def _get_token_entry_key(entry):
+    """ The key of an entry of the token file: the authority, resource, client and user of a token, as in
+    adal.TokenCache, or the id and tenant of a service principal. """
+    if entry.get(_SERVICE_PRINCIPAL_ID):
+        return _SERVICE_PRINCIPAL, entry[_SERVICE_PRINCIPAL_ID], entry.get(_SERVICE_PRINCIPAL_TENANT)
+    return tuple((entry.get(k) or '').lower() for k in ('_authority', 'resource', '_clientId', _TOKEN_ENTRY_USER_ID))
+
+
+def _get_seconds_to_expiry(token_entry):
+    from datetime import datetime
+    import dateutil.parser
+    try:
+        expires_on = dateutil.parser.parse(token_entry[_TOKEN_ENTRY_EXPIRES_ON])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    return (expires_on - datetime.now(expires_on.tzinfo)).total_seconds()
+
+
+def _get_newer_token_entry(entry, other):
+    """ Of two entries with the same key, the one which expires last, or `entry`. """
+    if other is None or entry.get(_SERVICE_PRINCIPAL_ID):
+        return entry
+    entry_expiry, other_expiry = _get_seconds_to_expiry(entry), _get_seconds_to_expiry(other)
+    if entry_expiry is not None and other_expiry is not None and other_expiry > entry_expiry:
+        return other
+    return entry
+
+
 def _delete_file(file_path):
     try:
         os.remove(file_path)
@@ -829,48 +870,97 @@ class SubscriptionFinder(object):
         return self._auth_context_factory(self.cli_ctx, tenant, token_cache)
 
     def _find_using_common_tenant(self, access_token, resource):
-        import adal
         from msrest.authentication import BasicTokenAuthentication
+        from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
 
         all_subscriptions = []
         token_credential = BasicTokenAuthentication({'access_token': access_token})
         client = self._arm_client_factory(token_credential)
-        tenants = client.tenants.list()
-        for t in tenants:
-            tenant_id = t.tenant_id
-            temp_context = self._create_auth_context(tenant_id)
-            try:
-                temp_credentials = temp_context.acquire_token(resource, self.user_id, _CLIENT_ID)
-            except adal.AdalError as ex:
-                # because user creds went through the 'common' tenant, the error here must be
-                # tenant specific, like the account was disabled. For such errors, we will continue
-                # with other tenants.
-                logger.warning("Failed to authenticate '%s' due to error '%s'", t, ex)
-                continue
-            subscriptions = self._find_using_specific_tenant(
-                tenant_id,
-                temp_credentials[_ACCESS_TOKEN])
-            all_subscriptions.extend(subscriptions)
+        tenants = list(client.tenants.list())
 
+        timeout = self.cli_ctx.config.getint('core', 'tenant_timeout', DEFAULT_TENANT_TIMEOUT)
+        max_concurrency = self.cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
+        if max_concurrency < 2 or len(tenants) < 2:
+            results = [self._find_using_tenant(t, resource, timeout) for t in tenants]
+        else:
+            # each tenant issues its own token, so they are searched at the same time
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(tenants))) as executor:
+                results = list(executor.map(lambda t: self._find_using_tenant(t, resource, timeout), tenants))
+
+        for t, subscriptions in zip(tenants, results):
+            if subscriptions is not None:
+                self.tenants.append(t.tenant_id)
+                all_subscriptions.extend(subscriptions)
         return all_subscriptions
 
+    def _find_using_tenant(self, t, resource, timeout):
+        """ Return the subscriptions of a tenant the user signed in through the 'common' tenant, or None when the
+        tenant cannot issue a token or does not list its subscriptions within `timeout` seconds. """
+        import adal
+        import time
+
+        tenant_id = t.tenant_id
+        start = time.time()
+        deadline = start + timeout if timeout > 0 else None
+        temp_context = self._create_auth_context(tenant_id)
+        try:
+            temp_credentials = temp_context.acquire_token(resource, self.user_id, _CLIENT_ID)
+        except adal.AdalError as ex:
+            # because user creds went through the 'common' tenant, the error here must be
+            # tenant specific, like the account was disabled. For such errors, we will continue
+            # with other tenants.
+            logger.warning("Failed to authenticate '%s' due to error '%s'", t, ex)
+            return None
+        token_time = time.time() - start
+
+        try:
+            subscriptions = self._list_subscriptions(tenant_id, temp_credentials[_ACCESS_TOKEN], deadline)
+        except Exception:  # pylint: disable=broad-except
+            if deadline is None or time.time() < deadline:
+                raise
+            subscriptions = None
+        if subscriptions is None:
+            logger.warning("Tenant '%s' did not list its subscriptions within %s seconds, they are skipped. Set "
+                           "'core.tenant_timeout' to wait longer.", tenant_id, timeout)
+            return None
+        logger.debug("Tenant '%s': token acquired in %.2f seconds, %d subscriptions listed in %.2f seconds",
+                     tenant_id, token_time, len(subscriptions), time.time() - start - token_time)
+        return subscriptions
+
     def _find_using_specific_tenant(self, tenant, access_token):
+        all_subscriptions = self._list_subscriptions(tenant, access_token)
+        self.tenants.append(tenant)
+        return all_subscriptions
+
+    def _list_subscriptions(self, tenant, access_token, deadline=None):
+        """ Return the subscriptions of a tenant, or None if they are not all listed by the deadline. """
+        import time
         from msrest.authentication import BasicTokenAuthentication
 
         token_credential = BasicTokenAuthentication({'access_token': access_token})
         client = self._arm_client_factory(token_credential)
+        if deadline is not None:
+            # no single request may outlast the deadline
+            client.config.connection.timeout = max(deadline - time.time(), 1)
         subscriptions = client.subscriptions.list()
         all_subscriptions = []
         for s in subscriptions:
+            if deadline is not None and time.time() > deadline:
+                return None
             setattr(s, 'tenant_id', tenant)
             all_subscriptions.append(s)
-        self.tenants.append(tenant)
         return all_subscriptions
 
 
 class CredsCache(object):
     '''Caches AAD tokena and service principal secrets, and persistence will
     also be handled
+
+    The token file is shared by concurrent `az` processes. Writes hold an advisory lock on `<file>.lock` and only
+    apply what this process changed on top of what the others saved, so refreshed tokens are not lost. A token which
+    needs a refresh is refreshed under the same lock after reloading the file, so that a token another process just
+    refreshed is used instead, and is saved at once.
     '''
 
     def __init__(self, cli_ctx, auth_ctx_factory=None, async_persist=True):
@@ -883,6 +973,11 @@ class CredsCache(object):
         self._should_flush_to_disk = False
         self._async_persist = async_persist
         self._ctx = cli_ctx
+        # the entries as last read from or written to the token file, serialized, by key
+        self._file_entries = {}
+        self._lock = threading.RLock()
+        self._holding_file_lock = False
+        self._refresh_timers = {}
         if async_persist:
             import atexit
             atexit.register(self.flush_to_disk)
@@ -895,30 +990,130 @@ class CredsCache(object):
 
     def flush_to_disk(self):
         if self._should_flush_to_disk:
-            with os.fdopen(os.open(self._token_file, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600),
-                           'w+') as cred_file:
-                items = self.adal_token_cache.read_items()
-                all_creds = [entry for _, entry in items]
+            with self._lock_token_file():
+                self._write_token_file()
+
+    @contextmanager
+    def _lock_token_file(self):
+        with self._lock:
+            if self._holding_file_lock:
+                yield
+                return
+            with lock_file(self._token_file + _TOKEN_FILE_LOCK_SUFFIX):
+                self._holding_file_lock = True
+                try:
+                    yield
+                finally:
+                    self._holding_file_lock = False
 
-                # trim away useless fields (needed for cred sharing with xplat)
-                for i in all_creds:
-                    for key in TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE:
-                        i.pop(key, None)
+    def _read_token_file(self):
+        try:
+            return _load_tokens_from_file(self._token_file)
+        except CLIError as ex:
+            logger.warning("Ignoring the content of %s: %s", self._token_file, ex)
+            return []
+
+    def _get_entries(self):
+        """ The entries to save, by key. """
+        entries = {}
+        for _, entry in self.adal_token_cache.read_items():
+            # trim away useless fields (needed for cred sharing with xplat)
+            entry = {k: v for k, v in entry.items() if k not in TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE}
+            entries[_get_token_entry_key(entry)] = entry
+        for cred in self._service_principal_creds:
+            entries[_get_token_entry_key(cred)] = cred
+        return entries
+
+    def _set_entries(self, all_entries):
+        import adal
+        self._service_principal_creds = [x for x in all_entries if x.get(_SERVICE_PRINCIPAL_ID)]
+        real_token = json.dumps([x for x in all_entries if not x.get(_SERVICE_PRINCIPAL_ID)])
+        if self._adal_token_cache_attr is None:
+            self._adal_token_cache_attr = adal.TokenCache(real_token)
+        else:
+            self._adal_token_cache_attr.deserialize(real_token)
+        self._adal_token_cache_attr.has_state_changed = False
+        self._file_entries = {_get_token_entry_key(x): json.dumps(x, sort_keys=True) for x in all_entries}
+
+    def _write_token_file(self):
+        """ Save the changes of this process on top of the file as other processes left it. The token file must be
+        locked. """
+        entries = {_get_token_entry_key(x): x for x in self._read_token_file()}
+        current = self._get_entries()
+        for key in set(self._file_entries) - set(current):
+            entries.pop(key, None)
+        for key, entry in current.items():
+            if json.dumps(entry, sort_keys=True) != self._file_entries.get(key):
+                entries[key] = _get_newer_token_entry(entry, entries.get(key))
+        all_creds = list(entries.values())
+
+        with atomic_write(self._token_file, file_mode=0o600) as cred_file:
+            cred_file.write(json.dumps(all_creds))
+        self._set_entries(all_creds)
+        self._should_flush_to_disk = False
 
-                all_creds.extend(self._service_principal_creds)
-                cred_file.write(json.dumps(all_creds))
+    def _reload_token_file(self):
+        """ Pick up the tokens other processes saved. The token file must be locked. """
+        if self._should_flush_to_disk or self.adal_token_cache.has_state_changed:
+            self._write_token_file()
+        else:
+            self._set_entries(self._read_token_file())
+
+    def _is_token_fresh(self, username, tenant, resource):
+        """ Whether adal can return the cached token of a user for a resource without refreshing it. """
+        authority_suffix = '/' + (tenant or _COMMON_TENANT).lower()
+        for entry in self.adal_token_cache.find({_TOKEN_ENTRY_USER_ID: username, '_clientId': _CLIENT_ID}):
+            if (entry.get('resource') == resource and
+                    (entry.get('_authority') or '').lower().rstrip('/').endswith(authority_suffix)):
+                seconds_to_expiry = _get_seconds_to_expiry(entry)
+                return seconds_to_expiry is not None and seconds_to_expiry > _TOKEN_REFRESH_WINDOW
+        return False
 
     def retrieve_token_for_user(self, username, tenant, resource):
         context = self._auth_ctx_factory(self._ctx, tenant, cache=self.adal_token_cache)
-        token_entry = context.acquire_token(resource, username, _CLIENT_ID)
+        if self._is_token_fresh(username, tenant, resource):
+            token_entry = context.acquire_token(resource, username, _CLIENT_ID)
+        else:
+            with self._lock_token_file():
+                self._reload_token_file()
+                token_entry = context.acquire_token(resource, username, _CLIENT_ID)
+                if self.adal_token_cache.has_state_changed:
+                    # share the refreshed token with the other processes right away
+                    self._write_token_file()
         if not token_entry:
             raise CLIError("Could not retrieve token from local cache.{}".format(
                 " Please run 'az login'." if not in_cloud_console() else ''))
 
         if self.adal_token_cache.has_state_changed:
             self.persist_cached_creds()
+        self._schedule_background_refresh(username, tenant, resource, token_entry)
         return (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN], token_entry)
 
+    def _schedule_background_refresh(self, username, tenant, resource, token_entry):
+        """ Refresh a token shortly before it expires, so that a long running command does not wait for it. """
+        seconds_to_expiry = _get_seconds_to_expiry(token_entry)
+        if seconds_to_expiry is None or not _BACKGROUND_REFRESH_LEAD_TIME < seconds_to_expiry < 24 * 3600:
+            return
+        key = (username, tenant, resource)
+        with self._lock:
+            if key in self._refresh_timers:
+                return
+            timer = threading.Timer(seconds_to_expiry - _BACKGROUND_REFRESH_LEAD_TIME, self._refresh_in_background,
+                                    key)
+            timer.daemon = True
+            self._refresh_timers[key] = timer
+        timer.start()
+
+    def _refresh_in_background(self, username, tenant, resource):
+        with self._lock:
+            self._refresh_timers.pop((username, tenant, resource), None)
+        try:
+            self.retrieve_token_for_user(username, tenant, resource)
+            logger.debug("Refreshed the token of '%s' for '%s' in the background", username, resource)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.debug("Failed to refresh the token of '%s' for '%s' in the background: %s", username, resource,
+                         ex)
+
     def retrieve_token_for_service_principal(self, sp_id, resource, tenant, use_cert_sn_issuer=False):
         self.load_adal_token_cache()
         matched = [x for x in self._service_principal_creds if sp_id == x[_SERVICE_PRINCIPAL_ID] and
@@ -947,11 +1142,9 @@ class CredsCache(object):
 
     def load_adal_token_cache(self):
         if self._adal_token_cache_attr is None:
-            import adal
-            all_entries = _load_tokens_from_file(self._token_file)
-            self._load_service_principal_creds(all_entries)
-            real_token = [x for x in all_entries if x not in self._service_principal_creds]
-            self._adal_token_cache_attr = adal.TokenCache(json.dumps(real_token))
+            with self._lock:
+                if self._adal_token_cache_attr is None:
+                    self._set_entries(_load_tokens_from_file(self._token_file))
         return self._adal_token_cache_attr
 
     def save_service_principal_cred(self, sp_entry):
@@ -974,12 +1167,6 @@ class CredsCache(object):
         if state_changed:
             self.persist_cached_creds()
 
-    def _load_service_principal_creds(self, creds):
-        for c in creds:
-            if c.get(_SERVICE_PRINCIPAL_ID):
-                self._service_principal_creds.append(c)
-        return self._service_principal_creds
-
     def remove_cached_creds(self, user_or_sp):
         state_changed = False
         # clear AAD tokens
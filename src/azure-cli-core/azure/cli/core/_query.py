@@ -0,0 +1,127 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import collections
+import threading
+
+import six
+
+from knack.events import EVENT_PARSER_GLOBAL_CREATE, EVENT_INVOKER_POST_PARSE_ARGS, EVENT_INVOKER_FILTER_RESULT
+from knack.query import CLIQuery
+
+# the most compiled expressions kept by compile_query
+MAX_COMPILED_QUERIES = 128
+
+_compiled_queries = collections.OrderedDict()
+_compiled_queries_lock = threading.Lock()
+
+
+def compile_query(raw_query):
+    """ Compile a JMESPath expression, reusing the expressions compiled by the most recent calls. """
+    with _compiled_queries_lock:
+        try:
+            query = _compiled_queries.pop(raw_query)
+        except KeyError:
+            query = None
+        if query is not None:
+            _compiled_queries[raw_query] = query
+            return query
+
+    from jmespath import compile as compile_jmespath
+    query = compile_jmespath(raw_query)
+    with _compiled_queries_lock:
+        _compiled_queries[raw_query] = query
+        while len(_compiled_queries) > MAX_COMPILED_QUERIES:
+            _compiled_queries.popitem(last=False)
+    return query
+
+
+def get_query(cli_ctx):
+    """ Return the compiled `--query` of the running command, if any. """
+    invocation = getattr(cli_ctx, 'invocation', None)
+    return invocation.data.get('query') if invocation else None
+
+
+def get_query_equality_filters(query):
+    """ Return `{path: value}` for the `path=='value'` conditions which every element of the result of a query like
+    `[?location=='westus' && tags.env=='prod'].name` satisfies. Paths are dot-separated field names.
+
+    Commands can use them to narrow what they retrieve, as long as the query is still applied to their result.
+    """
+    node = getattr(query, 'parsed', None)
+    if not node or node['type'] != 'filter_projection' or node['children'][0]['type'] != 'identity':
+        return {}
+    filters = {}
+    conditions = [node['children'][2]]
+    while conditions:
+        condition = conditions.pop()
+        if condition['type'] == 'and_expression':
+            conditions.extend(condition['children'])
+        elif condition['type'] == 'comparator' and condition['value'] == 'eq':
+            left, right = condition['children']
+            if left['type'] == 'literal':
+                left, right = right, left
+            path = _get_field_path(left)
+            if path and right['type'] == 'literal' and isinstance(right['value'], six.string_types):
+                filters[path] = right['value']
+    return filters
+
+
+def _get_field_path(node):
+    if node['type'] == 'field':
+        return node['value']
+    if node['type'] == 'subexpression':
+        paths = [_get_field_path(child) for child in node['children']]
+        if all(paths):
+            return '.'.join(paths)
+    return None
+
+
+class AzCliQuery(CLIQuery):
+    """ `--query` with cached compiled expressions.
+
+    The expression is kept in the invocation data as 'query', where the invoker may consume it when it applies the
+    query itself, page by page.
+    """
+
+    @staticmethod
+    def jmespath_type(raw_query):
+        try:
+            return compile_query(raw_query)
+        except KeyError:
+            # Raise a ValueError which argparse can handle
+            raise ValueError
+
+    @staticmethod
+    def on_global_arguments(_, **kwargs):
+        arg_group = kwargs.get('arg_group')
+        arg_group.add_argument('--query', dest='_jmespath_query', metavar='JMESPATH',
+                               help='JMESPath query string. See http://jmespath.org/ for more'
+                                    ' information and examples.',
+                               type=AzCliQuery.jmespath_type)
+
+    @staticmethod
+    def handle_query_parameter(cli_ctx, **kwargs):
+        args = kwargs['args']
+        query = args._jmespath_query  # pylint: disable=protected-access
+        del args._jmespath_query
+        if query:
+            cli_ctx.invocation.data['query'] = query
+            cli_ctx.invocation.data['query_active'] = True
+
+    @staticmethod
+    def filter_output(cli_ctx, **kwargs):
+        query = get_query(cli_ctx)
+        if query:
+            from jmespath import Options
+            kwargs['event_data']['result'] = query.search(kwargs['event_data']['result'],
+                                                          Options(collections.OrderedDict))
+
+    def __init__(self, cli_ctx=None):  # pylint: disable=super-init-not-called
+        # the base class would register its own handlers
+        self.cli_ctx = cli_ctx
+        self.cli_ctx.register_event(EVENT_PARSER_GLOBAL_CREATE, AzCliQuery.on_global_arguments)
+        self.cli_ctx.register_event(EVENT_INVOKER_POST_PARSE_ARGS, AzCliQuery.handle_query_parameter)
+        self.cli_ctx.register_event(EVENT_INVOKER_FILTER_RESULT, AzCliQuery.filter_output)
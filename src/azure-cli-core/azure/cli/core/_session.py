@@ -3,10 +3,13 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import atexit
 import json
 import logging
 import os
+import threading
 import time
+import weakref
 
 try:
     import collections.abc as collections
@@ -17,36 +20,79 @@ from codecs import open as codecs_open
 
 from knack.log import get_logger
 
+from azure.cli.core.util import atomic_write, lock_file
+
 try:
     t_JSONDecodeError = json.JSONDecodeError
 except AttributeError:  # in Python 2.7
     t_JSONDecodeError = ValueError
 
+LOCK_FILE_SUFFIX = '.lock'
+# attempts to write a file before giving up
+SAVE_RETRIES = 5
+
+# every Session, by id, for flush_sessions
+_sessions = weakref.WeakValueDictionary()
+
 
 class Session(collections.MutableMapping):
     """
     A simple dict-like class that is backed by a JSON file.
 
-    All direct modifications will save the file. Indirect modifications should
-    be followed by a call to `save_with_retry` or `save`.
+    The file is read the first time the data is accessed. Modifications are kept in memory and written by `flush`,
+    which runs after each command and when the process exits. Direct modifications only write the keys they change,
+    on top of what other processes saved in the meantime. Indirect modifications should be followed by a call to
+    `save`, after which the whole data is written.
+
+    Writers hold an advisory lock on `<file>.lock` and replace the file in one step, so readers never see a partial
+    file and need no lock. On Windows with Python 2 only, a reader may briefly find no file (see `replace_file`).
     """
 
-    def __init__(self, encoding=None):
+    def __init__(self, encoding=None, file_mode=0o666):
         super(Session, self).__init__()
         self.filename = None
-        self.data = {}
+        self.max_age = 0
+        self._data = {}
         self._encoding = encoding if encoding else 'utf-8-sig'
+        # permissions of a new file before the umask is applied, 0o600 for files holding secrets
+        self._file_mode = file_mode
+        self._changed_keys = set()
+        self._deleted_keys = set()
+        self._replace = False
+        self._retries = SAVE_RETRIES
+        self._lock = threading.RLock()
+        _sessions[id(self)] = self
 
     def load(self, filename, max_age=0):
-        self.filename = filename
-        self.data = {}
+        """ Use `filename` from now on. Pending modifications of the previous file are written first. The file is
+        only read when the data is accessed, and is discarded if it was not modified for `max_age` seconds. """
+        with self._lock:
+            self.flush()
+            self.filename = filename
+            self.max_age = max_age
+            self._data = None
+
+    @property
+    def data(self):
+        with self._lock:
+            if self._data is None:
+                self._data = self._read()
+            return self._data
+
+    @data.setter
+    def data(self, value):
+        with self._lock:
+            self._data = value
+
+    def _read(self):
         try:
-            if max_age > 0:
+            if self.max_age > 0:
                 st = os.stat(self.filename)
-                if st.st_mtime + max_age < time.clock():
-                    self.save()
+                if st.st_mtime + self.max_age < time.time():
+                    self._replace = True
+                    return {}
             with codecs_open(self.filename, 'r', encoding=self._encoding) as f:
-                self.data = json.load(f)
+                return json.load(f)
         except (OSError, IOError, t_JSONDecodeError) as load_exception:
             # OSError / IOError should imply file not found issues which are expected on fresh runs (e.g. on build
             # agents or new systems). A parse error indicates invalid/bad data in the file. We do not wish to warn
@@ -54,26 +100,67 @@ class Session(collections.MutableMapping):
             log_level = logging.INFO
             if isinstance(load_exception, t_JSONDecodeError):
                 log_level = logging.WARNING
+                self._replace = True
 
             get_logger(__name__).log(log_level,
                                      "Failed to load or parse file %s. It will be overridden by default settings.",
                                      self.filename)
-            self.save()
+            return {}
 
     def save(self):
-        if self.filename:
-            with codecs_open(self.filename, 'w', encoding=self._encoding) as f:
-                json.dump(self.data, f)
-
-    def save_with_retry(self, retries=5):
-        for _ in range(retries - 1):
-            try:
-                self.save()
-                break
-            except OSError:
-                time.sleep(0.1)
-        else:
+        """ Mark the whole data as modified. It is written by the next `flush`. """
+        with self._lock:
+            if self._data is None:
+                self._data = self._read()
+            self._replace = True
+
+    def save_with_retry(self, retries=SAVE_RETRIES):
+        """ Same as `save`, with the number of attempts the next `flush` makes to write the file. """
+        with self._lock:
             self.save()
+            self._retries = retries
+
+    def flush(self, retries=None):
+        """ Write the pending modifications to the file, if any, in up to `retries` attempts. By default, the number
+        given to `save_with_retry`. """
+        with self._lock:
+            if not self.filename or not (self._replace or self._changed_keys or self._deleted_keys):
+                return
+            retries = retries or self._retries
+            with lock_file(self.filename + LOCK_FILE_SUFFIX):
+                if self._replace:
+                    data = self._data
+                else:
+                    # apply the keys this process changed to the file as other processes may have saved it
+                    data = self._read_for_update()
+                    for key in self._deleted_keys:
+                        data.pop(key, None)
+                    for key in self._changed_keys:
+                        data[key] = self._data[key]
+                for _ in range(retries - 1):
+                    try:
+                        self._write(data)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+                else:
+                    self._write(data)
+            self._changed_keys.clear()
+            self._deleted_keys.clear()
+            self._replace = False
+            self._retries = SAVE_RETRIES
+
+    def _read_for_update(self):
+        try:
+            with codecs_open(self.filename, 'r', encoding=self._encoding) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, IOError, t_JSONDecodeError):
+            return {}
+
+    def _write(self, data):
+        with atomic_write(self.filename, encoding=self._encoding, file_mode=self._file_mode) as f:
+            json.dump(data, f)
 
     def get(self, key, default=None):
         return self.data.get(key, default)
@@ -82,12 +169,16 @@ class Session(collections.MutableMapping):
         return self.data.setdefault(key, {})
 
     def __setitem__(self, key, value):
-        self.data[key] = value
-        self.save_with_retry()
+        with self._lock:
+            self.data[key] = value
+            self._changed_keys.add(key)
+            self._deleted_keys.discard(key)
 
     def __delitem__(self, key):
-        del self.data[key]
-        self.save_with_retry()
+        with self._lock:
+            del self.data[key]
+            self._deleted_keys.add(key)
+            self._changed_keys.discard(key)
 
     def __iter__(self):
         return iter(self.data)
@@ -96,6 +187,22 @@ class Session(collections.MutableMapping):
         return len(self.data)
 
 
+def flush_sessions(*_, **__):
+    """ Write the pending modifications of every session. """
+    for session in list(_sessions.values()):
+        session.flush()
+
+
+def _flush_sessions_at_exit():
+    try:
+        flush_sessions()
+    except Exception as ex:  # pylint: disable=broad-except
+        get_logger(__name__).warning("Failed to save the CLI session files: %s", ex)
+
+
+atexit.register(_flush_sessions_at_exit)
+
+
 # ACCOUNT contains subscriptions information
 ACCOUNT = Session()
 
@@ -104,3 +211,6 @@ CONFIG = Session()
 
 # SESSION provides read-write session variables
 SESSION = Session()
+
+# INDEX maps top-level command names to the command modules and extensions which provide them
+INDEX = Session()
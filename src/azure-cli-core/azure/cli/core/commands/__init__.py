@@ -22,7 +22,8 @@ import six
 # pylint: disable=unused-import
 from azure.cli.core.commands.constants import (
     BLACKLISTED_MODS, DEFAULT_QUERY_TIME_RANGE, CLI_COMMON_KWARGS, CLI_COMMAND_KWARGS, CLI_PARAM_KWARGS,
-    CLI_POSITIONAL_PARAM_KWARGS, CONFIRM_PARAM_NAME)
+    CLI_POSITIONAL_PARAM_KWARGS, CONFIRM_PARAM_NAME, DEFAULT_MAX_CONCURRENCY, DEFAULT_PROGRESS_REPORT_INTERVAL)
+from azure.cli.core.commands.polling import PollingBackoff
 from azure.cli.core.commands.parameters import (
     AzArgumentContext, patch_arg_make_required, patch_arg_make_optional)
 from azure.cli.core.extension import get_extension
@@ -471,6 +472,7 @@ class AzCliCommandInvoker(CommandInvoker):
                                   EVENT_INVOKER_FILTER_RESULT)
         from azure.cli.core.commands.events import (
             EVENT_INVOKER_PRE_CMD_TBL_TRUNCATE, EVENT_INVOKER_PRE_LOAD_ARGUMENTS, EVENT_INVOKER_POST_LOAD_ARGUMENTS)
+        from azure.cli.core.commands.streaming import QueryPageCollector, is_elementwise_query
 
         # TODO: Can't simply be invoked as an event because args are transformed
         args = _pre_command_table_create(self.cli_ctx, args)
@@ -582,7 +584,9 @@ class AzCliCommandInvoker(CommandInvoker):
         for expanded_arg in _explode_list_args(parsed_args):
             cmd_copy = copy.copy(cmd)
             cmd_copy.cli_ctx = copy.copy(cmd.cli_ctx)
-            cmd_copy.cli_ctx.data = copy.deepcopy(cmd.cli_ctx.data)
+            # jobs only replace top-level entries, so a shallow copy (plus the headers) keeps them isolated
+            cmd_copy.cli_ctx.data = dict(cmd.cli_ctx.data)
+            cmd_copy.cli_ctx.data['headers'] = dict(cmd.cli_ctx.data['headers'])
             expanded_arg.cmd = expanded_arg._cmd = cmd_copy
 
             if hasattr(expanded_arg, '_subscription'):
@@ -592,10 +596,35 @@ class AzCliCommandInvoker(CommandInvoker):
             jobs.append((expanded_arg, cmd_copy))
 
         ids = getattr(parsed_args, '_ids', None) or [None] * len(jobs)
-        if self.cli_ctx.config.getboolean('core', 'disable_concurrent_ids', False) or len(ids) < 2:
-            results, exceptions = self._run_jobs_serially(jobs, ids)
+        table_transformer = self.commands_loader.command_table[parsed_args.command].table_transformer
+
+        # commands like the generic wait handle all the jobs at once
+        batch_handler = cmd.command_kwargs.get('batch_handler')
+        if batch_handler and len(jobs) > 1:
+            result = batch_handler([self._filter_params(expanded_arg) for expanded_arg, _ in jobs], ids)
+            return CommandResultItem(result, table_transformer=table_transformer,
+                                     is_query_active=self.data['query_active'])
+        on_result = None
+        if getattr(parsed_args, '_stream_results', False):
+            def on_result(result):
+                self._output_result(result, table_transformer)
+
+        # paged results of a single command are written page by page, or at least reduced by --query page by page
+        stream_writer = page_collector = None
+        query = self.data.get('query')
+        if len(jobs) == 1 and not on_result:
+            stream_writer = self._get_stream_writer(query, table_transformer)
+            if not stream_writer and query and is_elementwise_query(query):
+                page_collector = QueryPageCollector(query)
+        page_writer = stream_writer or page_collector
+
+        max_concurrency = self._get_max_concurrency(parsed_args)
+        if page_writer:
+            results, exceptions = self._run_jobs_serially(jobs, ids, on_page=page_writer.write)
+        elif max_concurrency < 2 or len(ids) < 2:
+            results, exceptions = self._run_jobs_serially(jobs, ids, on_result)
         else:
-            results, exceptions = self._run_jobs_concurrently(jobs, ids)
+            results, exceptions = self._run_jobs_concurrently(jobs, ids, max_concurrency, on_result)
 
         # handle exceptions
         if len(exceptions) == 1 and not results:
@@ -608,6 +637,13 @@ class AzCliCommandInvoker(CommandInvoker):
                 return CommandResultItem(None, exit_code=1, error=CLIError('Encountered more than one exception.'))
             logger.warning('Encountered more than one exception.')
 
+        if on_result or (stream_writer and stream_writer.streamed):
+            # results have already been written as they completed
+            return CommandResultItem(None, exit_code=0)
+        if page_collector and page_collector.streamed:
+            self.data['query'] = None
+            results = [page_collector.result]
+
         if results and len(results) == 1:
             results = results[0]
 
@@ -616,18 +652,53 @@ class AzCliCommandInvoker(CommandInvoker):
 
         return CommandResultItem(
             event_data['result'],
-            table_transformer=self.commands_loader.command_table[parsed_args.command].table_transformer,
+            table_transformer=table_transformer,
             is_query_active=self.data['query_active'])
 
+    def _get_max_concurrency(self, parsed_args):
+        if self.cli_ctx.config.getboolean('core', 'disable_concurrent_ids', False):
+            return 1
+        max_concurrency = getattr(parsed_args, '_max_concurrency', None) or \
+            self.cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
+        if max_concurrency < 1:
+            raise CLIError('--max-concurrency must be a positive integer.')
+        return max_concurrency
+
+    def _get_stream_writer(self, query, table_transformer):
+        from azure.cli.core.commands.streaming import StreamWriter, is_streaming_format, is_elementwise_query
+        output_format = self.data['output']
+        if not is_streaming_format(self.cli_ctx, output_format):
+            return None
+        if query and not is_elementwise_query(query):
+            logger.debug("The query can't be applied page by page, the whole result is retrieved before output")
+            return None
+        return StreamWriter(self.cli_ctx, output_format, table_transformer=table_transformer, query=query,
+                            is_query_active=self.data['query_active'])
+
+    def _output_result(self, result, table_transformer):
+        from knack.events import EVENT_INVOKER_FILTER_RESULT
+        event_data = {'result': result}
+        self.cli_ctx.raise_event(EVENT_INVOKER_FILTER_RESULT, event_data=event_data)
+        if event_data['result'] is None:
+            return
+        output = self.cli_ctx.output
+        output.out(CommandResultItem(event_data['result'], table_transformer=table_transformer,
+                                     is_query_active=self.data['query_active']),
+                   formatter=output.get_formatter(self.data['output']), out_file=sys.stdout)
+
     @staticmethod
     def _extract_parameter_names(args):
         # note: name start with more than 2 '-' will be treated as value e.g. certs in PEM format
         return [(p.split('=', 1)[0] if p.startswith('--') else p[:2]) for p in args if
                 (p.startswith('-') and not p.startswith('---') and len(p) > 1)]
 
-    def _run_job(self, expanded_arg, cmd_copy):
+    def _run_job(self, expanded_arg, cmd_copy, on_page=None):
+        from azure.cli.core.commands.throttling import RATE_LIMIT_TRACKER
         params = self._filter_params(expanded_arg)
         try:
+            # throttled requests are retried one by one by the SDK clients, as a handler may have made other
+            # requests before, so only the start of new work waits here
+            RATE_LIMIT_TRACKER.wait()
             result = cmd_copy(params)
             if cmd_copy.supports_no_wait and getattr(expanded_arg, 'no_wait', False):
                 result = None
@@ -640,6 +711,14 @@ class AzCliCommandInvoker(CommandInvoker):
 
             if _is_poller(result):
                 result = LongRunningOperation(cmd_copy.cli_ctx, 'Starting {}'.format(cmd_copy.name))(result)
+            elif _is_paged(result) and on_page:
+                from azure.cli.core.commands.streaming import iter_pages
+                for page in iter_pages(result):
+                    page = todict(page, AzCliCommandInvoker.remove_additional_prop_layer)
+                    event_data = {'result': page}
+                    cmd_copy.cli_ctx.raise_event(EVENT_INVOKER_TRANSFORM_RESULT, event_data=event_data)
+                    on_page(event_data['result'])
+                return None
             elif _is_paged(result):
                 result = list(result)
 
@@ -653,27 +732,42 @@ class AzCliCommandInvoker(CommandInvoker):
                 return CommandResultItem(None, exit_code=1, error=ex)
             six.reraise(*sys.exc_info())
 
-    def _run_jobs_serially(self, jobs, ids):
+    def _run_jobs_serially(self, jobs, ids, on_result=None, on_page=None):
         results, exceptions = [], []
         for job, id_arg in zip(jobs, ids):
             expanded_arg, cmd_copy = job
             try:
-                results.append(self._run_job(expanded_arg, cmd_copy))
+                result = self._run_job(expanded_arg, cmd_copy, on_page)
             except(Exception, SystemExit) as ex:  # pylint: disable=broad-except
                 exceptions.append((ex, id_arg))
+                continue
+            results.append(result)
+            if on_result:
+                on_result(result)
         return results, exceptions
 
-    def _run_jobs_concurrently(self, jobs, ids):
+    def _run_jobs_concurrently(self, jobs, ids, max_concurrency, on_result=None):
+        """ Run the jobs on a pool of `max_concurrency` threads.
+
+        Results are returned in the order of `jobs` and each exception is paired with the id of the job which
+        raised it. `on_result` is called on this thread for each result as soon as it completes.
+        """
         from concurrent.futures import ThreadPoolExecutor, as_completed
-        tasks, results, exceptions = [], [], []
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            for expanded_arg, cmd_copy in jobs:
-                tasks.append(executor.submit(self._run_job, expanded_arg, cmd_copy))
-            for index, task in enumerate(as_completed(tasks)):
+        outcomes = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(jobs))) as executor:
+            tasks = {executor.submit(self._run_job, expanded_arg, cmd_copy): index
+                     for index, (expanded_arg, cmd_copy) in enumerate(jobs)}
+            for task in as_completed(tasks):
+                index = tasks[task]
                 try:
-                    results.append(task.result())
+                    outcomes[index] = (True, task.result())
                 except (Exception, SystemExit) as ex:  # pylint: disable=broad-except
-                    exceptions.append((ex, ids[index]))
+                    outcomes[index] = (False, ex)
+                    continue
+                if on_result:
+                    on_result(outcomes[index][1])
+        results = [value for succeeded, value in outcomes if succeeded]
+        exceptions = [(value, id_arg) for (succeeded, value), id_arg in zip(outcomes, ids) if not succeeded]
         return results, exceptions
 
     def resolve_warnings(self, cmd, parsed_args):
@@ -792,8 +886,24 @@ class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
         self.deploy_dict = {}
         self.last_progress_report = datetime.datetime.now()
 
-    def _delay(self):
-        time.sleep(self.poller_done_interval_ms / 1000.0)
+    def _delay(self, poller=None):
+        # the poller polls the service on its own thread, following its Retry-After hints; only wait for it here,
+        # so that the command returns as soon as the operation is done
+        if poller is None or not hasattr(poller, 'wait'):
+            time.sleep(self.poller_done_interval_ms / 1000.0)
+            return
+        try:
+            poller.wait(self.poller_done_interval_ms / 1000.0)
+        except Exception:  # pylint: disable=broad-except
+            # the error of the operation is raised again by poller.result()
+            pass
+
+    @staticmethod
+    def _get_correlation_id(response):
+        try:
+            return json.loads(response.__dict__['_content'].decode())['properties']['correlationId']
+        except:  # pylint: disable=bare-except
+            return None
 
     def _generate_template_progress(self, correlation_id):  # pylint: disable=no-self-use
         """ gets the progress for template deployments """
@@ -871,27 +981,31 @@ class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
 
         cli_logger = get_logger()  # get CLI logger which has the level set through command lines
         is_verbose = any(handler.level <= logs.INFO for handler in cli_logger.handlers)
+        # the activity log is queried less and less often while the operation runs
+        progress_backoff = PollingBackoff(DEFAULT_PROGRESS_REPORT_INTERVAL)
+        progress_delay = progress_backoff.next_delay()
+        parsed_response = None
 
         while not poller.done():
             self.cli_ctx.get_progress_controller().add(message='Running')
-            try:
-                # pylint: disable=protected-access
-                correlation_id = json.loads(
-                    poller._response.__dict__['_content'].decode())['properties']['correlationId']
-
-                correlation_message = 'Correlation ID: {}'.format(correlation_id)
-            except:  # pylint: disable=bare-except
-                pass
+            response = getattr(poller, '_response', None)
+            if correlation_id is None and response is not parsed_response:
+                # parse each response of the poller once
+                parsed_response = response
+                correlation_id = self._get_correlation_id(response)
+                if correlation_id is not None:
+                    correlation_message = 'Correlation ID: {}'.format(correlation_id)
 
             current_time = datetime.datetime.now()
-            if is_verbose and current_time - self.last_progress_report >= datetime.timedelta(seconds=10):
+            if is_verbose and current_time - self.last_progress_report >= datetime.timedelta(seconds=progress_delay):
                 self.last_progress_report = current_time
+                progress_delay = progress_backoff.next_delay()
                 try:
                     self._generate_template_progress(correlation_id)
                 except Exception as ex:  # pylint: disable=broad-except
                     logger.warning('%s during progress reporting: %s', getattr(type(ex), '__name__', type(ex)), ex)
             try:
-                self._delay()
+                self._delay(poller)
             except KeyboardInterrupt:
                 self.cli_ctx.get_progress_controller().stop()
                 logger.error('Long-running operation wait cancelled.  %s', correlation_message)
@@ -15,7 +15,9 @@ from six import string_types
 from azure.cli.core import AzCommandsLoader, EXCLUDED_PARAMS
 from azure.cli.core.commands import LongRunningOperation, _is_poller, cached_get, cached_put
 from azure.cli.core.commands.client_factory import get_mgmt_service_client
+from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
 from azure.cli.core.commands.events import EVENT_INVOKER_PRE_LOAD_ARGUMENTS
+from azure.cli.core.commands.polling import MAX_POLLING_INTERVAL, PollingBackoff, PollingScheduler
 from azure.cli.core.commands.validators import IterateValue
 from azure.cli.core.util import (
     shell_safe_json_parse, augment_no_wait_handler_args, get_command_type_kwarg, find_child_item)
@@ -28,6 +30,9 @@ from knack.util import todict, CLIError
 
 logger = get_logger(__name__)
 EXCLUDED_NON_CLIENT_PARAMS = list(set(EXCLUDED_PARAMS) - set(['self', 'client']))
+# the arguments of the generic wait commands
+_WAIT_CONDITIONS = ['created', 'updated', 'deleted', 'exists', 'custom']
+_WAIT_OPTIONS = ['timeout', 'interval'] + _WAIT_CONDITIONS
 
 
 # pylint:disable=too-many-lines
@@ -227,6 +232,12 @@ def register_ids_argument(cli_ctx):
                 'arg_group': group_name
             }
             command.add_argument('ids', '--ids', **id_kwargs)
+            command.add_argument('_max_concurrency', '--max-concurrency', type=int, arg_group=group_name,
+                                 help='Maximum number of resources processed at the same time when several '
+                                      'IDs are given. Default: `core.max_concurrency` or 10.')
+            command.add_argument('_stream_results', '--stream-results', action='store_true', arg_group=group_name,
+                                 help='Output the result for each ID as soon as it is available instead of '
+                                      'once all IDs have been processed.')
 
     def parse_ids_arguments(_, command, args):
         namespace = args
@@ -591,7 +602,8 @@ def _cli_wait_command(context, name, getter_op, custom_command=False, **kwargs):
         )
         cmd_args['interval'] = CLICommandArgument(
             'interval', options_list=['--interval'], default=30, arg_group=group_name, type=int,
-            help='polling interval in seconds'
+            help='polling interval in seconds. Later polls back off up to {} seconds, or to this interval if it is '
+                 'longer, unless the service asks for another delay'.format(MAX_POLLING_INTERVAL)
         )
         cmd_args['deleted'] = CLICommandArgument(
             'deleted', options_list=['--deleted'], action='store_true', arg_group=group_name,
@@ -615,6 +627,10 @@ def _cli_wait_command(context, name, getter_op, custom_command=False, **kwargs):
                  "provisioningState!='InProgress', "
                  "instanceView.statuses[?code=='PowerState/running']"
         )
+        cmd_args['min_count'] = CLICommandArgument(
+            'min_count', options_list=['--min-count'], arg_group=group_name, type=int,
+            help='with several --ids, return as soon as this many resources meet the condition. Default: all of them'
+        )
         return [(k, v) for k, v in cmd_args.items()]
 
     def get_provisioning_state(instance):
@@ -626,10 +642,10 @@ def _cli_wait_command(context, name, getter_op, custom_command=False, **kwargs):
                 provisioning_state = getattr(properties, 'provisioning_state', None)
         return provisioning_state
 
-    def handler(args):
+    def prepare(args):
+        """ Return the getter of a wait target, whether it may return the raw response and the wait options, which
+        are taken out of `args`. """
         from azure.cli.core.commands.client_factory import resolve_client_arg_name
-        from msrest.exceptions import ClientException
-        import time
 
         context_copy = copy.copy(context)
         getter_args = dict(extract_args_from_signature(context.get_op_handler(
@@ -647,55 +663,168 @@ def _cli_wait_command(context, name, getter_op, custom_command=False, **kwargs):
 
         getter = context_copy.get_op_handler(getter_op, operation_group=kwargs.get('operation_group'))
 
-        timeout = args.pop('timeout')
-        interval = args.pop('interval')
-        wait_for_created = args.pop('created')
-        wait_for_deleted = args.pop('deleted')
-        wait_for_updated = args.pop('updated')
-        wait_for_exists = args.pop('exists')
-        custom_condition = args.pop('custom')
-        if not any([wait_for_created, wait_for_updated, wait_for_deleted,
-                    wait_for_exists, custom_condition]):
+        options = {option: args.pop(option) for option in _WAIT_OPTIONS}
+        if not any(options[condition] for condition in _WAIT_CONDITIONS):
             raise CLIError(
                 "incorrect usage: --created | --updated | --deleted | --exists | --custom JMESPATH")
 
-        progress_indicator = context_copy.cli_ctx.get_progress_controller()
-        progress_indicator.begin()
-        for _ in range(0, timeout, interval):
+        # the raw response of SDK operations carries the Retry-After hints of the service
+        use_raw = 'raw' in getter_args and 'raw' not in args
+        return getter, use_raw, options
+
+    def is_provisioned(provisioning_state, options, resource_id=None):
+        """ Whether a provisioning state meets --created or --updated. """
+        # until we have any needs to wait for 'Failed', let us bail out on this
+        if provisioning_state == 'Failed':
+            raise CLIError("The operation on '{}' failed".format(resource_id) if resource_id else
+                           'The operation failed')
+        return bool((options['created'] or options['updated']) and provisioning_state == 'Succeeded')
+
+    def is_satisfied(instance, options, resource_id=None):
+        """ Whether an existing resource meets the wait condition. """
+        if options['exists']:
+            return True
+        return is_provisioned(get_provisioning_state(instance), options, resource_id) or \
+            bool(options['custom'] and verify_property(instance, options['custom']))
+
+    def get_poll(getter, args, use_raw, options, resource_id=None):
+        """ Return the poll of one target, which gets it with `getter`. """
+        from azure.cli.core.commands.throttling import run_with_backoff
+        from msrest.exceptions import ClientException
+        from msrest.pipeline import ClientRawResponse
+
+        def poll():
             try:
-                progress_indicator.add(message='Waiting')
-                instance = getter(**args)
-                if wait_for_exists:
-                    progress_indicator.end()
-                    return None
-                provisioning_state = get_provisioning_state(instance)
-                # until we have any needs to wait for 'Failed', let us bail out on this
-                if provisioning_state == 'Failed':
-                    progress_indicator.stop()
-                    raise CLIError('The operation failed')
-                if ((wait_for_created or wait_for_updated) and provisioning_state == 'Succeeded') or \
-                        custom_condition and bool(verify_property(instance, custom_condition)):
-                    progress_indicator.end()
-                    return None
+                instance = run_with_backoff(lambda: getter(raw=True, **args) if use_raw else getter(**args))
             except ClientException as ex:
-                progress_indicator.stop()
                 if getattr(ex, 'status_code', None) == 404:
-                    if wait_for_deleted:
-                        return None
-                    if not any([wait_for_created, wait_for_exists, custom_condition]):
+                    if options['deleted']:
+                        return True, None
+                    if not any([options['created'], options['exists'], options['custom']]):
                         raise
-                else:
-                    raise
-            except Exception:  # pylint: disable=broad-except
-                progress_indicator.stop()
+                    return False, getattr(ex, 'response', None)
                 raise
+            response = None
+            if isinstance(instance, ClientRawResponse):
+                instance, response = instance.output, instance.response
+            return is_satisfied(instance, options, resource_id), response
 
-            time.sleep(interval)
+        return poll
 
+    def wait(cli_ctx, scheduler, timeout, until=None):
+        progress_indicator = cli_ctx.get_progress_controller()
+        progress_indicator.begin()
+        try:
+            done = scheduler.run(timeout, until=until, on_tick=lambda: progress_indicator.add(message='Waiting'))
+        except Exception:  # pylint: disable=broad-except
+            progress_indicator.stop()
+            raise
         progress_indicator.end()
-        return CLIError('Wait operation timed-out after {} seconds'.format(timeout))
+        return done
 
-    context._cli_command(name, handler=handler, argument_loader=generic_wait_arguments_loader, **kwargs)  # pylint: disable=protected-access
+    def handler(args):
+        cli_ctx = args['cmd'].cli_ctx
+        getter, use_raw, options = prepare(args)
+        args.pop('min_count', None)
+
+        scheduler = PollingScheduler()
+        scheduler.add(None, get_poll(getter, args, use_raw, options), PollingBackoff(options['interval']))
+        if wait(cli_ctx, scheduler, options['timeout']):
+            return None
+        return CLIError('Wait operation timed-out after {} seconds'.format(options['timeout']))
+
+    def get_group_poll(client, resource_group, resource_type, members, options, satisfied):
+        """ Return the poll of resources of one type in one resource group, which lists them all at once.
+        `members` are `(index, resource id, poll)` and the indexes of those which meet the condition are added to
+        `satisfied`. """
+        from azure.cli.core.commands.throttling import run_with_backoff
+        from msrest.exceptions import ClientException
+
+        def list_resources():
+            return list(client.list_by_resource_group(
+                resource_group, filter="resourceType eq '{}'".format(resource_type), expand='provisioningState'))
+
+        def poll():
+            try:
+                resources = {r.id.lower(): r for r in run_with_backoff(list_resources)}
+            except ClientException as ex:
+                if getattr(ex, 'status_code', None) != 404:
+                    raise
+                resources = {}
+            for index, resource_id, member_poll in members:
+                if index in satisfied:
+                    continue
+                resource = resources.get(resource_id.lower())
+                if resource is None:
+                    # --updated fails on a resource which does not exist, as getting it reports
+                    done = options['deleted'] or not (options['created'] or options['exists']) and member_poll()[0]
+                elif options['deleted']:
+                    done = False
+                elif options['exists']:
+                    done = True
+                else:
+                    provisioning_state = _get_listed_provisioning_state(resource)
+                    # get the resources whose state the list does not tell
+                    done = is_provisioned(provisioning_state, options, resource_id) if provisioning_state else \
+                        member_poll()[0]
+                if done:
+                    satisfied.add(index)
+            return all(index in satisfied for index, _, _ in members), None
+
+        return poll
+
+    def get_member_poll(index, poll, satisfied):
+        def member_poll():
+            done, response = poll()
+            if done:
+                satisfied.add(index)
+            return done, response
+        return member_poll
+
+    def batch_handler(args_list, ids):
+        """ Wait for the resources of several --ids at once.
+
+        Top-level resources are grouped by subscription, resource group and type, and the provisioning state of each
+        group is checked with a single list call per poll. Resources which the list cannot tell about, such as child
+        resources or those waited for with --custom, which needs the full resource, are polled one by one. """
+        from msrestazure.tools import is_valid_resource_id, parse_resource_id
+
+        cli_ctx = args_list[0]['cmd'].cli_ctx
+        min_count = args_list[0].get('min_count') or len(args_list)
+        if min_count < 1:
+            raise CLIError('--min-count must be a positive integer.')
+        targets = []
+        for args, resource_id in zip(args_list, ids):
+            args.pop('min_count', None)
+            getter, use_raw, options = prepare(args)
+            targets.append((resource_id, get_poll(getter, args, use_raw, options, resource_id)))
+
+        satisfied = set()
+        scheduler = PollingScheduler(max_concurrency=cli_ctx.config.getint(
+            'core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY))
+        groups = OrderedDict()
+        for index, (resource_id, poll) in enumerate(targets):
+            parts = parse_resource_id(resource_id) if resource_id and is_valid_resource_id(resource_id) else {}
+            if options['custom'] or not parts.get('type') or 'child_name_1' in parts:
+                scheduler.add(index, get_member_poll(index, poll, satisfied), PollingBackoff(options['interval']))
+                continue
+            group = (parts['subscription'].lower(), parts['resource_group'].lower(),
+                     '{}/{}'.format(parts['namespace'], parts['type']).lower())
+            groups.setdefault(group, []).append((index, resource_id, poll))
+        for group, members in groups.items():
+            subscription, resource_group, resource_type = group
+            client = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES,
+                                             subscription_id=subscription).resources
+            scheduler.add(group, get_group_poll(client, resource_group, resource_type, members, options, satisfied),
+                          PollingBackoff(options['interval']))
+
+        wait(cli_ctx, scheduler, options['timeout'], until=lambda: len(satisfied) >= min_count)
+        if len(satisfied) >= min_count:
+            return None
+        return CLIError('Wait operation timed-out after {} seconds'.format(options['timeout']))
+
+    context._cli_command(name, handler=handler, batch_handler=batch_handler,  # pylint: disable=protected-access
+                         argument_loader=generic_wait_arguments_loader, **kwargs)
 
 
 def _cli_show_command(context, name, getter_op, custom_command=False, **kwargs):
@@ -750,6 +879,13 @@ def show_exception_handler(ex):
     raise ex
 
 
+def _get_listed_provisioning_state(resource):
+    """ The provisioning state of a resource listed with `$expand=provisioningState`. The models of API versions
+    which do not declare it keep it among their additional properties. """
+    return getattr(resource, 'provisioning_state', None) or \
+        (getattr(resource, 'additional_properties', None) or {}).get('provisioningState')
+
+
 def verify_property(instance, condition):
     from jmespath import compile as compile_jmespath
     result = todict(instance)
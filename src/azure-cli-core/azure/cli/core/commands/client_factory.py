@@ -4,9 +4,11 @@
 # --------------------------------------------------------------------------------------------
 
 import os
+import threading
 
 from azure.cli.core import __version__ as core_version
 import azure.cli.core._debug as _debug
+from azure.cli.core.commands.throttling import RATE_LIMIT_TRACKER, THROTTLED_STATUS_CODE
 from azure.cli.core.extension import EXTENSIONS_MOD_PREFIX
 from azure.cli.core.profiles._shared import get_client_class, SDKProfile
 from azure.cli.core.profiles import ResourceType, CustomResourceType, get_api_version, get_sdk
@@ -18,6 +20,9 @@ logger = get_logger(__name__)
 UA_AGENT = "AZURECLI/{}".format(core_version)
 ENV_ADDITIONAL_USER_AGENT = 'AZURE_HTTP_USER_AGENT'
 
+_CLIENT_CACHE = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
 
 def resolve_client_arg_name(operation, kwargs):
     if not isinstance(operation, str):
@@ -108,6 +113,44 @@ def configure_common_settings(cli_ctx, client):
                                   ' '.join(cli_ctx.data['safe_params']))
     client.config.generate_client_request_id = 'x-ms-client-request-id' not in cli_ctx.data['headers']
 
+    _use_shared_connection_pool(cli_ctx, client)
+
+    hooks = getattr(client.config, 'hooks', None)
+    if hooks is not None and RATE_LIMIT_TRACKER.response_hook not in hooks:
+        hooks.append(RATE_LIMIT_TRACKER.response_hook)
+    _retry_throttled_requests(client)
+
+
+def _retry_throttled_requests(client):
+    # a throttled request was rejected before it was processed, so it is retried whatever its method, after the
+    # Retry-After delay of the response
+    retry_policy = getattr(client.config, 'retry_policy', None)
+    policy = getattr(retry_policy, 'policy', None)
+    if policy is None:
+        return
+    status_forcelist = set(policy.status_forcelist or [])
+    if THROTTLED_STATUS_CODE not in status_forcelist:
+        policy.status_forcelist = status_forcelist | {THROTTLED_STATUS_CODE}
+    policy.respect_retry_after_header = True
+
+
+def _use_shared_connection_pool(cli_ctx, client):
+    from azure.cli.core.util import use_shared_connection_pool
+    from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+    config = client.config
+    if not hasattr(config, 'session_configuration_callback'):
+        return
+    # without keep-alive msrest closes its session, and every connection, after each response
+    config.keep_alive = True
+    maxsize = cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
+    session_configuration_callback = config.session_configuration_callback
+
+    def _configure_session(session, global_config, local_config, **kwargs):
+        use_shared_connection_pool(session, maxsize)
+        return session_configuration_callback(session, global_config, local_config, **kwargs)
+
+    config.session_configuration_callback = _configure_session
+
 
 def _get_mgmt_service_client(cli_ctx,
                              client_type,
@@ -122,6 +165,14 @@ def _get_mgmt_service_client(cli_ctx,
     from azure.cli.core._profile import Profile
     logger.debug('Getting management service client client_type=%s', client_type.__name__)
     resource = resource or cli_ctx.cloud.endpoints.active_directory_resource_id
+    cache_key = _get_client_cache_key(cli_ctx, client_type, subscription_bound, subscription_id, api_version,
+                                      base_url_bound, resource, sdk_profile, aux_subscriptions, kwargs)
+    if cache_key is not None:
+        with _CLIENT_CACHE_LOCK:
+            cached = _CLIENT_CACHE.get(cache_key)
+        if cached is not None:
+            logger.debug('Reusing management service client client_type=%s', client_type.__name__)
+            return cached
     profile = Profile(cli_ctx=cli_ctx)
     cred, subscription_id, _ = profile.get_login_credentials(subscription_id=subscription_id, resource=resource,
                                                              aux_subscriptions=aux_subscriptions)
@@ -143,9 +194,33 @@ def _get_mgmt_service_client(cli_ctx,
 
     configure_common_settings(cli_ctx, client)
 
+    if cache_key is not None:
+        with _CLIENT_CACHE_LOCK:
+            _CLIENT_CACHE[cache_key] = (client, subscription_id)
     return client, subscription_id
 
 
+def _get_client_cache_key(cli_ctx, client_type, subscription_bound, subscription_id, api_version, base_url_bound,
+                          resource, sdk_profile, aux_subscriptions, kwargs):
+    # Clients are cached per thread, as SDK clients and their sessions are not thread safe, and commands
+    # sometimes change a client (e.g. its config.subscription_id) after getting it.
+    key = (threading.current_thread().ident, client_type, subscription_bound, subscription_id, api_version,
+           cli_ctx.cloud.endpoints.resource_manager if base_url_bound else None, resource,
+           str(sdk_profile) if sdk_profile else None, tuple(aux_subscriptions or []),
+           tuple(sorted(kwargs.items())), cli_ctx.data['command'],
+           tuple(sorted(cli_ctx.data['headers'].items())), tuple(cli_ctx.data.get('safe_params') or []))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def reset_client_cache(*_, **__):
+    with _CLIENT_CACHE_LOCK:
+        _CLIENT_CACHE.clear()
+
+
 def get_data_service_client(cli_ctx, service_type, account_name, account_key, connection_string=None,
                             sas_token=None, socket_timeout=None, token_credential=None, endpoint_suffix=None):
     logger.debug('Getting data service client service_type=%s', service_type.__name__)
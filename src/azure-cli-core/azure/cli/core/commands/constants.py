@@ -12,7 +12,7 @@ CLI_COMMON_KWARGS = ['min_api', 'max_api', 'resource_type', 'operation_group',
 CLI_COMMAND_KWARGS = ['transform', 'table_transformer', 'confirmation', 'exception_handler',
                       'client_factory', 'operations_tmpl', 'no_wait_param', 'supports_no_wait', 'validator',
                       'client_arg_name', 'doc_string_source', 'deprecate_info',
-                      'supports_local_cache', 'model_path'] + CLI_COMMON_KWARGS
+                      'supports_local_cache', 'model_path', 'batch_handler'] + CLI_COMMON_KWARGS
 CLI_PARAM_KWARGS = \
     ['id_part', 'completer', 'validator', 'options_list', 'configured_default', 'arg_group', 'arg_type',
      'deprecate_info'] \
@@ -27,5 +27,10 @@ CONFIRM_PARAM_NAME = 'yes'
 
 # 1 hour in milliseconds
 DEFAULT_QUERY_TIME_RANGE = 3600000
+# seconds between the first activity log queries of `--verbose` long-running operations, which then back off
+DEFAULT_PROGRESS_REPORT_INTERVAL = 10
 
 BLACKLISTED_MODS = ['context', 'shell', 'documentdb', 'component']
+
+# number of resources processed at once by commands given several --ids
+DEFAULT_MAX_CONCURRENCY = 10
@@ -0,0 +1,102 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Polling shared by long-running operations and the generic `wait` commands. The delay between two polls of a target
+grows exponentially, with jitter, up to a cap, unless the service asks for a delay with `Retry-After`. A scheduler
+polls any number of targets from one process.
+"""
+
+import heapq
+import itertools
+import random
+import time
+
+from azure.cli.core.commands.throttling import get_retry_after
+
+DEFAULT_BACKOFF_FACTOR = 1.5
+# the share of a delay which is randomly taken off, so that targets polled together drift apart
+DEFAULT_JITTER = 0.2
+# seconds, unless the first delay is longer
+MAX_POLLING_INTERVAL = 60
+
+
+class PollingBackoff(object):
+    """ The delays between the polls of one target, starting at `interval` seconds. """
+
+    def __init__(self, interval, max_interval=MAX_POLLING_INTERVAL, factor=DEFAULT_BACKOFF_FACTOR,
+                 jitter=DEFAULT_JITTER):
+        self.max_interval = max(interval, max_interval)
+        self.factor = factor
+        self.jitter = jitter
+        self._next_interval = interval
+
+    def next_delay(self, response=None):
+        """ Return the seconds to wait before the next poll. `response` is the last response of the target, whose
+        Retry-After header takes precedence. """
+        retry_after = get_retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        delay = self._next_interval
+        self._next_interval = min(self._next_interval * self.factor, self.max_interval)
+        return delay * random.uniform(1 - self.jitter, 1)
+
+
+class PollingScheduler(object):
+    """ Polls targets until they are done, each on its own backoff.
+
+    `poll()` returns `(done, response)`, where `response` may carry a Retry-After hint, and raises to stop polling.
+    The targets which are due together are polled on up to `max_concurrency` threads.
+
+    Time is counted as the sum of the delays slept, as the `wait` commands always did, so that the time spent in
+    requests does not shorten the timeout.
+    """
+
+    def __init__(self, max_concurrency=1, sleep=None):
+        self.max_concurrency = max_concurrency
+        # looked up at call time, so that tests which patch time.sleep apply
+        self._sleep = sleep or (lambda seconds: time.sleep(seconds))  # pylint: disable=unnecessary-lambda
+        self._targets = {}
+        self._due = []
+        self._sequence = itertools.count()
+
+    def add(self, key, poll, backoff):
+        """ Poll `poll` right away and then after each delay of `backoff`. """
+        self._targets[key] = (poll, backoff)
+        heapq.heappush(self._due, (0, next(self._sequence), key))
+
+    def run(self, timeout, required=None, until=None, on_tick=None):
+        """ Poll until `required` targets (all by default) are done, `until()` is true or `timeout` seconds passed.
+        Return the keys of the targets which are done, in the order they were done. `on_tick()` runs after every
+        round of polls. """
+        required = len(self._targets) if required is None else required
+        elapsed = 0.0
+        done = []
+        while self._due and len(done) < required and not (until and until()):
+            due_at = self._due[0][0]
+            if due_at and due_at >= timeout:
+                break
+            if due_at > elapsed:
+                self._sleep(due_at - elapsed)
+                elapsed = due_at
+            keys = []
+            while self._due and self._due[0][0] <= elapsed:
+                keys.append(heapq.heappop(self._due)[2])
+            for key, (is_done, response) in zip(keys, self._poll(keys)):
+                if is_done:
+                    done.append(key)
+                else:
+                    delay = self._targets[key][1].next_delay(response)
+                    heapq.heappush(self._due, (elapsed + delay, next(self._sequence), key))
+            if on_tick:
+                on_tick()
+        return done
+
+    def _poll(self, keys):
+        if self.max_concurrency < 2 or len(keys) < 2:
+            return [self._targets[key][0]() for key in keys]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(keys))) as executor:
+            return list(executor.map(lambda key: self._targets[key][0](), keys))
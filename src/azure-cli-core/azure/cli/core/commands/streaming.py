@@ -0,0 +1,95 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Output of paged results page by page, as they are retrieved, so that memory stays bounded whatever the size of the
+result. `--output jsonl` always streams. `--output tsv` and `--output table` stream when `core.stream_output` is set,
+in which case the columns of a table are sized page by page.
+"""
+
+import sys
+
+STREAMING_FORMATS = ('jsonl', 'tsv', 'table')
+# the header and separator lines of the 'simple' tables knack prints
+TABLE_HEADER_LINES = 2
+
+
+def is_streaming_format(cli_ctx, output_format):
+    if output_format == 'jsonl':
+        return True
+    return output_format in STREAMING_FORMATS and cli_ctx.config.getboolean('core', 'stream_output', False)
+
+
+def is_elementwise_query(query):
+    """ Whether a compiled JMESPath expression applies to each element of a list on its own, like `[].name` or
+    `[?location=='westus'].{name:name}`, so that applying it page by page gives the same result. """
+    node = getattr(query, 'parsed', None)
+    if not node or node['type'] not in ('projection', 'filter_projection', 'flatten'):
+        return False
+    left = node['children'][0]
+    if left['type'] == 'flatten':
+        left = left['children'][0]
+    return left['type'] == 'identity'
+
+
+def iter_pages(paged):
+    """ Yield the pages of an msrest Paged result, retrieving each one once the previous one is consumed. """
+    while True:
+        try:
+            page = paged.advance_page()
+        except StopIteration:
+            return
+        yield list(page)
+
+
+def _search(query, page):
+    from collections import OrderedDict
+    from jmespath import Options
+    return query.search(page, Options(OrderedDict))
+
+
+class QueryPageCollector(object):
+    """ Applies an element-wise `--query` to each page of a result as it is retrieved, so that only what the query
+    selects is kept. """
+
+    def __init__(self, query):
+        self.query = query
+        self.result = []
+        self.streamed = False
+
+    def write(self, page):
+        self.streamed = True
+        self.result.extend(_search(self.query, page))
+
+
+class StreamWriter(object):
+    """ Applies `--query` and writes each page of a result as soon as it is transformed. """
+
+    def __init__(self, cli_ctx, output_format, table_transformer=None, query=None, is_query_active=False,
+                 out_file=None):
+        self.output_format = output_format
+        self.table_transformer = table_transformer
+        self.query = query
+        self.is_query_active = is_query_active
+        self.out_file = out_file or sys.stdout
+        self.formatter = cli_ctx.output.get_formatter(output_format)
+        self.streamed = False
+        self._header_written = False
+
+    def write(self, page):
+        from knack.util import CommandResultItem
+        self.streamed = True
+        if self.query:
+            page = _search(self.query, page)
+        if not page:
+            return
+        output = self.formatter(CommandResultItem(page, table_transformer=self.table_transformer,
+                                                  is_query_active=self.is_query_active))
+        if self.output_format == 'table':
+            if self._header_written:
+                output = ''.join(output.splitlines(True)[TABLE_HEADER_LINES:])
+            self._header_written = True
+        self.out_file.write(output)
+        self.out_file.flush()
@@ -0,0 +1,106 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import random
+import threading
+import time
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+THROTTLED_STATUS_CODE = 429
+RATE_LIMIT_HEADER_PREFIX = 'x-ms-ratelimit-remaining-'
+# Below this many remaining ARM requests, new work is slowed down before the service starts rejecting it.
+LOW_REMAINING_REQUESTS = 50
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_SECONDS = 2
+MAX_BACKOFF_SECONDS = 60
+
+
+def get_retry_after(response):
+    """ Return the Retry-After delay of a response in seconds, or None if there is no usable value. """
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        return max(float(headers.get('Retry-After')), 0)
+    except (TypeError, ValueError):
+        # HTTP-date values are not used by ARM
+        return None
+
+
+def _get_status_code(ex):
+    response = getattr(ex, 'response', None)
+    status_code = getattr(response, 'status_code', None) or getattr(ex, 'status_code', None)
+    return status_code
+
+
+def is_throttled(ex):
+    return _get_status_code(ex) == THROTTLED_STATUS_CODE
+
+
+class RateLimitTracker(object):
+    """ Tracks ARM throttling across all threads of an invocation.
+
+    The tracker sees every response through `response_hook`, which `configure_common_settings` registers on each
+    SDK client. A 429 pauses all callers of `wait` until its Retry-After delay has passed, and a low
+    `x-ms-ratelimit-remaining-*` count spaces out new requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0
+        self.remaining = None
+
+    def response_hook(self, response, *args, **kwargs):  # pylint: disable=unused-argument
+        remaining = [int(value) for header, value in response.headers.items()
+                     if header.lower().startswith(RATE_LIMIT_HEADER_PREFIX) and value.isdigit()]
+        if remaining:
+            with self._lock:
+                self.remaining = min(remaining)
+        if response.status_code == THROTTLED_STATUS_CODE:
+            self.delay(get_retry_after(response) or DEFAULT_BACKOFF_SECONDS)
+
+    def delay(self, seconds):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.time() + seconds)
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.time()
+                remaining = self.remaining
+            if delay <= 0:
+                break
+            time.sleep(delay)
+        if remaining is not None and remaining < LOW_REMAINING_REQUESTS:
+            time.sleep(DEFAULT_BACKOFF_SECONDS * (1 - float(remaining) / LOW_REMAINING_REQUESTS))
+
+
+RATE_LIMIT_TRACKER = RateLimitTracker()
+
+
+def run_with_backoff(func, max_retries=DEFAULT_MAX_RETRIES, tracker=RATE_LIMIT_TRACKER):
+    """ Call `func`, retrying with exponential backoff and jitter when the service throttles it.
+
+    A throttled request was rejected before it was processed, so repeating a call which makes one request, or only
+    reads, is safe. Calls which may have made other requests before the throttled one must not be wrapped, as their
+    side effects would be repeated; the SDK clients retry their throttled requests themselves.
+    """
+    attempt = 0
+    while True:
+        tracker.wait()
+        try:
+            return func()
+        except Exception as ex:  # pylint: disable=broad-except
+            if attempt >= max_retries or not is_throttled(ex):
+                raise
+            delay = get_retry_after(getattr(ex, 'response', None))
+            if delay is None:
+                delay = min(DEFAULT_BACKOFF_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1)
+            logger.info('Request throttled, retrying in %.1f seconds.', delay)
+            tracker.delay(delay)
+            attempt += 1
@@ -4,15 +4,83 @@
 # --------------------------------------------------------------------------------------------
 
 import re
+from operator import methodcaller
+
+import six
 
 from azure.cli.core.util import b64_to_hex
 
 import knack.events as events
 
 
+_CONTAINERS = (dict, list)
+_lower = methodcaller('lower')
+
+
+class ResultTransform(object):  # pylint: disable=too-few-public-methods
+    """ A transform of the dicts of a command result.
+
+    :param keys: `func(obj)` is called on each dict which has at least one of these keys.
+    :param func: Updates the dict in place.
+    :param skip_keys: The values of these keys are not visited by this transform.
+    """
+
+    def __init__(self, keys, func, skip_keys=None):
+        self.keys = tuple(keys)
+        self.func = func
+        self.skip_keys = frozenset(skip_keys or [])
+
+
+class ResultTransformer(object):
+    """ Applies several `ResultTransform`s to a result in one walk of its dicts and lists. """
+
+    def __init__(self, transforms=None):
+        self._transforms = ()
+        self._skip_keys = frozenset()
+        for transform in transforms or []:
+            self.add(transform)
+
+    def add(self, transform):
+        self._transforms += (transform,)
+        self._skip_keys |= transform.skip_keys
+
+    def apply(self, result):
+        if not self._transforms:
+            return
+        skip_keys = self._skip_keys
+        stack = [(result, self._transforms)]
+        while stack:
+            obj, transforms = stack.pop()
+            if isinstance(obj, dict):
+                for transform in transforms:
+                    for key in transform.keys:
+                        if key in obj:
+                            transform.func(obj)
+                            break
+                # strings and numbers cannot contain dicts, so they are not visited at all
+                if skip_keys.isdisjoint(obj):
+                    stack.extend([(value, transforms) for value in obj.values() if isinstance(value, _CONTAINERS)])
+                    continue
+                for key, value in obj.items():
+                    if not isinstance(value, _CONTAINERS):
+                        continue
+                    if key in skip_keys:
+                        child_transforms = tuple(t for t in transforms if key not in t.skip_keys)
+                        if child_transforms:
+                            stack.append((value, child_transforms))
+                    else:
+                        stack.append((value, transforms))
+            elif isinstance(obj, list):
+                stack.extend([(item, transforms) for item in obj if isinstance(item, _CONTAINERS)])
+
+
 def register_global_transforms(cli_ctx):
-    cli_ctx.register_event(events.EVENT_INVOKER_TRANSFORM_RESULT, _resource_group_transform)
-    cli_ctx.register_event(events.EVENT_INVOKER_TRANSFORM_RESULT, _x509_from_base64_to_hex_transform)
+    transformer = ResultTransformer([RESOURCE_GROUP_TRANSFORM, X509_HEX_TRANSFORM])
+
+    def _apply_global_transforms(_, **kwargs):
+        transformer.apply(kwargs['event_data']['result'])
+
+    cli_ctx.register_event(events.EVENT_INVOKER_TRANSFORM_RESULT, _apply_global_transforms)
 
 
 def _parse_id(strid):
@@ -26,40 +94,41 @@ def _parse_id(strid):
     return parsed
 
 
+def _get_resource_group(resource_id):
+    """ Return the resource group of a '/subscriptions/{}/resourceGroups/{}/providers/{}/{}/{}' id, or None. """
+    # the segments after the name of the resource are not needed, so they are left unsplit
+    parts = resource_id.split('/', 8)
+    if len(parts) < 9 or parts[3].lower() != 'resourcegroups':
+        return None
+    return parts[4]
+
+
+def _set_resource_group(obj):
+    resource_id = obj['id']
+    if not resource_id or not isinstance(resource_id, six.string_types) or 'resourceGroup' in obj:
+        return
+    if 'resourcegroup' in map(_lower, obj):
+        return
+    resource_group = _get_resource_group(resource_id)
+    if resource_group is not None:
+        obj['resourceGroup'] = resource_group
+
+
+def _set_x509_hex(obj):
+    try:
+        if 'x509ThumbprintHex' not in obj and obj['x509Thumbprint']:
+            obj['x509ThumbprintHex'] = b64_to_hex(obj['x509Thumbprint'])
+    except (KeyError, IndexError, TypeError):
+        pass
+
+
+RESOURCE_GROUP_TRANSFORM = ResultTransform(['id'], _set_resource_group, skip_keys=['sourceVault'])
+X509_HEX_TRANSFORM = ResultTransform(['x509Thumbprint'], _set_x509_hex)
+
+
 def _add_resource_group(obj):
-    if isinstance(obj, list):
-        for array_item in obj:
-            _add_resource_group(array_item)
-    elif isinstance(obj, dict):
-        try:
-            if 'resourcegroup' not in [x.lower() for x in obj.keys()]:
-                if obj['id']:
-                    obj['resourceGroup'] = _parse_id(obj['id'])['resource-group']
-        except (KeyError, IndexError, TypeError):
-            pass
-        for item_key in obj:
-            if item_key != 'sourceVault':
-                _add_resource_group(obj[item_key])
+    ResultTransformer([RESOURCE_GROUP_TRANSFORM]).apply(obj)
 
 
 def _add_x509_hex(obj):
-    if isinstance(obj, list):
-        for array_item in obj:
-            _add_x509_hex(array_item)
-    elif isinstance(obj, dict):
-        try:
-            if 'x509ThumbprintHex' not in obj:
-                if obj['x509Thumbprint']:
-                    obj['x509ThumbprintHex'] = b64_to_hex(obj['x509Thumbprint'])
-        except (KeyError, IndexError, TypeError):
-            pass
-        for item_key in obj:
-            _add_x509_hex(obj[item_key])
-
-
-def _resource_group_transform(_, **kwargs):
-    _add_resource_group(kwargs['event_data']['result'])
-
-
-def _x509_from_base64_to_hex_transform(_, **kwargs):
-    _add_x509_hex(kwargs['event_data']['result'])
+    ResultTransformer([X509_HEX_TRANSFORM]).apply(obj)
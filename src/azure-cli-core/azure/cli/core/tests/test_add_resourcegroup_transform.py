@@ -85,6 +85,68 @@ class TestResourceGroupTransform(unittest.TestCase):
             'name': 'A name'
         })
 
+    def test_dont_stomp_on_existing_resourcegroup_id_of_any_case(self):
+        instance = {
+            'id': TestResourceGroupTransform.CORRECT_ID,
+            'ResourceGroup': 'SomethingElse'
+        }
+        _add_resource_group(instance)
+        self.assertNotIn('resourceGroup', instance)
+
+    def test_global_transforms_in_one_walk(self):
+        from azure.cli.core.commands.transform import (ResultTransformer, RESOURCE_GROUP_TRANSFORM,
+                                                       X509_HEX_TRANSFORM)
+        result = [{
+            'id': TestResourceGroupTransform.CORRECT_ID,
+            'properties': {
+                'nics': [{'id': TestResourceGroupTransform.CORRECT_ID.replace('REsourceGROUPname', 'other')}],
+                'sourceVault': {
+                    'id': TestResourceGroupTransform.CORRECT_ID,
+                    'certificates': [{'x509Thumbprint': 'AQID'}]
+                }
+            }
+        }, 'a string', 42, None]
+
+        ResultTransformer([RESOURCE_GROUP_TRANSFORM, X509_HEX_TRANSFORM]).apply(result)
+
+        self.assertEqual(result[0]['resourceGroup'], 'REsourceGROUPname')
+        self.assertEqual(result[0]['properties']['nics'][0]['resourceGroup'], 'other')
+        # the resource group transform does not visit 'sourceVault', the others still do
+        source_vault = result[0]['properties']['sourceVault']
+        self.assertNotIn('resourceGroup', source_vault)
+        self.assertEqual(source_vault['certificates'][0]['x509ThumbprintHex'], '010203')
+        self.assertEqual(result[1:], ['a string', 42, None])
+
+    def test_global_transforms_match_separate_walks(self):
+        import copy
+        from azure.cli.core.commands.transform import (ResultTransformer, RESOURCE_GROUP_TRANSFORM,
+                                                       X509_HEX_TRANSFORM)
+        prefix = '/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg{}/providers/'
+        result = [{
+            'id': (prefix + 'Microsoft.Compute/virtualMachines/vm{}').format(i % 3, i),
+            'tags': {'env': 'prod'},
+            'storageProfile': {
+                'osDisk': {'managedDisk': {'id': (prefix + 'Microsoft.Compute/disks/os{}').format(i % 3, i)}},
+                'dataDisks': [{'id': TestResourceGroupTransform.NON_RG_ID}, {'id': None}, {'id': 42}],
+            },
+            'osProfile': {'secrets': [{'sourceVault': {'id': TestResourceGroupTransform.CORRECT_ID},
+                                       'vaultCertificates': [{'x509Thumbprint': 'AQID'}]}]},
+            'networkProfile': [{'id': TestResourceGroupTransform.BOGUS_ID, 'ResourceGroup': 'rg'}],
+        } for i in range(6)]
+
+        separate = copy.deepcopy(result)
+        ResultTransformer([RESOURCE_GROUP_TRANSFORM]).apply(separate)
+        ResultTransformer([X509_HEX_TRANSFORM]).apply(separate)
+        ResultTransformer([RESOURCE_GROUP_TRANSFORM, X509_HEX_TRANSFORM]).apply(result)
+        self.assertEqual(result, separate)
+        self.assertEqual(result[4]['resourceGroup'], 'rg1')
+        self.assertEqual(result[4]['osProfile']['secrets'][0]['vaultCertificates'][0]['x509ThumbprintHex'], '010203')
+
+    def test_result_transformer_accepts_scalar_results(self):
+        from azure.cli.core.commands.transform import ResultTransformer, RESOURCE_GROUP_TRANSFORM
+        for result in [None, 'a string', 42]:
+            ResultTransformer([RESOURCE_GROUP_TRANSFORM]).apply(result)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -220,6 +220,80 @@ class TestCommandRegistration(unittest.TestCase):
         self.assertTrue(isinstance(ext2.command_source, ExtensionCommandSource))
         self.assertTrue(ext2.command_source.overrides_command)
 
+    @mock.patch('importlib.import_module', _mock_import_lib)
+    @mock.patch('pkgutil.iter_modules', lambda _: [(None, 'hello_mod', None), (None, 'other_mod', None)])
+    @mock.patch('azure.cli.core.extension.get_extensions', lambda: [])
+    def test_command_index(self):
+        from azure.cli.core._session import Session
+
+        loaded_modules = []
+
+        def _mock_load_command_loader(loader, args, name, prefix):
+            loaded_modules.append(name)
+            group_name = name.split('_')[0]
+
+            class TestCommandsLoader(AzCommandsLoader):
+
+                def load_command_table(self, args):
+                    super(TestCommandsLoader, self).load_command_table(args)
+                    with self.command_group(group_name, operations_tmpl='{}#TestCommandRegistration.{{}}'.format(
+                            __name__)) as g:
+                        g.command('world', 'sample_vm_get')
+                    return self.command_table
+
+            command_loader = TestCommandsLoader(cli_ctx=loader.cli_ctx)
+            command_table = command_loader.load_command_table(args)
+            loader.loaders.append(command_loader)
+            for cmd in command_table:
+                loader.cmd_to_loader_map[cmd] = [command_loader]
+            return command_table, {}
+
+        cli = DummyCli()
+        with mock.patch('azure.cli.core._session.INDEX', Session()), \
+                mock.patch('azure.cli.core.commands._load_command_loader', _mock_load_command_loader):
+            # an empty index falls back to loading every module and builds the index
+            cmd_tbl = MainCommandsLoader(cli).load_command_table(['hello', 'world'])
+            self.assertEqual(sorted(loaded_modules), ['hello_mod', 'other_mod'])
+            self.assertEqual(sorted(cmd_tbl), ['hello world', 'other world'])
+
+            # the index now restricts loading to the owning module
+            loaded_modules[:] = []
+            cmd_tbl = MainCommandsLoader(cli).load_command_table(['hello', 'world'])
+            self.assertEqual(loaded_modules, ['hello_mod'])
+            self.assertEqual(list(cmd_tbl), ['hello world'])
+
+            # unknown commands and `az` itself still load everything, but leave the index as it is
+            for args in [['unknown'], []]:
+                loaded_modules[:] = []
+                with mock.patch.object(Session, 'save_with_retry', autospec=True) as save:
+                    MainCommandsLoader(cli).load_command_table(args)
+                self.assertEqual(sorted(loaded_modules), ['hello_mod', 'other_mod'])
+                self.assertFalse(save.called)
+
+            # a different set of installed modules invalidates the index
+            loaded_modules[:] = []
+            with mock.patch('pkgutil.iter_modules', lambda _: [(None, 'hello_mod', None)]):
+                MainCommandsLoader(cli).load_command_table(['hello', 'world'])
+            self.assertEqual(loaded_modules, ['hello_mod'])
+            loaded_modules[:] = []
+            MainCommandsLoader(cli).load_command_table(['hello', 'world'])
+            self.assertEqual(sorted(loaded_modules), ['hello_mod', 'other_mod'])
+
+    def test_command_index_misses_after_extension_change(self):
+        from azure.cli.core import CommandIndex
+        from azure.cli.core._session import Session
+
+        ext = namedtuple('Extension', ['name', 'version'])
+        cli = DummyCli()
+        with mock.patch('azure.cli.core._session.INDEX', Session()):
+            extensions = [ext('hello_ext', '1.0')]
+            CommandIndex(cli, ['hello_mod'], extensions).update(
+                {'hello world': mock.MagicMock(command_source='hello_mod')})
+            self.assertEqual(CommandIndex(cli, ['hello_mod'], extensions).get(['hello', 'world']), ['hello_mod'])
+            # adding, removing or updating an extension misses the index, so the next full load rebuilds it
+            for extensions in [[ext('hello_ext', '1.0'), ext('other_ext', '1.0')], [], [ext('hello_ext', '1.1')]]:
+                self.assertIsNone(CommandIndex(cli, ['hello_mod'], extensions).get(['hello', 'world']))
+
     def test_argument_with_overrides(self):
 
         global_vm_name_type = CLIArgumentType(
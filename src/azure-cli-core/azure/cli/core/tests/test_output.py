@@ -12,8 +12,9 @@ class TestCoreCLIOutput(unittest.TestCase):
         from azure.cli.core.mock import DummyCli
 
         output_producer = AzOutputProducer(DummyCli())
-        self.assertEqual(6, len(output_producer._FORMAT_DICT))  # six types: json, jsonc, table, tsv, yaml, none
+        self.assertEqual(7, len(output_producer._FORMAT_DICT))  # seven types: json, jsonc, table, tsv, yaml, jsonl, none
         self.assertIn('yaml', output_producer._FORMAT_DICT)
+        self.assertIn('jsonl', output_producer._FORMAT_DICT)
         self.assertIn('none', output_producer._FORMAT_DICT)
 
     # regression test for https://github.com/Azure/azure-cli/issues/9263
@@ -0,0 +1,202 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+import mock
+
+from knack.util import CLIError
+
+from azure.cli.core.commands.polling import PollingBackoff, PollingScheduler
+
+
+class TestPolling(unittest.TestCase):
+
+    def test_backoff_grows_to_cap_with_jitter(self):
+        backoff = PollingBackoff(10, max_interval=30, jitter=0.2)
+        delays = [backoff.next_delay() for _ in range(5)]
+        for delay, interval in zip(delays, [10, 15, 22.5, 30, 30]):
+            self.assertTrue(interval * 0.8 <= delay <= interval, (delay, interval))
+
+        # an interval longer than the cap is kept
+        self.assertTrue(90 <= PollingBackoff(100, max_interval=30, jitter=0.1).next_delay() <= 100)
+
+    def test_backoff_honors_retry_after(self):
+        backoff = PollingBackoff(10)
+        self.assertEqual(backoff.next_delay(mock.MagicMock(headers={'Retry-After': '3'})), 3)
+        # the hint does not advance the backoff
+        self.assertTrue(8 <= backoff.next_delay(mock.MagicMock(headers={})) <= 10)
+
+    def test_scheduler_polls_each_target_on_its_own_backoff(self):
+        polls = []
+
+        def _poll_until(key, polls_needed):
+            def _poll():
+                polls.append(key)
+                return polls.count(key) >= polls_needed, None
+            return _poll
+
+        sleeps = []
+        scheduler = PollingScheduler(sleep=sleeps.append)
+        scheduler.add('fast', _poll_until('fast', 2), PollingBackoff(1, jitter=0))
+        scheduler.add('slow', _poll_until('slow', 3), PollingBackoff(5, jitter=0))
+        ticks = []
+        done = scheduler.run(60, on_tick=lambda: ticks.append(len(polls)))
+
+        self.assertEqual(done, ['fast', 'slow'])
+        self.assertEqual(polls, ['fast', 'slow', 'fast', 'slow', 'slow'])
+        # fast at 0 and 1, slow at 0, 5 and 12.5
+        self.assertEqual(sleeps, [1, 4, 7.5])
+        self.assertEqual(ticks, [2, 3, 4, 5])
+
+    def test_scheduler_timeout_and_required(self):
+        sleeps = []
+        scheduler = PollingScheduler(sleep=sleeps.append)
+        scheduler.add('never', lambda: (False, None), PollingBackoff(10, jitter=0))
+        self.assertEqual(scheduler.run(30), [])
+        # polled at 0, 10 and 25
+        self.assertEqual(sleeps, [10, 15])
+
+        scheduler = PollingScheduler(max_concurrency=4, sleep=sleeps.append)
+        scheduler.add('done', lambda: (True, None), PollingBackoff(10))
+        scheduler.add('never', lambda: (False, None), PollingBackoff(10))
+        self.assertEqual(scheduler.run(30, required=1), ['done'])
+
+    def test_scheduler_stops_on_error(self):
+        def _fail():
+            raise ValueError('failed')
+
+        scheduler = PollingScheduler(sleep=lambda _: None)
+        scheduler.add('failing', _fail, PollingBackoff(10))
+        with self.assertRaises(ValueError):
+            scheduler.run(30)
+
+    def test_scheduler_until(self):
+        polls = []
+
+        def _poll():
+            polls.append(1)
+            return False, None
+
+        scheduler = PollingScheduler(sleep=lambda _: None)
+        scheduler.add('never', _poll, PollingBackoff(10))
+        self.assertEqual(scheduler.run(3600, until=lambda: len(polls) >= 3), [])
+        self.assertEqual(len(polls), 3)
+
+
+class TestLongRunningOperation(unittest.TestCase):
+
+    def test_long_running_operation_waits_on_the_poller(self):
+        from azure.cli.core.commands import LongRunningOperation
+        cli_ctx = mock.MagicMock()
+        poller = mock.MagicMock()
+        poller.done.side_effect = [False, False, True]
+        poller.result.return_value = 'result'
+        poller._response.__dict__['_content'] = b'{"properties": {"correlationId": "123"}}'
+
+        with mock.patch.object(LongRunningOperation, '_get_correlation_id',
+                               side_effect=LongRunningOperation._get_correlation_id) as get_correlation_id:
+            self.assertEqual(LongRunningOperation(cli_ctx, poller_done_interval_ms=500.0)(poller), 'result')
+
+        poller.wait.assert_called_with(0.5)
+        self.assertEqual(poller.wait.call_count, 2)
+        # the correlation id is only parsed once
+        get_correlation_id.assert_called_once_with(poller._response)
+
+
+_VM_ID = '/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg/providers/Microsoft.Compute/' \
+         'virtualMachines/{}'
+
+
+class TestWaitCommand(unittest.TestCase):
+
+    def setUp(self):
+        from azure.cli.core import AzCommandsLoader
+        from azure.cli.core.mock import DummyCli
+
+        # the command looks up its getter in this module by name, and passes the arguments of its signature
+        self.get_vm = mock.create_autospec(lambda resource_group_name, vm_name: None)
+        patcher = mock.patch('{}._get_vm'.format(__name__), self.get_vm, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        class TestCommandsLoader(AzCommandsLoader):
+            def load_command_table(self, args):
+                super(TestCommandsLoader, self).load_command_table(args)
+                with self.command_group('vm', operations_tmpl='{}#{{}}'.format(__name__)) as g:
+                    g.wait_command('wait', getter_name='_get_vm')
+                return self.command_table
+
+        self.cli_ctx = DummyCli()
+        loader = TestCommandsLoader(self.cli_ctx)
+        loader.load_command_table(None)
+        self.cmd = loader.command_table['vm wait']
+        self.cmd.cli_ctx = self.cli_ctx
+
+    def _wait(self, names, **options):
+        args_list = []
+        for name in names:
+            args = {'cmd': self.cmd, 'resource_group_name': 'rg', 'vm_name': name, 'timeout': 3600, 'interval': 30,
+                    'created': False, 'updated': False, 'deleted': False, 'exists': False, 'custom': None,
+                    'min_count': None}
+            args.update(options)
+            args_list.append(args)
+        return self.cmd.command_kwargs['batch_handler'](args_list, [_VM_ID.format(n) for n in names])
+
+    @staticmethod
+    def _listed(name, provisioning_state):
+        return mock.MagicMock(id=_VM_ID.format(name).upper(), provisioning_state=None,
+                              additional_properties={'provisioningState': provisioning_state})
+
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('azure.cli.core.commands.arm.get_mgmt_service_client', autospec=True)
+    def test_wait_lists_resources_of_a_group_at_once(self, get_client, sleep):
+        resources = get_client.return_value.resources
+        resources.list_by_resource_group.side_effect = [
+            [self._listed('vm1', 'Creating'), self._listed('vm2', 'Creating'), mock.MagicMock(id='other')],
+            [self._listed('vm1', 'Succeeded'), self._listed('vm2', 'Creating')],
+            [self._listed('vm1', 'Succeeded'), self._listed('vm2', 'Succeeded')]]
+
+        self.assertIsNone(self._wait(['vm1', 'vm2'], created=True))
+        self.assertEqual(resources.list_by_resource_group.call_count, 3)
+        resources.list_by_resource_group.assert_called_with(
+            'rg', filter="resourceType eq 'microsoft.compute/virtualmachines'", expand='provisioningState')
+        self.assertEqual(sleep.call_count, 2)
+        self.get_vm.assert_not_called()
+
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('azure.cli.core.commands.arm.get_mgmt_service_client', autospec=True)
+    def test_wait_returns_once_min_count_resources_are_deleted(self, get_client, sleep):
+        resources = get_client.return_value.resources
+        resources.list_by_resource_group.side_effect = [
+            [self._listed('vm1', 'Deleting'), self._listed('vm2', 'Deleting')],
+            [self._listed('vm2', 'Deleting')]]
+
+        self.assertIsNone(self._wait(['vm1', 'vm2'], deleted=True, min_count=1))
+        self.assertEqual(resources.list_by_resource_group.call_count, 2)
+
+        # resources whose state the list does not tell are got one by one
+        resources.list_by_resource_group.side_effect = None
+        resources.list_by_resource_group.return_value = [mock.MagicMock(id=_VM_ID.format('vm1'), provisioning_state=None,
+                                                                        additional_properties={})]
+        self.get_vm.return_value = mock.MagicMock(provisioning_state='Failed')
+        with self.assertRaises(CLIError) as ex:
+            self._wait(['vm1', 'vm2'], updated=True)
+        self.assertEqual(str(ex.exception), "The operation on '{}' failed".format(_VM_ID.format('vm1')))
+
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('azure.cli.core.commands.arm.get_mgmt_service_client', autospec=True)
+    def test_wait_gets_each_resource_for_custom_condition(self, get_client, sleep):
+        self.get_vm.side_effect = lambda resource_group_name, vm_name: mock.MagicMock(
+            spec=['name', 'provisioning_state', 'properties'], provisioning_state=None, properties=None)
+        result = self._wait(['vm1', 'vm2', 'vm3'], custom="name=='never'", timeout=100)
+        self.assertIsInstance(result, CLIError)
+        get_client.assert_not_called()
+        # each resource is polled at 0, about 30 and about 30 + 45
+        self.assertEqual(self.get_vm.call_count, 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
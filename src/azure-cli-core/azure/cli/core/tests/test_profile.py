@@ -835,6 +835,46 @@ class TestProfile(unittest.TestCase):
         mock_auth_context.acquire_token.assert_called_once_with(
             mgmt_resource, self.user1, mock.ANY)
 
+    @mock.patch.dict('os.environ', {'AZURE_CORE_MAX_CONCURRENCY': '4', 'AZURE_CORE_TENANT_TIMEOUT': '1'})
+    def test_find_subscriptions_in_tenants_concurrently(self):
+        import adal
+        import time
+        cli = DummyCli()
+        tenants = ['tenant1', 'tenant2-disabled', 'tenant3-slow', 'tenant4']
+        subscriptions = {t: SubscriptionStub('/subscriptions/sub-' + t, t, self.state1, t) for t in tenants}
+
+        def _create_auth_context(_, tenant, _1):
+            context = mock.MagicMock()
+            context.acquire_token_with_username_password.return_value = self.token_entry1
+            if tenant == 'tenant2-disabled':
+                context.acquire_token.side_effect = adal.AdalError('account disabled')
+            else:
+                context.acquire_token.return_value = dict(self.token_entry1, accessToken='token-{}'.format(tenant))
+            return context
+
+        def _list_slowly(tenant):
+            yield subscriptions[tenant]
+            time.sleep(1.2)
+            yield SubscriptionStub('/subscriptions/late', 'late', self.state1, tenant)
+
+        def _create_arm_client(credentials):
+            tenant = credentials.token['access_token'].replace('token-', '', 1)
+            client = mock.MagicMock()
+            client.tenants.list.return_value = [TenantStub(t) for t in tenants]
+            if tenant == 'tenant3-slow':
+                client.subscriptions.list.return_value = _list_slowly(tenant)
+            elif tenant in subscriptions:
+                client.subscriptions.list.return_value = [subscriptions[tenant]]
+            return client
+
+        finder = SubscriptionFinder(cli, _create_auth_context, None, _create_arm_client)
+        # action
+        subs = finder.find_from_user_account(self.user1, 'bar', None, 'https://management.core.windows.net/')
+
+        # assert: the tenants which fail or time out are skipped, the others keep their order
+        self.assertEqual(subs, [subscriptions['tenant1'], subscriptions['tenant4']])
+        self.assertEqual(finder.tenants, ['tenant1', 'tenant4'])
+
     @mock.patch('adal.AuthenticationContext', autospec=True)
     def test_find_subscriptions_thru_username_non_password(self, mock_auth_context):
         cli = DummyCli()
@@ -1402,10 +1442,11 @@ class TestProfile(unittest.TestCase):
         # assert
         self.assertEqual(creds_cache.retrieve_secret_of_service_principal(test_sp['servicePrincipalId']), None)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
-    def test_credscache_add_new_sp_creds(self, _, mock_open_for_write, mock_read_file):
+    def test_credscache_add_new_sp_creds(self, _, mock_open_for_write, mock_read_file, _2):
         cli = DummyCli()
         test_sp = {
             "servicePrincipalId": "myapp",
@@ -1428,7 +1469,7 @@ class TestProfile(unittest.TestCase):
         token_entries = [e for _, e in creds_cache.adal_token_cache.read_items()]  # noqa: F812
         self.assertEqual(token_entries, [self.token_entry1])
         self.assertEqual(creds_cache._service_principal_creds, [test_sp, test_sp2])
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
+        mock_open_for_write.assert_called_with(mock.ANY, 'w')
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
@@ -1451,10 +1492,11 @@ class TestProfile(unittest.TestCase):
         self.assertEqual(creds_cache._service_principal_creds, [test_sp])
         self.assertFalse(mock_open_for_write.called)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
-    def test_credscache_add_preexisting_sp_new_secret(self, _, mock_open_for_write, mock_read_file):
+    def test_credscache_add_preexisting_sp_new_secret(self, _, mock_open_for_write, mock_read_file, _2):
         cli = DummyCli()
         test_sp = {
             "servicePrincipalId": "myapp",
@@ -1494,10 +1536,11 @@ class TestProfile(unittest.TestCase):
         # we know the matching did go through)
         self.assertRaises(ValueError, creds_cache.retrieve_token_for_service_principal, 'myapp', 'resource1', 'mytenant', False)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
-    def test_credscache_remove_creds(self, _, mock_open_for_write, mock_read_file):
+    def test_credscache_remove_creds(self, _, mock_open_for_write, mock_read_file, _2):
         cli = DummyCli()
         test_sp = {
             "servicePrincipalId": "myapp",
@@ -1521,14 +1564,15 @@ class TestProfile(unittest.TestCase):
         # assert #2
         self.assertEqual(creds_cache._service_principal_creds, [])
 
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
+        mock_open_for_write.assert_called_with(mock.ANY, 'w')
         self.assertEqual(mock_open_for_write.call_count, 2)
 
+    @mock.patch('azure.cli.core.util.replace_file', autospec=True)
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
     @mock.patch('os.fdopen', autospec=True)
     @mock.patch('os.open', autospec=True)
     @mock.patch('adal.AuthenticationContext', autospec=True)
-    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, _, mock_open_for_write, mock_read_file):  # pylint: disable=line-too-long
+    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, _, mock_open_for_write, mock_read_file, _2):  # pylint: disable=line-too-long
         cli = DummyCli()
         token_entry2 = {
             "accessToken": "new token",
@@ -1559,10 +1603,109 @@ class TestProfile(unittest.TestCase):
             mock.ANY)
 
         # assert
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
+        mock_open_for_write.assert_called_with(mock.ANY, 'w')
         self.assertEqual(token, 'new token')
         self.assertEqual(token_type, token_entry2['tokenType'])
 
+    def _create_user_token_entry(self, access_token, expires_in):
+        import datetime
+        expires_on = datetime.datetime.now() + datetime.timedelta(seconds=expires_in)
+        return {
+            "_clientId": "04b07795-8ddb-461a-bbee-02f9e1bf7b46",
+            "resource": "https://management.core.windows.net/",
+            "tokenType": "Bearer",
+            "expiresOn": expires_on.strftime('%Y-%m-%d %H:%M:%S.%f'),
+            "_authority": "https://login.microsoftonline.com/" + self.tenant_id,
+            "isMRRT": True,
+            "refreshToken": "refresh-" + access_token,
+            "accessToken": access_token,
+            "userId": self.user1
+        }
+
+    def test_credscache_merges_changes_of_concurrent_processes(self):
+        import shutil
+        import tempfile
+        cli = DummyCli()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        token_file = os.path.join(temp_dir, 'accessTokens.json')
+        test_sp = {
+            "servicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "accessToken": "Secret"
+        }
+        with open(token_file, 'w') as f:
+            json.dump([self.token_entry1, test_sp], f)
+
+        with mock.patch.dict('os.environ', {'AZURE_ACCESS_TOKEN_FILE': token_file}):
+            creds_cache1 = CredsCache(cli, async_persist=False)
+            creds_cache2 = CredsCache(cli, async_persist=False)
+            creds_cache1.load_adal_token_cache()
+            creds_cache2.load_adal_token_cache()
+
+            # action: each process changes something else
+            creds_cache1.save_service_principal_cred(dict(test_sp, servicePrincipalId='myapp2'))
+            creds_cache2.remove_cached_creds(self.user1)
+
+        # assert
+        with open(token_file, 'r') as f:
+            saved = json.load(f)
+        self.assertEqual(sorted(x.get('servicePrincipalId') for x in saved), ['myapp', 'myapp2'])
+        self.assertEqual(creds_cache2._service_principal_creds, saved)
+
+    @mock.patch('adal.oauth2_client.OAuth2Client.get_token', autospec=True)
+    def test_credscache_reuses_token_refreshed_by_another_process(self, mock_get_token):
+        import adal
+        import shutil
+        import tempfile
+        cli = DummyCli()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        token_file = os.path.join(temp_dir, 'accessTokens.json')
+        with open(token_file, 'w') as f:
+            json.dump([self._create_user_token_entry('expired token', -60)], f)
+
+        def _create_auth_context(_, tenant, cache):
+            return adal.AuthenticationContext('https://login.microsoftonline.com/' + tenant, cache=cache)
+
+        mgmt_resource = 'https://management.core.windows.net/'
+        with mock.patch.dict('os.environ', {'AZURE_ACCESS_TOKEN_FILE': token_file}):
+            creds_cache = CredsCache(cli, _create_auth_context, async_persist=True)
+            creds_cache.load_adal_token_cache()
+
+            # action: another process refreshes the token
+            with open(token_file, 'w') as f:
+                json.dump([self._create_user_token_entry('refreshed token', 3600)], f)
+            _, token, _ = creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, mgmt_resource)
+
+            # assert: the token is not refreshed again, and is refreshed in the background before it expires
+            self.assertEqual(token, 'refreshed token')
+            self.assertFalse(mock_get_token.called)
+            timer = creds_cache._refresh_timers[(self.user1, self.tenant_id, mgmt_resource)]
+            timer.cancel()
+            self.assertTrue(3300 < timer.interval < 3400)
+
+            # action: the token of a process expires, it refreshes it
+            with open(token_file, 'w') as f:
+                json.dump([self._create_user_token_entry('expired token', -60)], f)
+            creds_cache = CredsCache(cli, _create_auth_context, async_persist=True)
+            mock_get_token.return_value = {
+                'accessToken': 'new token',
+                'refreshToken': 'new refresh token',
+                'tokenType': 'Bearer',
+                'expiresOn': self._create_user_token_entry('', 3600)['expiresOn'],
+                'resource': mgmt_resource
+            }
+            _, token, _ = creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, mgmt_resource)
+            creds_cache._refresh_timers.popitem()[1].cancel()
+
+        # assert: the new token is saved at once for other processes
+        self.assertEqual(token, 'new token')
+        self.assertEqual(mock_get_token.call_count, 1)
+        with open(token_file, 'r') as f:
+            saved = json.load(f)
+        self.assertEqual([x['accessToken'] for x in saved], ['new token'])
+
     @mock.patch('azure.cli.core._profile.get_file_json', autospec=True)
     def test_credscache_good_error_on_file_corruption(self, mock_read_file):
         mock_read_file.side_effect = ValueError('a bad error for you')
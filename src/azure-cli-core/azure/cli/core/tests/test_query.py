@@ -0,0 +1,48 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+import mock
+
+from azure.cli.core._query import AzCliQuery, compile_query, get_query_equality_filters
+
+
+class TestQuery(unittest.TestCase):
+
+    def test_compile_query_reuses_expressions(self):
+        query = compile_query("[?location=='westus'].name")
+        self.assertIs(compile_query("[?location=='westus'].name"), query)
+        self.assertEqual(query.search([{'name': 'a', 'location': 'westus'}]), ['a'])
+
+    def test_invalid_query(self):
+        with self.assertRaises(ValueError):
+            AzCliQuery.jmespath_type('[?location==')
+
+    def test_get_query_equality_filters(self):
+        filters = get_query_equality_filters(
+            compile_query("[?location=='westus' && tags.env=='prod' && 'vm1'==name && size > `1`].id"))
+        self.assertEqual(filters, {'location': 'westus', 'tags.env': 'prod', 'name': 'vm1'})
+
+        for expression in ["[?location=='westus' || name=='vm1']", "[?!(location=='westus')]", "[].name",
+                           "value[?location=='westus']", "[?location!='westus']"]:
+            self.assertEqual(get_query_equality_filters(compile_query(expression)), {}, expression)
+
+    def test_filter_output_uses_the_query_of_the_invocation(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.invocation.data = {'query': compile_query('[].name')}
+        event_data = {'result': [{'name': 'a'}, {'name': 'b'}]}
+        AzCliQuery.filter_output(cli_ctx, event_data=event_data)
+        self.assertEqual(event_data['result'], ['a', 'b'])
+
+        # the query is only applied while it has not been consumed
+        cli_ctx.invocation.data['query'] = None
+        event_data = {'result': [{'name': 'a'}]}
+        AzCliQuery.filter_output(cli_ctx, event_data=event_data)
+        self.assertEqual(event_data['result'], [{'name': 'a'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import codecs
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+
+from azure.cli.core._session import Session, flush_sessions
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'az.sess')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_file(self, data):
+        with open(self.filename, 'w') as f:
+            json.dump(data, f)
+
+    def _read_file(self):
+        with codecs.open(self.filename, 'r', encoding='utf-8-sig') as f:
+            return json.load(f)
+
+    def test_session_writes_once_on_flush(self):
+        session = Session()
+        session.load(self.filename)
+        session['a'] = 1
+        session['b'] = 2
+        del session['a']
+        self.assertFalse(os.path.exists(self.filename))
+
+        with mock.patch.object(Session, '_write', autospec=True, side_effect=Session._write) as write:
+            flush_sessions()
+            flush_sessions()
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(self._read_file(), {'b': 2})
+        self.assertEqual([f for f in os.listdir(self.temp_dir) if f.endswith('.tmp')], [])
+
+    @mock.patch('time.sleep', autospec=True)
+    def test_session_save_with_retry_sets_flush_attempts(self, _):
+        session = Session()
+        session.load(self.filename)
+        session.data['a'] = 1
+        session.save_with_retry(3)
+        with mock.patch.object(Session, '_write', autospec=True, side_effect=OSError()) as write:
+            with self.assertRaises(OSError):
+                session.flush()
+        self.assertEqual(write.call_count, 3)
+
+        # the default applies again after a flush
+        with mock.patch.object(Session, '_write', autospec=True, side_effect=[OSError(), None]) as write:
+            session.flush()
+        self.assertEqual(write.call_count, 2)
+        session.save()
+        with mock.patch.object(Session, '_write', autospec=True, side_effect=OSError()) as write:
+            with self.assertRaises(OSError):
+                session.flush()
+        self.assertEqual(write.call_count, 5)
+        session.flush()
+        self.assertEqual(self._read_file(), {'a': 1})
+
+    @unittest.skipIf(os.name == 'nt', 'File modes are not enforced on Windows')
+    def test_session_creates_file_with_mode(self):
+        session = Session(file_mode=0o600)
+        session.load(self.filename)
+        session['token'] = 'secret'
+        session.flush()
+        self.assertEqual(os.stat(self.filename).st_mode & 0o777, 0o600)
+        self.assertEqual(self._read_file(), {'token': 'secret'})
+
+    def test_session_reads_file_when_accessed(self):
+        self._write_file({'a': 1})
+        session = Session()
+        with mock.patch.object(Session, '_read', autospec=True, side_effect=Session._read) as read:
+            session.load(self.filename)
+            self.assertEqual(read.call_count, 0)
+            self.assertEqual(session.get('a'), 1)
+            self.assertEqual(dict(session), {'a': 1})
+        self.assertEqual(read.call_count, 1)
+
+    def test_session_keeps_changes_of_other_processes(self):
+        self._write_file({'a': 1, 'b': 1, 'c': 1})
+        session = Session()
+        session.load(self.filename)
+        session['a'] = 2
+        del session['b']
+
+        # another process saves the file in the meantime
+        self._write_file({'a': 1, 'b': 1, 'c': 3, 'd': 4})
+        session.flush()
+        self.assertEqual(self._read_file(), {'a': 2, 'c': 3, 'd': 4})
+
+        # indirect modifications write the whole data
+        session.data['e'] = 5
+        session.save()
+        session.flush()
+        self.assertEqual(self._read_file(), {'a': 2, 'c': 1, 'e': 5})
+
+    def test_session_concurrent_writers(self):
+        sessions = []
+        for i in range(8):
+            session = Session()
+            session.load(self.filename)
+            session['key{}'.format(i)] = i
+            sessions.append(session)
+        threads = [threading.Thread(target=s.flush) for s in sessions]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self._read_file(), {'key{}'.format(i): i for i in range(8)})
+
+    def test_session_max_age(self):
+        self._write_file({'a': 1})
+        session = Session()
+        session.load(self.filename, max_age=3600)
+        self.assertEqual(session.get('a'), 1)
+
+        expired = time.time() - 7200
+        os.utime(self.filename, (expired, expired))
+        session.load(self.filename, max_age=3600)
+        self.assertIsNone(session.get('a'))
+        session.flush()
+        self.assertEqual(self._read_file(), {})
+
+    def test_session_loading_another_file_flushes(self):
+        session = Session()
+        session.load(self.filename)
+        session['a'] = 1
+        session.load(os.path.join(self.temp_dir, 'other.json'))
+        self.assertEqual(self._read_file(), {'a': 1})
+        self.assertEqual(len(session), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
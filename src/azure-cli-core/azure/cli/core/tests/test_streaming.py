@@ -0,0 +1,75 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+import mock
+from six import StringIO
+
+from azure.cli.core.commands.streaming import StreamWriter, is_elementwise_query, iter_pages
+
+
+class _FakePaged(object):
+    def __init__(self, pages):
+        self._pages = list(pages)
+        self.retrieved = 0
+
+    def advance_page(self):
+        if self.retrieved == len(self._pages):
+            raise StopIteration('End of paging')
+        self.retrieved += 1
+        return self._pages[self.retrieved - 1]
+
+
+class TestStreaming(unittest.TestCase):
+
+    def test_iter_pages_retrieves_pages_lazily(self):
+        paged = _FakePaged([[1, 2], [3]])
+        pages = iter_pages(paged)
+        self.assertEqual(next(pages), [1, 2])
+        self.assertEqual(paged.retrieved, 1)
+        self.assertEqual(list(pages), [[3]])
+
+    def test_is_elementwise_query(self):
+        import jmespath
+        for expression in ["[].name", "[*].{name:name, id:id}", "[?location=='westus']", "[?tags.env=='prod'].id",
+                           "[]"]:
+            self.assertTrue(is_elementwise_query(jmespath.compile(expression)), expression)
+        for expression in ["[0]", "length(@)", "sort_by(@, &name)", "[].name | [0]", "name"]:
+            self.assertFalse(is_elementwise_query(jmespath.compile(expression)), expression)
+
+    def test_stream_writer_jsonl_with_query(self):
+        import jmespath
+        from azure.cli.core._output import AzOutputProducer
+        from azure.cli.core.mock import DummyCli
+        cli_ctx = DummyCli()
+        cli_ctx.output = AzOutputProducer(cli_ctx)
+        out_file = StringIO()
+        writer = StreamWriter(cli_ctx, 'jsonl', query=jmespath.compile("[?location=='westus'].name"),
+                              is_query_active=True, out_file=out_file)
+
+        writer.write([{'name': 'a', 'location': 'westus'}, {'name': 'b', 'location': 'eastus'}])
+        writer.write([{'name': 'c', 'location': 'eastus'}])
+        writer.write([{'name': 'd', 'location': 'westus'}])
+
+        self.assertTrue(writer.streamed)
+        self.assertEqual(out_file.getvalue(), '"a"\n"d"\n')
+
+    def test_stream_writer_table_writes_header_once(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.output.get_formatter.return_value = \
+            lambda obj: 'Name\n------\n' + ''.join('{}\n'.format(x['name']) for x in obj.result)
+        out_file = StringIO()
+        writer = StreamWriter(cli_ctx, 'table', out_file=out_file)
+
+        writer.write([{'name': 'a'}, {'name': 'b'}])
+        writer.write([])
+        writer.write([{'name': 'c'}])
+
+        self.assertEqual(out_file.getvalue(), 'Name\n------\na\nb\nc\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
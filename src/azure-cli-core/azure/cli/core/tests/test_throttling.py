@@ -0,0 +1,149 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import time
+import unittest
+
+import mock
+
+from azure.cli.core.commands import AzCliCommandInvoker
+from azure.cli.core.commands.throttling import (
+    RateLimitTracker, run_with_backoff, get_retry_after, is_throttled, LOW_REMAINING_REQUESTS)
+
+
+class ThrottledError(Exception):
+    def __init__(self, retry_after=None):
+        super(ThrottledError, self).__init__('throttled')
+        headers = {'Retry-After': retry_after} if retry_after is not None else {}
+        self.response = mock.MagicMock(status_code=429, headers=headers)
+
+
+class TestThrottling(unittest.TestCase):
+
+    def test_get_retry_after(self):
+        self.assertEqual(get_retry_after(mock.MagicMock(headers={'Retry-After': '7'})), 7)
+        self.assertIsNone(get_retry_after(mock.MagicMock(headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})))
+        self.assertIsNone(get_retry_after(mock.MagicMock(headers={})))
+        self.assertIsNone(get_retry_after(None))
+
+    def test_is_throttled(self):
+        self.assertTrue(is_throttled(ThrottledError()))
+        self.assertFalse(is_throttled(ValueError()))
+
+    @mock.patch('time.sleep')
+    def test_run_with_backoff_honors_retry_after(self, sleep_mock):
+        calls = []
+
+        def _func():
+            calls.append(time.time())
+            if len(calls) < 3:
+                raise ThrottledError(retry_after='3')
+            return 'done'
+
+        tracker = RateLimitTracker()
+        self.assertEqual(run_with_backoff(_func, tracker=tracker), 'done')
+        self.assertEqual(len(calls), 3)
+        for call in sleep_mock.call_args_list:
+            self.assertLessEqual(call[0][0], 3)
+
+    @mock.patch('time.sleep')
+    def test_run_with_backoff_gives_up(self, _):
+        def _func():
+            raise ThrottledError()
+
+        with self.assertRaises(ThrottledError):
+            run_with_backoff(_func, max_retries=2, tracker=RateLimitTracker())
+
+    def test_run_with_backoff_does_not_retry_other_errors(self):
+        calls = []
+
+        def _func():
+            calls.append(1)
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            run_with_backoff(_func, tracker=RateLimitTracker())
+        self.assertEqual(len(calls), 1)
+
+    @mock.patch('time.sleep')
+    def test_tracker_slows_down_when_few_requests_remain(self, sleep_mock):
+        tracker = RateLimitTracker()
+        tracker.response_hook(mock.MagicMock(status_code=200, headers={
+            'x-ms-ratelimit-remaining-subscription-reads': str(LOW_REMAINING_REQUESTS * 10),
+            'x-ms-ratelimit-remaining-tenant-reads': '0'}))
+        self.assertEqual(tracker.remaining, 0)
+        tracker.wait()
+        self.assertTrue(sleep_mock.called)
+
+        sleep_mock.reset_mock()
+        tracker.response_hook(mock.MagicMock(status_code=200, headers={
+            'x-ms-ratelimit-remaining-subscription-reads': str(LOW_REMAINING_REQUESTS * 10)}))
+        tracker.wait()
+        self.assertFalse(sleep_mock.called)
+
+    def test_sdk_clients_retry_throttled_requests(self):
+        from msrest.universal_http.requests import RequestHTTPSenderConfiguration
+        from azure.cli.core.commands.client_factory import _retry_throttled_requests
+        client = mock.MagicMock()
+        client.config = RequestHTTPSenderConfiguration()
+        _retry_throttled_requests(client)
+        policy = client.config.retry_policy()
+        self.assertIn(429, policy.status_forcelist)
+        # any method, as the throttled request was not processed
+        self.assertTrue(policy.is_retry('POST', 429, has_retry_after=True))
+        self.assertIn(500, policy.status_forcelist)
+        self.assertNotIn(404, policy.status_forcelist)
+
+    def test_run_job_does_not_repeat_a_throttled_handler(self):
+        invoker = AzCliCommandInvoker.__new__(AzCliCommandInvoker)
+        invoker._filter_params = lambda args: {}
+        calls = []
+
+        def _handler(params):
+            calls.append(params)
+            raise ThrottledError()
+
+        cmd = mock.MagicMock(side_effect=_handler, exception_handler=None)
+        with self.assertRaises(ThrottledError):
+            invoker._run_job(mock.MagicMock(), cmd)
+        self.assertEqual(len(calls), 1)
+
+
+class TestConcurrentJobs(unittest.TestCase):
+
+    def test_run_jobs_concurrently_keeps_order_and_ids(self):
+        invoker = AzCliCommandInvoker.__new__(AzCliCommandInvoker)
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def _run_job(expanded_arg, _):
+            with lock:
+                running.append(expanded_arg)
+                max_running.append(len(running))
+            # finish in reverse order of submission
+            time.sleep(0.01 * (10 - expanded_arg))
+            with lock:
+                running.remove(expanded_arg)
+            if expanded_arg % 3 == 0:
+                raise ValueError(expanded_arg)
+            return expanded_arg
+
+        invoker._run_job = _run_job
+        jobs = [(i, None) for i in range(10)]
+        ids = ['id{}'.format(i) for i in range(10)]
+        streamed = []
+        results, exceptions = invoker._run_jobs_concurrently(jobs, ids, 4, streamed.append)
+
+        self.assertEqual(results, [1, 2, 4, 5, 7, 8])
+        self.assertEqual([(str(ex), id_arg) for ex, id_arg in exceptions],
+                         [('0', 'id0'), ('3', 'id3'), ('6', 'id6'), ('9', 'id9')])
+        self.assertEqual(sorted(streamed), results)
+        self.assertLessEqual(max(max_running), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,7 +14,8 @@ import json
 from azure.cli.core.util import \
     (get_file_json, truncate_text, shell_safe_json_parse, b64_to_hex, hash_string, random_string,
      open_page_in_browser, can_launch_browser, handle_exception, ConfiguredDefaultSetter, send_raw_request,
-     should_disable_connection_verify)
+     should_disable_connection_verify, use_shared_connection_pool, get_connection_pool_stats,
+     reset_shared_connection_pool, atomic_write, FileCache)
 
 
 class TestUtils(unittest.TestCase):
@@ -172,6 +173,100 @@ class TestUtils(unittest.TestCase):
             result = can_launch_browser()
             self.assertFalse(result)
 
+    def test_atomic_write(self):
+        import os
+        import shutil
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'file.json')
+
+        with atomic_write(path, encoding='utf-8-sig', file_mode=0o600) as f:
+            json.dump({'key': u'\u00e9'}, f)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'\xef\xbb\xbf{"key": "\\u00e9"}')
+        if os.name != 'nt':
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+        # a failed write leaves the previous file, and no temporary file
+        with self.assertRaises(ValueError):
+            with atomic_write(path) as f:
+                f.write('partial')
+                raise ValueError()
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'\xef\xbb\xbf{"key": "\\u00e9"}')
+        with atomic_write(path, 'wb') as f:
+            f.write(b'replaced')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'replaced')
+        self.assertEqual(os.listdir(directory), ['file.json'])
+
+    def test_file_cache(self):
+        import os
+        import shutil
+        import time
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = FileCache(directory, 60)
+
+        self.assertIsNone(cache.load('kind', ['key']))
+        self.assertFalse(cache.is_fresh(None))
+        cache.save('kind', ['key'], {'a': 1}, etag='"v1"')
+        entry = cache.load('kind', ['key'])
+        self.assertEqual((entry['value'], entry['etag']), ({'a': 1}, '"v1"'))
+        self.assertTrue(cache.is_fresh(entry))
+        self.assertIsNone(cache.load('other', ['key']))
+        self.assertIsNone(cache.load('kind', ['other']))
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertFalse(cache.is_fresh(entry))
+
+        # entries which cannot be read are missing, and failing to save one is not an error
+        for name in os.listdir(os.path.join(directory, 'kind')):
+            with open(os.path.join(directory, 'kind', name), 'w') as f:
+                f.write('{')
+        self.assertIsNone(cache.load('kind', ['key']))
+        with mock.patch('azure.cli.core.util.atomic_write', side_effect=OSError()):
+            cache.save('kind', ['key'], {'a': 2})
+
+
+class TestSharedConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        reset_shared_connection_pool()
+        self.addCleanup(reset_shared_connection_pool)
+
+    def test_sessions_share_connections(self):
+        import threading
+        import requests
+        from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), _Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.shutdown)
+
+        url = 'http://127.0.0.1:{}/'.format(server.server_port)
+        for _ in range(3):
+            session = requests.Session()
+            use_shared_connection_pool(session)
+            self.assertEqual(session.get(url).status_code, 200)
+
+        self.assertEqual(get_connection_pool_stats(), [('127.0.0.1', 1, 3)])
+        reset_shared_connection_pool()
+        self.assertEqual(get_connection_pool_stats(), [])
+
 
 class TestBase64ToHex(unittest.TestCase):
 
@@ -9,6 +9,8 @@ import json
 import getpass
 import base64
 import binascii
+import threading
+from contextlib import contextmanager
 import six
 
 from knack.log import get_logger
@@ -19,6 +21,8 @@ logger = get_logger(__name__)
 CLI_PACKAGE_NAME = 'azure-cli'
 COMPONENT_PREFIX = 'azure-cli-'
 
+_SHARED_POOL_LOCK = threading.Lock()
+
 
 def handle_exception(ex):  # pylint: disable=too-many-return-statements
     # For error code, follow guidelines at https://docs.python.org/2/library/sys.html#sys.exit,
@@ -235,6 +239,110 @@ def read_file_content(file_path, allow_binary=False):
     raise CLIError('Failed to decode file {} - unknown decoding'.format(file_path))
 
 
+@contextmanager
+def lock_file(path):
+    """ Hold an exclusive advisory lock on the file `path` against other processes, creating the file if needed. """
+    import os
+    with open(path, 'a') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            # retries every second for 10 seconds before giving up
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding=None, file_mode=0o666):
+    """ Write the file `path` through a temporary file which replaces it once written, so that readers never see a
+    partial file and a failed write leaves the previous one intact. `file_mode` gives the permissions of a new file
+    before the umask is applied, 0o600 for files holding secrets. With `encoding`, text is encoded as such. """
+    import codecs
+    import os
+    temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.current_thread().ident)
+    binary = encoding or 'b' in mode
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | (getattr(os, 'O_BINARY', 0) if binary else 0)
+    try:
+        with os.fdopen(os.open(temp_path, flags, file_mode), 'wb' if binary else 'w') as f:
+            yield codecs.getwriter(encoding)(f) if encoding else f
+        replace_file(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class FileCache(object):
+    """ JSON values kept in one file per kind and key under `directory`, and fresh for `ttl` seconds.
+
+    The cache only saves time, so an entry which cannot be read is missing, and failing to save one is only logged.
+    """
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+
+    def load(self, kind, key):
+        """ Return the entry saved for a key, `{'saved': <time>, 'value': <value>, ...}`, whatever its age, or None. """
+        try:
+            with open(self._get_path(kind, key), 'r') as f:
+                entry = json.load(f)
+            if isinstance(entry, dict) and 'saved' in entry and 'value' in entry:
+                return entry
+        except (IOError, OSError, ValueError):
+            pass
+        return None
+
+    def is_fresh(self, entry):
+        import time
+        return entry is not None and time.time() - entry['saved'] < self.ttl
+
+    def save(self, kind, key, value, **metadata):
+        """ Save the value of a key, along with `metadata` which `load` returns in the entry. """
+        import os
+        import time
+        from knack.util import ensure_dir
+        path = self._get_path(kind, key)
+        metadata.update(saved=time.time(), value=value)
+        try:
+            ensure_dir(os.path.dirname(path))
+            with atomic_write(path) as f:
+                json.dump(metadata, f)
+        except (IOError, OSError) as ex:
+            logger.debug("Failed to cache %s in '%s': %s", kind, path, ex)
+
+    def _get_path(self, kind, key):
+        import hashlib
+        import os
+        digest = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, kind, '{}.json'.format(digest))
+
+
+def replace_file(source, destination):
+    """ Replace the file `destination` with `source` in one step, so that readers find either file.
+
+    Python 2 has no os.replace, and its os.rename does not replace an existing file on Windows. There, `destination`
+    is removed first, and a reader may briefly find no file.
+    """
+    import os
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)  # pylint: disable=no-member
+        return
+    if os.name == 'nt' and os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+
+
 def shell_safe_json_parse(json_or_dict_string, preserve_order=False):
     """ Allows the passing of JSON or Python dictionary strings. This is needed because certain
     JSON strings in CMD shell are not received in main's argv. This allows the user to specify
@@ -496,6 +604,61 @@ def check_connectivity(url='https://example.org', max_retries=5, timeout=1):
     return success
 
 
+_SHARED_POOL_MANAGER = None
+
+
+def get_shared_pool_manager(maxsize=None):
+    """ Return the urllib3 pool manager shared by all SDK clients of the current invocation.
+
+    :param int maxsize: number of connections kept open per host, used when the pool manager is created.
+    """
+    global _SHARED_POOL_MANAGER  # pylint: disable=global-statement
+    if _SHARED_POOL_MANAGER is None:
+        from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
+        with _SHARED_POOL_LOCK:
+            if _SHARED_POOL_MANAGER is None:
+                maxsize = max(maxsize or DEFAULT_POOLSIZE, DEFAULT_POOLSIZE)
+                _SHARED_POOL_MANAGER = HTTPAdapter(pool_connections=DEFAULT_POOLSIZE, pool_maxsize=maxsize).poolmanager
+    return _SHARED_POOL_MANAGER
+
+
+def use_shared_connection_pool(session, maxsize=None):
+    """ Make a requests session send through the shared pool manager so that connections, and their TLS
+    handshakes, are reused across sessions and clients. Retries and other adapter settings are kept. """
+    pool_manager = get_shared_pool_manager(maxsize)
+    for prefix in ('https://', 'http://'):
+        adapter = session.adapters.get(prefix)
+        if adapter is not None and getattr(adapter, 'poolmanager', None) is not pool_manager:
+            adapter.poolmanager = pool_manager
+
+
+def reset_shared_connection_pool(*_, **__):
+    global _SHARED_POOL_MANAGER  # pylint: disable=global-statement
+    with _SHARED_POOL_LOCK:
+        pool_manager, _SHARED_POOL_MANAGER = _SHARED_POOL_MANAGER, None
+    if pool_manager is not None:
+        pool_manager.clear()
+
+
+def get_connection_pool_stats():
+    """ Return (host, new connections, requests) for each host reached through the shared pool manager. """
+    pool_manager = _SHARED_POOL_MANAGER
+    if pool_manager is None:
+        return []
+    stats = []
+    for key in pool_manager.pools.keys():
+        pool = pool_manager.pools.get(key)
+        if pool is not None:
+            stats.append((pool.host, pool.num_connections, pool.num_requests))
+    return stats
+
+
+def log_connection_pool_stats(*_, **__):
+    for host, connections, requests in get_connection_pool_stats():
+        logger.debug("Connection pool for '%s': %d requests, %d new connections, %d reused connections.",
+                     host, requests, connections, max(requests - connections, 0))
+
+
 def send_raw_request(cli_ctx, method, uri, headers=None, uri_parameters=None,  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
                      body=None, skip_authorization_header=False, resource=None, output_file=None,
                      generated_client_request_id_name='x-ms-client-request-id'):
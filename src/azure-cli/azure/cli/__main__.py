@@ -4,15 +4,22 @@
 # --------------------------------------------------------------------------------------------
 
 import sys
-import uuid
-import timeit
 
-from knack.completion import ARGCOMPLETE_ENV_NAME
-from knack.log import get_logger
+# Hand the command to a running daemon, if enabled, before paying for any of the imports below
+from azure.cli.daemon import invoke_with_daemon
+_daemon_exit_code = invoke_with_daemon(sys.argv[1:])
+if _daemon_exit_code is not None:
+    sys.exit(_daemon_exit_code)
 
-from azure.cli.core import get_default_cli
+import uuid  # pylint: disable=wrong-import-position  # noqa: E402
+import timeit  # pylint: disable=wrong-import-position  # noqa: E402
 
-import azure.cli.core.telemetry as telemetry
+from knack.completion import ARGCOMPLETE_ENV_NAME  # pylint: disable=wrong-import-position  # noqa: E402
+from knack.log import get_logger  # pylint: disable=wrong-import-position  # noqa: E402
+
+from azure.cli.core import get_default_cli  # pylint: disable=wrong-import-position  # noqa: E402
+
+import azure.cli.core.telemetry as telemetry  # pylint: disable=wrong-import-position  # noqa: E402
 
 
 # A workaround for https://bugs.python.org/issue32502 (https://github.com/Azure/azure-cli/issues/5184)
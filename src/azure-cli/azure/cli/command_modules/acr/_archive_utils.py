@@ -7,6 +7,11 @@ import tarfile
 import os
 import re
 import codecs
+import hashlib
+import itertools
+import time
+import zlib
+from collections import deque
 from io import open
 import requests
 from knack.log import get_logger
@@ -14,7 +19,9 @@ from knack.util import CLIError
 from msrestazure.azure_exceptions import CloudError
 from azure.storage.blob import BlockBlobService
 from ._azure_utils import get_blob_info
-from ._constants import TASK_VALID_VSTS_URLS
+from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+from ._constants import (TASK_VALID_VSTS_URLS, CONTEXT_CACHE_FILE, CONTEXT_REUSE_TTL, GZIP_BLOCK_SIZE,
+                         IGNORE_RULES_PER_PATTERN)
 
 logger = get_logger(__name__)
 
@@ -25,11 +32,16 @@ def upload_source_code(client,
                        source_location,
                        tar_file_path,
                        docker_file_path,
-                       docker_file_in_tar):
-    _pack_source_code(source_location,
-                      tar_file_path,
-                      docker_file_path,
-                      docker_file_in_tar)
+                       docker_file_in_tar,
+                       cli_ctx=None,
+                       skip_unchanged=False):
+    max_concurrency = cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY) \
+        if cli_ctx else DEFAULT_MAX_CONCURRENCY
+    context_hash = _pack_source_code(source_location,
+                                     tar_file_path,
+                                     docker_file_path,
+                                     docker_file_in_tar,
+                                     max_workers=min(max_concurrency, _get_cpu_count()))
 
     size = os.path.getsize(tar_file_path)
     unit = 'GiB'
@@ -39,6 +51,15 @@ def upload_source_code(client,
             break
         size = size / 1024.0
 
+    uploaded_contexts = context_key = None
+    if skip_unchanged and cli_ctx:
+        uploaded_contexts = _get_uploaded_contexts(cli_ctx)
+        context_key = '{}/{}/{}'.format(resource_group_name, registry_name, context_hash).lower()
+        uploaded = uploaded_contexts.get(context_key)
+        if uploaded and time.time() - uploaded['uploaded'] < CONTEXT_REUSE_TTL:
+            logger.warning("The source code did not change since it was last uploaded. Reusing it.")
+            return uploaded['relative_path']
+
     logger.warning("Uploading archived source code from '%s'...", tar_file_path)
     upload_url = None
     relative_path = None
@@ -54,22 +75,53 @@ def upload_source_code(client,
         raise CLIError("Failed to get a SAS URL to upload context.")
 
     account_name, endpoint_suffix, container_name, blob_name, sas_token = get_blob_info(upload_url)
-    BlockBlobService(account_name=account_name,
-                     sas_token=sas_token,
-                     endpoint_suffix=endpoint_suffix).create_blob_from_path(
-                         container_name=container_name,
-                         blob_name=blob_name,
-                         file_path=tar_file_path)
+    blob_service = BlockBlobService(account_name=account_name,
+                                    sas_token=sas_token,
+                                    endpoint_suffix=endpoint_suffix)
+    # upload contexts of more than one block as blocks in parallel
+    blob_service.MAX_SINGLE_PUT_SIZE = blob_service.MAX_BLOCK_SIZE
+    blob_service.create_blob_from_path(
+        container_name=container_name,
+        blob_name=blob_name,
+        file_path=tar_file_path,
+        max_connections=max_concurrency)
     logger.warning("Sending context ({0:.3f} {1}) to registry: {2}...".format(
         size, unit, registry_name))
+    if uploaded_contexts is not None:
+        now = time.time()
+        for key in [k for k, v in uploaded_contexts.items() if now - v.get('uploaded', 0) >= CONTEXT_REUSE_TTL]:
+            del uploaded_contexts[key]
+        uploaded_contexts[context_key] = {'relative_path': relative_path, 'uploaded': now}
+        uploaded_contexts.flush()
     return relative_path
 
 
-def _pack_source_code(source_location, tar_file_path, docker_file_path, docker_file_in_tar):
+def _get_uploaded_contexts(cli_ctx):
+    """ The source code contexts uploaded from this machine recently, by registry and hash. """
+    from azure.cli.core._session import Session
+    uploaded_contexts = Session()
+    uploaded_contexts.load(os.path.join(cli_ctx.config.config_dir, CONTEXT_CACHE_FILE))
+    return uploaded_contexts
+
+
+def _get_cpu_count():
+    import multiprocessing
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def _pack_source_code(source_location, tar_file_path, docker_file_path, docker_file_in_tar, max_workers=1):
+    """ Pack the source code into a gzipped tarball and return the SHA-256 hash of the tarball before it is
+    gzipped. """
     logger.warning("Packing source code into tar to upload...")
 
     ignore_list, ignore_list_size = _load_dockerignore_file(source_location)
     common_vcs_ignore_list = {'.git', '.gitignore', '.bzr', 'bzrignore', '.hg', '.hgignore', '.svn'}
+    match_ignore_rule = _compile_ignore_rules(ignore_list) if ignore_list else None
+    # the rules which make exceptions, by which the children of an ignored directory may be included again
+    exceptions = [(index, item) for index, item in enumerate(ignore_list or []) if not item.ignore]
 
     def _ignore_check(tarinfo, parent_ignored, parent_matching_rule_index):
         # ignore common vcs dir or file
@@ -82,37 +134,105 @@ def _pack_source_code(source_location, tar_file_path, docker_file_path, docker_f
             # eg, it will ignore the files under .git folder.
             return parent_ignored, parent_matching_rule_index
 
-        for index, item in enumerate(ignore_list):
-            # stop checking the remaining rules whose priorities are lower than the parent matching rule
-            # at this point, current item should just inherit from parent
-            if index >= parent_matching_rule_index:
-                break
-            if re.match(item.pattern, tarinfo.name):
-                logger.debug(".dockerignore: rule '%s' matches '%s'.",
-                             item.rule, tarinfo.name)
-                return item.ignore, index
+        # the rules whose priorities are lower than the parent matching rule are not checked, as the item should
+        # inherit from its parent then
+        index = match_ignore_rule(tarinfo.name, parent_matching_rule_index)
+        if index is not None:
+            item = ignore_list[index]
+            logger.debug(".dockerignore: rule '%s' matches '%s'.",
+                         item.rule, tarinfo.name)
+            return item.ignore, index
 
         logger.debug(".dockerignore: no rule for '%s'. parent ignore '%s'",
                      tarinfo.name, parent_ignored)
         # inherit from parent
         return parent_ignored, parent_matching_rule_index
 
-    with tarfile.open(tar_file_path, "w:gz") as tar:
-        # need to set arcname to empty string as the archive root path
-        _archive_file_recursively(tar,
-                                  source_location,
-                                  arcname="",
-                                  parent_ignored=False,
-                                  parent_matching_rule_index=ignore_list_size,
-                                  ignore_check=_ignore_check)
-
-        # Add the Dockerfile if it's specified.
-        # In the case of run, there will be no Dockerfile.
-        if docker_file_path:
-            docker_file_tarinfo = tar.gettarinfo(
-                docker_file_path, docker_file_in_tar)
-            with open(docker_file_path, "rb") as f:
-                tar.addfile(docker_file_tarinfo, f)
+    def _prune_check(tarinfo, ignored, matching_rule_index):
+        # the children of an ignored directory are all ignored, unless a rule of a higher priority than the one
+        # which ignored it makes an exception for some of them
+        return ignored and not any(item.may_match_children(tarinfo.name)
+                                   for index, item in exceptions if index < matching_rule_index)
+
+    with open(tar_file_path, "wb") as f:
+        gz = _ParallelGzipWriter(f, max_workers)
+        with tarfile.open(fileobj=gz, mode="w|") as tar:
+            # need to set arcname to empty string as the archive root path
+            _archive_file_recursively(tar,
+                                      source_location,
+                                      arcname="",
+                                      parent_ignored=False,
+                                      parent_matching_rule_index=ignore_list_size,
+                                      ignore_check=_ignore_check,
+                                      prune_check=_prune_check)
+
+            # Add the Dockerfile if it's specified.
+            # In the case of run, there will be no Dockerfile.
+            if docker_file_path:
+                docker_file_tarinfo = tar.gettarinfo(
+                    docker_file_path, docker_file_in_tar)
+                with open(docker_file_path, "rb") as docker_file:
+                    tar.addfile(docker_file_tarinfo, docker_file)
+        gz.close()
+    return gz.hash.hexdigest()
+
+
+class _ParallelGzipWriter(object):
+    """ A file which gzips what is written to it on up to `max_workers` threads and writes the result to `fileobj`.
+
+    The input is cut into blocks which are compressed as separate gzip members, which gzip readers decompress as a
+    single stream. It is also hashed, in the hash attribute.
+    """
+
+    def __init__(self, fileobj, max_workers=1, block_size=GZIP_BLOCK_SIZE):
+        self._fileobj = fileobj
+        self._block_size = block_size
+        self._buffer = []
+        self._buffered = 0
+        self._pending = deque()
+        self._max_pending = max_workers * 2
+        self._executor = None
+        if max_workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.hash.update(data)
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self._block_size:
+            self._compress_buffer()
+
+    def _compress_buffer(self):
+        block = b''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        if not self._executor:
+            self._fileobj.write(_gzip_block(block))
+            return
+        self._pending.append(self._executor.submit(_gzip_block, block))
+        # write the blocks in order, without keeping more of them in memory than there are threads to compress them
+        while self._pending and (self._pending[0].done() or len(self._pending) > self._max_pending):
+            self._fileobj.write(self._pending.popleft().result())
+
+    def close(self):
+        try:
+            if self._buffered:
+                self._compress_buffer()
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+        finally:
+            if self._executor:
+                self._executor.shutdown()
+
+
+def _gzip_block(block):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush()
+
+
+_IGNORE_RULE_WILDCARDS = re.compile(r'[*?\[\]\\{}()+|^$]')
 
 
 class IgnoreRule(object):  # pylint: disable=too-few-public-methods
@@ -142,6 +262,42 @@ class IgnoreRule(object):  # pylint: disable=too-few-public-methods
                     self.pattern += "/"  # add back / if it's not the last
         self.pattern += "$"
 
+        # the leading tokens without wildcards, which the names the rule matches start with
+        self.literal_tokens = list(itertools.takewhile(lambda token: not _IGNORE_RULE_WILDCARDS.search(token),
+                                                       tokens))
+        self.is_literal = len(self.literal_tokens) == token_length
+
+    def may_match_children(self, name):
+        """ Whether the rule may match an item under the directory `name`. """
+        dir_tokens = name.split('/')
+        if self.is_literal and len(dir_tokens) >= len(self.literal_tokens):
+            return False
+        return all(dir_token == token for dir_token, token in zip(dir_tokens, self.literal_tokens))
+
+
+def _compile_ignore_rules(ignore_list):
+    """ Return `match(name, limit)`, which returns the index of the first rule of `ignore_list` before `limit` which
+    matches `name`, if any. The rules are compiled into a few alternations, which are matched in one pass. """
+    chunks = []
+    # older versions of Python do not support more than 100 named groups in a regular expression
+    for start in range(0, len(ignore_list), IGNORE_RULES_PER_PATTERN):
+        alternatives = ['(?P<r{}>{})'.format(index, item.pattern) for index, item in
+                        enumerate(ignore_list[start:start + IGNORE_RULES_PER_PATTERN], start)]
+        chunks.append((start, re.compile('|'.join(alternatives))))
+
+    def match(name, limit):
+        for start, pattern in chunks:
+            if start >= limit:
+                break
+            # alternatives are tried in order, so the group which matched is the first rule which matches
+            m = pattern.match(name)
+            if m:
+                index = int(m.lastgroup[1:])
+                return index if index < limit else None
+        return None
+
+    return match
+
 
 def _load_dockerignore_file(source_location):
     # reference: https://docs.docker.com/engine/reference/builder/#dockerignore-file
@@ -169,7 +325,8 @@ def _load_dockerignore_file(source_location):
     return ignore_list, len(ignore_list)
 
 
-def _archive_file_recursively(tar, name, arcname, parent_ignored, parent_matching_rule_index, ignore_check):
+def _archive_file_recursively(tar, name, arcname, parent_ignored, parent_matching_rule_index, ignore_check,
+                              prune_check=None):
     # create a TarInfo object from the file
     tarinfo = tar.gettarinfo(name, arcname)
 
@@ -188,12 +345,13 @@ def _archive_file_recursively(tar, name, arcname, parent_ignored, parent_matchin
         else:
             tar.addfile(tarinfo)
 
-    # even the dir is ignored, its child items can still be included, so continue to scan
-    if tarinfo.isdir():
+    # even the dir is ignored, its child items can still be included, so continue to scan unless no rule can
+    # include them
+    if tarinfo.isdir() and not (prune_check and prune_check(tarinfo, ignored, matching_rule_index)):
         for f in os.listdir(name):
             _archive_file_recursively(tar, os.path.join(name, f), os.path.join(arcname, f),
                                       parent_ignored=ignored, parent_matching_rule_index=matching_rule_index,
-                                      ignore_check=ignore_check)
+                                      ignore_check=ignore_check, prune_check=prune_check)
 
 
 def check_remote_source_code(source_location):
@@ -19,6 +19,21 @@ ACR_TASK_YAML_DEFAULT_NAME = 'acb.yaml'
 
 ACR_CACHED_BUILDER_IMAGES = ('cloudfoundry/cnb:bionic',)
 
+# source code contexts uploaded from this machine, under the config directory
+CONTEXT_CACHE_FILE = 'acrContexts.json'
+# seconds for which an uploaded context is reused, well within the time the registry keeps it
+CONTEXT_REUSE_TTL = 3600
+# bytes of the tarball compressed at a time, each on its own thread
+GZIP_BLOCK_SIZE = 1024 * 1024
+IGNORE_RULES_PER_PATTERN = 90
+
+# registry lookups and tokens kept between commands, under the config directory
+REGISTRY_CACHE_FILE = 'acrCache.json'
+# seconds for which the resource group of a registry is kept, which is checked whenever it is used
+RESOURCE_GROUP_CACHE_TTL = 24 * 3600
+# seconds for which a refresh token is kept, well within its lifetime
+REFRESH_TOKEN_CACHE_TTL = 15 * 60
+
 
 def get_classic_sku(cmd):
     SkuName = cmd.get_models('SkuName')
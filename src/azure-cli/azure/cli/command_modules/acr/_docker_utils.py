@@ -9,6 +9,7 @@ except ImportError:
     from urllib import urlencode
     from urlparse import urlparse, urlunparse
 
+import threading
 import time
 from json import loads
 from base64 import b64encode
@@ -26,8 +27,8 @@ from azure.cli.core.cloud import CloudSuffixNotSetException
 from azure.cli.core._profile import _AZ_LOGIN_MESSAGE
 
 from ._client_factory import cf_acr_registries
-from ._constants import get_managed_sku
-from ._utils import get_registry_by_name, ResourceNotFound
+from ._constants import get_managed_sku, REFRESH_TOKEN_CACHE_TTL
+from ._utils import get_registry_by_name, get_cache_entry, set_cache_entry, remove_cache_entry, ResourceNotFound
 
 
 logger = get_logger(__name__)
@@ -40,6 +41,9 @@ ACCESS_TOKEN_PERMISSION = ['pull', 'push', 'delete', 'push,pull', 'delete,pull']
 AAD_TOKEN_BASE_ERROR_MESSAGE = "Unable to get AAD authorization tokens with message"
 ADMIN_USER_BASE_ERROR_MESSAGE = "Unable to get admin user credentials with message"
 
+_registry_session = None
+_registry_session_lock = threading.Lock()
+
 
 def _get_aad_token_after_challenge(cli_ctx,
                                    token_params,
@@ -75,10 +79,26 @@ def _get_aad_token_after_challenge(cli_ctx,
                        .get_error_message())
 
     refresh_token = loads(response.content.decode("utf-8"))["refresh_token"]
+    if not is_diagnostics_context:
+        set_cache_entry(cli_ctx, _get_refresh_token_cache_key(cli_ctx, login_server, creds[1]),
+                        {'realm': token_params['realm'], 'refresh_token': refresh_token}, REFRESH_TOKEN_CACHE_TTL)
     if only_refresh_token:
         return refresh_token
 
+    return _get_aad_access_token(token_params['realm'], login_server, refresh_token,
+                                 repository, artifact_repository, permission, is_diagnostics_context)
+
+
+def _get_aad_access_token(realm,
+                          login_server,
+                          refresh_token,
+                          repository,
+                          artifact_repository,
+                          permission,
+                          is_diagnostics_context):
+    authurl = urlparse(realm)
     authhost = urlunparse((authurl[0], authurl[1], '/oauth2/token', '', '', ''))
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
 
     if repository:
         scope = 'repository:{}:{}'.format(repository, permission)
@@ -107,6 +127,22 @@ def _get_aad_token_after_challenge(cli_ctx,
     return loads(response.content.decode("utf-8"))["access_token"]
 
 
+def _get_refresh_token_cache_key(cli_ctx, login_server, aad_access_token=None):
+    """The key of the refresh token of a registry for the current identity, which is derived from its AAD access
+    token so that it changes with the identity, and never reveals the token.
+    """
+    import hashlib
+    if aad_access_token is None:
+        from azure.cli.core._profile import Profile
+        try:
+            creds, _, _ = Profile(cli_ctx=cli_ctx).get_raw_token()
+        except CLIError:
+            return None
+        aad_access_token = creds[1]
+    return 'refreshToken/{}/{}'.format(login_server.lower(),
+                                       hashlib.sha256(aad_access_token.encode('utf-8')).hexdigest())
+
+
 def _get_aad_token(cli_ctx,
                    login_server,
                    only_refresh_token,
@@ -131,6 +167,20 @@ def _get_aad_token(cli_ctx,
 
     login_server = login_server.rstrip('/')
 
+    # a refresh token got for the same identity lately is exchanged for the access token right away
+    cache_key = None
+    if not only_refresh_token and not is_diagnostics_context:
+        cache_key = _get_refresh_token_cache_key(cli_ctx, login_server)
+        cached = get_cache_entry(cli_ctx, cache_key)
+        if cached:
+            logger.debug("Using the cached refresh token of '%s'", login_server)
+            try:
+                return _get_aad_access_token(cached['realm'], login_server, cached['refresh_token'],
+                                             repository, artifact_repository, permission, is_diagnostics_context)
+            except CLIError as e:
+                logger.debug("Could not use the cached refresh token. Exception: %s", str(e))
+                remove_cache_entry(cli_ctx, cache_key)
+
     challenge = requests.get('https://' + login_server + '/v2/', verify=(not should_disable_connection_verify()))
     if challenge.status_code not in [401] or 'WWW-Authenticate' not in challenge.headers:
         from ._errors import CONNECTIVITY_CHALLENGE_ERROR
@@ -315,6 +365,25 @@ def get_access_credentials(cmd,
                             permission=permission)
 
 
+def get_scoped_access_credentials(login_server,
+                                  username,
+                                  password,
+                                  repository=None,
+                                  permission=None):
+    """Exchange the credentials of get_login_credentials for the credentials to access a repository, or the
+    catalog if no repository is given. Admin user credentials are returned as they are.
+    :param str login_server: The registry login server
+    :param str username: The username from get_login_credentials
+    :param str password: The password or refresh token from get_login_credentials
+    :param str repository: Repository for which the access token is requested
+    :param str permission: The requested permission on the repository
+    """
+    if username != EMPTY_GUID:
+        return username, password
+    return EMPTY_GUID, _get_aad_access_token('https://{}'.format(login_server), login_server, password,
+                                             repository, None, permission, False)
+
+
 def log_registry_response(response):
     """Log the HTTP request and response of a registry API call.
     :param Response response: The response object
@@ -355,6 +424,17 @@ def get_authorization_header(username, password):
     return {'Authorization': auth}
 
 
+def _get_registry_session():
+    """The session registry requests are sent over, whose connections are kept for the next requests."""
+    global _registry_session  # pylint: disable=global-statement
+    with _registry_session_lock:
+        if _registry_session is None:
+            from azure.cli.core.util import use_shared_connection_pool
+            _registry_session = requests.Session()
+            use_shared_connection_pool(_registry_session)
+        return _registry_session
+
+
 def request_data_from_registry(http_method,
                                login_server,
                                path,
@@ -386,7 +466,7 @@ def request_data_from_registry(http_method,
         try:
             if file_payload:
                 with open(file_payload, 'rb') as data_payload:
-                    response = requests.request(
+                    response = _get_registry_session().request(
                         method=http_method,
                         url=url,
                         headers=headers,
@@ -395,7 +475,7 @@ def request_data_from_registry(http_method,
                         verify=(not should_disable_connection_verify())
                     )
             else:
-                response = requests.request(
+                response = _get_registry_session().request(
                     method=http_method,
                     url=url,
                     headers=headers,
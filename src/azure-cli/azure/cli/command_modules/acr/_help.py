@@ -34,6 +34,9 @@ examples:
   - name: Queue a local context as a Linux build on arm/v7 architecture, tag it, and push it to the registry.
     text: >
         az acr build -t sample/hello-world:{{.Run.ID}} -r MyRegistry . --platform linux/arm/v7
+  - name: Queue a local context as a build, reusing the context uploaded by the previous build if it did not change.
+    text: >
+        az acr build -t sample/hello-world:{{.Run.ID}} -r MyRegistry . --skip-unchanged
 """
 
 helps['acr check-health'] = """
@@ -370,6 +373,8 @@ short-summary: List repositories in an Azure Container Registry.
 examples:
   - name: List repositories in a given Azure Container Registry.
     text: az acr repository list -n MyRegistry
+  - name: List the repositories in a given Azure Container Registry with their manifests.
+    text: az acr repository list -n MyRegistry --include manifests
 """
 
 helps['acr repository show'] = """
@@ -781,6 +786,9 @@ examples:
   - name: Show logs for the last created run in the registry that built the image 'hello-world'.
     text: >
         az acr task logs -r MyRegistry --image hello-world
+  - name: Follow the logs of all the running runs of a task together.
+    text: >
+        az acr task logs -r MyRegistry -n MyTask --all-running
 """
 
 helps['acr task run'] = """
@@ -63,6 +63,7 @@ def load_arguments(self, _):  # pylint: disable=too-many-statements
         # Overwrite default shorthand of cmd to make availability for acr usage
         c.argument('cmd', options_list=['--__cmd__'])
         c.argument('cmd_value', help="Commands to execute.", options_list=['--cmd'])
+        c.argument('skip_unchanged', help="Reuse the local source code uploaded in the last hour if it did not change since, rather than uploading it again.", action='store_true')
 
     for scope in ['acr create', 'acr update']:
         with self.argument_context(scope, arg_group='Network Rule') as c:
@@ -91,6 +92,7 @@ def load_arguments(self, _):  # pylint: disable=too-many-statements
         c.argument('top', type=int, help='Limit the number of items in the results.')
         c.argument('orderby', help='Order the items in the results. Default to alphabetical order of names.', arg_type=get_enum_type(['time_asc', 'time_desc']))
         c.argument('detail', help='Show detailed information.', action='store_true')
+        c.argument('include', help='Also list the detailed tags or manifests of each repository. Up to `core.max_concurrency` repositories, 10 by default, are listed at a time.', arg_type=get_enum_type(['tags', 'manifests']))
         c.argument('delete_enabled', help='Indicates whether delete operation is allowed.', arg_type=get_three_state_flag())
         c.argument('list_enabled', help='Indicates whether this item shows in list operation results.', arg_type=get_three_state_flag())
         c.argument('read_enabled', help='Indicates whether read operation is allowed.', arg_type=get_three_state_flag())
@@ -187,6 +189,7 @@ def load_arguments(self, _):  # pylint: disable=too-many-statements
         c.argument('run_id', help='The unique run identifier.')
         c.argument('run_status', help='The current status of run.', arg_type=get_enum_type(RunStatus))
         c.argument('no_archive', help='Indicates whether the run should be archived.', arg_type=get_three_state_flag())
+        c.argument('all_running', help='Follow the logs of all the running runs together, prefixing each line with its run ID.', action='store_true')
 
         # Run agent parameters
         c.argument('cpu', type=int, help='The CPU configuration in terms of number of cores required for the run.')
@@ -2,21 +2,28 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
-from io import BytesIO
+import threading
 import time
-from random import uniform
 import colorama
 from knack.util import CLIError
 from knack.log import get_logger
 from msrestazure.azure_exceptions import CloudError
 from azure.storage.blob import AppendBlobService
 from azure.common import AzureHttpError
+from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+from azure.cli.core.commands.polling import PollingBackoff, PollingScheduler
 from ._azure_utils import get_blob_info
 
 logger = get_logger(__name__)
 
-DEFAULT_CHUNK_SIZE = 1024 * 4
+# the most bytes of a log read at once
+DEFAULT_CHUNK_SIZE = 1024 * 1024
 DEFAULT_LOG_TIMEOUT_IN_SEC = 60 * 30  # 30 minutes
+# seconds between two polls of a log which is growing, and at most between two polls of an idle one
+LOG_POLL_INTERVAL = 1
+MAX_LOG_POLL_INTERVAL = 15
+
+_print_lock = threading.Lock()
 
 
 def stream_logs(client,
@@ -25,6 +32,38 @@ def stream_logs(client,
                 resource_group_name,
                 no_format=False,
                 raise_error_on_failure=False):
+    stream_runs_logs(client, [run_id], registry_name, resource_group_name, no_format, raise_error_on_failure)
+
+
+def stream_runs_logs(client,
+                     run_ids,
+                     registry_name,
+                     resource_group_name,
+                     no_format=False,
+                     raise_error_on_failure=False):
+    """ Follow the logs of several runs together. The lines of each run are prefixed with its ID if there are more
+    than one. """
+    import requests
+    from azure.cli.core.util import use_shared_connection_pool
+
+    # the logs are read over one session, so that its connections are reused from one poll to the next
+    session = requests.Session()
+    use_shared_connection_pool(session)
+    followers = []
+    for run_id in run_ids:
+        account_name, endpoint_suffix, container_name, blob_name, sas_token = get_blob_info(
+            _get_log_sas_url(client, run_id, registry_name, resource_group_name))
+        blob_service = AppendBlobService(account_name=account_name,
+                                         sas_token=sas_token,
+                                         endpoint_suffix=endpoint_suffix,
+                                         request_session=session)
+        followers.append(_LogFollower(blob_service, container_name, blob_name,
+                                      prefix='{}: '.format(run_id) if len(run_ids) > 1 else ''))
+
+    _stream_logs(no_format, DEFAULT_LOG_TIMEOUT_IN_SEC, followers, raise_error_on_failure)
+
+
+def _get_log_sas_url(client, run_id, registry_name, resource_group_name):
     log_file_sas = None
     error_msg = "Could not get logs for ID: {}".format(run_id)
 
@@ -41,154 +80,157 @@ def stream_logs(client,
         logger.debug("%s Empty SAS URL.", error_msg)
         raise CLIError(error_msg)
 
-    account_name, endpoint_suffix, container_name, blob_name, sas_token = get_blob_info(
-        log_file_sas)
-
-    _stream_logs(no_format,
-                 DEFAULT_CHUNK_SIZE,
-                 DEFAULT_LOG_TIMEOUT_IN_SEC,
-                 AppendBlobService(
-                     account_name=account_name,
-                     sas_token=sas_token,
-                     endpoint_suffix=endpoint_suffix),
-                 container_name,
-                 blob_name,
-                 raise_error_on_failure)
-
-
-def _stream_logs(no_format,  # pylint: disable=too-many-locals, too-many-statements, too-many-branches
-                 byte_size,
-                 timeout_in_seconds,
-                 blob_service,
-                 container_name,
-                 blob_name,
-                 raise_error_on_failure):
+    return log_file_sas
+
 
+def _stream_logs(no_format, timeout_in_seconds, followers, raise_error_on_failure):
     if not no_format:
         colorama.init()
 
-    stream = BytesIO()
-    metadata = {}
-    start = 0
-    end = byte_size - 1
-    available = 0
-    sleep_time = 1
-    max_sleep_time = 15
-    num_fails = 0
-    num_fails_for_backoff = 3
-    consecutive_sleep_in_sec = 0
-
-    # Try to get the initial properties so there's no waiting.
-    # If the storage call fails, we'll just sleep and try again after.
+    scheduler = PollingScheduler(max_concurrency=min(len(followers), DEFAULT_MAX_CONCURRENCY))
+    for index, follower in enumerate(followers):
+        follower.timeout_in_seconds = timeout_in_seconds
+        # a follower is its own backoff, as its delays depend on what it read
+        scheduler.add(index, follower.poll, follower)
+
     try:
-        props = blob_service.get_blob_properties(
-            container_name=container_name, blob_name=blob_name)
-        metadata = props.metadata
-        available = props.properties.content_length
-    except (AttributeError, AzureHttpError):
-        pass
-
-    while (_blob_is_not_complete(metadata) or start < available):
-        while start < available:
-            # Success! Reset our polling backoff.
-            sleep_time = 1
-            num_fails = 0
-            consecutive_sleep_in_sec = 0
-
-            try:
-                old_byte_size = len(stream.getvalue())
-                blob_service.get_blob_to_stream(
-                    container_name=container_name,
-                    blob_name=blob_name,
-                    start_range=start,
-                    end_range=end,
-                    stream=stream)
-
-                curr_bytes = stream.getvalue()
-                new_byte_size = len(curr_bytes)
-                amount_read = new_byte_size - old_byte_size
-                start += amount_read
-                end = start + byte_size - 1
-
-                # Only scan what's newly read. If nothing is read, default to 0.
-                min_scan_range = max(new_byte_size - amount_read - 1, 0)
-                for i in range(new_byte_size - 1, min_scan_range, -1):
-                    if curr_bytes[i - 1:i + 1] == b'\r\n':
-                        flush = curr_bytes[:i]  # won't print \n
-                        stream = BytesIO()
-                        stream.write(curr_bytes[i + 1:])
-                        print(flush.decode('utf-8', errors='ignore'))
-                        break
-            except AzureHttpError as ae:
-                if ae.status_code != 404:
-                    raise CLIError(ae)
-            except KeyboardInterrupt:
-                curr_bytes = stream.getvalue()
-                if curr_bytes:
-                    print(curr_bytes.decode('utf-8', errors='ignore'))
-                return
+        scheduler.run(float('inf'))
+    except KeyboardInterrupt:
+        for follower in followers:
+            follower.flush()
+        return
 
+    if raise_error_on_failure:
+        for follower in followers:
+            build_status = _get_run_status(follower.metadata).lower()
+            logger.debug("status was: '%s'", build_status)
+            if build_status in ('internalerror', 'failed'):
+                raise CLIError("Run failed")
+            if build_status == 'timedout':
+                raise CLIError("Run timed out")
+            if build_status == 'canceled':
+                raise CLIError("Run was canceled")
+
+
+class _LogFollower(object):
+    """ Prints the complete lines of a log blob as it grows, until the blob is marked complete.
+
+    The size and metadata of the blob come with each range read, so a log which keeps growing is read with one
+    request per poll, and polled every `LOG_POLL_INTERVAL` seconds. An idle log is polled for its properties, less
+    and less often.
+    """
+
+    def __init__(self, blob_service, container_name, blob_name, prefix='', chunk_size=DEFAULT_CHUNK_SIZE):
+        self.blob_service = blob_service
+        self.container_name = container_name
+        self.blob_name = blob_name
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.timeout_in_seconds = DEFAULT_LOG_TIMEOUT_IN_SEC
+        self.metadata = {}
+        self._buffer = b''
+        self._start = 0
+        self._available = 0
+        self._grew = False
+        self._backoff = PollingBackoff(LOG_POLL_INTERVAL, max_interval=MAX_LOG_POLL_INTERVAL)
+        self._idle_in_sec = 0
+
+    def poll(self):
+        """ Read and print what was appended to the log since the last poll. Return whether the log is complete. """
+        start = self._start
+        if not self._grew:
+            self._get_properties()
+        while self._start < self._available or (self._grew and self._start == start):
+            if not self._read():
+                break
+        self._grew = self._start > start
+
+        if not _blob_is_not_complete(self.metadata) and self._start >= self._available:
+            # the log may not end with a line break
+            self.flush()
+            return True, None
+
+        if self._idle_in_sec > self.timeout_in_seconds:
+            # Flush anything remaining in the buffer - this would be the case
+            # if the file has expired and we weren't able to detect any \r\n
+            self.flush()
+            logger.warning("Failed to find any new logs in %d seconds. Client will stop polling for additional logs.",
+                           self._idle_in_sec)
+            return True, None
+        return False, None
+
+    def next_delay(self, response=None):  # pylint: disable=unused-argument
+        if self._grew:
+            # the log is growing, poll it again soon
+            self._backoff = PollingBackoff(LOG_POLL_INTERVAL, max_interval=MAX_LOG_POLL_INTERVAL)
+            self._idle_in_sec = 0
+            return self._backoff.next_delay()
+        delay = self._backoff.next_delay()
+        self._idle_in_sec += delay
+        logger.debug("No new logs in '%s' for %d seconds, polling again in %.1f seconds",
+                     self.blob_name, self._idle_in_sec, delay)
+        return delay
+
+    def _get_properties(self):
         try:
-            props = blob_service.get_blob_properties(
-                container_name=container_name, blob_name=blob_name)
-            metadata = props.metadata
-            available = props.properties.content_length
+            props = self.blob_service.get_blob_properties(
+                container_name=self.container_name, blob_name=self.blob_name)
+            self.metadata = props.metadata
+            self._available = props.properties.content_length
         except AzureHttpError as ae:
+            # the log is not created until the run starts
             if ae.status_code != 404:
                 raise CLIError(ae)
-        except KeyboardInterrupt:
-            if curr_bytes:
-                print(curr_bytes.decode('utf-8', errors='ignore'))
-            return
         except Exception as err:
             raise CLIError(err)
 
-        if consecutive_sleep_in_sec > timeout_in_seconds:
-            # Flush anything remaining in the buffer - this would be the case
-            # if the file has expired and we weren't able to detect any \r\n
-            curr_bytes = stream.getvalue()
-            if curr_bytes:
-                print(curr_bytes.decode('utf-8', errors='ignore'))
+    def _read(self):
+        """ Read the next range of the log. Return whether anything was read. """
+        try:
+            blob = self.blob_service.get_blob_to_bytes(
+                container_name=self.container_name,
+                blob_name=self.blob_name,
+                start_range=self._start,
+                end_range=self._start + self.chunk_size - 1,
+                max_connections=1)
+        except AzureHttpError as ae:
+            # 416 when nothing was appended since the last read
+            if ae.status_code == 416:
+                self._get_properties()
+                return self._start < self._available
+            if ae.status_code != 404:
+                raise CLIError(ae)
+            return False
 
-            logger.warning("Failed to find any new logs in %d seconds. Client will stop polling for additional logs.",
-                           consecutive_sleep_in_sec)
-            return
-
-        # If no new data available but not complete, sleep before trying to process additional data.
-        if (_blob_is_not_complete(metadata) and start >= available):
-            num_fails += 1
-
-            logger.debug(
-                "Failed to find new content %d times in a row", num_fails)
-            if num_fails >= num_fails_for_backoff:
-                num_fails = 0
-                sleep_time = min(sleep_time * 2, max_sleep_time)
-                logger.debug("Resetting failure count to %d", num_fails)
-
-            rnd = uniform(1, 2)  # 1.0 <= x < 2.0
-            total_sleep_time = sleep_time + rnd
-            consecutive_sleep_in_sec += total_sleep_time
-            logger.debug("Base sleep time: %d, random delay: %d, total: %d, consecutive: %d",
-                         sleep_time, rnd, total_sleep_time, consecutive_sleep_in_sec)
-            time.sleep(total_sleep_time)
-
-    # One final check to see if there's anything in the buffer to flush
-    # E.g., metadata has been set and start == available, but the log file
-    # didn't end in \r\n, so we were unable to flush out the final contents.
-    curr_bytes = stream.getvalue()
-    if curr_bytes:
-        print(curr_bytes.decode('utf-8', errors='ignore'))
-
-    build_status = _get_run_status(metadata).lower()
-    logger.debug("status was: '%s'", build_status)
+        self.metadata = blob.metadata
+        self._available = int(blob.properties.content_range.rsplit('/', 1)[1])
+        if not blob.content:
+            return False
+        self._start += len(blob.content)
+        self._write(blob.content)
+        return True
 
-    if raise_error_on_failure:
-        if build_status in ('internalerror', 'failed'):
-            raise CLIError("Run failed")
-        if build_status == 'timedout':
-            raise CLIError("Run timed out")
-        if build_status == 'canceled':
-            raise CLIError("Run was canceled")
+    def _write(self, data):
+        # Only scan what's newly read, from the last byte before it in case it is \r.
+        search_from = max(len(self._buffer) - 1, 0)
+        self._buffer += data
+        index = self._buffer.rfind(b'\r\n', search_from)
+        if index >= 0:
+            lines = self._buffer[:index + 1]  # won't print \n
+            self._buffer = self._buffer[index + 2:]
+            self._print(lines)
+
+    def flush(self):
+        if self._buffer:
+            lines, self._buffer = self._buffer, b''
+            self._print(lines)
+
+    def _print(self, lines):
+        text = lines.decode('utf-8', errors='ignore')
+        if self.prefix:
+            text = '\r\n'.join(self.prefix + line for line in text.split('\r\n'))
+        with _print_lock:
+            print(text)
 
 
 def _blob_is_not_complete(metadata):
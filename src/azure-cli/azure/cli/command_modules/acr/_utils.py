@@ -3,6 +3,9 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import threading
+import time
+
 from knack.util import CLIError
 from knack.log import get_logger
 from knack.prompting import prompt_y_n, NoTTYException
@@ -10,6 +13,8 @@ from azure.cli.core.commands.parameters import get_resources_in_subscription
 
 from ._constants import (
     REGISTRY_RESOURCE_TYPE,
+    REGISTRY_CACHE_FILE,
+    RESOURCE_GROUP_CACHE_TTL,
     ACR_RESOURCE_PROVIDER,
     STORAGE_RESOURCE_TYPE,
     TASK_RESOURCE_ID_TEMPLATE,
@@ -31,6 +36,10 @@ VERSION_2017_10_GA = "2017-10-01"
 
 logger = get_logger(__name__)
 
+# the registry caches, by path
+_registry_caches = {}
+_registry_caches_lock = threading.Lock()
+
 
 def _arm_get_resource_by_name(cli_ctx, resource_name, resource_type):
     """Returns the ARM resource in the current subscription with resource_name.
@@ -76,19 +85,106 @@ def _get_resource_group_name_by_resource_id(resource_id):
 
 
 def get_resource_group_name_by_registry_name(cli_ctx, registry_name,
-                                             resource_group_name=None):
+                                             resource_group_name=None,
+                                             use_cache=True):
     """Returns the resource group name for the container registry.
     :param str registry_name: The name of container registry
     :param str resource_group_name: The name of resource group
+    :param bool use_cache: Whether to use and update the cached resource group of the registry
     """
     if not resource_group_name:
-        arm_resource = _arm_get_resource_by_name(
-            cli_ctx, registry_name, REGISTRY_RESOURCE_TYPE)
-        resource_group_name = _get_resource_group_name_by_resource_id(
-            arm_resource.id)
+        cache_key = _get_resource_group_cache_key(cli_ctx, registry_name) if use_cache else None
+        resource_group_name = get_cache_entry(cli_ctx, cache_key)
+        if not resource_group_name:
+            arm_resource = _arm_get_resource_by_name(
+                cli_ctx, registry_name, REGISTRY_RESOURCE_TYPE)
+            resource_group_name = _get_resource_group_name_by_resource_id(
+                arm_resource.id)
+            set_cache_entry(cli_ctx, cache_key, resource_group_name, RESOURCE_GROUP_CACHE_TTL)
     return resource_group_name
 
 
+def run_with_resource_group(cli_ctx, registry_name, resource_group_name, operation):
+    """Returns the result of operation on the registry, resolving its resource group if not specified. If the
+    registry is not found in its cached resource group, the group is resolved again and operation is retried.
+    :param str registry_name: The name of container registry
+    :param str resource_group_name: The name of resource group
+    :param callable operation: Takes the resource group name
+    """
+    from msrestazure.azure_exceptions import CloudError
+    resolved = not resource_group_name
+    resource_group_name = get_resource_group_name_by_registry_name(
+        cli_ctx, registry_name, resource_group_name)
+    try:
+        return operation(resource_group_name)
+    except CloudError as e:
+        if not resolved or e.status_code != 404:
+            raise
+        # the registry may have been moved or deleted since its resource group was cached
+        logger.debug("Registry '%s' not found in resource group '%s'. Exception: %s",
+                     registry_name, resource_group_name, str(e))
+        remove_resource_group_cache_entry(cli_ctx, registry_name)
+        return operation(get_resource_group_name_by_registry_name(cli_ctx, registry_name))
+
+
+def remove_resource_group_cache_entry(cli_ctx, registry_name):
+    remove_cache_entry(cli_ctx, _get_resource_group_cache_key(cli_ctx, registry_name))
+
+
+def _get_resource_group_cache_key(cli_ctx, registry_name):
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    try:
+        return 'resourceGroup/{}/{}'.format(get_subscription_id(cli_ctx), registry_name).lower()
+    except CLIError:
+        # not logged in, the lookup fails anyway
+        return None
+
+
+def get_cache_entry(cli_ctx, key):
+    """Returns the value cached for key, unless it expired.
+    :param str key: The key of the entry, None for no entry
+    """
+    if not key:
+        return None
+    entry = _get_registry_cache(cli_ctx).get(key)
+    if not entry or entry.get('expires', 0) < time.time():
+        return None
+    return entry.get('value')
+
+
+def set_cache_entry(cli_ctx, key, value, ttl):
+    """Caches value for key for ttl seconds, removing the expired entries.
+    :param str key: The key of the entry, None for no entry
+    """
+    if not key:
+        return
+    cache = _get_registry_cache(cli_ctx)
+    now = time.time()
+    for expired_key in [k for k, v in cache.items() if v.get('expires', 0) < now]:
+        del cache[expired_key]
+    cache[key] = {'value': value, 'expires': now + ttl}
+
+
+def remove_cache_entry(cli_ctx, key):
+    cache = _get_registry_cache(cli_ctx)
+    if key and key in cache:
+        del cache[key]
+
+
+def _get_registry_cache(cli_ctx):
+    # one per process, written after the command
+    import os
+    from azure.cli.core._session import Session
+    path = os.path.join(cli_ctx.config.config_dir, REGISTRY_CACHE_FILE)
+    with _registry_caches_lock:
+        cache = _registry_caches.get(path)
+        if cache is None:
+            # holds refresh tokens, so only the user may read it
+            cache = _registry_caches[path] = Session(file_mode=0o600)
+            cache.load(path)
+        return cache
+
+
 def get_resource_id_by_storage_account_name(cli_ctx, storage_account_name):
     """Returns the resource id for the storage account.
     :param str storage_account_name: The name of storage account
@@ -103,11 +199,9 @@ def get_registry_by_name(cli_ctx, registry_name, resource_group_name=None):
     :param str registry_name: The name of container registry
     :param str resource_group_name: The name of resource group
     """
-    resource_group_name = get_resource_group_name_by_registry_name(
-        cli_ctx, registry_name, resource_group_name)
     client = get_acr_service_client(cli_ctx, VERSION_2017_10_GA).registries
-
-    return client.get(resource_group_name, registry_name), resource_group_name
+    return run_with_resource_group(cli_ctx, registry_name, resource_group_name,
+                                   lambda group: (client.get(group, registry_name), group))
 
 
 def get_registry_from_name_or_login_server(cli_ctx, login_server, registry_name=None):
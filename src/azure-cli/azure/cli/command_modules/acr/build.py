@@ -39,7 +39,8 @@ def acr_build(cmd,  # pylint: disable=too-many-locals
               no_wait=False,
               platform=None,
               target=None,
-              auth_mode=None):
+              auth_mode=None,
+              skip_unchanged=False):
     _, resource_group_name = validate_managed_registry(
         cmd, registry_name, resource_group_name, BUILD_NOT_SUPPORTED)
 
@@ -65,13 +66,16 @@ def acr_build(cmd,  # pylint: disable=too-many-locals
             # NOTE: os.path.basename is unable to parse "\" in the file path
             original_docker_file_name = os.path.basename(
                 docker_file_path.replace("\\", "/"))
+            # the context of an unchanged build must be the same to be reused, so the name is derived from the
+            # content of the docker file then
             docker_file_in_tar = '{}_{}'.format(
-                uuid.uuid4().hex, original_docker_file_name)
+                _get_file_hash(docker_file_path) if skip_unchanged else uuid.uuid4().hex, original_docker_file_name)
 
             source_location = upload_source_code(
                 client_registries, registry_name, resource_group_name,
                 source_location, tar_file_path,
-                docker_file_path, docker_file_in_tar)
+                docker_file_path, docker_file_in_tar,
+                cli_ctx=cmd.cli_ctx, skip_unchanged=skip_unchanged)
             # For local source, the docker file is added separately into tar as the new file name (docker_file_in_tar)
             # So we need to update the docker_file_path
             docker_file_path = docker_file_in_tar
@@ -159,3 +163,9 @@ def _get_push_enabled_status(no_push, image_names):
 def _check_local_docker_file(docker_file_path):
     if not os.path.isfile(docker_file_path):
         raise CLIError("Unable to find '{}'.".format(docker_file_path))
+
+
+def _get_file_hash(file_path):
+    import hashlib
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:32]
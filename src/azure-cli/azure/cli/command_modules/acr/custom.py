@@ -17,7 +17,9 @@ from ._utils import (
     validate_managed_registry,
     validate_sku_update,
     get_resource_group_name_by_registry_name,
-    get_resource_id_by_storage_account_name
+    get_resource_id_by_storage_account_name,
+    remove_resource_group_cache_entry,
+    run_with_resource_group
 )
 from ._docker_utils import get_login_credentials
 from .network_rule import NETWORK_RULE_NOT_SUPPORTED
@@ -105,13 +107,17 @@ def acr_create(cmd,
 
 
 def acr_delete(cmd, client, registry_name, resource_group_name=None):
-    resource_group_name = get_resource_group_name_by_registry_name(cmd.cli_ctx, registry_name, resource_group_name)
-    return client.delete(resource_group_name, registry_name)
+    # deleting a registry missing from a stale cached resource group would succeed without deleting anything
+    resource_group_name = get_resource_group_name_by_registry_name(cmd.cli_ctx, registry_name, resource_group_name,
+                                                                   use_cache=False)
+    result = client.delete(resource_group_name, registry_name)
+    remove_resource_group_cache_entry(cmd.cli_ctx, registry_name)
+    return result
 
 
 def acr_show(cmd, client, registry_name, resource_group_name=None):
-    resource_group_name = get_resource_group_name_by_registry_name(cmd.cli_ctx, registry_name, resource_group_name)
-    return client.get(resource_group_name, registry_name)
+    return run_with_resource_group(cmd.cli_ctx, registry_name, resource_group_name,
+                                   lambda group: client.get(group, registry_name))
 
 
 def acr_update_custom(cmd,
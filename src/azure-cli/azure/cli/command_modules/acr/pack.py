@@ -47,7 +47,7 @@ def acr_pack_build(cmd,  # pylint: disable=too-many-locals
 
     client_registries = cf_acr_registries_tasks(cmd.cli_ctx)
     source_location = prepare_source_location(
-        source_location, client_registries, registry_name, resource_group_name)
+        source_location, client_registries, registry_name, resource_group_name, cli_ctx=cmd.cli_ctx)
     if not source_location:
         raise CLIError('Building with Buildpacks requires a valid source location.')
 
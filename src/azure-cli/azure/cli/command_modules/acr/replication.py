@@ -6,7 +6,7 @@
 from azure.cli.core.util import CLIError
 
 from ._utils import (
-    get_resource_group_name_by_registry_name,
+    run_with_resource_group,
     validate_premium_registry
 )
 
@@ -86,10 +86,10 @@ def acr_replication_update_set(cmd,
                                registry_name,
                                resource_group_name=None,
                                parameters=None):
-    resource_group_name = get_resource_group_name_by_registry_name(
-        cmd.cli_ctx, registry_name, resource_group_name)
-    return client.update(
-        resource_group_name=resource_group_name,
-        registry_name=registry_name,
-        replication_name=replication_name,
-        tags=parameters.tags)
+    return run_with_resource_group(
+        cmd.cli_ctx, registry_name, resource_group_name,
+        lambda group: client.update(
+            resource_group_name=group,
+            registry_name=registry_name,
+            replication_name=replication_name,
+            tags=parameters.tags))
@@ -12,7 +12,13 @@ from knack.util import CLIError
 from knack.log import get_logger
 
 from ._utils import user_confirmation
-from ._docker_utils import request_data_from_registry, get_access_credentials, RegistryException
+from ._docker_utils import (
+    request_data_from_registry,
+    get_access_credentials,
+    get_login_credentials,
+    get_scoped_access_credentials,
+    RegistryException
+)
 
 logger = get_logger(__name__)
 
@@ -120,7 +126,11 @@ def acr_repository_list(cmd,
                         resource_group_name=None,  # pylint: disable=unused-argument
                         tenant_suffix=None,
                         username=None,
-                        password=None):
+                        password=None,
+                        include=None):
+    if include:
+        return _list_repositories_with_items(cmd, registry_name, include, top, tenant_suffix, username, password)
+
     login_server, username, password = get_access_credentials(
         cmd=cmd,
         registry_name=registry_name,
@@ -137,6 +147,55 @@ def acr_repository_list(cmd,
         top=top)
 
 
+def _list_repositories_with_items(cmd, registry_name, include, top, tenant_suffix, username, password):
+    """List the repositories with their tags or manifests, which are listed for many repositories at a time.
+    The pages of one list follow each other, as each page links to the next.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+
+    # log in once, and get a token for each repository from there
+    login_server, username, password = get_login_credentials(
+        cmd=cmd,
+        registry_name=registry_name,
+        tenant_suffix=tenant_suffix,
+        username=username,
+        password=password)
+
+    catalog_username, catalog_password = get_scoped_access_credentials(login_server, username, password)
+    repositories = _obtain_data_from_registry(
+        login_server=login_server,
+        path='/v2/_catalog',
+        username=catalog_username,
+        password=catalog_password,
+        result_index='repositories',
+        top=top)
+
+    def _list_items(repository):
+        repository_username, repository_password = get_scoped_access_credentials(
+            login_server, username, password, repository=repository, permission='pull')
+        try:
+            items = _obtain_data_from_registry(
+                login_server=login_server,
+                path=_get_tag_path(repository) if include == 'tags' else _get_manifest_path(repository),
+                username=repository_username,
+                password=repository_password,
+                result_index=include)
+        except RegistryException as e:
+            # the repository was deleted since it was listed
+            if e.status_code != 404:
+                raise
+            logger.warning("Skipping repository '%s'. %s", repository, e)
+            return None
+        return {'name': repository, include: items}
+
+    if not repositories:
+        return []
+    max_concurrency = cmd.cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(repositories))) as executor:
+        return [result for result in executor.map(_list_items, repositories) if result]
+
+
 def acr_repository_show_tags(cmd,
                              registry_name,
                              repository,
@@ -42,7 +42,8 @@ def acr_run(cmd,  # pylint: disable=too-many-locals
             timeout=None,
             resource_group_name=None,
             platform=None,
-            auth_mode=None):
+            auth_mode=None,
+            skip_unchanged=False):
 
     _, resource_group_name = validate_managed_registry(
         cmd, registry_name, resource_group_name, RUN_NOT_SUPPORTED)
@@ -55,7 +56,8 @@ def acr_run(cmd,  # pylint: disable=too-many-locals
 
     client_registries = cf_acr_registries_tasks(cmd.cli_ctx)
     source_location = prepare_source_location(
-        source_location, client_registries, registry_name, resource_group_name)
+        source_location, client_registries, registry_name, resource_group_name,
+        cli_ctx=cmd.cli_ctx, skip_unchanged=skip_unchanged)
 
     platform_os, platform_arch, platform_variant = get_validate_platform(cmd, platform)
 
@@ -118,7 +120,8 @@ def acr_run(cmd,  # pylint: disable=too-many-locals
     return stream_logs(client, run_id, registry_name, resource_group_name, no_format, True)
 
 
-def prepare_source_location(source_location, client_registries, registry_name, resource_group_name):
+def prepare_source_location(source_location, client_registries, registry_name, resource_group_name,
+                            cli_ctx=None, skip_unchanged=False):
     if source_location.lower() == NULL_SOURCE_LOCATION:
         source_location = None
     elif os.path.exists(source_location):
@@ -132,7 +135,8 @@ def prepare_source_location(source_location, client_registries, registry_name, r
         try:
             source_location = upload_source_code(
                 client_registries, registry_name, resource_group_name,
-                source_location, tar_file_path, "", "")
+                source_location, tar_file_path, "", "",
+                cli_ctx=cli_ctx, skip_unchanged=skip_unchanged)
         except Exception as err:
             raise CLIError(err)
         finally:
@@ -18,7 +18,7 @@ from ._utils import (
     remove_timer_trigger,
     get_task_id_from_task_name
 )
-from ._stream_utils import stream_logs
+from ._stream_utils import stream_logs, stream_runs_logs
 
 logger = get_logger(__name__)
 
@@ -880,10 +880,31 @@ def acr_task_logs(cmd,
                   run_id=None,
                   task_name=None,
                   image=None,
-                  resource_group_name=None):
+                  resource_group_name=None,
+                  all_running=False):
     _, resource_group_name = validate_managed_registry(
         cmd, registry_name, resource_group_name, TASK_NOT_SUPPORTED)
 
+    if all_running:
+        if run_id:
+            raise CLIError("--run-id and --all-running can not be used together.")
+        RunStatus = cmd.get_models('RunStatus')
+        running_runs = acr_task_list_runs(cmd,
+                                          client,
+                                          registry_name,
+                                          top=None,
+                                          task_name=task_name,
+                                          run_status=RunStatus.running.value,
+                                          image=image,
+                                          resource_group_name=resource_group_name)
+        run_ids = [run.run_id for run in running_runs]
+        if not run_ids:
+            raise CLIError(_get_list_runs_message(base_message="Could not find any running run",
+                                                  task_name=task_name,
+                                                  image=image))
+        logger.warning("Run IDs: %s", ', '.join(run_ids))
+        return stream_runs_logs(client, run_ids, registry_name, resource_group_name)
+
     if not run_id:
         # show logs for the last run
         paged_runs = acr_task_list_runs(cmd,
@@ -0,0 +1,111 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+import mock
+
+from azure.cli.core.mock import DummyCli
+from azure.cli.command_modules.acr import _archive_utils
+
+
+class AcrArchiveUtilsTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.temp_dir, 'src')
+        self.tar_file_path = os.path.join(self.temp_dir, 'context.tar.gz')
+        self._write('Dockerfile', 'FROM scratch\n')
+        self._write(os.path.join('app', 'main.go'), 'package main\n')
+        self._write(os.path.join('.git', 'HEAD'), 'ref: refs/heads/master\n')
+        self._write(os.path.join('vendor', 'lib', 'lib.go'), 'package lib\n')
+        self._write(os.path.join('vendor', 'lib', 'README.md'), 'lib\n')
+        self._write(os.path.join('logs', 'build.log'), 'log\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.src_dir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def _pack(self, max_workers=1):
+        with mock.patch('os.listdir', side_effect=os.listdir) as listdir:
+            context_hash = _archive_utils._pack_source_code(self.src_dir, self.tar_file_path, '', '',
+                                                            max_workers=max_workers)
+        listed = sorted(os.path.relpath(c[0][0], self.src_dir).replace(os.sep, '/') for c in listdir.call_args_list)
+        with tarfile.open(self.tar_file_path, 'r:gz') as tar:
+            names = sorted(name for name in tar.getnames() if name)
+        return context_hash, names, listed
+
+    def test_pack_prunes_ignored_directories(self):
+        self._write('.dockerignore', 'vendor\nlogs\n!vendor/**/*.go\n')
+        _, names, listed = self._pack()
+        self.assertEqual(names, ['.dockerignore', 'Dockerfile', 'app', 'app/main.go', 'vendor/lib/lib.go'])
+        # the children of vendor may be included again, unlike those of .git and logs
+        self.assertEqual(listed, ['.', 'app', 'vendor', 'vendor/lib'])
+
+        # the exception has a lower priority than the rule ignoring vendor now
+        self._write('.dockerignore', '!vendor/**/*.go\nvendor\nlogs\n')
+        _, names, listed = self._pack()
+        self.assertEqual(names, ['.dockerignore', 'Dockerfile', 'app', 'app/main.go'])
+        self.assertEqual(listed, ['.', 'app'])
+
+    def test_ignore_rules_match_in_priority_order(self):
+        ignore_list = [_archive_utils.IgnoreRule('!rule{}.txt'.format(i)) for i in range(200)] + \
+            [_archive_utils.IgnoreRule('*.txt')]
+        match = _archive_utils._compile_ignore_rules(ignore_list)
+        self.assertEqual(match('rule150.txt', 201), 150)
+        self.assertEqual(match('other.txt', 201), 200)
+        self.assertIsNone(match('rule150.txt', 150))
+        self.assertIsNone(match('other.md', 201))
+
+    def test_pack_gzips_in_parallel_blocks(self):
+        for i in range(20):
+            self._write(os.path.join('data', 'file{}.txt'.format(i)), 'content {}\n'.format(i) * 20000)
+        context_hash, names, _ = self._pack()
+        parallel_hash, parallel_names, _ = self._pack(max_workers=4)
+        # the same context gives the same hash however it is compressed
+        self.assertEqual(parallel_hash, context_hash)
+        self.assertEqual(parallel_names, names)
+        with gzip.open(self.tar_file_path, 'rb') as f:
+            with tarfile.open(fileobj=io.BytesIO(f.read())) as tar:
+                content = tar.extractfile('data/file19.txt').read()
+        self.assertEqual(content, b'content 19\n' * 20000)
+
+    @mock.patch('azure.cli.command_modules.acr._archive_utils.BlockBlobService', autospec=True)
+    def test_upload_skips_unchanged_context(self, blob_service):
+        cli_ctx = DummyCli()
+        cli_ctx.config.config_dir = self.temp_dir
+        client = mock.MagicMock()
+        client.get_build_source_upload_url.return_value = mock.MagicMock(
+            upload_url='https://account.blob.core.windows.net/container/blob?sig=token', relative_path='source/1')
+
+        def _upload():
+            return _archive_utils.upload_source_code(client, 'registry', 'rg', self.src_dir, self.tar_file_path,
+                                                     os.path.join(self.src_dir, 'Dockerfile'), 'Dockerfile',
+                                                     cli_ctx=cli_ctx, skip_unchanged=True)
+
+        self.assertEqual(_upload(), 'source/1')
+        self.assertEqual(_upload(), 'source/1')
+        self.assertEqual(client.get_build_source_upload_url.call_count, 1)
+        blob_service.return_value.create_blob_from_path.assert_called_once_with(
+            container_name='container', blob_name='blob', file_path=self.tar_file_path, max_connections=mock.ANY)
+
+        client.get_build_source_upload_url.return_value.relative_path = 'source/2'
+        self._write(os.path.join('app', 'main.go'), 'package main\n\nfunc main() {}\n')
+        self.assertEqual(_upload(), 'source/2')
+        self.assertEqual(client.get_build_source_upload_url.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,16 +4,20 @@
 # --------------------------------------------------------------------------------------------
 
 try:
-    from urllib.parse import urlencode
+    from urllib.parse import urlencode, unquote
 except ImportError:
-    from urllib import urlencode
+    from urllib import urlencode, unquote
 import json
+import os
+import shutil
+import tempfile
 import unittest
 import mock
 import sys
 
 from azure.mgmt.containerregistry.v2018_09_01.models import Registry, Sku
 
+from azure.cli.command_modules.acr.custom import acr_show, acr_delete
 from azure.cli.command_modules.acr.repository import (
     acr_repository_list,
     acr_repository_show_tags,
@@ -37,6 +41,7 @@ from azure.cli.command_modules.acr._docker_utils import (
 )
 from azure.cli.command_modules.acr._docker_utils import ResourceNotFound
 from azure.cli.core.mock import DummyCli
+from azure.cli.core._session import flush_sessions
 
 
 TEST_TENANT = 'testtenant'
@@ -50,7 +55,7 @@ TEST_REPOSITORY = 'testrepository'
 class AcrMockCommandsTests(unittest.TestCase):
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_repository_list(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -64,6 +69,7 @@ class AcrMockCommandsTests(unittest.TestCase):
         mock_get_access_credentials.return_value = 'testregistry.azurecr.io', 'username', 'password'
         acr_repository_list(cmd, 'testregistry')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/v2/_catalog',
             headers=get_authorization_header('username', 'password'),
@@ -78,6 +84,7 @@ class AcrMockCommandsTests(unittest.TestCase):
         mock_get_access_credentials.return_value = 'testregistry.azurecr.io', EMPTY_GUID, 'password'
         acr_repository_list(cmd, 'testregistry', top=10)
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/v2/_catalog',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -89,7 +96,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_repository_show_tags(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -115,6 +122,7 @@ class AcrMockCommandsTests(unittest.TestCase):
 
         acr_repository_show_tags(cmd, 'testregistry', 'testrepository')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_tags',
             headers=get_authorization_header('username', 'password'),
@@ -132,6 +140,7 @@ class AcrMockCommandsTests(unittest.TestCase):
 
         acr_repository_show_tags(cmd, 'testregistry', 'testrepository', top=10, orderby='time_desc', detail=True)
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_tags',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -143,7 +152,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_repository_show_manifests(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -166,6 +175,7 @@ class AcrMockCommandsTests(unittest.TestCase):
 
         acr_repository_show_manifests(cmd, 'testregistry', 'testrepository')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_manifests',
             headers=get_authorization_header('username', 'password'),
@@ -181,6 +191,7 @@ class AcrMockCommandsTests(unittest.TestCase):
 
         acr_repository_show_manifests(cmd, 'testregistry', 'testrepository', top=10, orderby='time_desc', detail=True)
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_manifests',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -192,7 +203,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_repository_show(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -212,6 +223,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                             registry_name='testregistry',
                             repository='testrepository')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/acr/v1/testrepository',
             headers=get_authorization_header('username', 'password'),
@@ -224,6 +236,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                             registry_name='testregistry',
                             image='testrepository:testtag')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_tags/testtag',
             headers=get_authorization_header('username', 'password'),
@@ -236,6 +249,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                             registry_name='testregistry',
                             image='testrepository@sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_manifests/sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7',
             headers=get_authorization_header('username', 'password'),
@@ -244,7 +258,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_repository_show(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -265,6 +279,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                               repository='testrepository',
                               write_enabled='false')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='patch',
             url='https://testregistry.azurecr.io/acr/v1/testrepository',
             headers=get_authorization_header('username', 'password'),
@@ -280,6 +295,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                               image='testrepository:testtag',
                               write_enabled='false')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='patch',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_tags/testtag',
             headers=get_authorization_header('username', 'password'),
@@ -295,6 +311,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                               image='testrepository@sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7',
                               write_enabled='false')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='patch',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_manifests/sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7',
             headers=get_authorization_header('username', 'password'),
@@ -306,7 +323,7 @@ class AcrMockCommandsTests(unittest.TestCase):
 
     @mock.patch('azure.cli.command_modules.acr.repository.get_access_credentials', autospec=True)
     @mock.patch('azure.cli.command_modules.acr.repository._get_manifest_digest', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_repository_delete(self, mock_requests_delete, mock_get_manifest_digest, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -324,6 +341,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                               repository='testrepository',
                               yes=True)
         mock_requests_delete.assert_called_with(
+            mock.ANY,
             method='delete',
             url='https://testregistry.azurecr.io/acr/v1/testrepository',
             headers=get_authorization_header('username', 'password'),
@@ -337,6 +355,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                               image='testrepository:testtag',
                               yes=True)
         mock_requests_delete.assert_called_with(
+            mock.ANY,
             method='delete',
             url='https://testregistry.azurecr.io/v2/testrepository/manifests/sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7',
             headers=get_authorization_header('username', 'password'),
@@ -350,6 +369,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                               image='testrepository@sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7',
                               yes=True)
         mock_requests_delete.assert_called_with(
+            mock.ANY,
             method='delete',
             url='https://testregistry.azurecr.io/v2/testrepository/manifests/sha256:c5515758d4c5e1e838e9cd307f6c6a0d620b5e07e6f927b07d05f6d12a1ac8d7',
             headers=get_authorization_header('username', 'password'),
@@ -362,6 +382,7 @@ class AcrMockCommandsTests(unittest.TestCase):
                              registry_name='testregistry',
                              image='testrepository:testtag')
         mock_requests_delete.assert_called_with(
+            mock.ANY,
             method='delete',
             url='https://testregistry.azurecr.io/acr/v1/testrepository/_tags/testtag',
             headers=get_authorization_header('username', 'password'),
@@ -491,7 +512,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_helm_list(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -520,6 +541,7 @@ class AcrMockCommandsTests(unittest.TestCase):
         mock_get_access_credentials.return_value = 'testregistry.azurecr.io', EMPTY_GUID, 'password'
         acr_helm_list(cmd, 'testregistry', repository='testrepository')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/helm/v1/testrepository/_charts',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -528,7 +550,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_helm_show(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -553,6 +575,7 @@ class AcrMockCommandsTests(unittest.TestCase):
         # Show all versions of a chart
         acr_helm_show(cmd, 'testregistry', 'mychart1', repository='testrepository')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/helm/v1/testrepository/_charts/mychart1',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -563,6 +586,7 @@ class AcrMockCommandsTests(unittest.TestCase):
         # Show one version of a chart
         acr_helm_show(cmd, 'testregistry', 'mychart1', version='0.2.1', repository='testrepository')
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='get',
             url='https://testregistry.azurecr.io/helm/v1/testrepository/_charts/mychart1/0.2.1',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -571,7 +595,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_helm_delete(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -585,6 +609,7 @@ class AcrMockCommandsTests(unittest.TestCase):
         # Delete all versions of a chart
         acr_helm_delete(cmd, 'testregistry', 'mychart1', repository='testrepository', yes=True)
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='delete',
             url='https://testregistry.azurecr.io/helm/v1/testrepository/_charts/mychart1',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -595,6 +620,7 @@ class AcrMockCommandsTests(unittest.TestCase):
         # Delete one version of a chart
         acr_helm_delete(cmd, 'testregistry', 'mychart1', version='0.2.1', repository='testrepository', yes=True)
         mock_requests_get.assert_called_with(
+            mock.ANY,
             method='delete',
             url='https://testregistry.azurecr.io/helm/v1/testrepository/_blobs/mychart1-0.2.1.tgz',
             headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -603,7 +629,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             verify=mock.ANY)
 
     @mock.patch('azure.cli.command_modules.acr.helm.get_access_credentials', autospec=True)
-    @mock.patch('requests.request', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
     def test_helm_push(self, mock_requests_get, mock_get_access_credentials):
         cmd = self._setup_cmd()
 
@@ -621,6 +647,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             mock_open.return_value = mock.MagicMock()
             acr_helm_push(cmd, 'testregistry', './charts/mychart1-0.2.1.tgz', repository='testrepository')
             mock_requests_get.assert_called_with(
+                mock.ANY,
                 method='put',
                 url='https://testregistry.azurecr.io/helm/v1/testrepository/_blobs/mychart1-0.2.1.tgz',
                 headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -633,6 +660,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             mock_open.return_value = mock.MagicMock()
             acr_helm_push(cmd, 'testregistry', 'mychart1-0.2.1.tgz.prov', repository='testrepository')
             mock_requests_get.assert_called_with(
+                mock.ANY,
                 method='put',
                 url='https://testregistry.azurecr.io/helm/v1/testrepository/_blobs/mychart1-0.2.1.tgz.prov',
                 headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -645,6 +673,7 @@ class AcrMockCommandsTests(unittest.TestCase):
             mock_open.return_value = mock.MagicMock()
             acr_helm_push(cmd, 'testregistry', './charts/mychart1-0.2.1.tgz', repository='testrepository', force=True)
             mock_requests_get.assert_called_with(
+                mock.ANY,
                 method='patch',
                 url='https://testregistry.azurecr.io/helm/v1/testrepository/_blobs/mychart1-0.2.1.tgz',
                 headers=get_authorization_header(EMPTY_GUID, 'password'),
@@ -652,9 +681,114 @@ class AcrMockCommandsTests(unittest.TestCase):
                 data=mock_open.return_value.__enter__.return_value,
                 verify=mock.ANY)
 
+    @mock.patch('azure.cli.command_modules.acr.repository.get_login_credentials', autospec=True)
+    @mock.patch('requests.post', autospec=True)
+    @mock.patch('requests.Session.request', autospec=True)
+    def test_repository_list_include_manifests(self, mock_requests_get, mock_requests_post, mock_get_login_credentials):
+        cmd = self._setup_cmd()
+        mock_get_login_credentials.return_value = 'testregistry.azurecr.io', EMPTY_GUID, TEST_ACR_REFRESH_TOKEN
+
+        def _get_token(url, data, headers, verify):
+            scope = dict(x.split('=') for x in data.split('&'))['scope']
+            return self._json_response({'access_token': unquote(scope)})
+        mock_requests_post.side_effect = _get_token
+
+        def _get_data(session, method, url, headers, params, json, verify):
+            if url.endswith('/v2/_catalog'):
+                if params.get('last'):
+                    return self._json_response({'repositories': ['repo3']})
+                return self._json_response({'repositories': ['repo1', 'repo2']},
+                                           link='</v2/_catalog?last=repo2&n=2>; rel="next"')
+            repository = url.split('/')[-2]
+            if repository == 'repo2':
+                # deleted since it was listed
+                response = self._json_response({})
+                response.status_code = 404
+                return response
+            self.assertEqual(headers, get_authorization_header(EMPTY_GUID, 'repository:{}:pull'.format(repository)))
+            return self._json_response({'manifests': [{'digest': repository}]})
+        mock_requests_get.side_effect = _get_data
+
+        self.assertEqual(acr_repository_list(cmd, 'testregistry', include='manifests'), [
+            {'name': 'repo1', 'manifests': [{'digest': 'repo1'}]},
+            {'name': 'repo3', 'manifests': [{'digest': 'repo3'}]}])
+        # logged in once
+        mock_get_login_credentials.assert_called_once_with(
+            cmd=cmd, registry_name='testregistry', tenant_suffix=None, username=None, password=None)
+        self.assertEqual(sorted(c[1]['url'] for c in mock_requests_get.call_args_list), [
+            'https://testregistry.azurecr.io/acr/v1/repo1/_manifests',
+            'https://testregistry.azurecr.io/acr/v1/repo2/_manifests',
+            'https://testregistry.azurecr.io/acr/v1/repo3/_manifests',
+            'https://testregistry.azurecr.io/v2/_catalog',
+            'https://testregistry.azurecr.io/v2/_catalog'])
+
+    @mock.patch('azure.cli.command_modules.acr._utils.get_acr_service_client', autospec=True)
+    @mock.patch('azure.cli.command_modules.acr._utils._arm_get_resource_by_name', autospec=True)
+    @mock.patch('azure.cli.core.commands.client_factory.get_subscription_id', autospec=True)
+    def test_registry_resource_group_is_cached(self, mock_get_subscription_id, mock_get_resource, mock_get_client):
+        from msrestazure.azure_exceptions import CloudError
+        from azure.cli.command_modules.acr._utils import get_registry_by_name
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        self.addCleanup(flush_sessions)
+        cli_ctx = DummyCli()
+        cli_ctx.config.config_dir = temp_dir
+        mock_get_subscription_id.return_value = TEST_SUBSCRIPTION
+        mock_get_resource.return_value = mock.MagicMock(
+            id='/subscriptions/{}/resourceGroups/rg1/providers/Microsoft.ContainerRegistry/registries/'
+               'testregistry'.format(TEST_SUBSCRIPTION))
+        registries = mock_get_client.return_value.registries
+
+        self.assertEqual(get_registry_by_name(cli_ctx, 'testregistry'), (registries.get.return_value, 'rg1'))
+        self.assertEqual(get_registry_by_name(cli_ctx, 'testregistry'), (registries.get.return_value, 'rg1'))
+        self.assertEqual(mock_get_resource.call_count, 1)
+
+        # the registry moved
+        mock_get_resource.return_value.id = mock_get_resource.return_value.id.replace('rg1', 'rg2')
+        registries.get.side_effect = [CloudError(mock.MagicMock(status_code=404), error='not found'), 'registry']
+        self.assertEqual(get_registry_by_name(cli_ctx, 'testregistry'), ('registry', 'rg2'))
+        registries.get.assert_called_with('rg2', 'testregistry')
+        self.assertEqual(mock_get_resource.call_count, 2)
+
+        # the cache holds refresh tokens too
+        flush_sessions()
+        if os.name != 'nt':
+            self.assertEqual(os.stat(os.path.join(temp_dir, 'acrCache.json')).st_mode & 0o777, 0o600)
+
+        # the same fallback applies to the commands which take the registry name
+        cmd = mock.MagicMock(cli_ctx=cli_ctx)
+        mock_get_resource.return_value.id = mock_get_resource.return_value.id.replace('rg2', 'rg3')
+        client = mock.MagicMock()
+        client.get.side_effect = [CloudError(mock.MagicMock(status_code=404), error='not found'), 'registry']
+        self.assertEqual(acr_show(cmd, client, 'testregistry'), 'registry')
+        client.get.assert_called_with('rg3', 'testregistry')
+        self.assertEqual(mock_get_resource.call_count, 3)
+
+        # a deletion looks the resource group up, and forgets it
+        mock_get_resource.return_value.id = mock_get_resource.return_value.id.replace('rg3', 'rg4')
+        acr_delete(cmd, client, 'testregistry')
+        client.delete.assert_called_once_with('rg4', 'testregistry')
+        client.get.side_effect = None
+        acr_show(cmd, client, 'testregistry')
+        self.assertEqual(mock_get_resource.call_count, 5)
+
+    @staticmethod
+    def _json_response(content, link=None):
+        response = mock.MagicMock()
+        response.headers = {'link': link} if link else {}
+        response.status_code = 200
+        response.json.return_value = content
+        response.content = json.dumps(content).encode()
+        return response
+
     def _setup_cmd(self):
         cmd = mock.MagicMock()
         cmd.cli_ctx = DummyCli()
+        # keep the registry cache out of the user's configuration directory
+        cmd.cli_ctx.config.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cmd.cli_ctx.config.config_dir)
+        self.addCleanup(flush_sessions)
         mock_sku = mock.MagicMock()
         mock_sku.classic.value = 'Classic'
         mock_sku.basic.value = 'Basic'
@@ -0,0 +1,83 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import unittest
+
+import mock
+
+from azure.common import AzureHttpError
+from knack.util import CLIError
+
+from azure.cli.command_modules.acr import _stream_utils
+
+
+class _FakeLogBlob(object):
+    """ A log blob which is appended the next of `appends` each time its properties are got. """
+
+    def __init__(self, appends, status='Succeeded'):
+        self.appends = list(appends)
+        self.status = status
+        self.content = b''
+        self.calls = []
+
+    @property
+    def metadata(self):
+        return {} if self.appends else {'Complete': self.status}
+
+    def get_blob_properties(self, container_name, blob_name):
+        self.calls.append('properties')
+        if self.appends:
+            self.content += self.appends.pop(0)
+        return mock.MagicMock(metadata=self.metadata, properties=mock.MagicMock(content_length=len(self.content)))
+
+    def get_blob_to_bytes(self, container_name, blob_name, start_range, end_range, max_connections):
+        self.calls.append('read')
+        if start_range >= len(self.content):
+            raise AzureHttpError('InvalidRange', 416)
+        content = self.content[start_range:end_range + 1]
+        return mock.MagicMock(content=content, metadata=self.metadata, properties=mock.MagicMock(
+            content_range='bytes {}-{}/{}'.format(start_range, start_range + len(content) - 1, len(self.content))))
+
+
+class AcrStreamUtilsTests(unittest.TestCase):
+
+    def _stream(self, blobs, raise_error_on_failure=False, chunk_size=_stream_utils.DEFAULT_CHUNK_SIZE):
+        followers = [_stream_utils._LogFollower(blob, 'logs', 'run{}.log'.format(i), chunk_size=chunk_size,
+                                                prefix='run{}: '.format(i) if len(blobs) > 1 else '')
+                     for i, blob in enumerate(blobs)]
+        with mock.patch('time.sleep', autospec=True) as sleep, \
+                mock.patch.object(_stream_utils, 'print', create=True) as printed:
+            _stream_utils._stream_logs(True, 60, followers, raise_error_on_failure)
+        return [c[0][0] for c in printed.call_args_list], [c[0][0] for c in sleep.call_args_list]
+
+    def test_follow_log_prints_complete_lines(self):
+        blob = _FakeLogBlob([b'', b'step 1\r\nstep', b' 2\r', b'\nstep 3\r\n', b'', b'', b'', b'done'])
+        printed, sleeps = self._stream([blob], chunk_size=4)
+
+        self.assertEqual(printed, ['step 1\r', 'step 2\r', 'step 3\r', 'done'])
+        # a log which grew is read again right away, and its properties are only got when nothing was appended
+        self.assertEqual(blob.calls[:8], ['properties', 'properties', 'read', 'read', 'read', 'read', 'properties',
+                                          'read'])
+        # the polls are frequent while the log grows and less so while it is idle
+        self.assertTrue(sleeps[3] < 1 < sleeps[5] < sleeps[6], sleeps)
+
+    def test_follow_several_logs_and_raise_on_failure(self):
+        blobs = [_FakeLogBlob([b'a\r\n', b'b\r\n']), _FakeLogBlob([b'c\r\nd\r\n'], status='Failed')]
+        with self.assertRaises(CLIError) as ex:
+            self._stream(blobs, raise_error_on_failure=True)
+        self.assertEqual(str(ex.exception), 'Run failed')
+
+        blobs = [_FakeLogBlob([b'a\r\n', b'b\r\n']), _FakeLogBlob([b'c\r\nd\r\n'])]
+        printed, _ = self._stream(blobs)
+        self.assertEqual(sorted(printed), ['run0: a\r', 'run0: b\r', 'run1: c\r\nrun1: d\r'])
+
+    def test_follow_log_stops_after_timeout(self):
+        blob = _FakeLogBlob([b'partial'] + [b''] * 1000)
+        printed, sleeps = self._stream([blob])
+        self.assertEqual(printed, ['partial'])
+        self.assertTrue(60 < sum(sleeps) < 60 + _stream_utils.MAX_LOG_POLL_INTERVAL + 1, sleeps)
+
+
+if __name__ == '__main__':
+    unittest.main()
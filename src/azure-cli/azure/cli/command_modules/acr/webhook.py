@@ -6,7 +6,7 @@
 from azure.cli.core.util import CLIError
 
 from ._utils import (
-    get_resource_group_name_by_registry_name,
+    run_with_resource_group,
     validate_managed_registry
 )
 
@@ -117,9 +117,9 @@ def acr_webhook_update_set(cmd,
                            registry_name,
                            resource_group_name=None,
                            parameters=None):
-    resource_group_name = get_resource_group_name_by_registry_name(
-        cmd.cli_ctx, registry_name, resource_group_name)
-    return client.update(resource_group_name, registry_name, webhook_name, parameters)
+    return run_with_resource_group(
+        cmd.cli_ctx, registry_name, resource_group_name,
+        lambda group: client.update(group, registry_name, webhook_name, parameters))
 
 
 def acr_webhook_get_config(cmd,
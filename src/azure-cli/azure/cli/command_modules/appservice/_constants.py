@@ -23,3 +23,9 @@ RUNTIME_TO_IMAGE = {
     'dotnet': 'mcr.microsoft.com/azure-functions/dotnet:2.0-appservice',
     'python': 'mcr.microsoft.com/azure-functions/python:2.0-python3.6-appservice'
 }
+ZIP_HASH_BLOCK_SIZE = 1024 * 1024  # bytes read at a time to hash a zip package
+ZIP_DEPLOYMENT_POLL_INTERVAL = 2  # seconds, growing up to ZIP_DEPLOYMENT_MAX_POLL_INTERVAL
+ZIP_DEPLOYMENT_MAX_POLL_INTERVAL = 15
+ZIP_DEPLOYMENT_TIMEOUT = 1800  # seconds
+ZIP_DEPLOYMENTS_FILE = 'zipDeployments.json'
+PACKAGE_CACHE_DIR = 'webapp_up_packages'  # under the config directory, one package per source directory
@@ -23,27 +23,34 @@ def web_client_factory(cli_ctx, **_):
     return get_mgmt_service_client(cli_ctx, WebSiteManagementClient)
 
 
-def zip_contents_from_dir(dirPath, lang):
+def zip_contents_from_dir(dirPath, lang, cache_dir=None):
+    """ Zip the contents of a directory. With `cache_dir`, the package is kept there and packaging again only
+    compresses the files which changed since. """
     relroot = os.path.abspath(os.path.join(dirPath, os.pardir))
     path_and_file = os.path.splitdrive(dirPath)[1]
     file_val = os.path.split(path_and_file)[1]
     zip_file_path = relroot + os.path.sep + file_val + ".zip"
     abs_src = os.path.abspath(dirPath)
+    files = []
+    for dirname, subdirs, filenames in os.walk(dirPath):
+        # skip node_modules folder for Node apps,
+        # since zip_deployment will perfom the build operation
+        if lang.lower() == NODE_RUNTIME_NAME and 'node_modules' in subdirs:
+            subdirs.remove('node_modules')
+        elif lang.lower() == NETCORE_RUNTIME_NAME:
+            if 'bin' in subdirs:
+                subdirs.remove('bin')
+            elif 'obj' in subdirs:
+                subdirs.remove('obj')
+        for filename in filenames:
+            absname = os.path.abspath(os.path.join(dirname, filename))
+            files.append((absname, absname[len(abs_src) + 1:]))
+    if cache_dir:
+        from ._packaging import package_files
+        return package_files(files, cache_dir)
     with zipfile.ZipFile("{}".format(zip_file_path), "w", zipfile.ZIP_DEFLATED) as zf:
-        for dirname, subdirs, files in os.walk(dirPath):
-            # skip node_modules folder for Node apps,
-            # since zip_deployment will perfom the build operation
-            if lang.lower() == NODE_RUNTIME_NAME and 'node_modules' in subdirs:
-                subdirs.remove('node_modules')
-            elif lang.lower() == NETCORE_RUNTIME_NAME:
-                if 'bin' in subdirs:
-                    subdirs.remove('bin')
-                elif 'obj' in subdirs:
-                    subdirs.remove('obj')
-            for filename in files:
-                absname = os.path.abspath(os.path.join(dirname, filename))
-                arcname = absname[len(abs_src) + 1:]
-                zf.write(absname, arcname)
+        for absname, arcname in files:
+            zf.write(absname, arcname)
     return zip_file_path
 
 
@@ -1214,6 +1214,11 @@ examples:
         az webapp deployment source config-zip \\
             -g {myRG} -n {myAppName} \\
             --src {zipFilePathLocation}
+  - name: Skip the deployment if the same zip file was the last one deployed from this machine.
+    text: >
+        az webapp deployment source config-zip \\
+            -g {myRG} -n {myAppName} \\
+            --src {zipFilePathLocation} --skip-unchanged
 """
 
 helps['webapp deployment source delete'] = """
@@ -1425,6 +1430,10 @@ short-summary: >
   where the code is present. Current support includes Node, Python, .NET Core and ASP.NET, staticHtml. Node,
   Python apps are created as Linux apps. .Net Core, ASP.NET and static HTML apps are created as Windows apps.
   If command is run from an empty folder, an empty windows web app is created.
+long-summary: >
+  The package of each source folder is kept under `webapp_up_packages` in the CLI's config directory, so that the
+  next deployment only compresses the files which changed. The packages of other folders are removed once unused for
+  30 days, or from the least recently used one while all together they take more than 1 GiB.
 examples:
   - name: View the details of the app that will be created, without actually running the operation
     text: >
@@ -0,0 +1,309 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Incremental zip packaging for `webapp up`. A manifest kept next to the package records the size, modification time
+and SHA-256 hash of each file, so that the compressed members of unchanged files are copied from the previous
+package rather than compressed again. Changed files are compressed on a pool of processes, and files whose type is
+already compressed are stored as they are. The packages of source directories which are no longer deployed are
+removed by `prune_package_cache`.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zipfile
+import zlib
+
+from knack.log import get_logger
+
+from azure.cli.core.util import atomic_write, replace_file
+
+logger = get_logger(__name__)
+
+PACKAGE_FILE = 'package.zip'
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+# file types which are already compressed, and gain nothing from being deflated again
+STORED_EXTENSIONS = frozenset([
+    '.7z', '.br', '.bz2', '.ear', '.gif', '.gz', '.ico', '.jar', '.jpeg', '.jpg', '.mp3', '.mp4', '.nupkg', '.png',
+    '.tgz', '.war', '.webm', '.webp', '.whl', '.woff', '.woff2', '.xz', '.zip'])
+# files larger than this are compressed by the main process, as they are written, to bound the memory used
+MAX_POOLED_FILE_SIZE = 16 * 1024 * 1024
+# small files are sent to the pool together, up to this many bytes or files at a time
+POOL_BATCH_SIZE = 4 * 1024 * 1024
+POOL_BATCH_FILES = 64
+READ_BLOCK_SIZE = 1024 * 1024
+# the packages of other source directories are removed once unused for this long, or else from the least recently
+# used one while all together they are larger than this
+PACKAGE_CACHE_MAX_AGE = 30 * 24 * 3600
+PACKAGE_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# the local file header of a zip member: signature, versions, flags, method, time, date, CRC-32, sizes and the
+# lengths of the file name and of the extra field
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+
+
+def package_files(files, cache_dir, max_workers=None):
+    """ Zip `files`, pairs of a path and its name in the package, into `cache_dir` and return the path of the package.
+
+    The members of the files which did not change since the previous package in `cache_dir` are copied from it. A
+    file did not change if its size and modification time, or else its hash, are those in the manifest.
+    """
+    from knack.util import ensure_dir
+    ensure_dir(cache_dir)
+    package_path = os.path.join(cache_dir, PACKAGE_FILE)
+    manifest = _load_manifest(cache_dir)
+    previous = None
+    if manifest:
+        try:
+            previous = zipfile.ZipFile(package_path, 'r')
+        except (IOError, OSError, zipfile.BadZipfile):
+            manifest = {}
+
+    temp_path = '{}.{}.tmp'.format(package_path, os.getpid())
+    new_manifest = {}
+    try:
+        reused, changed = _find_changes(files, manifest, previous, new_manifest)
+        logger.info("Packaging %d changed files, reusing %d unchanged ones", len(changed), len(reused))
+        pooled = [(path, changed[path].st_size) for path, _ in files
+                  if path in changed and changed[path].st_size <= MAX_POOLED_FILE_SIZE]
+        compressed = _compress_files(pooled, max_workers)
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            for path, arcname in files:
+                if path in reused:
+                    _copy_member(zf, previous, previous.getinfo(arcname))
+                elif changed[path].st_size <= MAX_POOLED_FILE_SIZE:
+                    content_hash, crc, size, compress_type, data = next(compressed)
+                    zinfo = _get_zip_info(path, arcname, changed[path])
+                    zinfo.compress_type, zinfo.CRC, zinfo.file_size = compress_type, crc, size
+                    zinfo.compress_size = len(data)
+                    _write_member(zf, zinfo, [data])
+                    new_manifest[arcname]['hash'] = content_hash
+                else:
+                    zf.write(path, arcname, compress_type=_get_compress_type(path))
+                    new_manifest[arcname]['hash'] = _get_file_hash(path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if previous:
+            previous.close()
+
+    replace_file(temp_path, package_path)
+    _save_manifest(cache_dir, new_manifest)
+    return package_path
+
+
+def _find_changes(files, manifest, previous, new_manifest):
+    """ Return the paths of the unchanged files, and the stats of the changed ones by path. The entries of all the
+    files are added to `new_manifest`, with the hash of the unchanged ones. """
+    previous_names = set(previous.namelist()) if previous else set()
+    reused = set()
+    changed = {}
+    for path, arcname in files:
+        stat = os.stat(path)
+        entry = manifest.get(arcname)
+        new_manifest[arcname] = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        if entry and arcname in previous_names and entry.get('size') == stat.st_size and \
+                (entry.get('mtime') == stat.st_mtime or entry.get('hash') == _get_file_hash(path)):
+            new_manifest[arcname]['hash'] = entry['hash']
+            reused.add(path)
+        else:
+            changed[path] = stat
+    return reused, changed
+
+
+def _compress_files(files, max_workers=None):
+    """ Return an iterator of the results of `_compress_file` for `files`, pairs of a path and its size, in order. """
+    if max_workers is None:
+        import multiprocessing
+        max_workers = multiprocessing.cpu_count()
+    if max_workers < 2 or len(files) < 2:
+        return (_compress_file(path) for path, _ in files)
+    return _compress_files_in_pool(files, max_workers)
+
+
+def _compress_files_in_pool(files, max_workers):
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+        for batch in _get_batches(files):
+            pending.append(executor.submit(_compress_batch, batch))
+            # yield the results in order, without keeping more batches in memory than twice the processes compress
+            while len(pending) > max_workers * 2:
+                for result in pending.popleft().result():
+                    yield result
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+
+
+def _get_batches(files):
+    batch = []
+    batch_size = 0
+    for path, size in files:
+        batch.append(path)
+        batch_size += size
+        if batch_size >= POOL_BATCH_SIZE or len(batch) >= POOL_BATCH_FILES:
+            yield batch
+            batch = []
+            batch_size = 0
+    if batch:
+        yield batch
+
+
+def _compress_batch(paths):
+    return [_compress_file(path) for path in paths]
+
+
+def _compress_file(path):
+    """ Return the SHA-256 hash, CRC-32, size, compression type and compressed content of a file. """
+    compress_type = _get_compress_type(path)
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15) \
+        if compress_type == zipfile.ZIP_DEFLATED else None
+    content_hash = hashlib.sha256()
+    crc = 0
+    size = 0
+    chunks = []
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            content_hash.update(block)
+            crc = zlib.crc32(block, crc)
+            size += len(block)
+            chunks.append(compressor.compress(block) if compressor else block)
+    if compressor:
+        chunks.append(compressor.flush())
+    return content_hash.hexdigest(), crc & 0xffffffff, size, compress_type, b''.join(chunks)
+
+
+def _get_compress_type(path):
+    if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _get_file_hash(path):
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def _get_zip_info(path, arcname, stat):
+    """ A member for a file, with the attributes `ZipFile.write` would give it. """
+    import time
+    zinfo = zipfile.ZipInfo(arcname.replace(os.sep, '/'), time.localtime(stat.st_mtime)[0:6])
+    zinfo.external_attr = (stat.st_mode & 0xFFFF) << 16
+    if zinfo.date_time[0] < 1980:
+        zinfo.date_time = (1980, 1, 1, 0, 0, 0)
+    return zinfo
+
+
+def _copy_member(zf, source, source_info):
+    """ Copy a member of `source` to `zf` without decompressing it. """
+    zinfo = zipfile.ZipInfo(source_info.filename, source_info.date_time)
+    zinfo.compress_type = source_info.compress_type
+    zinfo.CRC = source_info.CRC
+    zinfo.file_size = source_info.file_size
+    zinfo.compress_size = source_info.compress_size
+    zinfo.external_attr = source_info.external_attr
+    zinfo.create_system = source_info.create_system
+    _write_member(zf, zinfo, _read_member(source.fp, source_info))
+
+
+def _read_member(fp, zinfo):
+    """ Yield the compressed content of a member, a block at a time. """
+    fp.seek(zinfo.header_offset)
+    header = _LOCAL_HEADER.unpack(fp.read(_LOCAL_HEADER.size))
+    fp.seek(zinfo.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1])
+    remaining = zinfo.compress_size
+    while remaining:
+        block = fp.read(min(remaining, READ_BLOCK_SIZE))
+        if not block:
+            raise zipfile.BadZipfile("Truncated member '{}'".format(zinfo.filename))
+        remaining -= len(block)
+        yield block
+
+
+def _write_member(zf, zinfo, chunks):
+    """ Append a member whose content is already compressed, as `ZipFile.write` appends the members it compresses.
+    The CRC-32 and sizes of `zinfo` must be set. """
+    # pylint: disable=protected-access
+    zinfo.header_offset = zf.fp.tell()
+    zf._writecheck(zinfo)
+    zf._didModify = True
+    zf.fp.write(zinfo.FileHeader(zinfo.file_size > zipfile.ZIP64_LIMIT or
+                                 zinfo.compress_size > zipfile.ZIP64_LIMIT))
+    for chunk in chunks:
+        zf.fp.write(chunk)
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    if hasattr(zf, 'start_dir'):
+        zf.start_dir = zf.fp.tell()
+
+
+def prune_package_cache(root_dir, keep=None, max_age=PACKAGE_CACHE_MAX_AGE, max_size=PACKAGE_CACHE_MAX_SIZE):
+    """ Remove the package directories under `root_dir` which were not used for `max_age` seconds, then the least
+    recently used ones while all together take more than `max_size` bytes. The directory `keep` is never removed. """
+    import shutil
+    import time
+    try:
+        package_dirs = [os.path.join(root_dir, name) for name in os.listdir(root_dir)]
+    except OSError:
+        return
+    keep = os.path.normcase(os.path.abspath(keep)) if keep else None
+    packages = []
+    total_size = 0
+    for package_dir in package_dirs:
+        if not os.path.isdir(package_dir):
+            continue
+        last_used, size = _get_package_usage(package_dir)
+        total_size += size
+        if os.path.normcase(os.path.abspath(package_dir)) != keep:
+            packages.append((last_used, size, package_dir))
+    now = time.time()
+    for last_used, size, package_dir in sorted(packages):
+        if last_used + max_age > now and total_size <= max_size:
+            break
+        logger.info("Removing the package %s", package_dir)
+        shutil.rmtree(package_dir, ignore_errors=True)
+        total_size -= size
+
+
+def _get_package_usage(package_dir):
+    """ Return when the package in `package_dir` was last used, and the size of its files. """
+    last_used = 0
+    size = 0
+    for name in (PACKAGE_FILE, MANIFEST_FILE):
+        try:
+            stat = os.stat(os.path.join(package_dir, name))
+        except OSError:
+            continue
+        size += stat.st_size
+        if name == MANIFEST_FILE:
+            # the manifest is saved each time the package is used
+            last_used = stat.st_mtime
+    return last_used, size
+
+
+def _load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE), 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest['files']
+    except (IOError, OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def _save_manifest(cache_dir, files):
+    with atomic_write(os.path.join(cache_dir, MANIFEST_FILE)) as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': files}, f)
@@ -184,6 +184,7 @@ def load_arguments(self, _):
         with self.argument_context(scope + ' deployment source config-zip') as c:
             c.argument('src', help='a zip file path for deployment')
             c.argument('timeout', type=int, options_list=['--timeout', '-t'], help='Configurable timeout in seconds for checking the status of deployment', validator=validate_timeout_value)
+            c.argument('skip_unchanged', action='store_true', help='skip the upload if the package, identified by its SHA-256 hash, is the one this machine last deployed and the latest deployment of the app')
 
         with self.argument_context(scope + ' config appsettings list') as c:
             c.argument('name', arg_type=webapp_name_arg_type, id_part=None)
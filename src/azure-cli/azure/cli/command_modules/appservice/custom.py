@@ -59,7 +59,9 @@ from ._create_util import (zip_contents_from_dir, get_runtime_version_details, c
                            should_create_new_rg, set_location, should_create_new_app,
                            get_lang_from_content, get_num_apps_in_asp)
 from ._constants import (NODE_RUNTIME_NAME, OS_DEFAULT, STATIC_RUNTIME_NAME, PYTHON_RUNTIME_NAME,
-                         RUNTIME_TO_IMAGE, NODE_VERSION_DEFAULT)
+                         RUNTIME_TO_IMAGE, NODE_VERSION_DEFAULT, ZIP_HASH_BLOCK_SIZE, ZIP_DEPLOYMENT_POLL_INTERVAL,
+                         ZIP_DEPLOYMENT_MAX_POLL_INTERVAL, ZIP_DEPLOYMENT_TIMEOUT, ZIP_DEPLOYMENTS_FILE,
+                         PACKAGE_CACHE_DIR)
 
 logger = get_logger(__name__)
 
@@ -277,7 +279,8 @@ def update_azure_storage_account(cmd, resource_group_name, name, custom_id, stor
     return result.properties
 
 
-def enable_zip_deploy_functionapp(cmd, resource_group_name, name, src, timeout=None, slot=None):
+def enable_zip_deploy_functionapp(cmd, resource_group_name, name, src, timeout=None, slot=None,
+                                  skip_unchanged=False):
     client = web_client_factory(cmd.cli_ctx)
     app = client.web_apps.get(resource_group_name, name)
     parse_plan_id = parse_resource_id(app.server_farm_id)
@@ -293,10 +296,10 @@ def enable_zip_deploy_functionapp(cmd, resource_group_name, name, src, timeout=N
         time.sleep(retry_delay)
     if is_plan_consumption(plan_info) and app.reserved:
         return upload_zip_to_storage(cmd, resource_group_name, name, src, slot)
-    return enable_zip_deploy(cmd, resource_group_name, name, src, timeout, slot)
+    return enable_zip_deploy(cmd, resource_group_name, name, src, timeout, slot, skip_unchanged)
 
 
-def enable_zip_deploy(cmd, resource_group_name, name, src, timeout=None, slot=None):
+def enable_zip_deploy(cmd, resource_group_name, name, src, timeout=None, slot=None, skip_unchanged=False):
     logger.warning("Getting scm site credentials for zip deployment")
     user_name, password = _get_site_credential(cmd.cli_ctx, resource_group_name, name, slot)
     scm_url = _get_scm_url(cmd, resource_group_name, name, slot)
@@ -305,24 +308,106 @@ def enable_zip_deploy(cmd, resource_group_name, name, src, timeout=None, slot=No
 
     import urllib3
     authorization = urllib3.util.make_headers(basic_auth='{0}:{1}'.format(user_name, password))
-    headers = authorization
+    headers = dict(authorization)
     headers['content-type'] = 'application/octet-stream'
     headers['User-Agent'] = UA_AGENT
 
-    import requests
     import os
-    from azure.cli.core.util import should_disable_connection_verify
-    # Read file content
-    with open(os.path.realpath(os.path.expanduser(src)), 'rb') as fs:
-        zip_content = fs.read()
+    src = os.path.realpath(os.path.expanduser(src))
+    session = _get_scm_session()
+    content_hash = deployed_packages = None
+    if skip_unchanged:
+        content_hash = _get_file_hash(src)
+        deployed_packages = _get_deployed_packages(cmd.cli_ctx)
+        deployment = _get_unchanged_deployment(session, deployment_status_url, authorization,
+                                               deployed_packages.get(scm_url.lower()), content_hash)
+        if deployment:
+            logger.warning("The package was already deployed by deployment '%s'. Skipping the upload.",
+                           deployment['id'])
+            return deployment
+
+    # the package is streamed rather than read in memory
+    with open(src, 'rb') as fs:
         logger.warning("Starting zip deployment. This operation can take a while to complete ...")
-        requests.post(zip_url, data=zip_content, headers=headers, verify=not should_disable_connection_verify())
+        session.post(zip_url, data=_UploadProgressReader(fs, os.path.getsize(src),
+                                                         cmd.cli_ctx.get_progress_controller(det=True)),
+                     headers=headers)
     # check the status of async deployment
     response = _check_zip_deployment_status(cmd, resource_group_name, name, deployment_status_url,
-                                            authorization, timeout)
+                                            authorization, timeout, session=session)
+    if content_hash:
+        deployed_packages[scm_url.lower()] = {'hash': content_hash, 'deployment': response.get('id')}
+        deployed_packages.flush()
     return response
 
 
+class _UploadProgressReader(object):
+    """ A file to upload as a request body, which reports the progress of the upload as it is read. """
+
+    def __init__(self, file_obj, size, progress):
+        self._file = file_obj
+        self._size = size
+        self._progress = progress
+        self._read = 0
+        self._percent = None
+
+    def __len__(self):
+        return self._size
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self._read += len(data)
+        # redraw the progress bar only when it changes
+        percent = self._read * 100 // self._size if self._size else 100
+        if percent != self._percent:
+            self._percent = percent
+            self._progress.add(message='Uploading', value=self._read, total_val=self._size)
+            if self._read >= self._size:
+                self._progress.end()
+        return data
+
+
+def _get_scm_session():
+    """ A session for the requests to the scm site, which keeps connections open between them. """
+    import requests
+    from azure.cli.core.util import should_disable_connection_verify, use_shared_connection_pool
+    session = requests.Session()
+    session.verify = not should_disable_connection_verify()
+    use_shared_connection_pool(session)
+    return session
+
+
+def _get_file_hash(path):
+    import hashlib
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(ZIP_HASH_BLOCK_SIZE), b''):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+
+def _get_deployed_packages(cli_ctx):
+    """ The hash of the last package deployed to each scm site, and the id of its deployment. """
+    import os
+    from azure.cli.core._session import Session
+    deployed_packages = Session()
+    deployed_packages.load(os.path.join(cli_ctx.config.config_dir, ZIP_DEPLOYMENTS_FILE))
+    return deployed_packages
+
+
+def _get_unchanged_deployment(session, deployment_status_url, authorization, deployed_package, content_hash):
+    """ Return the latest deployment of the site if it succeeded and deployed the package of `content_hash`. """
+    if not deployed_package or deployed_package.get('hash') != content_hash:
+        return None
+    response = session.get(deployment_status_url, headers=authorization)
+    if response.status_code != 200:
+        return None
+    deployment = response.json()
+    if deployment.get('id') == deployed_package.get('deployment') and deployment.get('status') == 4:
+        return deployment
+    return None
+
+
 def upload_zip_to_storage(cmd, resource_group_name, name, src, slot=None):
     settings = get_app_settings(cmd, resource_group_name, name, slot)
 
@@ -2315,16 +2400,21 @@ def list_locations(cmd, sku, linux_workers_enabled=None):
     return client.list_geo_regions(full_sku, linux_workers_enabled)
 
 
-def _check_zip_deployment_status(cmd, rg_name, name, deployment_status_url, authorization, timeout=None):
-    import requests
-    total_trials = (int(timeout) // 2) if timeout else 450
-    num_trials = 0
-    while num_trials < total_trials:
-        time.sleep(2)
-        response = requests.get(deployment_status_url, headers=authorization)
-        time.sleep(2)
+def _check_zip_deployment_status(cmd, rg_name, name, deployment_status_url, authorization, timeout=None,
+                                 session=None):
+    from azure.cli.core.commands.polling import PollingBackoff
+    session = session or _get_scm_session()
+    timeout = int(timeout) if timeout else ZIP_DEPLOYMENT_TIMEOUT
+    backoff = PollingBackoff(ZIP_DEPLOYMENT_POLL_INTERVAL, max_interval=ZIP_DEPLOYMENT_MAX_POLL_INTERVAL)
+    response = None
+    res_dict = {}
+    elapsed = 0
+    while elapsed < timeout:
+        delay = backoff.next_delay(response)
+        time.sleep(delay)
+        elapsed += delay
+        response = session.get(deployment_status_url, headers=authorization)
         res_dict = response.json()
-        num_trials = num_trials + 1
         if res_dict.get('status', 0) == 3:
             _configure_default_logging(cmd, rg_name, name)
             raise CLIError("""Zip deployment failed. {}. Please run the command az webapp log tail
@@ -2585,16 +2675,17 @@ def webapp_up(cmd, name, resource_group_name=None, plan=None,  # pylint: disable
 
     if do_deployment:
         logger.warning("Creating zip with contents of dir %s ...", src_dir)
-        # zip contents & deploy
-        zip_file_path = zip_contents_from_dir(src_dir, language)
+        # zip contents & deploy. The package is kept, per source directory, so that the next `webapp up` only
+        # compresses the files which changed
+        import hashlib
+        from ._packaging import prune_package_cache
+        cache_root = os.path.join(cmd.cli_ctx.config.config_dir, PACKAGE_CACHE_DIR)
+        cache_dir = os.path.join(cache_root, hashlib.sha256(os.path.abspath(src_dir).encode('utf-8')).hexdigest())
+        zip_file_path = zip_contents_from_dir(src_dir, language, cache_dir=cache_dir)
+        prune_package_cache(cache_root, keep=cache_dir)
 
         logger.warning("Preparing to deploy %s contents to app.", '' if is_skip_build else 'and build')
         enable_zip_deploy(cmd, rg_name, name, zip_file_path)
-        # Remove the file after deployment, handling exception if user removed the file manually
-        try:
-            os.remove(zip_file_path)
-        except OSError:
-            pass
     logger.warning("All done.")
     with ConfiguredDefaultSetter(cmd.cli_ctx.config, True):
         cmd.cli_ctx.config.set_value('defaults', 'group', rg_name)
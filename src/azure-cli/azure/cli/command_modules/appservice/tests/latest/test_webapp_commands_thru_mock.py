@@ -30,7 +30,8 @@ from azure.cli.command_modules.appservice.custom import (set_deployment_user,
                                                          validate_container_app_create_options,
                                                          restore_deleted_webapp,
                                                          list_snapshots,
-                                                         restore_snapshot)
+                                                         restore_snapshot,
+                                                         enable_zip_deploy)
 
 # pylint: disable=line-too-long
 from vsts_cd_manager.continuous_delivery_manager import ContinuousDeliveryResult
@@ -381,6 +382,53 @@ class TestWebappMocked(unittest.TestCase):
         self.assertFalse(validate_container_app_create_options(None, None, test_multi_container_config, None))
         self.assertFalse(validate_container_app_create_options(None, None, None, None))
 
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('azure.cli.command_modules.appservice.custom._get_scm_session', autospec=True)
+    @mock.patch('azure.cli.command_modules.appservice.custom._get_scm_url', autospec=True)
+    @mock.patch('azure.cli.command_modules.appservice.custom._get_site_credential', autospec=True)
+    def test_zip_deploy_streams_package(self, site_credential_mock, get_scm_url_mock, get_session_mock, sleep_mock):
+        import os
+        import shutil
+        import tempfile
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        src = os.path.join(temp_dir, 'app.zip')
+        with open(src, 'wb') as f:
+            f.write(b'0123456789' * 10000)
+        site_credential_mock.return_value = ('user', 'password')
+        get_scm_url_mock.return_value = 'https://web1.scm.azurewebsites.net'
+        session = get_session_mock.return_value
+        uploads = []
+
+        def _post(url, data, headers):
+            # the body is read a block at a time as it is sent
+            uploads.append((len(data), b''.join(iter(lambda: data.read(8192), b''))))
+
+        session.post.side_effect = _post
+        session.get.return_value.status_code = 200
+        session.get.return_value.headers = {}
+        session.get.return_value.json.side_effect = [{'status': 1, 'progress': 'Building'},
+                                                     {'status': 4, 'id': 'deployment1'},
+                                                     {'status': 4, 'id': 'deployment1'}]
+        cmd_mock = mock.MagicMock()
+        cmd_mock.cli_ctx.config.config_dir = temp_dir
+
+        # action
+        result = enable_zip_deploy(cmd_mock, 'rg', 'web1', src, skip_unchanged=True)
+
+        # assert
+        self.assertEqual(result, {'status': 4, 'id': 'deployment1'})
+        self.assertEqual(uploads, [(100000, b'0123456789' * 10000)])
+        cmd_mock.cli_ctx.get_progress_controller.return_value.end.assert_called_once_with()
+        # the polls back off from 2 seconds
+        self.assertEqual(sleep_mock.call_count, 2)
+        self.assertTrue(sleep_mock.call_args_list[0][0][0] <= 2 < sleep_mock.call_args_list[1][0][0])
+
+        # the unchanged package is not uploaded again
+        result = enable_zip_deploy(cmd_mock, 'rg', 'web1', src, skip_unchanged=True)
+        self.assertEqual(result, {'status': 4, 'id': 'deployment1'})
+        self.assertEqual(len(uploads), 1)
+
 
 class FakedResponse(object):  # pylint: disable=too-few-public-methods
     def __init__(self, status_code):
@@ -0,0 +1,136 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import mock
+
+from azure.cli.command_modules.appservice import _packaging
+from azure.cli.command_modules.appservice._create_util import zip_contents_from_dir
+
+
+class TestWebappPackaging(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.temp_dir, 'app')
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        self._write('index.js', b'console.log("hello");\n' * 100)
+        self._write(os.path.join('lib', 'util.js'), b'module.exports = {};\n' * 100)
+        self._write(os.path.join('node_modules', 'dep', 'index.js'), b'ignored')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.src_dir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def _read_package(self, path):
+        with zipfile.ZipFile(path) as zf:
+            self.assertIsNone(zf.testzip())
+            return {info.filename: (info.compress_type, zf.read(info)) for info in zf.infolist()}
+
+    def test_package_compresses_only_changed_files(self):
+        with mock.patch.object(_packaging, '_compress_file', side_effect=_packaging._compress_file) as compress:
+            path = zip_contents_from_dir(self.src_dir, 'node', cache_dir=self.cache_dir)
+            self.assertEqual(compress.call_count, 2)
+            self.assertEqual(path, os.path.join(self.cache_dir, _packaging.PACKAGE_FILE))
+            first = self._read_package(path)
+            self.assertEqual(sorted(first), ['index.js', 'lib/util.js'])
+            self.assertEqual(first['index.js'], (zipfile.ZIP_DEFLATED, b'console.log("hello");\n' * 100))
+
+            # nothing changed
+            compress.reset_mock()
+            zip_contents_from_dir(self.src_dir, 'node', cache_dir=self.cache_dir)
+            compress.assert_not_called()
+            self.assertEqual(self._read_package(path), first)
+
+            # a touched file with the same content is not compressed again
+            os.utime(os.path.join(self.src_dir, 'lib', 'util.js'), (1, 1))
+            self._write('index.js', b'console.log("bye");\n')
+            self._write('logo.png', b'\x89PNG' * 100)
+            zip_contents_from_dir(self.src_dir, 'node', cache_dir=self.cache_dir)
+            self.assertEqual(sorted(c[0][0] for c in compress.call_args_list),
+                             [os.path.join(self.src_dir, 'index.js'), os.path.join(self.src_dir, 'logo.png')])
+
+        package = self._read_package(path)
+        self.assertEqual(package['index.js'], (zipfile.ZIP_DEFLATED, b'console.log("bye");\n'))
+        self.assertEqual(package['lib/util.js'], first['lib/util.js'])
+        # already compressed file types are stored
+        self.assertEqual(package['logo.png'], (zipfile.ZIP_STORED, b'\x89PNG' * 100))
+
+    def test_package_compresses_in_process_pool(self):
+        for i in range(8):
+            self._write('file{}.txt'.format(i), 'content {}\n'.format(i).encode('utf-8') * 1000)
+        with mock.patch.object(_packaging, 'MAX_POOLED_FILE_SIZE', 5000):
+            path = _packaging.package_files(
+                [(os.path.join(self.src_dir, name), name) for name in sorted(os.listdir(self.src_dir))
+                 if name.endswith('.txt') or name == 'index.js'], self.cache_dir, max_workers=2)
+        package = self._read_package(path)
+        self.assertEqual(len(package), 9)
+        for i in range(8):
+            self.assertEqual(package['file{}.txt'.format(i)][1], 'content {}\n'.format(i).encode('utf-8') * 1000)
+
+    def test_pool_keeps_few_batches_pending(self):
+        from concurrent.futures import Future
+        submitted = []
+
+        class _Executor(object):
+            def __init__(self, max_workers):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def submit(self, fn, batch):  # pylint: disable=no-self-use
+                submitted.append(batch)
+                future = Future()
+                future.set_result([(path,) for path in batch])
+                return future
+
+        files = [('large{}'.format(i), _packaging.POOL_BATCH_SIZE) for i in range(20)] + \
+            [('small{}'.format(i), 10) for i in range(100)]
+        with mock.patch('concurrent.futures.ProcessPoolExecutor', _Executor):
+            for i, result in enumerate(_packaging._compress_files_in_pool(files, 2)):
+                self.assertEqual(result, (files[i][0],))
+                self.assertLessEqual(len(submitted), min(i, 20) + 1 + 2 * 2)
+        # small files are sent together
+        self.assertEqual([len(batch) for batch in submitted], [1] * 20 + [_packaging.POOL_BATCH_FILES, 36])
+
+    def test_prune_package_cache(self):
+        import time
+        now = time.time()
+        packages = {'old': now - _packaging.PACKAGE_CACHE_MAX_AGE - 60, 'current': now - 3 * 3600,
+                    'recent': now - 3600, 'used': now - 2 * 3600}
+        for name, last_used in packages.items():
+            package_dir = os.path.join(self.cache_dir, name)
+            os.makedirs(package_dir)
+            for file_name in (_packaging.PACKAGE_FILE, _packaging.MANIFEST_FILE):
+                with open(os.path.join(package_dir, file_name), 'wb') as f:
+                    f.write(b'0' * 500)
+            os.utime(os.path.join(package_dir, _packaging.MANIFEST_FILE), (last_used, last_used))
+
+        # the packages unused for too long go first, then the least recently used ones beyond the size limit
+        _packaging.prune_package_cache(self.cache_dir, keep=os.path.join(self.cache_dir, 'current'), max_size=2500)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['current', 'recent'])
+
+    def test_package_recovers_from_missing_package(self):
+        path = zip_contents_from_dir(self.src_dir, 'node', cache_dir=self.cache_dir)
+        os.remove(path)
+        path = zip_contents_from_dir(self.src_dir, 'node', cache_dir=self.cache_dir)
+        self.assertEqual(sorted(self._read_package(path)), ['index.js', 'lib/util.js'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1911,10 +1911,14 @@ examples:
 helps['network dns zone import'] = """
 type: command
 short-summary: Create a DNS zone using a DNS zone file.
+long-summary: The record sets are written in parallel, up to `core.max_concurrency` at a time (10 by default).
 examples:
   - name: Import a local zone file into a DNS zone resource.
     text: >
         az network dns zone import -g MyResourceGroup -n MyZone -f /path/to/zone/file
+  - name: Update a DNS zone with the record sets of a zone file which changed since it was last imported.
+    text: >
+        az network dns zone import -g MyResourceGroup -n MyZone -f /path/to/zone/file --only-changed
 """
 
 helps['network dns zone list'] = """
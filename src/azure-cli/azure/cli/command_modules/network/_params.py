@@ -425,6 +425,7 @@ def load_arguments(self, _):
 
     with self.argument_context('network dns zone import') as c:
         c.argument('file_name', options_list=['--file-name', '-f'], type=file_type, completer=FilesCompleter(), help='Path to the DNS zone file to import')
+        c.argument('only_changed', action='store_true', help='Only write the record sets which are missing from the zone or differ from the zone file. Record sets changed in the zone during the import are not overwritten.')
 
     with self.argument_context('network dns zone export') as c:
         c.argument('file_name', options_list=['--file-name', '-f'], type=file_type, completer=FilesCompleter(), help='Path to the DNS zone file to save')
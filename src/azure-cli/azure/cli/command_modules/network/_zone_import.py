@@ -0,0 +1,173 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+from __future__ import print_function
+
+import codecs
+import copy
+import json
+import sys
+import threading
+from collections import namedtuple
+
+from knack.log import get_logger
+from knack.util import CLIError
+
+from msrestazure.azure_exceptions import CloudError
+
+from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+from azure.cli.core.commands.throttling import run_with_backoff
+
+logger = get_logger(__name__)
+
+# the encodings read_file_content tries, in the same order
+ZONE_FILE_ENCODINGS = ['utf-8-sig', 'utf-8', 'utf-16', 'utf-16le', 'utf-16be']
+_READ_CHUNK_SIZE = 64 * 1024
+PRECONDITION_FAILED = 412
+# the properties of a record set which the service sets
+_SERVICE_PROPERTIES = ('id', 'name', 'type', 'etag', 'fqdn', 'provisioning_state', 'target_resource')
+
+ZoneRecordSet = namedtuple('ZoneRecordSet', ['name', 'type', 'record_set', 'record_count'])
+
+
+def open_zone_file(file_path):
+    """ Open a zone file for reading in the first encoding which decodes it, without loading it in memory. """
+    for encoding in ZONE_FILE_ENCODINGS:
+        if _can_decode(file_path, encoding):
+            logger.debug("reading file %s as %s", file_path, encoding)
+            return codecs.open(file_path, encoding=encoding)
+    raise CLIError('Failed to decode file {} - unknown decoding'.format(file_path))
+
+
+def _can_decode(file_path, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(file_path, 'rb') as zone_file:
+        try:
+            for chunk in iter(lambda: zone_file.read(_READ_CHUNK_SIZE), b''):
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeError:
+            return False
+    return True
+
+
+def _get_record_type(record_set):
+    # the type of a record set from the service is like 'Microsoft.Network/dnszones/A'
+    return record_set.type.rsplit('/', 1)[1].lower()
+
+
+def _get_comparable_properties(record_set):
+    properties = record_set.as_dict()
+    for key in _SERVICE_PROPERTIES:
+        properties.pop(key, None)
+    # the service manages the serial number of the SOA record
+    properties.get('soa_record', {}).pop('serial_number', None)
+    for key, value in properties.items():
+        if isinstance(value, list):
+            properties[key] = sorted(value, key=lambda x: json.dumps(x, sort_keys=True))
+    return properties
+
+
+class ZoneImporter(object):
+    """ Writes the record sets of a zone file to a DNS zone on a pool of threads.
+
+    :param client_factory: Returns a DNS management client. It is called once on each thread which uses a client, as
+        clients are not thread safe.
+    :param only_changed: List the record sets of the zone first and only write those which are missing or differ from
+        the zone file. The writes are conditional on the ETags of the listed record sets, so that a record set which
+        is changed during the import is not overwritten.
+    """
+
+    def __init__(self, client_factory, resource_group_name, zone_name, only_changed=False,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, out_file=None):
+        self.client_factory = client_factory
+        self.resource_group_name = resource_group_name
+        self.zone_name = zone_name
+        self.only_changed = only_changed
+        self.max_concurrency = max_concurrency
+        self.out_file = out_file or sys.stderr
+        self._existing_record_sets = {}
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        """ The client of the current thread. """
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def run(self, record_sets):
+        """ Import a list of `ZoneRecordSet`s. Return the number of records written or already up to date, and the
+        number of records in the list. """
+        if self.only_changed:
+            self._existing_record_sets = {
+                (rs.name.lower(), _get_record_type(rs)): rs
+                for rs in self.client.record_sets.list_by_dns_zone(self.resource_group_name, self.zone_name)}
+
+        total_records = sum(rs.record_count for rs in record_sets)
+        cum_records = 0
+        unchanged_records = 0
+        for rs, written, ex in self._import_record_sets(record_sets):
+            if ex is not None:
+                if ex.status_code == PRECONDITION_FAILED:
+                    logger.error("Record set of type '%s' and name '%s' was changed during the import. Skipping...",
+                                 rs.type, rs.name)
+                else:
+                    logger.error(ex)
+                continue
+            cum_records += rs.record_count
+            if written:
+                print("({}/{}) Imported {} records of type '{}' and name '{}'"
+                      .format(cum_records, total_records, rs.record_count, rs.type, rs.name), file=self.out_file)
+            else:
+                unchanged_records += rs.record_count
+        if unchanged_records:
+            print('\n{} records were already up to date.'.format(unchanged_records), file=self.out_file)
+        return cum_records, total_records
+
+    def _import_record_sets(self, record_sets):
+        """ Yield (record set, whether it was written, CloudError or None) as each record set is imported. """
+        if self.max_concurrency < 2 or len(record_sets) < 2:
+            for rs in record_sets:
+                yield self._try_import_record_set(rs)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(record_sets))) as executor:
+            tasks = [executor.submit(self._try_import_record_set, rs) for rs in record_sets]
+            for task in as_completed(tasks):
+                yield task.result()
+
+    def _try_import_record_set(self, zone_record_set):
+        try:
+            return zone_record_set, self._import_record_set(zone_record_set), None
+        except CloudError as ex:
+            return zone_record_set, False, ex
+
+    def _import_record_set(self, zone_record_set):
+        name, record_type, record_set = zone_record_set.name, zone_record_set.type, zone_record_set.record_set
+        existing = self._existing_record_sets.get((name, record_type))
+        if name == '@' and record_type in ('soa', 'ns') and existing is None:
+            existing = run_with_backoff(lambda: self.client.record_sets.get(
+                self.resource_group_name, self.zone_name, name, record_type.upper()))
+        if name == '@' and record_type == 'soa':
+            record_set.soa_record.host = existing.soa_record.host
+        elif name == '@' and record_type == 'ns':
+            # the name servers of the zone are assigned by the service, only their TTL is imported
+            ttl = record_set.ttl
+            record_set = copy.copy(existing)
+            record_set.ttl = ttl
+
+        conditions = {}
+        if self.only_changed:
+            if existing is None:
+                conditions['if_none_match'] = '*'
+            elif _get_comparable_properties(existing) == _get_comparable_properties(record_set):
+                return False
+            else:
+                conditions['if_match'] = existing.etag
+        run_with_backoff(lambda: self.client.record_sets.create_or_update(
+            self.resource_group_name, self.zone_name, name, record_type, record_set, **conditions))
+        return True
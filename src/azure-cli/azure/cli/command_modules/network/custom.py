@@ -1398,13 +1398,15 @@ def _build_record(cmd, data):
 
 
 # pylint: disable=too-many-statements
-def import_zone(cmd, resource_group_name, zone_name, file_name):
-    from azure.cli.core.util import read_file_content
+def import_zone(cmd, resource_group_name, zone_name, file_name, only_changed=False):
+    from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+    from azure.cli.command_modules.network._zone_import import (
+        ZoneImporter, ZoneRecordSet, open_zone_file, PRECONDITION_FAILED)
     import sys
     RecordSet = cmd.get_models('RecordSet', resource_type=ResourceType.MGMT_NETWORK_DNS)
 
-    file_text = read_file_content(file_name)
-    zone_obj = parse_zone_file(file_text, zone_name)
+    with open_zone_file(file_name) as zone_file:
+        zone_obj = parse_zone_file(zone_file, zone_name)
 
     origin = zone_name
     record_sets = {}
@@ -1444,22 +1446,7 @@ def import_zone(cmd, resource_group_name, zone_name, file_name):
                 _add_record(record_set, record, record_set_type,
                             is_list=record_set_type.lower() not in ['soa', 'cname'])
 
-    total_records = 0
-    for key, rs in record_sets.items():
-        rs_name, rs_type = key.lower().rsplit('.', 1)
-        rs_name = rs_name[:-(len(origin) + 1)] if rs_name != origin else '@'
-        try:
-            record_count = len(getattr(rs, _type_to_property_name(rs_type)))
-        except TypeError:
-            record_count = 1
-        total_records += record_count
-    cum_records = 0
-
-    client = get_mgmt_service_client(cmd.cli_ctx, ResourceType.MGMT_NETWORK_DNS)
-    print('== BEGINNING ZONE IMPORT: {} ==\n'.format(zone_name), file=sys.stderr)
-
-    Zone = cmd.get_models('Zone', resource_type=ResourceType.MGMT_NETWORK_DNS)
-    client.zones.create_or_update(resource_group_name, zone_name, Zone(location='global'))
+    zone_record_sets = []
     for key, rs in record_sets.items():
 
         rs_name, rs_type = key.lower().rsplit('.', 1)
@@ -1471,23 +1458,28 @@ def import_zone(cmd, resource_group_name, zone_name, file_name):
             record_count = len(getattr(rs, _type_to_property_name(rs_type)))
         except TypeError:
             record_count = 1
-        if rs_name == '@' and rs_type == 'soa':
-            root_soa = client.record_sets.get(resource_group_name, zone_name, '@', 'SOA')
-            rs.soa_record.host = root_soa.soa_record.host
-            rs_name = '@'
-        elif rs_name == '@' and rs_type == 'ns':
-            root_ns = client.record_sets.get(resource_group_name, zone_name, '@', 'NS')
-            root_ns.ttl = rs.ttl
-            rs = root_ns
-            rs_type = rs.type.rsplit('/', 1)[1]
+        zone_record_sets.append(ZoneRecordSet(rs_name, rs_type, rs, record_count))
+
+    client = get_mgmt_service_client(cmd.cli_ctx, ResourceType.MGMT_NETWORK_DNS)
+    print('== BEGINNING ZONE IMPORT: {} ==\n'.format(zone_name), file=sys.stderr)
+
+    Zone = cmd.get_models('Zone', resource_type=ResourceType.MGMT_NETWORK_DNS)
+    if not only_changed:
+        client.zones.create_or_update(resource_group_name, zone_name, Zone(location='global'))
+    else:
+        # an existing zone is kept as it is
         try:
-            client.record_sets.create_or_update(
-                resource_group_name, zone_name, rs_name, rs_type, rs)
-            cum_records += record_count
-            print("({}/{}) Imported {} records of type '{}' and name '{}'"
-                  .format(cum_records, total_records, record_count, rs_type, rs_name), file=sys.stderr)
+            client.zones.create_or_update(resource_group_name, zone_name, Zone(location='global'), if_none_match='*')
         except CloudError as ex:
-            logger.error(ex)
+            if ex.status_code != PRECONDITION_FAILED:
+                raise
+
+    # the importer gets a client on each of its threads, which get_mgmt_service_client reuses within the thread
+    importer = ZoneImporter(lambda: get_mgmt_service_client(cmd.cli_ctx, ResourceType.MGMT_NETWORK_DNS),
+                            resource_group_name, zone_name, only_changed=only_changed,
+                            max_concurrency=cmd.cli_ctx.config.getint('core', 'max_concurrency',
+                                                                      DEFAULT_MAX_CONCURRENCY))
+    cum_records, total_records = importer.run(zone_record_sets)
     print("\n== {}/{} RECORDS IMPORTED SUCCESSFULLY: '{}' =="
           .format(cum_records, total_records, zone_name), file=sys.stderr)
 
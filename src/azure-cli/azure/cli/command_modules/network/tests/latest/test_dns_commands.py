@@ -4,8 +4,13 @@
 # --------------------------------------------------------------------------------------------
 
 import os
+import shutil
+import sys
+import tempfile
 import unittest
 
+import mock
+
 from azure.cli.testsdk import ScenarioTest, ResourceGroupPreparer
 
 from azure.cli.command_modules.network.zone_file import parse_zone_file
@@ -39,11 +44,20 @@ class DnsZoneImportTest(ScenarioTest):
             record sets. It does not test that the imported files meet any specific requirements. For that, run
             additional checks in the individual zone file tests.
         """
+        # export to a temporary directory, so that the tests leave the zone files as they are
+        export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_dir)
         self.kwargs.update({
             'zone': zone_name,
             'path': os.path.join(TEST_DIR, 'zone_files', filename),
-            'export': os.path.join(TEST_DIR, 'zone_files', filename + '_export.txt')
+            'export': os.path.join(export_dir, filename + '_export.txt')
         })
+        if not self.is_live:
+            # the recordings cannot be played back to several threads at once
+            patcher = mock.patch.dict('os.environ', {'AZURE_CORE_MAX_CONCURRENCY': '1'})
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
         # Import from zone file
         self.cmd('network dns zone import -n {zone} -g {rg} --file-name "{path}"')
         records1 = self.cmd('network dns record-set list -g {rg} -z {zone}').get_output_in_json()
@@ -626,6 +640,17 @@ class DnsParseZoneFiles(unittest.TestCase):
         ])
         self._check_a(zone, '*.' + zn, [(3600, '2.3.4.5')])
 
+    def test_zone_file_read_in_chunks(self):
+        from azure.cli.core.util import read_file_content
+        from azure.cli.command_modules.network._zone_import import open_zone_file
+        for file_name, zone_name in [('zone1.txt', 'zone1.com'), ('zone2.txt', 'zone2.com'), ('zone4.txt', 'zone4.com')]:
+            file_path = os.path.join(TEST_DIR, 'zone_files', file_name)
+            expected = parse_zone_file(read_file_content(file_path), zone_name)
+            # records and parentheses are split across chunks
+            with mock.patch.object(sys.modules[parse_zone_file.__module__], '_READ_CHUNK_SIZE', 7):
+                with open_zone_file(file_path) as zone_file:
+                    self.assertEqual(parse_zone_file(zone_file, zone_name), expected)
+
     def test_zone_import_errors(self):
         from knack.util import CLIError
         for f in ['fail1', 'fail2', 'fail3', 'fail4', 'fail5']:
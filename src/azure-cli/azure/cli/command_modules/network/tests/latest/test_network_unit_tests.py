@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import threading
 import unittest
 
 import mock
@@ -76,6 +77,64 @@ class TestNetworkUnitTests(unittest.TestCase):
         self.assertEqual(len(result), 2)
         self.assertEqual(result[1].value, 'noodle')
 
+    def test_network_dns_zone_import_only_changed(self):
+        from azure.mgmt.dns.v2018_05_01.models import RecordSet, ARecord, NsRecord, SoaRecord
+        from azure.cli.command_modules.network._zone_import import ZoneImporter, ZoneRecordSet
+
+        def _record_set(name, record_type, etag=None, **kwargs):
+            record_set = RecordSet(etag=etag, **kwargs)
+            record_set.name = name
+            record_set.type = 'Microsoft.Network/dnszones/' + record_type
+            return record_set
+
+        def _soa(serial_number):
+            return SoaRecord(host='ns1.azure-dns.com.', email='admin.contoso.com.', serial_number=serial_number,
+                             refresh_time=3600, retry_time=300, expire_time=2419200, minimum_ttl=300)
+
+        existing = [
+            _record_set('@', 'SOA', 'soa-etag', ttl=3600, soa_record=_soa(3)),
+            _record_set('@', 'NS', 'ns-etag', ttl=172800, ns_records=[NsRecord(nsdname='ns1.azure-dns.com.')]),
+            _record_set('www', 'A', 'www-etag', ttl=3600,
+                        arecords=[ARecord(ipv4_address='10.0.0.1'), ARecord(ipv4_address='10.0.0.2')]),
+            _record_set('old', 'A', 'old-etag', ttl=3600, arecords=[ARecord(ipv4_address='10.0.0.3')])]
+        clients = {}
+
+        def _client_factory():
+            client = mock.MagicMock()
+            client.record_sets.list_by_dns_zone.return_value = existing
+            clients[client] = threading.current_thread().ident
+            return client
+
+        soa = RecordSet(ttl=3600, soa_record=_soa('1'))
+        soa.soa_record.host = 'ns.contoso.com.'
+        record_sets = [
+            ZoneRecordSet('@', 'soa', soa, 1),
+            ZoneRecordSet('@', 'ns', RecordSet(ttl=3600, ns_records=[NsRecord(nsdname='ns.contoso.com.')]), 1),
+            ZoneRecordSet('www', 'a', RecordSet(ttl=3600, arecords=[ARecord(ipv4_address='10.0.0.2'),
+                                                                    ARecord(ipv4_address='10.0.0.1')]), 2),
+            ZoneRecordSet('old', 'a', RecordSet(ttl=3600, arecords=[ARecord(ipv4_address='10.0.0.4')]), 1),
+            ZoneRecordSet('new', 'a', RecordSet(ttl=60, arecords=[ARecord(ipv4_address='10.0.0.5')]), 1)]
+
+        importer = ZoneImporter(_client_factory, 'rg', 'contoso.com', only_changed=True, max_concurrency=4,
+                                out_file=mock.MagicMock())
+        self.assertEqual(importer.run(record_sets), (6, 6))
+
+        # each thread gets its own client
+        self.assertEqual(len(set(clients.values())), len(clients))
+        for client in clients:
+            client.record_sets.get.assert_not_called()
+        writes = {(c[0][2], c[0][3]): c for client in clients
+                  for c in client.record_sets.create_or_update.call_args_list}
+        # the SOA record, apart from its serial number, and the A records of 'www' are unchanged
+        self.assertEqual(sorted(writes), [('@', 'ns'), ('new', 'a'), ('old', 'a')])
+        # only the TTL of the name servers of the zone is imported
+        ns_write = writes[('@', 'ns')]
+        self.assertEqual(ns_write[0][4].ttl, 3600)
+        self.assertEqual(ns_write[0][4].ns_records[0].nsdname, 'ns1.azure-dns.com.')
+        self.assertEqual(ns_write[1], {'if_match': 'ns-etag'})
+        self.assertEqual(writes[('old', 'a')][1], {'if_match': 'old-etag'})
+        self.assertEqual(writes[('new', 'a')][1], {'if_none_match': '*'})
+
 
 if __name__ == '__main__':
     unittest.main()
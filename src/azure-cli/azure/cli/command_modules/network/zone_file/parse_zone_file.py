@@ -76,6 +76,8 @@ _REGEX = {
 
 _COMPILED_REGEX = {k: re.compile(v, re.IGNORECASE) for k, v in _REGEX.items()}
 
+_READ_CHUNK_SIZE = 64 * 1024
+
 
 class IncorrectParserException(Exception):
     pass
@@ -92,9 +94,7 @@ def _tokenize_line(line, quote_strings=False, infer_name=True):
     quote = False
     tokbuf = ""
     firstchar = True
-    ll = list(line)
-    while len(ll) > 0:
-        c = ll.pop(0)
+    for c in line:
         if c.isspace():
             if firstchar:
                 # used by the _add_record_names method
@@ -210,12 +210,32 @@ def _serialize(tokens):
     return " ".join(ret)
 
 
-def _remove_comments(text):
+def _split_lines(text):
     """
-    Remove comments from a zonefile
+    Split text, or a file object opened in text mode, into lines without
+    reading more than a chunk of the file at a time
+    """
+    if not hasattr(text, 'read'):
+        for line in text.split("\n"):
+            yield line
+        return
+
+    pending = ''
+    while True:
+        chunk = text.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    yield pending
+
+
+def _remove_comments(lines):
+    """
+    Remove comments from the lines of a zonefile
     """
-    ret = []
-    lines = text.split("\n")
     for line in lines:
         if not line:
             continue
@@ -224,71 +244,51 @@ def _remove_comments(text):
         if index != -1:
             line = line[:index]
         if line:
-            ret.append(line)
-
-    return "\n".join(ret)
+            yield line
 
 
-def _flatten(text):
+def _flatten(lines):
     """
-    Flatten the text:
+    Flatten the lines:
     * make sure each record is on one line.
     * remove parenthesis
     * remove Windows line endings
     """
-    lines = text.split('\n')
-    SENTINEL = '%%%'
-
-    # tokens: sequence of non-whitespace separated by '' where a newline was
-    tokens = []
-    for line in (x for x in lines if len(x) > 0):
-        line = line.replace('\t', ' ')
-        tokens += _tokenize_line(line, quote_strings=True, infer_name=False)
-        tokens.append(SENTINEL)
-
     # find (...) and turn it into a single line ("capture" it)
     capturing = False
     captured = []
 
-    flattened = []
-    while len(tokens) > 0:
-        tok = tokens.pop(0)
-
-        if tok == '$NAME':
-            tok = ' '
-
-        if not capturing and tok == SENTINEL:
-            # normal end-of-line
-            if len(captured) > 0:
-                flattened.append(" ".join(captured))
-                captured = []
-            continue
+    for line in (x for x in lines if len(x) > 0):
+        line = line.replace('\t', ' ')
+        for tok in _tokenize_line(line, quote_strings=True, infer_name=False):
+            if tok == '$NAME':
+                tok = ' '
 
-        if tok.startswith("("):
-            # begin grouping
-            tok = tok.lstrip("(")
-            capturing = True
+            if tok.startswith("("):
+                # begin grouping
+                tok = tok.lstrip("(")
+                capturing = True
 
-        if capturing and tok.endswith(")"):
-            # end grouping.  next end-of-line will turn this sequence into a flat line
-            tok = tok.rstrip(")")
-            capturing = False
+            if capturing and tok.endswith(")"):
+                # end grouping.  next end-of-line will turn this sequence into a flat line
+                tok = tok.rstrip(")")
+                capturing = False
 
-        if tok != SENTINEL:
             captured.append(tok)
 
-    return "\n".join(flattened)
+        if not capturing and len(captured) > 0:
+            # normal end-of-line
+            yield " ".join(captured)
+            captured = []
 
 
-def _add_record_names(text):
+def _add_record_names(lines):
     """
-    Go through each line of the text and ensure that
-    a name is defined.  Use previous record name if there is none.
+    Go through each line and ensure that a name is defined.
+    Use previous record name if there is none.
     """
     global SUPPORTED_RECORDS
 
-    lines = text.split("\n")
-    ret = []
     previous_record_name = None
 
     for line in lines:
@@ -302,9 +302,7 @@ def _add_record_names(text):
         elif not record_name.startswith('$'):
             previous_record_name = record_name
 
-        ret.append(_serialize(tokens))
-
-    return "\n".join(ret)
+        yield _serialize(tokens)
 
 
 def _convert_to_seconds(value):
@@ -406,14 +404,14 @@ def _post_check_names(zone):
 def parse_zone_file(text, zone_name, ignore_invalid=False):
     """
     Parse a zonefile into a dict
+
+    The zonefile is either text or a file object, which is read one
+    record at a time.
     """
 
-    text = _remove_comments(text)
-    text = _flatten(text)
-    text = _add_record_names(text)
+    record_lines = _add_record_names(_flatten(_remove_comments(_split_lines(text))))
 
     zone_obj = OrderedDict()
-    record_lines = text.split("\n")
     current_origin = zone_name.rstrip('.') + '.'
     current_ttl = 3600
     soa_processed = False
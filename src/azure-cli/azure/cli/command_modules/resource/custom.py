@@ -971,6 +971,9 @@ def list_resources(cmd, resource_group_name=None,
     if resource_group_name is not None:
         rcf.resource_groups.get(resource_group_name)
 
+    if not tag:
+        name, location, resource_type = _get_list_resources_query_filters(cmd, name, location, resource_type,
+                                                                          resource_provider_namespace)
     odata_filter = _list_resources_odata_filter_builder(resource_group_name,
                                                         resource_provider_namespace,
                                                         resource_type, name, tag, location)
@@ -978,6 +981,25 @@ def list_resources(cmd, resource_group_name=None,
     return list(resources)
 
 
+def _get_list_resources_query_filters(cmd, name, location, resource_type, resource_provider_namespace):
+    """ Narrow the listing with the `name`, `location` and `type` conditions of a `--query "[?location=='westus']"`,
+    which is still applied to the result. Tag conditions are not used, because listing resources by tag leaves their
+    tags out. """
+    from azure.cli.core._query import get_query, get_query_equality_filters
+    filters = {path: value for path, value in get_query_equality_filters(get_query(cmd.cli_ctx)).items()
+               if "'" not in value}
+    if not name and 'name' in filters:
+        name = filters['name']
+    if not location and 'location' in filters:
+        location = filters['location']
+    if not resource_type and not resource_provider_namespace and re.match('^[^/]+/[^/]+$', filters.get('type', '')):
+        resource_type = filters['type']
+    if filters:
+        logger.debug("--query conditions used to list resources: name=%s location=%s type=%s",
+                     name, location, resource_type)
+    return name, location, resource_type
+
+
 def register_provider(cmd, resource_provider_namespace, wait=False):
     _update_provider(cmd.cli_ctx, resource_provider_namespace, registering=True, wait=wait)
 
@@ -4,8 +4,9 @@
 # --------------------------------------------------------------------------------------------
 
 import unittest
+import mock
 from azure.cli.command_modules.resource.custom import (_list_resources_odata_filter_builder,
-                                                       _find_missing_parameters)
+                                                       _find_missing_parameters, _get_list_resources_query_filters)
 from azure.cli.core.parser import IncorrectUsageError
 
 
@@ -72,6 +73,20 @@ class TestListResources(unittest.TestCase):
         with self.assertRaises(IncorrectUsageError):
             _list_resources_odata_filter_builder(tag='foo=bar', name='should not work')
 
+    def test_query_conditions_narrow_the_listing(self):
+        import jmespath
+        cmd = mock.MagicMock()
+        cmd.cli_ctx.invocation.data = {'query': jmespath.compile(
+            "[?location=='westus' && type=='Microsoft.Compute/virtualMachines' && tags.env=='prod'].name")}
+        self.assertEqual(_get_list_resources_query_filters(cmd, None, None, None, None),
+                         (None, 'westus', 'Microsoft.Compute/virtualMachines'))
+        # explicit arguments win
+        self.assertEqual(_get_list_resources_query_filters(cmd, None, 'eastus', None, 'Microsoft.Compute'),
+                         (None, 'eastus', None))
+
+        cmd.cli_ctx.invocation.data = {'query': jmespath.compile("[?location=='westus' || name=='vm1']")}
+        self.assertEqual(_get_list_resources_query_filters(cmd, None, None, None, None), (None, None, None))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -518,7 +518,9 @@ examples:
 helps['role assignment list'] = """
 type: command
 short-summary: List role assignments.
-long-summary: By default, only assignments scoped to subscription will be displayed. To view assignments scoped by resource or group, use `--all`.
+long-summary: >
+    By default, only assignments scoped to subscription will be displayed. To view assignments scoped by resource or group, use `--all`.
+    The role names and principal names it resolves can be cached locally by setting 'name_cache_ttl' in the [role] section of the CLI configuration, or the AZURE_ROLE_NAME_CACHE_TTL environment variable, to a number of minutes.
 """
 
 helps['role assignment list-changelogs'] = """
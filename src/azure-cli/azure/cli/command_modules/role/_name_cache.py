@@ -0,0 +1,70 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Local copy of the role definition names and principal display names which `role assignment list` resolves, kept per
+cloud under the CLI's config directory for `role.name_cache_ttl` minutes. The cache is off unless that is set.
+"""
+
+import os
+import time
+
+from knack.log import get_logger
+
+from azure.cli.core.util import FileCache
+
+logger = get_logger(__name__)
+
+DEFAULT_NAME_CACHE_TTL = 0  # minutes
+NAME_CACHE_DIR = 'role_names'
+
+
+class NameCache(object):
+    """ Names of role definitions, per scope, and of principals, per tenant. """
+
+    def __init__(self, cli_ctx):
+        self.cache = FileCache(os.path.join(cli_ctx.config.config_dir, NAME_CACHE_DIR, cli_ctx.cloud.name),
+                               cli_ctx.config.getint('role', 'name_cache_ttl', DEFAULT_NAME_CACHE_TTL) * 60)
+
+    def get_role_names(self, scope, fetch):
+        """ Return `{role definition id: role name}` for a scope. `fetch()` lists them when they are not cached. """
+        if self.cache.ttl <= 0:
+            return fetch()
+        entry = self.cache.load('role_definitions', scope.lower())
+        if self.cache.is_fresh(entry):
+            logger.debug("Using cached role names of scope %s", scope)
+            return entry['value']
+        names = fetch()
+        self.cache.save('role_definitions', scope.lower(), names)
+        return names
+
+    def get_principal_names(self, tenant, object_ids, fetch):
+        """ Return `{object id: display name}` for principals of a tenant. `fetch(object_ids)` resolves those which
+        are not cached, and the principals it does not return are cached with an empty name. """
+        if self.cache.ttl <= 0:
+            return fetch(object_ids)
+        entry = self.cache.load('principals', tenant.lower())
+        # each name is saved with the time it was resolved
+        cached_names = entry['value'] if entry else {}
+        now = time.time()
+        names = {}
+        missing = []
+        for object_id in object_ids:
+            cached = cached_names.get(object_id)
+            if cached is not None and now - cached[1] < self.cache.ttl:
+                names[object_id] = cached[0]
+            else:
+                missing.append(object_id)
+        if not missing:
+            return names
+
+        fetched = fetch(missing)
+        for object_id in missing:
+            names[object_id] = fetched.get(object_id, '')
+            cached_names[object_id] = [names[object_id], now]
+        # leave out the names which expired, so that the cache does not grow forever
+        self.cache.save('principals', tenant.lower(),
+                        {k: v for k, v in cached_names.items() if now - v[1] < self.cache.ttl})
+        return names
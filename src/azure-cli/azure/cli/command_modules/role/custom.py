@@ -33,6 +33,7 @@ from azure.graphrbac.models import (ApplicationCreateParameters, ApplicationUpda
 
 from ._client_factory import _auth_client_factory, _graph_client_factory
 from ._multi_api_adaptor import MultiAPIAdaptor
+from ._name_cache import NameCache
 
 logger = get_logger(__name__)
 
@@ -194,10 +195,11 @@ def list_role_assignments(cmd, assignee=None, role=None, resource_group_name=Non
     # 1. fill in logic names to get things understandable.
     # (it's possible that associated roles and principals were deleted, and we just do nothing.)
     # 2. fill in role names
-    role_defs = list(definitions_client.list(
-        scope=scope or ('/subscriptions/' + definitions_client.config.subscription_id)))
     worker = MultiAPIAdaptor(cmd.cli_ctx)
-    role_dics = {i.id: worker.get_role_property(i, 'role_name') for i in role_defs}
+    name_cache = NameCache(cmd.cli_ctx)
+    definitions_scope = scope or ('/subscriptions/' + definitions_client.config.subscription_id)
+    role_dics = name_cache.get_role_names(definitions_scope, lambda: {
+        i.id: worker.get_role_property(i, 'role_name') for i in definitions_client.list(scope=definitions_scope)})
     for i in results:
         if not i.get('roleDefinitionName'):
             if role_dics.get(worker.get_role_property(i, 'roleDefinitionId')):
@@ -211,9 +213,13 @@ def list_role_assignments(cmd, assignee=None, role=None, resource_group_name=Non
                         for i in results if worker.get_role_property(i, 'principalId'))
 
     if principal_ids:
+        def _get_principal_names(object_ids):
+            principals = _get_object_stubs(graph_client, object_ids, max_concurrency=_get_max_concurrency(cmd.cli_ctx))
+            return {i.object_id: _get_displayable_name(i) for i in principals}
+
         try:
-            principals = _get_object_stubs(graph_client, principal_ids)
-            principal_dics = {i.object_id: _get_displayable_name(i) for i in principals}
+            principal_dics = name_cache.get_principal_names(
+                graph_client.config.tenant_id, principal_ids, _get_principal_names)
 
             for i in [r for r in results if not r.get('principalName')]:
                 i['principalName'] = ''
@@ -472,20 +478,29 @@ def _search_role_assignments(cli_ctx, assignments_client, definitions_client,
 
     worker = MultiAPIAdaptor(cli_ctx)
     if assignments:
+        scopes = None
+        if scope:
+            scopes = _get_inheritable_scopes(scope) if include_inherited else {scope.lower()}
+        role_id = _resolve_role_id(role, scope, definitions_client) if role else None
+
+        # one pass, with a set lookup for the scope, as there can be hundreds of thousands of assignments
         assignments = [a for a in assignments if (
-            not scope or
-            include_inherited and re.match(worker.get_role_property(a, 'scope'), scope, re.I) or
-            worker.get_role_property(a, 'scope').lower() == scope.lower()
+            (scopes is None or worker.get_role_property(a, 'scope').lower() in scopes) and
+            (role_id is None or worker.get_role_property(a, 'role_definition_id') == role_id) and
+            (assignee_object_id is None or worker.get_role_property(a, 'principal_id') == assignee_object_id)
         )]
 
-        if role:
-            role_id = _resolve_role_id(role, scope, definitions_client)
-            assignments = [i for i in assignments if worker.get_role_property(i, 'role_definition_id') == role_id]
+    return assignments
 
-        if assignee_object_id:
-            assignments = [i for i in assignments if worker.get_role_property(i, 'principal_id') == assignee_object_id]
 
-    return assignments
+def _get_inheritable_scopes(scope):
+    """ Return the lowercase scope, and the scopes above it whose role assignments it inherits. For example
+    '/subscriptions/{}/resourceGroups/{}' inherits the assignments of '/subscriptions/{}' and '/'. """
+    parts = scope.lower().rstrip('/').split('/')
+    scopes = {'/'}
+    for i in range(2, len(parts) + 1):
+        scopes.add('/'.join(parts[:i]))
+    return scopes
 
 
 def _build_role_scope(resource_group_name, scope, subscription_id):
@@ -1660,14 +1675,27 @@ def _is_guid(guid):
     return False
 
 
-def _get_object_stubs(graph_client, assignees):
+def _get_object_stubs(graph_client, assignees, max_concurrency=1):
     from azure.graphrbac.models import GetObjectsParameters
-    result = []
     assignees = list(assignees)  # callers could pass in a set
-    for i in range(0, len(assignees), 1000):
-        params = GetObjectsParameters(include_directory_object_references=True, object_ids=assignees[i:i + 1000])
-        result += list(graph_client.objects.get_objects_by_object_ids(params))
-    return result
+
+    def _get_objects(chunk):
+        params = GetObjectsParameters(include_directory_object_references=True, object_ids=chunk)
+        return list(graph_client.objects.get_objects_by_object_ids(params))
+
+    chunks = [assignees[i:i + 1000] for i in range(0, len(assignees), 1000)]
+    if max_concurrency < 2 or len(chunks) < 2:
+        results = [_get_objects(chunk) for chunk in chunks]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks))) as executor:
+            results = list(executor.map(_get_objects, chunks))
+    return [stub for result in results for stub in result]
+
+
+def _get_max_concurrency(cli_ctx):
+    from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+    return cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
 
 
 def _get_owner_url(cli_ctx, owner_object_id):
@@ -25,7 +25,10 @@ from azure.cli.command_modules.role.custom import (create_role_definition,
                                                    _get_object_stubs,
                                                    list_service_principal_owners,
                                                    list_application_owners,
-                                                   delete_role_assignments)
+                                                   delete_role_assignments,
+                                                   _search_role_assignments,
+                                                   _get_inheritable_scopes)
+from azure.cli.command_modules.role._name_cache import NameCache
 
 from knack.util import CLIError
 
@@ -407,6 +410,78 @@ class TestRoleMocked(unittest.TestCase):
             args, _ = call
             self.assertEqual(args[0].object_ids, group)
 
+    def test_get_object_stubs_in_parallel(self):
+        graph_client = mock.MagicMock()
+        graph_client.objects.get_objects_by_object_ids.side_effect = lambda params: list(params.object_ids)
+
+        stubs = _get_object_stubs(graph_client, list(range(2500)), max_concurrency=3)
+
+        self.assertEqual(graph_client.objects.get_objects_by_object_ids.call_count, 3)
+        self.assertEqual(stubs, list(range(2500)))
+
+    def test_get_inheritable_scopes(self):
+        self.assertEqual(_get_inheritable_scopes('/subscriptions/Sub1/resourceGroups/RG1/'),
+                         {'/', '/subscriptions', '/subscriptions/sub1', '/subscriptions/sub1/resourcegroups',
+                          '/subscriptions/sub1/resourcegroups/rg1'})
+
+    @mock.patch('azure.cli.command_modules.role._multi_api_adaptor.supported_api_version', return_value=False)
+    def test_search_role_assignments(self, _):
+        def _assignment(scope, role_definition_id='role1', principal_id='user1'):
+            return mock.MagicMock(scope=scope, role_definition_id=role_definition_id, principal_id=principal_id)
+
+        cli_ctx = mock.MagicMock()
+        rg_scope = '/subscriptions/sub1/resourceGroups/rg1'
+        assignments = [_assignment('/'), _assignment('/subscriptions/sub1'), _assignment(rg_scope.upper()),
+                       _assignment('/subscriptions/sub1/resourceGroups/rg'), _assignment(rg_scope, 'role2'),
+                       _assignment(rg_scope, principal_id='user2')]
+        assignments_client = mock.MagicMock()
+        assignments_client.list_for_scope.return_value = assignments
+
+        result = _search_role_assignments(cli_ctx, assignments_client, None, rg_scope, None, None,
+                                          include_inherited=True, include_groups=False)
+        # 'rg' is a prefix of 'rg1' but not a parent scope
+        self.assertEqual(result, [assignments[0], assignments[1], assignments[2], assignments[4], assignments[5]])
+
+        result = _search_role_assignments(cli_ctx, assignments_client, None, rg_scope, None, None,
+                                          include_inherited=False, include_groups=False)
+        self.assertEqual(result, [assignments[2], assignments[4], assignments[5]])
+
+        with mock.patch('azure.cli.command_modules.role.custom._resolve_object_id', return_value='user1'):
+            result = _search_role_assignments(cli_ctx, assignments_client, None, rg_scope, 'user1@contoso.com',
+                                              '/subscriptions/sub1/providers/Microsoft.Authorization/roleDefinitions/role1',
+                                              include_inherited=False, include_groups=False)
+        self.assertEqual(result, [])
+        with mock.patch('azure.cli.command_modules.role.custom._resolve_object_id', return_value='user1'):
+            result = _search_role_assignments(cli_ctx, assignments_client, None, rg_scope, 'user1@contoso.com', None,
+                                              include_inherited=False, include_groups=False)
+        self.assertEqual(result, [assignments[2], assignments[4]])
+
+    def test_name_cache(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.config.config_dir = tempfile.mkdtemp()
+        cli_ctx.cloud.name = 'AzureCloud'
+        cli_ctx.config.getint.return_value = 60
+        cache = NameCache(cli_ctx)
+        fetch_roles = mock.MagicMock(return_value={'role1': 'Reader'})
+        self.assertEqual(cache.get_role_names('/subscriptions/Sub1', fetch_roles), {'role1': 'Reader'})
+        self.assertEqual(cache.get_role_names('/subscriptions/sub1', fetch_roles), {'role1': 'Reader'})
+        self.assertEqual(fetch_roles.call_count, 1)
+
+        fetch_principals = mock.MagicMock(side_effect=lambda ids: {i: i.upper() for i in ids if i != 'deleted'})
+        self.assertEqual(cache.get_principal_names('tenant1', ['a', 'deleted'], fetch_principals),
+                         {'a': 'A', 'deleted': ''})
+        self.assertEqual(cache.get_principal_names('tenant1', ['a', 'b', 'deleted'], fetch_principals),
+                         {'a': 'A', 'b': 'B', 'deleted': ''})
+        # only the principals which were not cached are resolved
+        self.assertEqual(fetch_principals.call_args[0][0], ['b'])
+
+        # without a TTL nothing is cached
+        fetch_roles.reset_mock()
+        cli_ctx.config.getint.return_value = 0
+        cache = NameCache(cli_ctx)
+        cache.get_role_names('/subscriptions/sub1', fetch_roles)
+        self.assertEqual(fetch_roles.call_count, 1)
+
 
 class FakedError(object):  # pylint: disable=too-few-public-methods
     def __init__(self, message):
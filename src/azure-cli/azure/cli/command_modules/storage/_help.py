@@ -204,7 +204,7 @@ examples:
 
 helps['storage blob copy start-batch'] = """
 type: command
-short-summary: Copy multiple blobs or files to a blob container. Use `az storage blob show` to check the status of the blobs.
+short-summary: Copy multiple blobs or files to a blob container. Use `--wait` or `az storage blob show` to check the status of the blobs.
 parameters:
   - name: --destination-container -c
     type: string
@@ -238,6 +238,10 @@ examples:
   - name: Copy multiple blobs or files to a blob container. Use `az storage blob show` to check the status of the blobs. (autogenerated)
     text: az storage blob copy start-batch --account-key 00000000 --account-name MyAccount --destination-container MyDestinationContainer --source-account-key MySourceKey --source-account-name MySourceAccount --source-container MySourceContainer
     crafted: true
+  - name: Copy all blobs of a container to another account, and wait until every copy has completed.
+    text: az storage blob copy start-batch --account-name MyAccount --destination-container MyDestinationContainer --source-account-name MySourceAccount --source-container MySourceContainer --max-concurrency 50 --wait
+  - name: Copy all blobs of a container, and wait up to an hour for the copies to complete.
+    text: az storage blob copy start-batch --account-name MyAccount --destination-container MyDestinationContainer --source-account-name MySourceAccount --source-container MySourceContainer --wait --wait-timeout 3600
 """
 
 helps['storage blob delete'] = """
@@ -432,6 +436,10 @@ examples:
 helps['storage blob sync'] = """
 type: command
 short-summary: Sync blobs recursively to a storage blob container.
+long-summary: >
+    Uploads the files which are missing from the container or differ from their blob, and deletes the blobs under the
+    destination path which have no local file. Files are compared by size and MD5. The MD5 of the synced files is cached
+    locally, so the files which changed neither locally nor in the container since the previous sync are not read again.
 examples:
   - name: Sync a single blob to a container.
     text: az storage blob sync -c MyContainer --account-name MyStorageAccount -s "path/to/file" -d NewBlob
@@ -492,6 +500,8 @@ parameters:
 examples:
   - name: Upload all files that end with .py unless blob exists and has been modified since given date.
     text: az storage blob upload-batch -d MyContainer --account-name MyStorageAccount -s directory_path --pattern *.py --if-unmodified-since 2018-08-27T20:51Z
+  - name: Upload a directory using up to 50 connections, skipping the files uploaded before the previous run was interrupted.
+    text: az storage blob upload-batch -d MyContainer --account-name MyStorageAccount -s directory_path --max-concurrency 50 --resume
 """
 
 helps['storage blob url'] = """
@@ -14,8 +14,7 @@ from ._validators import (get_datetime_type, validate_metadata, get_permission_v
                           validate_table_payload_format, validate_key, add_progress_callback, process_resource_group,
                           storage_account_key_options, process_file_download_namespace, process_metric_update_namespace,
                           get_char_options_validator, validate_bypass, validate_encryption_source, validate_marker,
-                          validate_storage_data_plane_list, validate_azcopy_upload_destination_url,
-                          validate_azcopy_remove_arguments, as_user_validator)
+                          validate_storage_data_plane_list, validate_azcopy_remove_arguments, as_user_validator)
 
 
 def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statements
@@ -60,6 +59,9 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
                                       completer=get_storage_name_completion_list(t_queue_service, 'list_queues'))
     progress_type = CLIArgumentType(help='Include this flag to disable progress reporting for the command.',
                                     action='store_true', validator=add_progress_callback)
+    max_concurrency_type = CLIArgumentType(
+        type=int, help='Maximum number of connections used at once by all blobs of the batch. A blob transferred in '
+                       'chunks uses up to --max-connections of them. Default: `core.max_concurrency` or 10.')
     socket_timeout_type = CLIArgumentType(help='The socket timeout(secs), used by the service to regulate data flow.',
                                           type=int)
     num_results_type = CLIArgumentType(
@@ -326,6 +328,11 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('maxsize_condition', arg_group='Content Control')
         c.argument('validate_content', action='store_true', min_api='2016-05-31', arg_group='Content Control')
         c.argument('blob_type', options_list=('--type', '-t'), arg_type=get_enum_type(get_blob_types()))
+        c.argument('max_concurrency', max_concurrency_type)
+        c.argument('resume', action='store_true',
+                   help='Skip the files which an interrupted run of the same upload-batch command already uploaded '
+                        'and which have not changed since. Each run records the uploaded files in the configuration '
+                        'directory until it completes, or for at most a week if it does not.')
         c.extra('no_progress', progress_type)
         c.extra('socket_timeout', socket_timeout_type)
 
@@ -346,6 +353,7 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.extra('socket_timeout', socket_timeout_type)
         c.argument('max_connections', type=int,
                    help='Maximum number of parallel connections to use when the blob size exceeds 64MB.')
+        c.argument('max_concurrency', max_concurrency_type)
 
     with self.argument_context('storage blob delete') as c:
         from .sdkutil import get_delete_blob_snapshot_type_names
@@ -357,6 +365,9 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('delete_snapshots', arg_type=get_enum_type(get_delete_blob_snapshot_type_names()),
                    help='Required if the blob has associated snapshots.')
         c.argument('lease_id', help='The active lease id for the blob.')
+        c.argument('max_concurrency', type=int,
+                   help='Maximum number of requests sent at once. Each request deletes up to 256 blobs. '
+                        'Default: `core.max_concurrency` or 10.')
 
     with self.argument_context('storage blob lease') as c:
         c.argument('lease_duration', type=int)
@@ -418,6 +429,15 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source_container')
         c.argument('source_share')
 
+    with self.argument_context('storage blob copy start-batch') as c:
+        c.argument('max_concurrency', type=int,
+                   help='Maximum number of copies started at once. Default: `core.max_concurrency` or 10.')
+        c.argument('wait', action='store_true',
+                   help='Wait for all copies to complete, and list the copies which succeeded and which did not.')
+        c.argument('wait_timeout', type=int,
+                   help='Maximum number of seconds to wait with `--wait`. The copies still pending are listed as such. '
+                        'Default: no limit.')
+
     with self.argument_context('storage blob incremental-copy start') as c:
         from azure.cli.command_modules.storage._validators import process_blob_source_uri
 
@@ -432,14 +452,15 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source_lease_id', arg_group='Copy Source')
 
     with self.argument_context('storage blob sync') as c:
-        c.extra('destination_container', options_list=['--container', '-c'], required=True,
-                help='The sync destination container.')
-        c.extra('destination_path', options_list=['--destination', '-d'],
-                validator=validate_azcopy_upload_destination_url,
-                help='The sync destination path.')
+        c.argument('container_name', container_name_type, options_list=['--container', '-c'],
+                   help='The sync destination container.')
+        c.argument('destination_path', options_list=['--destination', '-d'],
+                   help='The sync destination path.')
         c.argument('source', options_list=['--source', '-s'],
                    help='The source file path to sync from.')
-        c.ignore('destination')
+        c.argument('max_connections', type=int,
+                   help='Maximum number of parallel connections to use when the blob size exceeds 64MB.')
+        c.argument('max_concurrency', max_concurrency_type)
 
     with self.argument_context('storage container') as c:
         from .sdkutil import get_container_access_type_names
@@ -760,17 +760,23 @@ def process_blob_upload_batch_parameters(cmd, namespace):
     # 2. try to extract account name and container name from destination string
     _process_blob_batch_container_parameters(cmd, namespace, source=False)
 
-    # 3. collect the files to be uploaded
+    # 3. the files to be uploaded are collected as they are uploaded
     namespace.source = os.path.realpath(namespace.source)
-    namespace.source_files = [c for c in glob_files_locally(namespace.source, namespace.pattern)]
 
     # 4. determine blob type
     if namespace.blob_type is None:
-        vhd_files = [f for f in namespace.source_files if f[0].endswith('.vhd')]
-        if any(vhd_files) and len(vhd_files) == len(namespace.source_files):
+        vhd_files, other_files = False, False
+        for path, _ in glob_files_locally(namespace.source, namespace.pattern):
+            if path.endswith('.vhd'):
+                vhd_files = True
+            else:
+                other_files = True
+            if vhd_files and other_files:
+                break
+        if vhd_files and not other_files:
             # when all the listed files are vhd files use page
             namespace.blob_type = 'page'
-        elif any(vhd_files):
+        elif vhd_files:
             # source files contain vhd files but not all of them
             from knack.util import CLIError
             raise CLIError("""Fail to guess the required blob type. Type of the files to be
@@ -1037,18 +1043,6 @@ def blob_tier_validator(cmd, namespace):
         raise ValueError('Blob tier is only applicable to block or page blob.')
 
 
-def validate_azcopy_upload_destination_url(cmd, namespace):
-    client = blob_data_service_factory(cmd.cli_ctx, {
-        'account_name': namespace.account_name})
-    destination_path = namespace.destination_path
-    if not destination_path:
-        destination_path = ''
-    url = client.make_blob_url(namespace.destination_container, destination_path)
-    namespace.destination = url
-    del namespace.destination_container
-    del namespace.destination_path
-
-
 def validate_azcopy_remove_arguments(cmd, namespace):
     usage_string = \
         'Invalid usage: {}. Supply only one of the following argument sets to specify source:' \
@@ -0,0 +1,129 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Tools to send several blob requests in one Blob Batch request. See
+https://docs.microsoft.com/rest/api/storageservices/blob-batch. The storage SDK used by the CLI does not support
+batches yet, so the subrequests are built and signed here and sent through the SDK's request pipeline.
+"""
+
+import uuid
+
+from azure.cli.command_modules.storage.url_quote_util import encode_for_url
+
+# the most subrequests a batch can contain
+MAX_BATCH_SIZE = 256
+BATCH_MIN_API = '2018-11-09'
+# the error codes with which a service which does not support batches rejects one: it does not know comp=batch, or
+# the API version batches require, the only header of the batch request which a CLI version may set differently
+BATCH_NOT_SUPPORTED_ERRORS = ('InvalidQueryParameterValue', 'UnsupportedQueryParameter', 'InvalidHeaderValue')
+
+
+class BatchSubResponse(object):  # pylint: disable=too-few-public-methods
+    def __init__(self, blob_name, status_code, error_code=None):
+        self.blob_name = blob_name
+        self.status_code = status_code
+        self.error_code = error_code
+
+
+def batch_delete_blobs(cmd, client, container_name, blob_names, delete_snapshots=None, lease_id=None,
+                       if_modified_since=None, if_unmodified_since=None, if_match=None, if_none_match=None,
+                       timeout=None):
+    """ Delete up to MAX_BATCH_SIZE blobs in one request. Returns a BatchSubResponse for each blob, in order. """
+    from datetime import datetime
+    t_http_request = cmd.get_models('common._http#HTTPRequest')
+    headers = {
+        'x-ms-delete-snapshots': delete_snapshots,
+        'x-ms-lease-id': lease_id,
+        'If-Modified-Since': _to_http_date(if_modified_since) if if_modified_since else None,
+        'If-Unmodified-Since': _to_http_date(if_unmodified_since) if if_unmodified_since else None,
+        'If-Match': if_match,
+        'If-None-Match': if_none_match,
+    }
+    sub_requests = []
+    for blob_name in blob_names:
+        request = t_http_request()
+        request.method = 'DELETE'
+        request.path = '/{}/{}'.format(encode_for_url(container_name), encode_for_url(blob_name))
+        request.query = {}
+        request.headers = {name: value for name, value in headers.items() if value}
+        request.headers['x-ms-date'] = _to_http_date(datetime.utcnow())
+        request.headers['Content-Length'] = '0'
+        client.authentication.sign_request(request)
+        sub_requests.append(request)
+
+    batch_id = str(uuid.uuid4())
+    request = t_http_request()
+    request.method = 'POST'
+    request.host_locations = client._get_host_locations()  # pylint: disable=protected-access
+    request.path = '/'
+    request.query = {'comp': 'batch', 'timeout': str(timeout) if timeout else None}
+    request.headers = {'Content-Type': 'multipart/mixed; boundary=batch_{}'.format(batch_id)}
+    request.body = serialize_batch_body(sub_requests, batch_id)
+    return client._perform_request(request, parser=parse_batch_response,  # pylint: disable=protected-access
+                                   parser_args=[blob_names])
+
+
+def is_batch_not_supported(ex):
+    """ Whether an AzureHttpError from a batch request means that the service does not support batches. """
+    return ex.status_code == 400 and getattr(ex, 'error_code', None) in BATCH_NOT_SUPPORTED_ERRORS
+
+
+def serialize_batch_body(sub_requests, batch_id):
+    lines = []
+    for content_id, request in enumerate(sub_requests):
+        path = request.path
+        if request.query:
+            from six.moves.urllib.parse import urlencode  # pylint: disable=import-error
+            path += ('&' if '?' in path else '?') + urlencode(request.query)
+        lines.extend(['--batch_{}'.format(batch_id),
+                      'Content-Type: application/http',
+                      'Content-Transfer-Encoding: binary',
+                      'Content-ID: {}'.format(content_id),
+                      '',
+                      '{} {} HTTP/1.1'.format(request.method, path)])
+        lines.extend('{}: {}'.format(name, value) for name, value in request.headers.items())
+        lines.append('')
+    lines.extend(['--batch_{}--'.format(batch_id), ''])
+    return '\r\n'.join(lines).encode('utf-8')
+
+
+def parse_batch_response(response, blob_names):
+    """ Match the parts of a multipart/mixed batch response to the blobs, by their Content-ID. """
+    content_type = next(value for name, value in response.headers.items() if name.lower() == 'content-type')
+    boundary = content_type.split('boundary=', 1)[1].split(';')[0].strip('"')
+    body = response.body.decode('utf-8') if isinstance(response.body, bytes) else response.body
+
+    results = [None] * len(blob_names)
+    for part in body.split('--' + boundary)[1:]:
+        if part.startswith('--'):
+            break
+        mime_headers, _, http_response = part.strip('\r\n').partition('\r\n\r\n')
+        content_id = _get_header(mime_headers.split('\r\n'), 'content-id')
+        status_line, _, http_headers = http_response.partition('\r\n')
+        if content_id is None or not content_id.strip().isdigit() or int(content_id) >= len(blob_names):
+            continue
+        index = int(content_id)
+        error_code = _get_header(http_headers.split('\r\n\r\n')[0].split('\r\n'), 'x-ms-error-code')
+        results[index] = BatchSubResponse(blob_names[index], int(status_line.split(' ')[1]), error_code)
+    # e.g. when the service rejected the whole batch in a single response part
+    return [result or BatchSubResponse(blob_name, None, 'NoSubResponse')
+            for blob_name, result in zip(blob_names, results)]
+
+
+def _get_header(lines, name):
+    for line in lines:
+        header, _, value = line.partition(':')
+        if header.strip().lower() == name:
+            return value.strip()
+    return None
+
+
+def _to_http_date(value):
+    import calendar
+    from email.utils import formatdate
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return formatdate(calendar.timegm(value.timetuple()), usegmt=True)
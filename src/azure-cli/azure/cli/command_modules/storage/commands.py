@@ -159,6 +159,7 @@ def load_command_table(self, _):  # pylint: disable=too-many-locals, too-many-st
                                        validator=process_blob_download_batch_parameters)
         g.storage_custom_command_oauth('delete-batch', 'storage_blob_delete_batch',
                                        validator=process_blob_delete_batch_parameters)
+        g.storage_custom_command_oauth('sync', 'storage_blob_sync')
         g.storage_custom_command_oauth('show', 'show_blob', table_transformer=transform_blob_output,
                                        client_factory=page_blob_service_factory,
                                        doc_string_source='blob#PageBlobService.get_blob_properties',
@@ -211,10 +212,6 @@ def load_command_table(self, _):  # pylint: disable=too-many-locals, too-many-st
                                 setter_name='set_service_properties',
                                 client_factory=cf_blob_data_gen_update)
 
-    with self.command_group('storage blob', command_type=block_blob_sdk,
-                            custom_command_type=get_custom_sdk('azcopy', blob_data_service_factory)) as g:
-        g.storage_custom_command_oauth('sync', 'storage_blob_sync')
-
     with self.command_group('storage container', command_type=block_blob_sdk,
                             custom_command_type=get_custom_sdk('blob', blob_data_service_factory)) as g:
         from azure.cli.command_modules.storage._transformers import (transform_storage_list_output,
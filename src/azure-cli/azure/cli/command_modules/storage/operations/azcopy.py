@@ -107,11 +107,6 @@ def storage_remove(cmd, client, service, target, exclude=None, include=None, rec
     azcopy.remove(_add_url_sas(target, azcopy.creds.sas_token), flags=flags)
 
 
-def storage_blob_sync(cmd, client, source, destination):
-    azcopy = _azcopy_blob_client(cmd, client)
-    azcopy.sync(source, _add_url_sas(destination, azcopy.creds.sas_token), flags=['--delete-destination', 'true'])
-
-
 def storage_run_command(cmd, command_args):
     if command_args.startswith('azcopy'):
         command_args = command_args[len('azcopy'):]
@@ -5,6 +5,7 @@
 
 from __future__ import print_function
 
+import functools
 import os
 from datetime import datetime
 from azure.cli.command_modules.storage.url_quote_util import encode_for_url, make_encoded_file_url_and_params
@@ -12,12 +13,16 @@ from azure.cli.command_modules.storage.util import (create_blob_service_from_sto
                                                     create_file_share_from_storage_client,
                                                     create_short_lived_share_sas,
                                                     create_short_lived_container_sas,
-                                                    filter_none, collect_blobs, collect_files,
+                                                    collect_blobs, collect_files, glob_files_locally,
+                                                    glob_blobs_remotely_sharded,
                                                     mkdir_p, guess_content_type, normalize_blob_file_path,
                                                     check_precondition_success)
 from knack.log import get_logger
 from knack.util import CLIError
 
+# longest time in seconds between two listings of the destination while waiting for copies
+MAX_COPY_POLL_INTERVAL = 30
+
 
 def delete_container(client, container_name, fail_not_exist=False, lease_id=None, if_modified_since=None,
                      if_unmodified_since=None, timeout=None, bypass_immutability_policy=False,
@@ -95,8 +100,11 @@ def set_service_properties(client, parameters, delete_retention=None, delete_ret
 
 def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
                             destination_path=None, source_container=None, source_share=None,
-                            source_sas=None, pattern=None, dryrun=False):
+                            source_sas=None, pattern=None, dryrun=False, max_concurrency=None, wait=False,
+                            wait_timeout=None):
     """Copy a group of blob or files to a blob container."""
+    if wait_timeout is not None and not wait:
+        raise CLIError('usage error: --wait-timeout can only be used with --wait')
     logger = None
     if dryrun:
         logger = get_logger(__name__)
@@ -117,17 +125,17 @@ def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
             source_sas = create_short_lived_container_sas(cmd, source_client.account_name, source_client.account_key,
                                                           source_container)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_blob_copy(blob_name):
-            if dryrun:
+        source_blobs = collect_blobs(source_client, source_container, pattern)
+        if dryrun:
+            for blob_name in source_blobs:
                 logger.warning('  - copy blob %s', blob_name)
-            else:
-                return _copy_blob_to_blob_container(client, source_client, container_name, destination_path,
-                                                    source_container, source_sas, blob_name)
+            return []
 
-        return list(filter_none(action_blob_copy(blob) for blob in collect_blobs(source_client,
-                                                                                 source_container,
-                                                                                 pattern)))
+        copy_tasks = (functools.partial(_copy_blob_to_blob_container, client, source_client, container_name,
+                                        destination_path, source_container, source_sas, blob_name)
+                      for blob_name in source_blobs)
+        return _run_blob_copy_batch(cmd, client, container_name, destination_path, copy_tasks, max_concurrency,
+                                    wait, wait_timeout)
 
     if source_share:
         # copy blob from file share
@@ -139,27 +147,104 @@ def storage_blob_copy_batch(cmd, client, source_client, container_name=None,
             source_sas = create_short_lived_share_sas(cmd, source_client.account_name, source_client.account_key,
                                                       source_share)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_file_copy(file_info):
-            dir_name, file_name = file_info
-            if dryrun:
+        source_files = collect_files(cmd, source_client, source_share, pattern)
+        if dryrun:
+            for dir_name, file_name in source_files:
                 logger.warning('  - copy file %s', os.path.join(dir_name, file_name))
-            else:
-                return _copy_file_to_blob_container(client, source_client, container_name, destination_path,
-                                                    source_share, source_sas, dir_name, file_name)
+            return []
 
-        return list(filter_none(action_file_copy(file) for file in collect_files(cmd,
-                                                                                 source_client,
-                                                                                 source_share,
-                                                                                 pattern)))
+        copy_tasks = (functools.partial(_copy_file_to_blob_container, client, source_client, container_name,
+                                        destination_path, source_share, source_sas, dir_name, file_name)
+                      for dir_name, file_name in source_files)
+        return _run_blob_copy_batch(cmd, client, container_name, destination_path, copy_tasks, max_concurrency,
+                                    wait, wait_timeout)
     raise ValueError('Fail to find source. Neither blob container or file share is specified')
 
 
+def _run_blob_copy_batch(cmd, client, container_name, destination_path, copy_tasks, max_concurrency, wait,
+                         wait_timeout=None):
+    """ Start the copies on up to `max_concurrency` connections and, with `wait`, wait up to `wait_timeout` seconds
+    for them to complete. """
+    from azure.cli.command_modules.storage.transfer_util import run_transfers
+    logger = get_logger(__name__)
+    _use_connection_budget(client, cmd, max_concurrency)
+
+    urls = {}
+    copies = {}
+    for index, (url, blob_name, copy) in run_transfers(((task, 1) for task in copy_tasks),
+                                                       _get_max_concurrency(cmd, max_concurrency)):
+        urls[index] = url
+        copies[blob_name] = (url, copy)
+
+    pending = [blob_name for blob_name, (_, copy) in copies.items() if copy.status == 'pending']
+    if not wait:
+        if pending:
+            logger.warning('%s of %s copies are pending. Use --wait to wait for them to complete.',
+                           len(pending), len(copies))
+        return [urls[index] for index in sorted(urls)]
+
+    _wait_for_blob_copies(cmd, client, container_name, destination_path, copies, pending, wait_timeout)
+    result = {'succeeded': [], 'failed': [], 'pending': []}
+    for url, copy in (copies[blob_name] for blob_name in sorted(copies)):
+        if copy.status == 'success':
+            result['succeeded'].append(url)
+        elif copy.status == 'pending':
+            result['pending'].append(url)
+        else:
+            result['failed'].append({'blob': url, 'status': copy.status, 'statusDescription': copy.status_description})
+    if result['failed']:
+        logger.warning('%s of %s copies did not succeed.', len(result['failed']), len(copies))
+    if result['pending']:
+        logger.warning('%s of %s copies are still pending after %s seconds.', len(result['pending']), len(copies),
+                       wait_timeout)
+    return result
+
+
+def _wait_for_blob_copies(cmd, client, container_name, destination_path, copies, pending, timeout=None):
+    """ Poll the copy status of the pending blobs with listings of the destination, rather than one request per blob,
+    for up to `timeout` seconds.
+
+    `copies` maps the name of each destination blob to its url and CopyProperties, which are updated in place.
+    """
+    import time
+    t_include = cmd.get_models('blob.models#Include')
+    logger = get_logger(__name__)
+    prefix = normalize_blob_file_path(None, destination_path) + '/' if destination_path else None
+    pending = set(pending)
+    deadline = time.time() + timeout if timeout is not None else None
+    interval = 1
+    while pending:
+        delay = interval if deadline is None else min(interval, deadline - time.time())
+        if delay <= 0:
+            return
+        logger.warning('Waiting for %s pending copies...', len(pending))
+        time.sleep(delay)
+        interval = min(interval * 2, MAX_COPY_POLL_INTERVAL)
+        listed = set()
+        for blob in client.list_blobs(container_name, prefix=prefix, include=t_include(copy=True)):
+            if blob.name not in pending:
+                continue
+            listed.add(blob.name)
+            copy = copies[blob.name][1]
+            listed_copy = blob.properties.copy
+            if listed_copy.id != copy.id:
+                copy.status, copy.status_description = 'failed', 'The blob was replaced by another copy.'
+            else:
+                copy.status, copy.status_description = listed_copy.status, listed_copy.status_description
+            if copy.status != 'pending':
+                pending.discard(blob.name)
+        for blob_name in pending - listed:
+            copy = copies[blob_name][1]
+            copy.status, copy.status_description = 'failed', 'The blob was deleted.'
+            pending.discard(blob_name)
+
+
 # pylint: disable=unused-argument
-def storage_blob_download_batch(client, source, destination, source_container_name, pattern=None, dryrun=False,
-                                progress_callback=None, max_connections=2):
+def storage_blob_download_batch(cmd, client, source, destination, source_container_name, pattern=None, dryrun=False,
+                                progress_callback=None, max_connections=2, max_concurrency=None):
+    from azure.cli.command_modules.storage.transfer_util import run_transfers, TransferProgress
 
-    def _download_blob(blob_service, container, destination_folder, normalized_blob_name, blob_name):
+    def _download_blob(blob_service, container, destination_folder, normalized_blob_name, blob_name, callback):
         # TODO: try catch IO exception
         destination_path = os.path.join(destination_folder, normalized_blob_name)
         destination_folder = os.path.dirname(destination_path)
@@ -167,7 +252,7 @@ def storage_blob_download_batch(client, source, destination, source_container_na
             mkdir_p(destination_folder)
 
         blob = blob_service.get_blob_to_path(container, blob_name, destination_path, max_connections=max_connections,
-                                             progress_callback=progress_callback)
+                                             progress_callback=callback)
         return blob.name
 
     source_blobs = collect_blobs(client, source_container_name, pattern)
@@ -195,19 +280,24 @@ def storage_blob_download_batch(client, source, destination, source_container_na
     # Tell progress reporter to reuse the same hook
     if progress_callback:
         progress_callback.reuse = True
-
-    results = []
-    for index, blob_normed in enumerate(blobs_to_download):
-        # add blob name and number to progress message
-        if progress_callback:
-            progress_callback.message = '{}/{}: "{}"'.format(
-                index + 1, len(blobs_to_download), blobs_to_download[blob_normed])
-        results.append(_download_blob(
-            client, source_container_name, destination, blob_normed, blobs_to_download[blob_normed]))
+    progress = TransferProgress(progress_callback, unit='blobs')
+    _use_connection_budget(client, cmd, max_concurrency)
+
+    def _tasks():
+        for index, blob_normed in enumerate(blobs_to_download):
+            progress.schedule(index)
+            # the size of a blob is only known once its download starts, so assume it is downloaded in chunks
+            yield (functools.partial(_download_blob, client, source_container_name, destination, blob_normed,
+                                     blobs_to_download[blob_normed], progress.callback(index)),
+                   max_connections)
+
+    results = [None] * len(blobs_to_download)
+    for index, result in run_transfers(_tasks(), _get_max_concurrency(cmd, max_concurrency)):
+        progress.complete(index)
+        results[index] = result
 
     # end progress hook
-    if progress_callback:
-        progress_callback.hook.end()
+    progress.end()
 
     return results
 
@@ -218,7 +308,9 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
                               content_settings=None, metadata=None, validate_content=False,
                               maxsize_condition=None, max_connections=2, lease_id=None, progress_callback=None,
                               if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, max_concurrency=None, resume=False):
+    from azure.cli.command_modules.storage.transfer_util import run_transfers, TransferProgress, TransferJournal
+
     def _create_return_result(blob_name, blob_content_settings, upload_result=None):
         blob_name = normalize_blob_file_path(destination_path, blob_name)
         return {
@@ -228,11 +320,13 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
             'eTag': upload_result.etag if upload_result else None}
 
     logger = get_logger(__name__)
-    source_files = source_files or []
+    # source files are streamed from the local folder unless given
+    source_files = source_files if source_files is not None else glob_files_locally(source, pattern)
     t_content_settings = cmd.get_models('blob.models#ContentSettings')
 
     results = []
     if dryrun:
+        source_files = list(source_files)
         logger.info('upload action: from %s to %s', source, destination)
         logger.info('    pattern %s', pattern)
         logger.info('  container %s', destination_container_name)
@@ -249,37 +343,161 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
         # Tell progress reporter to reuse the same hook
         if progress_callback:
             progress_callback.reuse = True
+        progress = TransferProgress(progress_callback)
+        _use_connection_budget(client, cmd, max_concurrency)
+
+        journal = TransferJournal(TransferJournal.get_path(cmd.cli_ctx, client.account_name, destination_container_name,
+                                                           destination_path, source, pattern, blob_type))
+        TransferJournal.prune(os.path.dirname(journal.path), keep=journal.path)
+        if resume:
+            logger.info('%d files were uploaded by a previous run', journal.load())
+
+        skipped = []
+        uploads = []
+
+        def _tasks():
+            for src, dst in source_files:
+                stat = os.stat(src)
+                if resume and journal.is_done(dst, stat.st_size, stat.st_mtime):
+                    skipped.append(dst)
+                    continue
+                index = len(uploads)
+                guessed_content_settings = guess_content_type(src, content_settings, t_content_settings)
+                uploads.append((dst, stat, guessed_content_settings))
+                progress.schedule(index, stat.st_size)
+
+                # blobs uploaded in chunks use up to max_connections each
+                chunked = blob_type == 'page' or \
+                    (blob_type == 'block' and stat.st_size > getattr(client, 'MAX_SINGLE_PUT_SIZE', 0))
+                yield (functools.partial(
+                    _upload_blob, cmd, client, destination_container_name,
+                    normalize_blob_file_path(destination_path, dst), src,
+                    blob_type=blob_type, content_settings=guessed_content_settings,
+                    metadata=metadata, validate_content=validate_content,
+                    maxsize_condition=maxsize_condition, max_connections=max_connections,
+                    lease_id=lease_id, progress_callback=progress.callback(index),
+                    if_modified_since=if_modified_since,
+                    if_unmodified_since=if_unmodified_since, if_match=if_match,
+                    if_none_match=if_none_match, timeout=timeout), max_connections if chunked else 1)
+
+        completed = {}
+        succeeded = False
+        try:
+            for index, (include, result) in run_transfers(_tasks(), _get_max_concurrency(cmd, max_concurrency)):
+                progress.complete(index)
+                dst, stat, guessed_content_settings = uploads[index]
+                if include:
+                    completed[index] = _create_return_result(dst, guessed_content_settings, result)
+                    journal.record(dst, stat.st_size, stat.st_mtime)
+            succeeded = True
+        finally:
+            # the journal is kept for --resume only when the batch did not complete
+            journal.close(remove=succeeded)
+        results = [completed[index] for index in sorted(completed)]
 
-        for index, source_file in enumerate(source_files):
-            src, dst = source_file
-            # logger.warning('uploading %s', src)
-            guessed_content_settings = guess_content_type(src, content_settings, t_content_settings)
-
-            # add blob name and number to progress message
-            if progress_callback:
-                progress_callback.message = '{}/{}: "{}"'.format(
-                    index + 1, len(source_files), normalize_blob_file_path(destination_path, dst))
-
-            include, result = _upload_blob(cmd, client, destination_container_name,
-                                           normalize_blob_file_path(destination_path, dst), src,
-                                           blob_type=blob_type, content_settings=guessed_content_settings,
-                                           metadata=metadata, validate_content=validate_content,
-                                           maxsize_condition=maxsize_condition, max_connections=max_connections,
-                                           lease_id=lease_id, progress_callback=progress_callback,
-                                           if_modified_since=if_modified_since,
-                                           if_unmodified_since=if_unmodified_since, if_match=if_match,
-                                           if_none_match=if_none_match, timeout=timeout)
-            if include:
-                results.append(_create_return_result(dst, guessed_content_settings, result))
         # end progress hook
-        if progress_callback:
-            progress_callback.hook.end()
-        num_failures = len(source_files) - len(results)
+        progress.end()
+        if skipped:
+            logger.warning('%s files skipped as they were uploaded by a previous run', len(skipped))
+        num_failures = len(uploads) - len(results)
         if num_failures:
-            logger.warning('%s of %s files not uploaded due to "Failed Precondition"', num_failures, len(source_files))
+            logger.warning('%s of %s files not uploaded due to "Failed Precondition"', num_failures, len(uploads))
     return results
 
 
+def _get_max_concurrency(cmd, max_concurrency):
+    from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+    return max_concurrency or cmd.cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
+
+
+def _use_connection_budget(client, cmd, max_concurrency):
+    """ Keep a connection open for each blob transferred at once. requests only keeps 10 per host by default. """
+    from requests.adapters import HTTPAdapter
+    session = getattr(client, 'request_session', None)
+    if session is not None:
+        max_connections = _get_max_concurrency(cmd, max_concurrency)
+        session.mount('https://', HTTPAdapter(pool_maxsize=max_connections))
+        session.mount('http://', HTTPAdapter(pool_maxsize=max_connections))
+
+
+def storage_blob_sync(cmd, client, source, container_name, destination_path=None, max_connections=2,
+                      max_concurrency=None):
+    """Sync a local file or directory to a blob container.
+
+    Files missing from the container or different from their blob are uploaded and, when syncing a directory,
+    blobs under the destination path which have no local file are deleted. A file is compared to its blob by size,
+    then by MD5. The MD5 of each file is kept in a local manifest, so files which changed on neither side since the
+    previous sync are not read again.
+    """
+    import itertools
+    from azure.cli.command_modules.storage.transfer_util import run_transfers, SyncManifest, get_file_md5
+
+    logger = get_logger(__name__)
+    t_content_settings = cmd.get_models('blob.models#ContentSettings')
+    source = os.path.realpath(source)
+    if os.path.isfile(source):
+        blob_name = normalize_blob_file_path(None, destination_path or os.path.basename(source))
+        local_files = [(source, blob_name)]
+        prefix = blob_name
+    elif os.path.isdir(source):
+        local_files = ((path, normalize_blob_file_path(destination_path, name))
+                       for path, name in glob_files_locally(source, None))
+        prefix = normalize_blob_file_path(None, destination_path) + '/' if destination_path else None
+    else:
+        raise CLIError('incorrect usage: source must be an existing file or directory')
+
+    # a single listing gives the size, MD5 and ETag of every blob under the destination
+    remote_blobs = {blob.name: blob.properties for blob in client.list_blobs(container_name, prefix=prefix)}
+    manifest = SyncManifest(SyncManifest.get_path(cmd.cli_ctx, client.account_name, container_name,
+                                                  destination_path, source))
+    manifest.load()
+    summary = {'uploaded': 0, 'deleted': 0, 'unchanged': 0}
+
+    def _sync_file(path, blob_name, stat, blob):
+        md5 = get_file_md5(path)
+        if blob is not None and blob.content_settings.content_md5 == md5:
+            return 'unchanged', blob_name, (stat.st_size, stat.st_mtime, md5, blob.etag)
+        result = upload_blob(cmd, client, container_name, blob_name, path, blob_type='block',
+                             content_settings=t_content_settings(content_md5=md5), max_connections=max_connections)
+        return 'uploaded', blob_name, (stat.st_size, stat.st_mtime, md5, result.etag)
+
+    def _delete_blob(blob_name):
+        client.delete_blob(container_name, blob_name)
+        return 'deleted', blob_name, None
+
+    def _upload_tasks():
+        for path, blob_name in local_files:
+            stat = os.stat(path)
+            blob = remote_blobs.pop(blob_name, None)
+            if blob is not None and blob.content_length == stat.st_size and \
+                    manifest.get_md5(blob_name, stat.st_size, stat.st_mtime, blob.etag) is not None:
+                summary['unchanged'] += 1
+                continue
+            chunked = stat.st_size > getattr(client, 'MAX_SINGLE_PUT_SIZE', 0)
+            yield functools.partial(_sync_file, path, blob_name, stat, blob), max_connections if chunked else 1
+
+    def _delete_tasks():
+        # only the blobs without a local file are left once all files are compared
+        for blob_name in list(remote_blobs) if not os.path.isfile(source) else []:
+            yield functools.partial(_delete_blob, blob_name), 1
+
+    _use_connection_budget(client, cmd, max_concurrency)
+    try:
+        for _, (action, blob_name, entry) in run_transfers(itertools.chain(_upload_tasks(), _delete_tasks()),
+                                                           _get_max_concurrency(cmd, max_concurrency)):
+            summary[action] += 1
+            if entry:
+                manifest.set(blob_name, *entry)
+            else:
+                manifest.remove(blob_name)
+    finally:
+        # keep what was done even if the sync failed part way
+        manifest.save()
+    logger.info('%d files uploaded, %d blobs deleted, %d files unchanged',
+                summary['uploaded'], summary['deleted'], summary['unchanged'])
+    return summary
+
+
 def upload_blob(cmd, client, container_name, blob_name, file_path, blob_type=None, content_settings=None, metadata=None,
                 validate_content=False, maxsize_condition=None, max_connections=2, lease_id=None, tier=None,
                 if_modified_since=None, if_unmodified_since=None, if_match=None, if_none_match=None, timeout=None,
@@ -379,9 +597,14 @@ def show_blob(cmd, client, container_name, blob_name, snapshot=None, lease_id=No
     return blob
 
 
-def storage_blob_delete_batch(client, source, source_container_name, pattern=None, lease_id=None,
+def storage_blob_delete_batch(cmd, client, source, source_container_name, pattern=None, lease_id=None,
                               delete_snapshots=None, if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, max_concurrency=None):
+    from azure.common import AzureHttpError
+    from azure.cli.command_modules.storage.blob_batch_util import (batch_delete_blobs, is_batch_not_supported,
+                                                                   MAX_BATCH_SIZE, BATCH_MIN_API)
+    from azure.cli.command_modules.storage.transfer_util import run_transfers
+
     @check_precondition_success
     def _delete_blob(blob_name):
         delete_blob_args = {
@@ -398,7 +621,9 @@ def storage_blob_delete_batch(client, source, source_container_name, pattern=Non
         return client.delete_blob(**delete_blob_args)
 
     logger = get_logger(__name__)
-    source_blobs = list(collect_blobs(client, source_container_name, pattern))
+    max_concurrency = _get_max_concurrency(cmd, max_concurrency)
+    # the listing is streamed, with the virtual directories at the top of the pattern listed in parallel
+    source_blobs = glob_blobs_remotely_sharded(client, source_container_name, pattern, max_concurrency)
 
     if dryrun:
         if if_modified_since:
@@ -408,16 +633,62 @@ def storage_blob_delete_batch(client, source, source_container_name, pattern=Non
         logger.warning('delete action: from %s', source)
         logger.warning('    pattern %s', pattern)
         logger.warning('  container %s', source_container_name)
-        logger.warning('      total %d', len(source_blobs))
         logger.warning(' operations')
+        total = 0
         for blob in source_blobs:
             logger.warning('  - %s', blob)
+            total += 1
+        logger.warning('      total %d', total)
         return []
 
-    results = [result for include, result in (_delete_blob(blob) for blob in source_blobs) if include]
-    num_failures = len(source_blobs) - len(results)
+    use_batch = [cmd.supported_api_version(min_api=BATCH_MIN_API)]
+
+    def _delete_blobs(blob_names):
+        """ Returns the number of blobs deleted, the number failing their precondition, and the other failures. """
+        if use_batch[0]:
+            try:
+                responses = batch_delete_blobs(cmd, client, source_container_name, blob_names,
+                                               delete_snapshots=delete_snapshots, lease_id=lease_id,
+                                               if_modified_since=if_modified_since,
+                                               if_unmodified_since=if_unmodified_since, if_match=if_match,
+                                               if_none_match=if_none_match, timeout=timeout)
+            except AzureHttpError as ex:
+                if not is_batch_not_supported(ex):
+                    raise
+                logger.info('Blob batch requests are not supported, deleting blobs one at a time: %s', ex)
+                use_batch[0] = False
+            else:
+                deleted = len([r for r in responses if r.status_code in (200, 202)])
+                # Precondition failed and Not modified errors, see check_precondition_success
+                not_met = len([r for r in responses if r.status_code in (304, 412)])
+                return deleted, not_met, [r for r in responses if r.status_code not in (200, 202, 304, 412)]
+        deleted = len([include for include, _ in (_delete_blob(blob_name) for blob_name in blob_names) if include])
+        return deleted, len(blob_names) - deleted, []
+
+    def _batches():
+        blob_names = []
+        for blob_name in source_blobs:
+            blob_names.append(blob_name)
+            if len(blob_names) == MAX_BATCH_SIZE:
+                yield functools.partial(_delete_blobs, blob_names), 1
+                blob_names = []
+        if blob_names:
+            yield functools.partial(_delete_blobs, blob_names), 1
+
+    _use_connection_budget(client, cmd, max_concurrency)
+    num_deleted, num_failures, errors = 0, 0, []
+    for _, (deleted, not_met, failed) in run_transfers(_batches(), max_concurrency):
+        num_deleted += deleted
+        num_failures += not_met
+        errors.extend(failed)
+
+    total = num_deleted + num_failures + len(errors)
     if num_failures:
-        logger.warning('%s of %s blobs not deleted due to "Failed Precondition"', num_failures, len(source_blobs))
+        logger.warning('%s of %s blobs not deleted due to "Failed Precondition"', num_failures, total)
+    if errors:
+        for error in errors:
+            logger.warning('Failed to delete blob %s: %s %s', error.blob_name, error.status_code, error.error_code)
+        raise CLIError('{} of {} blobs could not be deleted.'.format(len(errors), total))
 
 
 def generate_sas_blob_uri(client, container_name, blob_name, permission=None,
@@ -472,8 +743,8 @@ def _copy_blob_to_blob_container(blob_service, source_blob_service, destination_
                                                         sas_token=source_sas)
     destination_blob_name = normalize_blob_file_path(destination_path, source_blob_name)
     try:
-        blob_service.copy_blob(destination_container, destination_blob_name, source_blob_url)
-        return blob_service.make_blob_url(destination_container, destination_blob_name)
+        copy = blob_service.copy_blob(destination_container, destination_blob_name, source_blob_url)
+        return blob_service.make_blob_url(destination_container, destination_blob_name), destination_blob_name, copy
     except AzureException:
         error_template = 'Failed to copy blob {} to container {}.'
         raise CLIError(error_template.format(source_blob_name, destination_container))
@@ -490,8 +761,8 @@ def _copy_file_to_blob_container(blob_service, source_file_service, destination_
     destination_blob_name = normalize_blob_file_path(destination_path, source_path)
 
     try:
-        blob_service.copy_blob(destination_container, destination_blob_name, file_url)
-        return blob_service.make_blob_url(destination_container, destination_blob_name)
+        copy = blob_service.copy_blob(destination_container, destination_blob_name, file_url)
+        return blob_service.make_blob_url(destination_container, destination_blob_name), destination_blob_name, copy
     except AzureException as ex:
         error_template = 'Failed to copy file {} to container {}. {}'
         raise CLIError(error_template.format(source_file_name, destination_container, ex))
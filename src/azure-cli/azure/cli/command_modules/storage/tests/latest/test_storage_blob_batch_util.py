@@ -0,0 +1,84 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+import mock
+
+from azure.cli.command_modules.storage.blob_batch_util import serialize_batch_body, parse_batch_response
+from azure.cli.command_modules.storage.util import glob_blobs_remotely_sharded, get_pattern_prefix
+
+
+class TestStorageBlobBatchUtil(unittest.TestCase):
+
+    def test_serialize_batch_body(self):
+        request = mock.MagicMock(method='DELETE', path='/container/a%20b', query={},
+                                 headers={'x-ms-date': 'Thu, 01 Aug 2019 00:00:00 GMT'})
+        body = serialize_batch_body([request], 'id')
+        self.assertEqual(body, b'--batch_id\r\n'
+                               b'Content-Type: application/http\r\n'
+                               b'Content-Transfer-Encoding: binary\r\n'
+                               b'Content-ID: 0\r\n'
+                               b'\r\n'
+                               b'DELETE /container/a%20b HTTP/1.1\r\n'
+                               b'x-ms-date: Thu, 01 Aug 2019 00:00:00 GMT\r\n'
+                               b'\r\n'
+                               b'--batch_id--\r\n')
+
+    def test_parse_batch_response(self):
+        body = ('--batchresponse_1\r\n'
+                'Content-Type: application/http\r\n'
+                'Content-ID: 1\r\n'
+                '\r\n'
+                'HTTP/1.1 412 Condition Not Met\r\n'
+                'x-ms-error-code: ConditionNotMet\r\n'
+                '\r\n'
+                '--batchresponse_1\r\n'
+                'Content-Type: application/http\r\n'
+                'Content-ID: 0\r\n'
+                '\r\n'
+                'HTTP/1.1 202 Accepted\r\n'
+                'x-ms-delete-type-permanent: true\r\n'
+                '\r\n'
+                '--batchresponse_1--\r\n')
+        response = mock.MagicMock(status=202, body=body.encode('utf-8'),
+                                  headers={'content-type': 'multipart/mixed; boundary=batchresponse_1'})
+
+        results = parse_batch_response(response, ['a', 'b', 'c'])
+
+        self.assertEqual([(r.blob_name, r.status_code, r.error_code) for r in results],
+                         [('a', 202, None), ('b', 412, 'ConditionNotMet'), ('c', None, 'NoSubResponse')])
+
+    def test_glob_blobs_remotely_sharded(self):
+        def _blob(name):
+            blob = mock.MagicMock(spec=['name', 'properties'])
+            blob.name = name
+            return blob
+
+        def _list_blobs(container, prefix=None, delimiter=None):
+            self.assertEqual(container, 'logs')
+            if delimiter:
+                self.assertEqual(prefix, 'app')
+                directory = mock.MagicMock(spec=['name'])
+                directory.name = 'app/2019/'
+                return [_blob('app.log'), _blob('app.txt'), directory]
+            self.assertEqual(prefix, 'app/2019/')
+            return [_blob('app/2019/{}.log'.format(i)) for i in range(100)] + [_blob('app/2019/x.txt')]
+
+        client = mock.MagicMock()
+        client.list_blobs.side_effect = _list_blobs
+
+        names = list(glob_blobs_remotely_sharded(client, 'logs', 'app*.log', 4))
+
+        self.assertEqual(sorted(names), sorted(['app.log'] + ['app/2019/{}.log'.format(i) for i in range(100)]))
+
+    def test_get_pattern_prefix(self):
+        self.assertEqual(get_pattern_prefix(None), '')
+        self.assertEqual(get_pattern_prefix('logs/2019-0?/*.log'), 'logs/2019-0')
+        self.assertEqual(get_pattern_prefix('[ab]/*'), '')
+        self.assertEqual(get_pattern_prefix('readme'), 'readme')
+
+
+if __name__ == '__main__':
+    unittest.main()
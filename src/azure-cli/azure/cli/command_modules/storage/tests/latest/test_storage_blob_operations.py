@@ -0,0 +1,303 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+
+from knack.util import CLIError
+
+from azure.common import AzureHttpError
+
+from azure.cli.command_modules.storage import blob_batch_util, transfer_util
+from azure.cli.command_modules.storage.operations import blob
+
+URL = 'https://account.blob.core.windows.net/container/'
+
+
+def _get_test_cmd():
+    cmd = mock.MagicMock()
+    cmd.get_models.side_effect = lambda *_: mock.MagicMock
+    return cmd
+
+
+def _copy_task(blob_name, status, delay=0):
+    """ A task which starts the copy to `blob_name`, as returned by _copy_blob_to_blob_container. """
+    def _start_copy():
+        if delay:
+            time.sleep(delay)
+        return URL + blob_name, blob_name, mock.MagicMock(id=blob_name + '-copy', status=status,
+                                                          status_description=None)
+    return _start_copy
+
+
+def _listed_blob(blob_name, status, status_description=None, copy_id=None):
+    listed = mock.MagicMock()
+    listed.name = blob_name
+    listed.properties.copy = mock.MagicMock(id=copy_id or blob_name + '-copy', status=status,
+                                            status_description=status_description)
+    return listed
+
+
+class StorageBlobCopyBatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmd = _get_test_cmd()
+        self.client = mock.MagicMock()
+
+    def test_copy_batch_returns_urls_in_task_order(self):
+        names = ['blob{}'.format(i) for i in range(8)]
+        # the later copies start sooner
+        tasks = [_copy_task(name, 'pending', 0.01 * (len(names) - i)) for i, name in enumerate(names)]
+        with mock.patch.object(blob, '_wait_for_blob_copies', autospec=True) as wait_for_copies:
+            result = blob._run_blob_copy_batch(self.cmd, self.client, 'container', None, iter(tasks), 4, False)
+        self.assertEqual(result, [URL + name for name in names])
+        wait_for_copies.assert_not_called()
+        self.client.list_blobs.assert_not_called()
+
+    @mock.patch('time.sleep', autospec=True)
+    def test_copy_batch_waits_for_pending_copies(self, sleep):
+        tasks = [_copy_task('dir/a', 'success'), _copy_task('dir/b', 'pending'), _copy_task('dir/c', 'pending'),
+                 _copy_task('dir/d', 'pending'), _copy_task('dir/e', 'pending'), _copy_task('dir/f', 'pending')]
+        self.client.list_blobs.side_effect = [
+            [_listed_blob('dir/a', 'success'),
+             _listed_blob('dir/b', 'pending'),
+             _listed_blob('dir/c', 'failed', 'source not found'),
+             _listed_blob('dir/d', 'pending'),
+             _listed_blob('dir/e', 'success', copy_id='another-copy'),
+             _listed_blob('dir/other', 'pending')],
+            [_listed_blob('dir/b', 'success'),
+             _listed_blob('dir/d', 'aborted', 'aborted by the user')]]
+
+        result = blob._run_blob_copy_batch(self.cmd, self.client, 'container', 'dir', iter(tasks), 4, True)
+
+        self.assertEqual(result, {
+            'succeeded': [URL + 'dir/a', URL + 'dir/b'],
+            'failed': [
+                {'blob': URL + 'dir/c', 'status': 'failed', 'statusDescription': 'source not found'},
+                {'blob': URL + 'dir/d', 'status': 'aborted', 'statusDescription': 'aborted by the user'},
+                {'blob': URL + 'dir/e', 'status': 'failed',
+                 'statusDescription': 'The blob was replaced by another copy.'},
+                {'blob': URL + 'dir/f', 'status': 'failed', 'statusDescription': 'The blob was deleted.'}],
+            'pending': []})
+        # the destination is listed once per poll, with a growing interval
+        self.assertEqual(self.client.list_blobs.call_count, 2)
+        self.assertEqual(self.client.list_blobs.call_args[0], ('container',))
+        self.assertEqual(self.client.list_blobs.call_args[1]['prefix'], 'dir/')
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [1, 2])
+
+    def test_copy_batch_wait_times_out(self):
+        now = [1000.0]
+
+        def _sleep(seconds):
+            now[0] += seconds
+
+        self.client.list_blobs.side_effect = lambda *_, **__: [_listed_blob('a', 'pending'),
+                                                               _listed_blob('b', 'success')]
+        tasks = [_copy_task('a', 'pending'), _copy_task('b', 'pending')]
+        with mock.patch('time.time', side_effect=lambda: now[0]), mock.patch('time.sleep', side_effect=_sleep):
+            result = blob._run_blob_copy_batch(self.cmd, self.client, 'container', None, iter(tasks), 4, True,
+                                               wait_timeout=10)
+
+        self.assertEqual(result, {'succeeded': [URL + 'b'], 'failed': [], 'pending': [URL + 'a']})
+        # the polls are 1, 2 and 4 seconds apart, and the last one comes when the 10 seconds are up
+        self.assertEqual(now[0], 1010.0)
+        self.assertEqual(self.client.list_blobs.call_count, 4)
+
+    def test_copy_batch_wait_timeout_requires_wait(self):
+        with self.assertRaises(CLIError):
+            blob.storage_blob_copy_batch(self.cmd, self.client, None, container_name='container',
+                                         source_container='source', wait_timeout=10)
+        self.client.copy_blob.assert_not_called()
+
+
+class StorageBlobDeleteBatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmd = _get_test_cmd()
+        self.cmd.supported_api_version.return_value = True
+        self.client = mock.MagicMock()
+
+    def _delete_batch(self, batch_error):
+        def _batch_delete_blobs(*args, **kwargs):
+            raise batch_error
+
+        with mock.patch.object(blob, 'glob_blobs_remotely_sharded', return_value=iter(['a', 'b'])), \
+                mock.patch.object(blob_batch_util, 'batch_delete_blobs', side_effect=_batch_delete_blobs) as batch:
+            blob.storage_blob_delete_batch(self.cmd, self.client, 'container', 'container', max_concurrency=1)
+        return batch
+
+    def test_delete_batch_falls_back_when_batches_are_not_supported(self):
+        error = AzureHttpError('The value for one of the query parameters is not valid.', 400)
+        error.error_code = 'InvalidQueryParameterValue'
+        batch = self._delete_batch(error)
+        self.assertEqual(batch.call_count, 1)
+        self.assertEqual(sorted(c[1]['blob_name'] for c in self.client.delete_blob.call_args_list), ['a', 'b'])
+
+    def test_delete_batch_raises_other_bad_requests(self):
+        error = AzureHttpError('The request body is malformed.', 400)
+        error.error_code = 'InvalidInput'
+        with self.assertRaises(AzureHttpError):
+            self._delete_batch(error)
+        self.client.delete_blob.assert_not_called()
+
+
+class _FakeContainer(object):
+    """ The blobs of a container, which a sync lists, uploads to and deletes from. """
+
+    MAX_SINGLE_PUT_SIZE = 64 * 1024 * 1024
+
+    def __init__(self):
+        self.account_name = 'account'
+        self.blobs = {}
+        self.uploaded = []
+        self.deleted = []
+        self._etags = 0
+
+    def put(self, blob_name, content):
+        self._etags += 1
+        properties = mock.MagicMock(content_length=len(content), etag='etag{}'.format(self._etags))
+        properties.content_settings.content_md5 = _get_md5(content)
+        self.blobs[blob_name] = properties
+        return properties
+
+    def list_blobs(self, container_name, prefix=None):
+        listed = []
+        for blob_name in sorted(self.blobs):
+            if not prefix or blob_name.startswith(prefix):
+                listed.append(mock.MagicMock(properties=self.blobs[blob_name]))
+                listed[-1].name = blob_name
+        return listed
+
+    def upload_blob(self, cmd, client, container_name, blob_name, file_path, **kwargs):
+        self.uploaded.append(blob_name)
+        with open(file_path, 'rb') as f:
+            return self.put(blob_name, f.read())
+
+    def delete_blob(self, container_name, blob_name):
+        self.deleted.append(blob_name)
+        del self.blobs[blob_name]
+
+
+def _get_md5(content):
+    import base64
+    import hashlib
+    return base64.b64encode(hashlib.md5(content).digest()).decode('utf-8')
+
+
+class StorageBlobSyncTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cmd = _get_test_cmd()
+        self.cmd.cli_ctx.config.config_dir = tempfile.mkdtemp()
+        self.source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cmd.cli_ctx.config.config_dir)
+        self.addCleanup(shutil.rmtree, self.source)
+        self.container = _FakeContainer()
+
+    def _write(self, name, content, mtime=None):
+        path = os.path.join(self.source, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def _sync(self, source=None, destination_path=None):
+        self.container.uploaded, self.container.deleted = [], []
+        get_file_md5 = mock.Mock(side_effect=transfer_util.get_file_md5)
+        with mock.patch.object(blob, 'upload_blob', side_effect=self.container.upload_blob), \
+                mock.patch.object(transfer_util, 'get_file_md5', get_file_md5):
+            summary = blob.storage_blob_sync(self.cmd, self.container, source or self.source, 'container',
+                                             destination_path=destination_path, max_concurrency=4)
+        return summary, sorted(os.path.relpath(c[0][0], self.source) for c in get_file_md5.call_args_list)
+
+    def test_sync_directory(self):
+        self._write('same', b'same')
+        self._write('changed', b'new')
+        self._write(os.path.join('dir', 'new'), b'new')
+        self.container.put('dir/same', b'same')
+        self.container.put('dir/changed', b'old')
+        self.container.put('dir/remote-only', b'remote')
+        self.container.put('other/remote-only', b'remote')
+
+        # without a manifest, the files which have a blob of the same size are compared by MD5
+        summary, read = self._sync(destination_path='dir')
+        self.assertEqual(summary, {'uploaded': 2, 'deleted': 1, 'unchanged': 1})
+        self.assertEqual(sorted(self.container.uploaded), ['dir/changed', 'dir/dir/new'])
+        # only the blobs under the destination path are deleted
+        self.assertEqual(self.container.deleted, ['dir/remote-only'])
+        self.assertEqual(read, ['changed', os.path.join('dir', 'new'), 'same'])
+
+        # the manifest records every file, so an unchanged tree is neither read nor uploaded
+        summary, read = self._sync(destination_path='dir')
+        self.assertEqual(summary, {'uploaded': 0, 'deleted': 0, 'unchanged': 3})
+        self.assertEqual((read, self.container.uploaded, self.container.deleted), ([], [], []))
+
+    def test_sync_detects_changes_on_either_side(self):
+        self._write('mtime', b'content', mtime=1000)
+        self._write('size', b'content', mtime=1000)
+        self._write('content', b'content', mtime=1000)
+        self._write('remote', b'content', mtime=1000)
+        self.assertEqual(self._sync()[0], {'uploaded': 4, 'deleted': 0, 'unchanged': 0})
+
+        # a touched file is read again, but only uploaded if its content changed
+        self._write('mtime', b'content', mtime=2000)
+        self._write('content', b'CONTENT', mtime=2000)
+        self._write('size', b'longer content', mtime=1000)
+        # a blob replaced by someone else is compared again
+        self.container.put('remote', b'content')
+
+        summary, read = self._sync()
+        self.assertEqual(summary, {'uploaded': 2, 'deleted': 0, 'unchanged': 2})
+        self.assertEqual(sorted(self.container.uploaded), ['content', 'size'])
+        self.assertEqual(read, ['content', 'mtime', 'remote', 'size'])
+
+        # the manifest was updated with the new state
+        summary, read = self._sync()
+        self.assertEqual(summary, {'uploaded': 0, 'deleted': 0, 'unchanged': 4})
+        self.assertEqual(read, [])
+
+    def test_sync_file_keeps_other_blobs(self):
+        path = self._write('file', b'content')
+        self.container.put('file', b'old')
+        self.container.put('file.bak', b'backup')
+
+        summary, _ = self._sync(source=path)
+        self.assertEqual(summary, {'uploaded': 1, 'deleted': 0, 'unchanged': 0})
+        self.assertEqual(self.container.uploaded, ['file'])
+        self.assertEqual(sorted(self.container.blobs), ['file', 'file.bak'])
+
+    def test_sync_keeps_progress_when_interrupted(self):
+        self._write('a', b'a')
+        self._write('b', b'b')
+        upload_blob = self.container.upload_blob
+        attempts = []
+
+        def _fail_second_upload(cmd, client, container_name, blob_name, file_path, **kwargs):
+            attempts.append(blob_name)
+            if len(attempts) == 2:
+                raise CLIError('upload failed')
+            return upload_blob(cmd, client, container_name, blob_name, file_path, **kwargs)
+
+        self.container.upload_blob = _fail_second_upload
+        with self.assertRaises(CLIError):
+            self._sync()
+        self.container.upload_blob = upload_blob
+
+        # the file uploaded before the failure is neither read nor uploaded again
+        summary, read = self._sync()
+        self.assertEqual(summary, {'uploaded': 1, 'deleted': 0, 'unchanged': 1})
+        self.assertEqual(self.container.uploaded, [attempts[1]])
+        self.assertEqual(read, [attempts[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from azure.cli.command_modules.storage.transfer_util import (run_transfers, TransferProgress, TransferJournal,
+                                                             SyncManifest, get_file_md5)
+
+
+class TestStorageTransferUtil(unittest.TestCase):
+
+    def test_run_transfers_respects_connection_budget(self):
+        lock = threading.Lock()
+        in_use = [0, 0]  # current, peak
+
+        def _task(connections, value):
+            def _run():
+                with lock:
+                    in_use[0] += connections
+                    in_use[1] = max(in_use[1], in_use[0])
+                time.sleep(0.01)
+                with lock:
+                    in_use[0] -= connections
+                return value
+            return _run
+
+        tasks = ((_task(2 if i % 3 == 0 else 1, i), 2 if i % 3 == 0 else 1) for i in range(30))
+        results = dict(run_transfers(tasks, 4))
+
+        self.assertEqual(results, {i: i for i in range(30)})
+        self.assertLessEqual(in_use[1], 4)
+        self.assertGreater(in_use[1], 1)
+
+    def test_run_transfers_raises_task_error(self):
+        def _fail():
+            raise ValueError('failed')
+
+        started = []
+        completed = []
+        tasks = ((lambda i=i: started.append(i), 1) if i != 5 else (_fail, 1) for i in range(100))
+        with self.assertRaises(ValueError):
+            for index, _ in run_transfers(tasks, 2):
+                completed.append(index)
+        self.assertLess(len(started), 99)
+        # the tasks which ran alongside the failed one are still reported
+        self.assertEqual(sorted(completed), sorted(started))
+
+    def test_transfer_progress_reports_sum_of_transfers(self):
+        reports = []
+
+        def _progress_callback(current, total):
+            reports.append((_progress_callback.message, current, total))
+
+        progress = TransferProgress(_progress_callback)
+        progress.schedule(0, 10)
+        progress.schedule(1, 30)
+        progress.callback(0)(5, 10)
+        progress.callback(1)(30, 30)
+        progress.complete(1)
+
+        self.assertEqual(reports[-2], ('0/2 files', 35, 40))
+        self.assertEqual(reports[-1], ('1/2 files', 35, 40))
+
+    def test_transfer_journal_resume(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        path = os.path.join(folder, 'transfers', 'batch.journal')
+
+        journal = TransferJournal(path)
+        journal.record('a.txt', 1, 1.5)
+        journal.record('b.txt', 2, 2.5)
+        journal.close()
+        with open(path, 'a') as f:
+            f.write('["c.txt", 3')  # interrupted while writing
+
+        journal = TransferJournal(path)
+        self.assertEqual(journal.load(), 2)
+        self.assertTrue(journal.is_done('a.txt', 1, 1.5))
+        self.assertFalse(journal.is_done('b.txt', 2, 3.5))
+        self.assertFalse(journal.is_done('c.txt', 3, 3.5))
+        journal.close(remove=True)
+        self.assertFalse(os.path.exists(path))
+
+    def test_transfer_journal_prune(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        paths = [os.path.join(folder, name) for name in ('old.journal', 'new.journal', 'kept.journal', 'other.txt')]
+        for path in paths:
+            with open(path, 'w') as f:
+                f.write('["a.txt", 1, 1.5]\n')
+        expired = time.time() - 8 * 24 * 60 * 60
+        for path in (paths[0], paths[2], paths[3]):
+            os.utime(path, (expired, expired))
+
+        TransferJournal.prune(folder, keep=paths[2])
+        self.assertEqual(sorted(os.listdir(folder)), ['kept.journal', 'new.journal', 'other.txt'])
+        TransferJournal.prune(os.path.join(folder, 'missing'))
+
+    def test_sync_manifest(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        file_path = os.path.join(folder, 'index.html')
+        with open(file_path, 'w') as f:
+            f.write('hello')
+        md5 = get_file_md5(file_path)
+        self.assertEqual(md5, 'XUFAKrxLKna5cZ2REBfFkg==')
+
+        path = os.path.join(folder, 'sync', 'manifest.json')
+        manifest = SyncManifest(path)
+        manifest.load()
+        manifest.set('index.html', 5, 1.5, md5, '"etag1"')
+        manifest.set('old.html', 3, 1.5, 'md5', '"etag2"')
+        manifest.remove('old.html')
+        manifest.save()
+
+        manifest = SyncManifest(path)
+        manifest.load()
+        self.assertEqual(manifest.get_md5('index.html', 5, 1.5, '"etag1"'), md5)
+        self.assertIsNone(manifest.get_md5('index.html', 5, 2.5, '"etag1"'))
+        self.assertIsNone(manifest.get_md5('index.html', 5, 1.5, '"etag3"'))
+        self.assertIsNone(manifest.get_md5('old.html', 3, 1.5, '"etag2"'))
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['manifest.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
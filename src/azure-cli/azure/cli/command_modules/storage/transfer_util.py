@@ -0,0 +1,254 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Tools to transfer many blobs at once under a shared connection budget, report their aggregate progress and record
+completed transfers so that an interrupted batch can be resumed.
+"""
+
+import json
+import os
+import threading
+
+JOURNAL_MAX_AGE = 7 * 24 * 60 * 60  # journals of batches which did not complete are kept for a week
+
+
+class ConnectionBudget(object):
+    """ Counts the connections in use by all running transfers. """
+
+    def __init__(self, max_connections):
+        self.max_connections = max(max_connections, 1)
+        self._available = self.max_connections
+        self._condition = threading.Condition()
+
+    def acquire(self, connections):
+        with self._condition:
+            while self._available < connections:
+                self._condition.wait()
+            self._available -= connections
+
+    def release(self, connections):
+        with self._condition:
+            self._available += connections
+            self._condition.notify_all()
+
+
+def run_transfers(tasks, max_connections):
+    """ Run `(func, connections)` tasks on a thread pool, so that no more than `max_connections` are in use at once.
+
+    `tasks` is consumed lazily, as connections become available. Yields `(index, result)` for each task as it
+    completes. If a task raises, no further task is started and the exception is raised once the running ones end,
+    after their results are yielded.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    budget = ConnectionBudget(max_connections)
+    running = {}
+    failed = []
+
+    def _run(func, connections):
+        try:
+            return func()
+        finally:
+            budget.release(connections)
+
+    def _completed(futures):
+        for future in futures:
+            index = running.pop(future)
+            if future.exception() is None:
+                yield index, future.result()
+            else:
+                failed.append(future)
+
+    with ThreadPoolExecutor(max_workers=budget.max_connections) as executor:
+        for index, (func, connections) in enumerate(tasks):
+            connections = min(max(connections, 1), budget.max_connections)
+            budget.acquire(connections)
+            running[executor.submit(_run, func, connections)] = index
+            for result in _completed([f for f in running if f.done()]):
+                yield result
+            if failed:
+                break
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for result in _completed(done):
+                yield result
+    if failed:
+        failed[0].result()
+
+
+class TransferProgress(object):
+    """ Combines the progress of concurrent transfers into a single `progress_callback` report. """
+
+    def __init__(self, progress_callback, unit='files'):
+        self._progress_callback = progress_callback
+        self._unit = unit
+        self._lock = threading.Lock()
+        self._current = {}
+        self._total = {}
+        self.scheduled = 0
+        self.completed = 0
+
+    def schedule(self, index, size=None):
+        with self._lock:
+            self.scheduled += 1
+            if size:
+                self._total[index] = size
+
+    def callback(self, index):
+        """ Return the progress callback of a single transfer. """
+        if not self._progress_callback:
+            return None
+
+        def _update_progress(current, total):
+            with self._lock:
+                self._current[index] = current
+                if total:
+                    self._total[index] = total
+                self._report()
+        return _update_progress
+
+    def complete(self, index):
+        with self._lock:
+            self.completed += 1
+            # the sum of all transfers, so entries of finished ones are kept
+            self._current[index] = self._total.get(index, 0)
+            if self._progress_callback:
+                self._report()
+
+    def end(self):
+        if self._progress_callback:
+            self._progress_callback.hook.end()
+
+    def _report(self):
+        self._progress_callback.message = '{}/{} {}'.format(self.completed, self.scheduled, self._unit)
+        self._progress_callback(sum(self._current.values()), sum(self._total.values()))
+
+
+class TransferJournal(object):
+    """ Records the files a batch has transferred, so that running the same batch again can skip them.
+
+    The journal is a file of JSON lines `[name, size, mtime]`. It is removed once the batch completes, and replaced
+    by the first record of a batch which did not `load` it. The journals of batches which never complete are removed
+    by `prune` once they are older than `JOURNAL_MAX_AGE`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._mode = 'w'
+        self._entries = {}
+
+    @staticmethod
+    def get_path(cli_ctx, *key):
+        import hashlib
+        digest = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(cli_ctx.config.config_dir, 'transfers', '{}.journal'.format(digest))
+
+    @staticmethod
+    def prune(directory, keep=None, max_age=JOURNAL_MAX_AGE):
+        """ Remove the journals under `directory` which were not written for `max_age` seconds, except `keep`. """
+        import time
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        keep = os.path.normcase(os.path.abspath(keep)) if keep else None
+        expired = time.time() - max_age
+        for name in names:
+            path = os.path.join(directory, name)
+            if not name.endswith('.journal') or os.path.normcase(os.path.abspath(path)) == keep:
+                continue
+            try:
+                if os.path.getmtime(path) < expired:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def load(self):
+        self._entries = {}
+        self._mode = 'a'
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        name, size, mtime = json.loads(line)
+                    except ValueError:
+                        # the last line of an interrupted run may be incomplete
+                        continue
+                    self._entries[name] = (size, mtime)
+        except (IOError, OSError):
+            pass
+        return len(self._entries)
+
+    def is_done(self, name, size, mtime):
+        return self._entries.get(name) == (size, mtime)
+
+    def record(self, name, size, mtime):
+        if self._file is None:
+            from azure.cli.command_modules.storage.util import mkdir_p
+            mkdir_p(os.path.dirname(self.path))
+            self._file = open(self.path, self._mode)
+        self._file.write(json.dumps([name, size, mtime]) + '\n')
+        self._file.flush()
+
+    def close(self, remove=False):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class SyncManifest(object):
+    """ Remembers the local files a sync has uploaded, with their MD5 and the ETag of the resulting blob, so that
+    the next sync can skip the files which changed on neither side without reading them. """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+
+    @staticmethod
+    def get_path(cli_ctx, *key):
+        import hashlib
+        digest = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(cli_ctx.config.config_dir, 'sync', '{}.json'.format(digest))
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = {name: tuple(entry) for name, entry in json.load(f).items()}
+        except (IOError, OSError, ValueError):
+            self._entries = {}
+
+    def get_md5(self, name, size, mtime, etag):
+        """ Return the recorded MD5 of a file if neither the file nor its blob changed since it was recorded. """
+        entry = self._entries.get(name)
+        if entry and entry[:2] == (size, mtime) and entry[3] == etag:
+            return entry[2]
+        return None
+
+    def set(self, name, size, mtime, md5, etag):
+        self._entries[name] = (size, mtime, md5, etag)
+
+    def remove(self, name):
+        self._entries.pop(name, None)
+
+    def save(self):
+        from azure.cli.core.util import atomic_write
+        from azure.cli.command_modules.storage.util import mkdir_p
+        mkdir_p(os.path.dirname(self.path))
+        with atomic_write(self.path) as f:
+            json.dump(self._entries, f)
+
+
+def get_file_md5(path):
+    """ Return the MD5 of a file the way blob storage reports Content-MD5, base64 encoded. """
+    import base64
+    import hashlib
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(4 * 1024 * 1024), b''):
+            md5.update(chunk)
+    return base64.b64encode(md5.digest()).decode('utf-8')
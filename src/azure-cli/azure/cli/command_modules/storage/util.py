@@ -20,17 +20,85 @@ def collect_blobs(blob_service, container, pattern=None):
     if not _pattern_has_wildcards(pattern):
         return [pattern] if blob_service.exists(container, pattern) else []
 
-    results = []
-    for blob in blob_service.list_blobs(container):
-        try:
-            blob_name = blob.name.encode('utf-8') if isinstance(blob.name, unicode) else blob.name
-        except NameError:
-            blob_name = blob.name
+    return list(glob_blobs_remotely(blob_service, container, pattern))
 
-        if not pattern or _match_path(blob_name, pattern):
-            results.append(blob_name)
 
-    return results
+def glob_blobs_remotely(blob_service, container, pattern, prefix=None):
+    """glob the blobs in remote container based on the given pattern, listing only the blobs under the prefix"""
+    for blob in blob_service.list_blobs(container, prefix=prefix):
+        blob_name = _get_blob_name(blob)
+        if not pattern or _match_path(blob_name, pattern):
+            yield blob_name
+
+
+def glob_blobs_remotely_sharded(blob_service, container, pattern, max_shards):
+    """glob the blobs in remote container based on the given pattern, listing the virtual directories at the top
+    of the pattern on up to max_shards threads at once. Blobs are returned in no particular order."""
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+    from six.moves.queue import Queue, Full
+
+    # names can only match if they start with the part of the pattern before its first wildcard
+    prefix = get_pattern_prefix(pattern) or None
+    directories = []
+    for item in blob_service.list_blobs(container, prefix=prefix, delimiter='/'):
+        if not hasattr(item, 'properties'):
+            # a virtual directory, i.e. a BlobPrefix
+            directories.append(item.name)
+        else:
+            blob_name = _get_blob_name(item)
+            if not pattern or _match_path(blob_name, pattern):
+                yield blob_name
+    if not directories:
+        return
+
+    done = object()
+    names = Queue(maxsize=10000)
+    stopped = threading.Event()
+
+    def _put(item):
+        while not stopped.is_set():
+            try:
+                names.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def _list_directory(directory):
+        try:
+            for blob_name in glob_blobs_remotely(blob_service, container, pattern, prefix=directory):
+                _put(blob_name)
+                if stopped.is_set():
+                    break
+        except Exception as ex:  # pylint: disable=broad-except
+            _put(ex)
+        finally:
+            _put(done)
+
+    with ThreadPoolExecutor(max_workers=max(min(max_shards, len(directories)), 1)) as executor:
+        try:
+            for directory in directories:
+                executor.submit(_list_directory, directory)
+            remaining = len(directories)
+            while remaining:
+                item = names.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            # let the listing threads end when the caller stops early or a listing fails
+            stopped.set()
+
+
+def get_pattern_prefix(pattern):
+    """the part of a glob pattern before its first wildcard"""
+    if not pattern:
+        return ''
+    wildcards = [i for i in (pattern.find('*'), pattern.find('?'), pattern.find('[')) if i != -1]
+    return pattern[:min(wildcards)] if wildcards else pattern
 
 
 def collect_files(cmd, file_service, share, pattern=None):
@@ -163,6 +231,13 @@ def mkdir_p(path):
             raise
 
 
+def _get_blob_name(blob):
+    try:
+        return blob.name.encode('utf-8') if isinstance(blob.name, unicode) else blob.name
+    except NameError:
+        return blob.name
+
+
 def _pattern_has_wildcards(p):
     return not p or p.find('*') != -1 or p.find('?') != -1 or p.find('[') != -1
 
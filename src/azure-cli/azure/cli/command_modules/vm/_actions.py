@@ -25,64 +25,89 @@ def _resource_not_exists(cli_ctx, resource_type):
     return _handle_resource_not_exists
 
 
-def _get_thread_count():
-    return 5  # don't increase too much till https://github.com/Azure/msrestazure-for-python/issues/6 is fixed
+def _get_thread_count(cli_ctx):
+    from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+    return cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
 
 
-def load_images_thru_services(cli_ctx, publisher, offer, sku, location):
+def _get_catalog_location(cli_ctx, cache, location):
+    if location:
+        return location
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    return cache.get('location', [get_subscription_id(cli_ctx)],
+                     lambda _: (get_one_of_subscription_locations(cli_ctx), None))
+
+
+def load_images_thru_services(cli_ctx, publisher, offer, sku, location, offline=False, refresh=False):
     from concurrent.futures import ThreadPoolExecutor, as_completed
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    from ._catalog_cache import CatalogCache
     all_images = []
     client = _compute_client_factory(cli_ctx)
-    if location is None:
-        location = get_one_of_subscription_locations(cli_ctx)
+    cache = CatalogCache(cli_ctx, offline=offline, refresh=refresh)
+    location = _get_catalog_location(cli_ctx, cache, location)
+    # marketplace images can be private to a subscription
+    key = [get_subscription_id(cli_ctx), location]
+
+    def _list_names(kind, operation, *args):
+        return cache.get(kind, key + list(args), lambda _: ([x.name for x in operation(location, *args)], None))
 
     def _load_images_from_publisher(publisher):
-        offers = client.virtual_machine_images.list_offers(location, publisher)
+        offers = _list_names('offers', client.virtual_machine_images.list_offers, publisher)
         if offer:
-            offers = [o for o in offers if _matched(offer, o.name)]
+            offers = [o for o in offers if _matched(offer, o)]
         for o in offers:
-            skus = client.virtual_machine_images.list_skus(location, publisher, o.name)
+            skus = _list_names('skus', client.virtual_machine_images.list_skus, publisher, o)
             if sku:
-                skus = [s for s in skus if _matched(sku, s.name)]
+                skus = [s for s in skus if _matched(sku, s)]
             for s in skus:
-                images = client.virtual_machine_images.list(location, publisher, o.name, s.name)
-                for i in images:
+                versions = _list_names('versions', client.virtual_machine_images.list, publisher, o, s)
+                for v in versions:
                     all_images.append({
                         'publisher': publisher,
-                        'offer': o.name,
-                        'sku': s.name,
-                        'version': i.name})
+                        'offer': o,
+                        'sku': s,
+                        'version': v})
 
-    publishers = client.virtual_machine_images.list_publishers(location)
+    publishers = _list_names('publishers', client.virtual_machine_images.list_publishers)
     if publisher:
-        publishers = [p for p in publishers if _matched(publisher, p.name)]
+        publishers = [p for p in publishers if _matched(publisher, p)]
 
     publisher_num = len(publishers)
     if publisher_num > 1:
-        with ThreadPoolExecutor(max_workers=_get_thread_count()) as executor:
-            tasks = [executor.submit(_load_images_from_publisher, p.name) for p in publishers]
+        with ThreadPoolExecutor(max_workers=_get_thread_count(cli_ctx)) as executor:
+            tasks = [executor.submit(_load_images_from_publisher, p) for p in publishers]
             for t in as_completed(tasks):
                 t.result()  # don't use the result but expose exceptions from the threads
     elif publisher_num == 1:
-        _load_images_from_publisher(publishers[0].name)
+        _load_images_from_publisher(publishers[0])
 
     return all_images
 
 
-def load_images_from_aliases_doc(cli_ctx, publisher=None, offer=None, sku=None):
+def _get_aliases_doc(target_url, etag):
     import requests
-    from azure.cli.core.cloud import CloudEndpointNotSetException
     from azure.cli.core.util import should_disable_connection_verify
+    headers = {'If-None-Match': etag} if etag else None
+    # under hack mode(say through proxies with unsigned cert), opt out the cert verification
+    response = requests.get(target_url, headers=headers, verify=(not should_disable_connection_verify()))
+    if response.status_code == 304:
+        return None, etag
+    if response.status_code != 200:
+        raise CLIError("Failed to retrieve image alias doc '{}'. Error: '{}'".format(target_url, response))
+    return json.loads(response.content.decode()), response.headers.get('ETag')
+
+
+def load_images_from_aliases_doc(cli_ctx, publisher=None, offer=None, sku=None, offline=False, refresh=False):
+    from azure.cli.core.cloud import CloudEndpointNotSetException
+    from ._catalog_cache import CatalogCache
     try:
         target_url = cli_ctx.cloud.endpoints.vm_image_alias_doc
     except CloudEndpointNotSetException:
         raise CLIError("'endpoint_vm_image_alias_doc' isn't configured. Please invoke 'az cloud update' to configure "
                        "it or use '--all' to retrieve images from server")
-    # under hack mode(say through proxies with unsigned cert), opt out the cert verification
-    response = requests.get(target_url, verify=(not should_disable_connection_verify()))
-    if response.status_code != 200:
-        raise CLIError("Failed to retrieve image alias doc '{}'. Error: '{}'".format(target_url, response))
-    dic = json.loads(response.content.decode())
+    cache = CatalogCache(cli_ctx, offline=offline, refresh=refresh)
+    dic = cache.get('aliases', [target_url], lambda etag: _get_aliases_doc(target_url, etag))
     try:
         all_images = []
         result = (dic['outputs']['aliases']['value'])
@@ -151,7 +176,7 @@ def load_extension_images_thru_services(cli_ctx, publisher, name, version, locat
 
     publisher_num = len(publishers)
     if publisher_num > 1:
-        with ThreadPoolExecutor(max_workers=_get_thread_count()) as executor:
+        with ThreadPoolExecutor(max_workers=_get_thread_count(cli_ctx)) as executor:
             tasks = [executor.submit(_load_extension_images_from_publisher,
                                      p.name) for p in publishers]
             for t in as_completed(tasks):
@@ -0,0 +1,63 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Local copy of the VM image and SKU catalogs, kept per cloud under the CLI's config directory. Entries are reused for
+`vm.catalog_cache_ttl` minutes if it is set, or whatever their age in offline mode. Without it, the catalogs are only
+saved by `az vm refresh-catalog`, for offline mode.
+"""
+
+import os
+
+from knack.log import get_logger
+from knack.util import CLIError
+
+from azure.cli.core.util import FileCache
+
+logger = get_logger(__name__)
+
+DEFAULT_CATALOG_CACHE_TTL = 0  # minutes, the catalogs are only reused offline unless a TTL is set
+CATALOG_CACHE_DIR = 'vm_catalog'
+
+
+class CatalogCache(object):
+    """ Consulted before listing catalog data from Azure.
+
+    :param bool offline: Only use cached entries, and fail on the ones which are not cached.
+    :param bool refresh: Retrieve every entry again, whatever its age.
+    """
+
+    def __init__(self, cli_ctx, offline=False, refresh=False):
+        if offline and refresh:
+            raise CLIError('usage error: --offline cannot be used when refreshing the cache')
+        self.offline = offline
+        self.refresh = refresh
+        self.cache = FileCache(os.path.join(cli_ctx.config.config_dir, CATALOG_CACHE_DIR, cli_ctx.cloud.name),
+                               cli_ctx.config.getint('vm', 'catalog_cache_ttl', DEFAULT_CATALOG_CACHE_TTL) * 60)
+
+    def get(self, kind, key, fetch):
+        """ Return the cached value of an entry, or retrieve and cache it when it is missing or stale.
+
+        `fetch(etag)` returns `(value, etag)`. It is given the ETag of the cached value, if any, and may return
+        `(None, etag)` to signal the cached value is still current.
+        """
+        if self.cache.ttl <= 0 and not self.offline and not self.refresh:
+            return fetch(None)[0]
+        # catalog names are case-insensitive
+        key = [k.lower() if k else k for k in key]
+        entry = self.cache.load(kind, key)
+        if entry is not None and (self.offline or (not self.refresh and self.cache.is_fresh(entry))):
+            logger.debug("Using cached %s for %s", kind, key)
+            return entry['value']
+        if self.offline:
+            raise CLIError("Catalog data '{}' for {} is not cached. Run 'az vm refresh-catalog' or retry without "
+                           "'--offline'".format(kind, ', '.join(str(k) for k in key if k)))
+
+        value, etag = fetch(entry.get('etag') if entry else None)
+        if value is None and entry is not None:
+            logger.debug("Cached %s for %s is still current", kind, key)
+            value = entry['value']
+        self.cache.save(kind, key, value, etag=etag)
+        return value
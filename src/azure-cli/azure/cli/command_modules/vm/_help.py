@@ -1320,6 +1320,8 @@ examples:
     text: az vm image list -f CentOS
   - name: List all CentOS images.
     text: az vm image list -f CentOS --all
+  - name: List the CentOS images in West US from the local catalog cache, without calling Azure.
+    text: az vm image list -f CentOS --all -l westus --offline
 """
 
 helps['vm image list-offers'] = """
@@ -1408,7 +1410,10 @@ examples:
 helps['vm list-skus'] = """
 type: command
 short-summary: Get details for compute-related resource SKUs.
-long-summary: This command incorporates subscription level restriction, offering the most accurate information.
+long-summary: >
+    This command incorporates subscription level restriction, offering the most accurate information.
+    The SKUs are retrieved each time, unless 'vm.catalog_cache_ttl' is set, in which case they are cached locally for
+    that many minutes. Use 'az vm refresh-catalog' to retrieve them again, or to cache them for '--offline'.
 examples:
   - name: List all SKUs in the West US region.
     text: az vm list-skus -l westus
@@ -1418,6 +1423,8 @@ examples:
     text: az vm list-skus -l eastus2 --zone --size standard_ds1
   - name: List availability set related sku information in The West US region.
     text: az vm list-skus -l westus --resource-type availabilitySets
+  - name: List the VM sizes available in the West US region from the local catalog cache, without calling Azure.
+    text: az vm list-skus -l westus --resource-type virtualMachines --offline
 """
 
 helps['vm list-usage'] = """
@@ -1523,6 +1530,21 @@ examples:
 
 """
 
+helps['vm refresh-catalog'] = """
+type: command
+short-summary: Refresh the local cache of the VM image and SKU catalogs.
+long-summary: >
+    'az vm image list', 'az vm list-skus' and 'az vm create' reuse the catalog data they retrieve for
+    'vm.catalog_cache_ttl' minutes if it is set (by default they do not), and '--offline' uses whatever data is cached.
+    This command retrieves and caches the image alias list and the resource SKUs again, as well as the Marketplace
+    images matching '--publisher', '--offer' or '--sku' if given.
+examples:
+  - name: Refresh the image aliases and resource SKUs.
+    text: az vm refresh-catalog
+  - name: Also refresh the Canonical images available in West US, for use with 'az vm image list --all --offline'.
+    text: az vm refresh-catalog -l westus -p Canonical
+"""
+
 helps['vm resize'] = """
 type: command
 short-summary: Update a VM's size.
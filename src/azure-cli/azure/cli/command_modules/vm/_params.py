@@ -357,6 +357,7 @@ def load_arguments(self, _):
 
     with self.argument_context('vm image list') as c:
         c.argument('image_location', get_location_type(self.cli_ctx))
+        c.argument('offline', action='store_true', help="Only use the catalog data cached by previous commands. Run 'az vm refresh-catalog' to update it.")
 
     with self.argument_context('vm image show') as c:
         c.argument('skus', options_list=['--sku', '-s'])
@@ -398,6 +399,13 @@ def load_arguments(self, _):
         c.argument('show_all', options_list=['--all'], arg_type=get_three_state_flag(),
                    help="show all information including vm sizes not available under the current subscription")
         c.argument('resource_type', options_list=['--resource-type', '-r'], help='resource types e.g. "availabilitySets", "snapshots", "disks", etc')
+        c.argument('offline', action='store_true', help="Only use the catalog data cached by previous commands. Run 'az vm refresh-catalog' to update it.")
+
+    with self.argument_context('vm refresh-catalog') as c:
+        c.argument('location', get_location_type(self.cli_ctx))
+        c.argument('publisher', options_list=['--publisher', '-p'], help='image publisher name, partial name is accepted')
+        c.argument('offer', options_list=['--offer', '-f'], help='image offer name, partial name is accepted')
+        c.argument('sku', options_list=['--sku', '-s'], help='image sku name, partial name is accepted')
 
     with self.argument_context('vm restart') as c:
         c.argument('force', action='store_true', help='Force the VM to restart by redeploying it. Use if the VM is unresponsive.')
@@ -114,14 +114,24 @@ def get_key_vault_base_url(cli_ctx, vault_name):
     return 'https://{}{}'.format(vault_name, suffix)
 
 
-def list_sku_info(cli_ctx, location=None):
+def list_sku_info(cli_ctx, location=None, offline=False, refresh=False):
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    from azure.cli.core.profiles import ResourceType, get_sdk
     from ._client_factory import _compute_client_factory
+    from ._catalog_cache import CatalogCache
 
     def _match_location(l, locations):
         return next((x for x in locations if x.lower() == l.lower()), None)
 
-    client = _compute_client_factory(cli_ctx)
-    result = client.resource_skus.list()
+    def _list_skus(_):
+        client = _compute_client_factory(cli_ctx)
+        return [r.serialize(keep_readonly=True) for r in client.resource_skus.list()], None
+
+    # restrictions of the SKUs are specific to the subscription
+    cache = CatalogCache(cli_ctx, offline=offline, refresh=refresh)
+    skus = cache.get('resource-skus', [get_subscription_id(cli_ctx)], _list_skus)
+    resource_sku = get_sdk(cli_ctx, ResourceType.MGMT_COMPUTE, 'ResourceSku', mod='models')
+    result = [resource_sku.deserialize(r) for r in skus]
     if location:
         result = [r for r in result if _match_location(location, r.locations)]
     return result
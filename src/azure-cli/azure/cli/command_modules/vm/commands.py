@@ -229,6 +229,7 @@ def load_command_table(self, _):
         g.custom_command('open-port', 'open_vm_port')
         g.command('perform-maintenance', 'perform_maintenance', min_api='2017-03-30')
         g.command('redeploy', 'redeploy', supports_no_wait=True)
+        g.custom_command('refresh-catalog', 'refresh_vm_catalog')
         g.custom_command('resize', 'resize_vm', supports_no_wait=True)
         g.custom_command('restart', 'restart_vm', supports_no_wait=True)
         g.custom_show_command('show', 'show_vm', table_transformer=transform_vm)
@@ -708,41 +708,102 @@ def get_vm_details(cmd, resource_group_name, vm_name):
     result = get_instance_view(cmd, resource_group_name, vm_name)
     network_client = get_mgmt_service_client(
         cmd.cli_ctx, ResourceType.MGMT_NETWORK, api_version=get_target_network_api(cmd.cli_ctx))
+
+    def _get_nic(nic_id):
+        nic_parts = parse_resource_id(nic_id)
+        return network_client.network_interfaces.get(nic_parts['resource_group'], nic_parts['name'])
+
+    def _get_public_ip(public_ip_id):
+        res = parse_resource_id(public_ip_id)
+        return network_client.public_ip_addresses.get(res['resource_group'], res['name'])
+
+    _set_vm_details(result, result.instance_view, _get_nic, _get_public_ip)
+    return result
+
+
+def _list_vm_details(cmd, vms, resource_group_name=None):
+    """ Add the details of `get_vm_details` to listed VMs.
+
+    NICs and public IPs are listed once for the resource group, or the subscription if none is given, and joined to
+    the VMs by id, and only the instance views are fetched per VM, on up to `core.max_concurrency` threads.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from msrestazure.tools import parse_resource_id
+    from azure.cli.core.commands.constants import DEFAULT_MAX_CONCURRENCY
+    from azure.cli.core.commands.throttling import run_with_backoff
+    from azure.cli.command_modules.vm._vm_utils import get_target_network_api
+    if not vms:
+        return vms
+    network_client = get_mgmt_service_client(
+        cmd.cli_ctx, ResourceType.MGMT_NETWORK, api_version=get_target_network_api(cmd.cli_ctx))
+    if resource_group_name:
+        nics = network_client.network_interfaces.list(resource_group_name)
+        public_ips = network_client.public_ip_addresses.list(resource_group_name)
+    else:
+        nics = network_client.network_interfaces.list_all()
+        public_ips = network_client.public_ip_addresses.list_all()
+    nics = {nic.id.lower(): nic for nic in nics}
+    public_ips = {pip.id.lower(): pip for pip in public_ips}
+
+    def _get_nic(nic_id):
+        # resources in other resource groups or created after the listing above are fetched on their own
+        nic = nics.get(nic_id.lower())
+        if nic is None:
+            nic_parts = parse_resource_id(nic_id)
+            nic = network_client.network_interfaces.get(nic_parts['resource_group'], nic_parts['name'])
+        return nic
+
+    def _get_public_ip(public_ip_id):
+        public_ip = public_ips.get(public_ip_id.lower())
+        if public_ip is None:
+            res = parse_resource_id(public_ip_id)
+            public_ip = network_client.public_ip_addresses.get(res['resource_group'], res['name'])
+        return public_ip
+
+    def _get_instance_view(vm):
+        client = _compute_client_factory(cmd.cli_ctx)
+        return run_with_backoff(lambda: client.virtual_machines.instance_view(_parse_rg_name(vm.id)[0], vm.name))
+
+    max_concurrency = cmd.cli_ctx.config.getint('core', 'max_concurrency', DEFAULT_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max(min(max_concurrency, len(vms)), 1)) as executor:
+        instance_views = list(executor.map(_get_instance_view, vms))
+    for vm, instance_view in zip(vms, instance_views):
+        _set_vm_details(vm, instance_view, _get_nic, _get_public_ip)
+    return vms
+
+
+def _set_vm_details(vm, instance_view, get_nic, get_public_ip):
     public_ips = []
     fqdns = []
     private_ips = []
     mac_addresses = []
     # pylint: disable=line-too-long,no-member
-    for nic_ref in result.network_profile.network_interfaces:
-        nic_parts = parse_resource_id(nic_ref.id)
-        nic = network_client.network_interfaces.get(nic_parts['resource_group'], nic_parts['name'])
+    for nic_ref in vm.network_profile.network_interfaces:
+        nic = get_nic(nic_ref.id)
         if nic.mac_address:
             mac_addresses.append(nic.mac_address)
         for ip_configuration in nic.ip_configurations:
             if ip_configuration.private_ip_address:
                 private_ips.append(ip_configuration.private_ip_address)
             if ip_configuration.public_ip_address:
-                res = parse_resource_id(ip_configuration.public_ip_address.id)
-                public_ip_info = network_client.public_ip_addresses.get(res['resource_group'],
-                                                                        res['name'])
+                public_ip_info = get_public_ip(ip_configuration.public_ip_address.id)
                 if public_ip_info.ip_address:
                     public_ips.append(public_ip_info.ip_address)
                 if public_ip_info.dns_settings:
                     fqdns.append(public_ip_info.dns_settings.fqdn)
 
-    setattr(result, 'power_state',
-            ','.join([s.display_status for s in result.instance_view.statuses if s.code.startswith('PowerState/')]))
-    setattr(result, 'public_ips', ','.join(public_ips))
-    setattr(result, 'fqdns', ','.join(fqdns))
-    setattr(result, 'private_ips', ','.join(private_ips))
-    setattr(result, 'mac_addresses', ','.join(mac_addresses))
-    del result.instance_view  # we don't need other instance_view info as people won't care
-    return result
+    setattr(vm, 'power_state',
+            ','.join([s.display_status for s in instance_view.statuses if s.code.startswith('PowerState/')]))
+    setattr(vm, 'public_ips', ','.join(public_ips))
+    setattr(vm, 'fqdns', ','.join(fqdns))
+    setattr(vm, 'private_ips', ','.join(private_ips))
+    setattr(vm, 'mac_addresses', ','.join(mac_addresses))
+    del vm.instance_view  # we don't need other instance_view info as people won't care
 
 
-def list_skus(cmd, location=None, size=None, zone=None, show_all=None, resource_type=None):
+def list_skus(cmd, location=None, size=None, zone=None, show_all=None, resource_type=None, offline=False):
     from ._vm_utils import list_sku_info
-    result = list_sku_info(cmd.cli_ctx, location)
+    result = list_sku_info(cmd.cli_ctx, location, offline=offline)
     if not show_all:
         result = [x for x in result if not [y for y in (x.restrictions or [])
                                             if y.reason_code == 'NotAvailableForSubscription']]
@@ -761,7 +822,7 @@ def list_vm(cmd, resource_group_name=None, show_details=False):
     vm_list = ccf.virtual_machines.list(resource_group_name=resource_group_name) \
         if resource_group_name else ccf.virtual_machines.list_all()
     if show_details:
-        return [get_vm_details(cmd, _parse_rg_name(v.id)[0], v.name) for v in vm_list]
+        return _list_vm_details(cmd, list(vm_list), resource_group_name)
 
     return list(vm_list)
 
@@ -1330,7 +1391,7 @@ def remove_vm_identity(cmd, resource_group_name, vm_name, identities=None):
 
 # region VirtualMachines Images
 def list_vm_images(cmd, image_location=None, publisher_name=None, offer=None, sku=None,
-                   all=False):  # pylint: disable=redefined-builtin
+                   all=False, offline=False):  # pylint: disable=redefined-builtin
     load_thru_services = all
 
     if load_thru_services:
@@ -1338,9 +1399,10 @@ def list_vm_images(cmd, image_location=None, publisher_name=None, offer=None, sk
             logger.warning("You are retrieving all the images from server which could take more than a minute. "
                            "To shorten the wait, provide '--publisher', '--offer' or '--sku'. Partial name search "
                            "is supported.")
-        all_images = load_images_thru_services(cmd.cli_ctx, publisher_name, offer, sku, image_location)
+        all_images = load_images_thru_services(cmd.cli_ctx, publisher_name, offer, sku, image_location,
+                                               offline=offline)
     else:
-        all_images = load_images_from_aliases_doc(cmd.cli_ctx, publisher_name, offer, sku)
+        all_images = load_images_from_aliases_doc(cmd.cli_ctx, publisher_name, offer, sku, offline=offline)
         logger.warning(
             'You are viewing an offline list of images, use --all to retrieve an up-to-date list')
 
@@ -1349,6 +1411,15 @@ def list_vm_images(cmd, image_location=None, publisher_name=None, offer=None, sk
     return all_images
 
 
+def refresh_vm_catalog(cmd, location=None, publisher=None, offer=None, sku=None):
+    from ._vm_utils import list_sku_info
+    load_images_from_aliases_doc(cmd.cli_ctx, refresh=True)
+    if cmd.supported_api_version(min_api='2017-03-30'):
+        list_sku_info(cmd.cli_ctx, refresh=True)
+    if publisher or offer or sku:
+        load_images_thru_services(cmd.cli_ctx, publisher, offer, sku, location, refresh=True)
+
+
 def show_vm_image(cmd, urn=None, publisher=None, offer=None, sku=None, version=None, location=None):
     from azure.cli.core.commands.parameters import get_one_of_subscription_locations
     usage_err = 'usage error: --plan STRING --offer STRING --publish STRING --version STRING | --urn STRING'
@@ -16,7 +16,7 @@ from azure.cli.command_modules.vm.custom import (enable_boot_diagnostics, disabl
                                                  _get_extension_instance_name,
                                                  get_boot_log)
 from azure.cli.command_modules.vm.custom import \
-    (attach_unmanaged_data_disk, detach_data_disk, get_vmss_instance_view)
+    (attach_unmanaged_data_disk, detach_data_disk, get_vmss_instance_view, list_vm)
 
 from azure.cli.core import AzCommandsLoader
 from azure.cli.core.commands import AzCliCommand
@@ -237,6 +237,56 @@ class TestVmCustom(unittest.TestCase):
         vm_client.virtual_machine_scale_set_vms.list.assert_called_once_with('rg1', 'vmss1', expand='instanceView',
                                                                              select='instanceView')
 
+    @mock.patch('azure.cli.command_modules.vm.custom.get_mgmt_service_client')
+    @mock.patch('azure.cli.command_modules.vm.custom._compute_client_factory')
+    def test_list_vm_show_details(self, factory_mock, network_factory_mock):
+        sub = '/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg1/providers/'
+        vms = []
+        for name in ['vm1', 'vm2']:
+            vm = FakedVM(nics=[mock.MagicMock(id=sub + 'Microsoft.Network/networkInterfaces/' + name + 'nic')])
+            vm.id = sub + 'Microsoft.Compute/virtualMachines/' + name
+            vm.name = name
+            vms.append(vm)
+        nics = []
+        for name in ['vm1', 'vm2']:
+            pip_ref = mock.MagicMock(id=sub + 'Microsoft.Network/publicIPAddresses/' + name + 'ip')
+            nic = mock.MagicMock(id=(sub + 'Microsoft.Network/networkInterfaces/' + name + 'nic').upper(),
+                                 mac_address=name + 'mac',
+                                 ip_configurations=[mock.MagicMock(private_ip_address='10.0.0.' + name[-1],
+                                                                   public_ip_address=pip_ref)])
+            nics.append(nic)
+        pips = [mock.MagicMock(id=sub + 'Microsoft.Network/publicIPAddresses/vm1ip', ip_address='1.1.1.1',
+                               dns_settings=None)]
+        pip2 = mock.MagicMock(ip_address='2.2.2.2', dns_settings=None)
+        compute_client = mock.MagicMock()
+        compute_client.virtual_machines.list.return_value = vms
+        compute_client.virtual_machines.instance_view.return_value = mock.MagicMock(
+            statuses=[InstanceViewStatus(code='PowerState/running', display_status='VM running')])
+        factory_mock.return_value = compute_client
+        network_client = network_factory_mock.return_value
+        network_client.network_interfaces.list.return_value = nics
+        network_client.public_ip_addresses.list.return_value = pips
+        network_client.public_ip_addresses.get.return_value = pip2
+        cmd = _get_test_cmd()
+
+        # execute
+        result = list_vm(cmd, 'rg1', show_details=True)
+
+        # assert
+        self.assertEqual([vm.name for vm in result], ['vm1', 'vm2'])
+        self.assertEqual([vm.private_ips for vm in result], ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual([vm.mac_addresses for vm in result], ['vm1mac', 'vm2mac'])
+        self.assertEqual([vm.public_ips for vm in result], ['1.1.1.1', '2.2.2.2'])
+        self.assertEqual([vm.power_state for vm in result], ['VM running', 'VM running'])
+        self.assertEqual(compute_client.virtual_machines.instance_view.call_count, 2)
+        # only the resource group is listed
+        network_client.network_interfaces.list.assert_called_once_with('rg1')
+        network_client.public_ip_addresses.list.assert_called_once_with('rg1')
+        network_client.network_interfaces.list_all.assert_not_called()
+        network_client.public_ip_addresses.list_all.assert_not_called()
+        network_client.network_interfaces.get.assert_not_called()
+        network_client.public_ip_addresses.get.assert_called_once_with('rg1', 'vm2ip')
+
     # pylint: disable=line-too-long
     @mock.patch('azure.cli.command_modules.vm.disk_encryption._compute_client_factory', autospec=True)
     @mock.patch('azure.cli.command_modules.vm.disk_encryption._get_keyvault_key_url', autospec=True)
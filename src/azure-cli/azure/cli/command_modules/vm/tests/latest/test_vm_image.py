@@ -27,8 +27,8 @@ def _get_test_cmd():
 
 
 class TestVMImage(unittest.TestCase):
-    @mock.patch('azure.cli.command_modules.vm.custom.urlopen', autospec=True)
-    def test_read_images_from_alias_doc(self, mock_urlopen):
+    @mock.patch('requests.get', autospec=True)
+    def test_read_images_from_alias_doc(self, mock_get):
         from azure.cli.command_modules.vm.custom import list_vm_images
         cmd = _get_test_cmd()
         file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
@@ -36,9 +36,7 @@ class TestVMImage(unittest.TestCase):
         with open(file_path, 'r') as test_file:
             test_data = test_file.read().encode()
 
-        mock_read = mock.MagicMock()
-        mock_read.read.return_value = test_data
-        mock_urlopen.return_value = mock_read
+        mock_get.return_value = mock.MagicMock(status_code=200, content=test_data)
 
         # action
         images = list_vm_images(cmd)
@@ -70,5 +68,75 @@ class TestVMImage(unittest.TestCase):
             load_images_from_aliases_doc(cli_ctx)
 
 
+class TestCatalogCache(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.config_dir = tempfile.mkdtemp()
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.config.getint.return_value = 60
+        self.cli_ctx.cloud.name = 'AzureCloud'
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.config_dir, ignore_errors=True)
+
+    def test_catalog_cache_reuses_entries(self):
+        from azure.cli.command_modules.vm._catalog_cache import CatalogCache
+        fetch = mock.MagicMock(return_value=(['Canonical', 'OpenLogic'], None))
+
+        self.assertEqual(CatalogCache(self.cli_ctx).get('publishers', ['sub', 'westus'], fetch),
+                         ['Canonical', 'OpenLogic'])
+        # names are case-insensitive
+        self.assertEqual(CatalogCache(self.cli_ctx).get('publishers', ['sub', 'WestUS'], fetch),
+                         ['Canonical', 'OpenLogic'])
+        self.assertEqual(fetch.call_count, 1)
+
+        CatalogCache(self.cli_ctx, refresh=True).get('publishers', ['sub', 'westus'], fetch)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_catalog_cache_revalidates_with_etag(self):
+        import time
+        from azure.cli.command_modules.vm._catalog_cache import CatalogCache
+        cache = CatalogCache(self.cli_ctx)
+        cache.get('aliases', ['url'], lambda etag: ({'outputs': 1}, '"v1"'))
+
+        fetch = mock.MagicMock(return_value=(None, '"v1"'))
+        with mock.patch('time.time', return_value=time.time() + 2 * 60 * 60):
+            self.assertEqual(cache.get('aliases', ['url'], fetch), {'outputs': 1})
+        fetch.assert_called_once_with('"v1"')
+
+    def test_catalog_cache_offline(self):
+        import time
+        from azure.cli.command_modules.vm._catalog_cache import CatalogCache
+        fetch = mock.MagicMock(return_value=(['Canonical'], None))
+        with self.assertRaises(CLIError):
+            CatalogCache(self.cli_ctx, offline=True).get('publishers', ['sub', 'westus'], fetch)
+
+        CatalogCache(self.cli_ctx).get('publishers', ['sub', 'westus'], fetch)
+        # stale entries are still used offline
+        with mock.patch('time.time', return_value=time.time() + 2 * 60 * 60):
+            self.assertEqual(CatalogCache(self.cli_ctx, offline=True).get('publishers', ['sub', 'westus'], fetch),
+                             ['Canonical'])
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_catalog_cache_is_opt_in(self):
+        from azure.cli.command_modules.vm._catalog_cache import CatalogCache, DEFAULT_CATALOG_CACHE_TTL
+        self.cli_ctx.config.getint.return_value = DEFAULT_CATALOG_CACHE_TTL
+        fetch = mock.MagicMock(return_value=(['Canonical'], None))
+        CatalogCache(self.cli_ctx).get('publishers', ['sub', 'westus'], fetch)
+        CatalogCache(self.cli_ctx).get('publishers', ['sub', 'westus'], fetch)
+        self.assertEqual(fetch.call_count, 2)
+        with self.assertRaises(CLIError):
+            CatalogCache(self.cli_ctx, offline=True).get('publishers', ['sub', 'westus'], fetch)
+
+        # refresh-catalog caches the catalogs for offline use
+        CatalogCache(self.cli_ctx, refresh=True).get('publishers', ['sub', 'westus'], fetch)
+        self.assertEqual(CatalogCache(self.cli_ctx, offline=True).get('publishers', ['sub', 'westus'], fetch),
+                         ['Canonical'])
+        CatalogCache(self.cli_ctx).get('publishers', ['sub', 'westus'], fetch)
+        self.assertEqual(fetch.call_count, 4)
+
+
 if __name__ == '__main__':
     unittest.main()
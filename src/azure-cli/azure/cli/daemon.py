@@ -0,0 +1,385 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+'''Opt-in resident process that keeps the CLI warm between invocations.
+
+The daemon listens on a unix socket in the configuration directory. The launcher in `__main__` sends the
+argument vector, working directory and environment of each `az` call together with its stdin/stdout/stderr
+file descriptors. The daemon forks a child for each call, so every command runs in a process that already
+has the command modules and SDKs imported, writes straight to the caller's terminal, and cannot leak state
+into later calls. Only the exit code travels back over the socket.
+
+Enable it with `use_daemon = true` in the `[core]` section of the CLI config file or the
+`AZURE_CORE_USE_DAEMON` environment variable. The first call starts the daemon in the background and runs
+locally; later calls go through the daemon. Manage it with `python -m azure.cli.daemon start|stop|status`.
+
+This module is imported before anything else in `__main__`, so the client side must only use the standard
+library.
+'''
+
+from __future__ import print_function
+
+import array
+import json
+import os
+import socket
+import struct
+import sys
+
+DAEMON_SOCKET_NAME = 'daemon.sock'
+DEFAULT_IDLE_TIMEOUT = 3600
+
+_HEADER = struct.Struct('!I')
+_RESULT = struct.Struct('!i')
+_STDIO_FDS = (0, 1, 2)
+_MAX_SOCKET_PATH = 100
+# Sent instead of a child pid when the daemon declines the request and the caller should run locally
+_DECLINED = -1
+
+
+def is_daemon_supported():
+    return hasattr(socket, 'AF_UNIX') and hasattr(socket.socket, 'sendmsg') and hasattr(os, 'fork')
+
+
+def get_config_dir():
+    # duplicates azure.cli.core._environment.get_config_dir so the client does not import azure.cli.core
+    return os.getenv('AZURE_CONFIG_DIR', None) or os.path.expanduser(os.path.join('~', '.azure'))
+
+
+def get_socket_path(config_dir=None):
+    return os.path.join(config_dir or get_config_dir(), DAEMON_SOCKET_NAME)
+
+
+def _get_core_option(config_dir, option, fallback=None):
+    value = os.environ.get('AZURE_CORE_' + option.upper())
+    if value is None:
+        try:
+            import configparser
+        except ImportError:  # Python 2
+            import ConfigParser as configparser
+        config = configparser.RawConfigParser()
+        config.read(os.path.join(config_dir, 'config'))
+        if config.has_option('core', option):
+            value = config.get('core', option)
+    return fallback if value is None else value
+
+
+def _use_daemon(config_dir):
+    if not is_daemon_supported() or '_ARGCOMPLETE' in os.environ:
+        return False
+    return _get_core_option(config_dir, 'use_daemon', 'false').lower() in ('1', 'yes', 'true', 'on')
+
+
+def _send_message(sock, message, fds=None):
+    payload = json.dumps(message).encode('utf-8')
+    data = _HEADER.pack(len(payload)) + payload
+    if fds:
+        sent = sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+        data = data[sent:]
+    sock.sendall(data)
+
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError('daemon connection closed')
+        data += chunk
+    return data
+
+
+def _recv_message(sock, max_fds=0):
+    fds = array.array('i')
+    if max_fds:
+        data, ancdata, _, _ = sock.recvmsg(_HEADER.size, socket.CMSG_LEN(max_fds * fds.itemsize))
+        for level, kind, fd_data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(fd_data[:len(fd_data) - (len(fd_data) % fds.itemsize)])
+        if not data:
+            raise EOFError('daemon connection closed')
+        data += _recv_exactly(sock, _HEADER.size - len(data))
+    else:
+        data = _recv_exactly(sock, _HEADER.size)
+    size, = _HEADER.unpack(data)
+    return json.loads(_recv_exactly(sock, size).decode('utf-8')), list(fds)
+
+
+def _recv_int(sock):
+    return _RESULT.unpack(_recv_exactly(sock, _RESULT.size))[0]
+
+
+def _connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        sock.close()
+        raise
+    return sock
+
+
+def _spawn_daemon():
+    import subprocess
+    with open(os.devnull, 'r+b') as devnull:
+        subprocess.Popen([sys.executable, '-m', 'azure.cli.daemon', 'start'],
+                         stdin=devnull, stdout=devnull, stderr=devnull, close_fds=True, start_new_session=True)
+
+
+def invoke_with_daemon(args):
+    """ Run `args` in the daemon if it is enabled and running.
+
+    :return: the exit code of the command, or None if the caller should run the command itself.
+    """
+    config_dir = get_config_dir()
+    if not _use_daemon(config_dir):
+        return None
+    socket_path = get_socket_path(config_dir)
+    try:
+        sock = _connect(socket_path)
+    except socket.error:
+        try:
+            _spawn_daemon()
+        except OSError:
+            pass
+        return None
+
+    import signal
+    with sock:
+        try:
+            _send_message(sock, {'action': 'invoke', 'args': args, 'cwd': os.getcwd(), 'env': dict(os.environ)},
+                          fds=_STDIO_FDS)
+            child_pid = _recv_int(sock)
+        except (socket.error, EOFError):
+            return None
+        if child_pid == _DECLINED:
+            return None
+        while True:
+            try:
+                return _recv_int(sock)
+            except KeyboardInterrupt:
+                # the command runs in another process group, so forward the interrupt
+                os.kill(child_pid, signal.SIGINT)
+            except (socket.error, EOFError):
+                return 1
+
+
+def _get_install_fingerprint():
+    """ Modification times that change when the CLI, its command modules or its extensions are updated. """
+    import azure.cli.core
+    import azure.cli.command_modules
+    from azure.cli.core.extension import EXTENSIONS_DIR, DEV_EXTENSION_SOURCES
+    paths = [os.path.dirname(azure.cli.core.__file__), EXTENSIONS_DIR] + list(DEV_EXTENSION_SOURCES)
+    paths.extend(azure.cli.command_modules.__path__)
+    fingerprint = []
+    for path in paths:
+        try:
+            fingerprint.append(os.stat(path).st_mtime)
+        except OSError:
+            fingerprint.append(None)
+    return fingerprint
+
+
+def _warm_up():
+    from knack.log import get_logger
+    from azure.cli.core import get_default_cli, MainCommandsLoader
+    from azure.cli.core._session import flush_sessions
+
+    logger = get_logger(__name__)
+    try:
+        cli = get_default_cli()
+        loader = MainCommandsLoader(cli)
+        loader.load_command_table(None)
+        loader.load_arguments()
+        flush_sessions()
+    except Exception:  # pylint: disable=broad-except
+        import traceback
+        logger.debug('Daemon warm up failed: %s', traceback.format_exc())
+
+
+def _run_child(conn, request, fds):
+    """ Runs in the forked child. Mirrors `azure.cli.__main__`. """
+    import atexit
+    import signal
+    conn.sendall(_RESULT.pack(os.getpid()))
+    for fd, target in zip(fds, _STDIO_FDS):
+        os.dup2(fd, target)
+        os.close(fd)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    os.environ.clear()
+    os.environ.update(request['env'])
+    exit_code = 1
+    try:
+        os.chdir(request['cwd'])
+
+        from knack.completion import ARGCOMPLETE_ENV_NAME
+        from azure.cli.core import get_default_cli
+        import azure.cli.core.telemetry as telemetry
+
+        az_cli = get_default_cli()
+        telemetry.set_application(az_cli, ARGCOMPLETE_ENV_NAME)
+        try:
+            telemetry.start()
+            exit_code = az_cli.invoke(request['args'])
+            if exit_code and exit_code != 0:
+                telemetry.set_failure()
+            else:
+                telemetry.set_success()
+            az_cli.logging.end_cmd_metadata_logging(exit_code)
+        except KeyboardInterrupt:
+            telemetry.set_user_fault('keyboard interrupt')
+            exit_code = 1
+        except SystemExit as ex:
+            exit_code = ex.code if isinstance(ex.code, int) else (0 if ex.code is None else 1)
+            az_cli.logging.end_cmd_metadata_logging(exit_code)
+        finally:
+            telemetry.conclude()
+    finally:
+        # os._exit below skips the atexit handlers, which write the session files and the token cache
+        try:
+            atexit._run_exitfuncs()  # pylint: disable=protected-access
+        except Exception:  # pylint: disable=broad-except
+            pass
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:  # pylint: disable=broad-except
+                pass
+        try:
+            conn.sendall(_RESULT.pack(exit_code or 0))
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+
+def _reap_children(children):
+    for pid in list(children):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except OSError:
+            done = pid
+        if done:
+            children.discard(pid)
+
+
+def _bind_server(socket_path):
+    """ Listen on `socket_path`, replacing a stale socket. Returns None if another daemon is listening on it. """
+    from azure.cli.core.util import lock_file
+
+    # serializes daemons started by concurrent calls, so only one of them removes a stale socket and binds
+    with lock_file(socket_path + '.lock'):
+        try:
+            _connect(socket_path).close()
+            return None
+        except socket.error:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)  # stale socket from a daemon that did not shut down cleanly
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            server.bind(socket_path)
+            server.listen(64)
+        except socket.error:
+            server.close()
+            raise
+        finally:
+            os.umask(old_umask)
+    return server
+
+
+def run_daemon(socket_path=None, idle_timeout=None):
+    """ Serve commands on `socket_path` until stopped, idle for `idle_timeout` seconds or the CLI is updated. """
+    import select
+    import time
+    from knack.log import get_logger
+
+    logger = get_logger(__name__)
+    config_dir = get_config_dir()
+    socket_path = socket_path or get_socket_path(config_dir)
+    if idle_timeout is None:
+        idle_timeout = int(_get_core_option(config_dir, 'daemon_idle_timeout', DEFAULT_IDLE_TIMEOUT))
+    if len(socket_path) > _MAX_SOCKET_PATH:
+        raise ValueError("Daemon socket path '{}' is too long.".format(socket_path))
+
+    server = _bind_server(socket_path)
+    if server is None:
+        logger.warning('The daemon is already running.')
+        return
+    children = set()
+    try:
+        # calls made while warming up wait in the listen backlog rather than spawning more daemons
+        _warm_up()
+        fingerprint = _get_install_fingerprint()
+        last_request = time.time()
+        while True:
+            readable, _, _ = select.select([server], [], [], 5)
+            _reap_children(children)
+            if not readable:
+                if idle_timeout and time.time() - last_request > idle_timeout and not children:
+                    logger.info('Daemon idle for %s seconds, exiting.', idle_timeout)
+                    return
+                continue
+            last_request = time.time()
+            conn, _ = server.accept()
+            fds = []
+            try:
+                request, fds = _recv_message(conn, max_fds=len(_STDIO_FDS))
+                action = request.get('action')
+                if action == 'stop':
+                    return
+                if action != 'invoke' or len(fds) != len(_STDIO_FDS):
+                    conn.sendall(_RESULT.pack(_DECLINED))
+                    continue
+                if fingerprint != _get_install_fingerprint():
+                    # modules imported by this process are stale, let the caller run the command itself
+                    conn.sendall(_RESULT.pack(_DECLINED))
+                    logger.info('The CLI installation changed, exiting daemon.')
+                    return
+                pid = os.fork()
+                if pid == 0:
+                    server.close()
+                    _run_child(conn, request, fds)
+                children.add(pid)
+            except (socket.error, EOFError, ValueError) as ex:
+                logger.debug('Daemon request failed: %s', ex)
+            finally:
+                for fd in fds:
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+                conn.close()
+    finally:
+        server.close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+
+
+def main(argv):
+    action = argv[0] if argv else 'status'
+    socket_path = get_socket_path()
+    if not is_daemon_supported():
+        print('The daemon is not supported on this platform.', file=sys.stderr)
+        return 1
+    if action == 'start':
+        run_daemon(socket_path)
+        return 0
+    try:
+        sock = _connect(socket_path)
+    except socket.error:
+        print('The daemon is not running.')
+        return 0 if action == 'stop' else 1
+    with sock:
+        if action == 'stop':
+            _send_message(sock, {'action': 'stop'})
+            print('The daemon has been stopped.')
+        else:
+            print('The daemon is running on {}.'.format(socket_path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
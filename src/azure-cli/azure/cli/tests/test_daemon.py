@@ -0,0 +1,139 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+
+from azure.cli import daemon
+
+
+@unittest.skipUnless(daemon.is_daemon_supported(), 'The daemon is not supported on this platform.')
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.socket_path = daemon.get_socket_path(self.config_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dir)
+
+    def _start_daemon(self, fingerprints=None):
+        patches = [mock.patch.object(daemon, '_warm_up', autospec=True),
+                   mock.patch.object(daemon, '_get_install_fingerprint', side_effect=fingerprints or [[1], [1]])]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        thread = threading.Thread(target=daemon.run_daemon, args=(self.socket_path, 0))
+        thread.daemon = True
+        thread.start()
+        for _ in range(100):
+            try:
+                daemon._connect(self.socket_path).close()
+                return thread
+            except socket.error:
+                time.sleep(0.05)
+        self.fail('The daemon did not start.')
+
+    def _stop_daemon(self, thread):
+        with daemon._connect(self.socket_path) as sock:
+            daemon._send_message(sock, {'action': 'stop'})
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_send_message_with_file_descriptors(self):
+        pipes = [os.pipe() for _ in daemon._STDIO_FDS]
+        client, server = socket.socketpair()
+        try:
+            message = {'action': 'invoke', 'args': ['vm', 'list'], 'env': {'KEY': 'value'}}
+            daemon._send_message(client, message, fds=[w for _, w in pipes])
+            received, fds = daemon._recv_message(server, max_fds=len(daemon._STDIO_FDS))
+            self.assertEqual(received, message)
+            self.assertEqual(len(fds), len(pipes))
+            # the received descriptors write to the same pipes as the sent ones
+            for fd, (r, _) in zip(fds, pipes):
+                os.write(fd, b'out')
+                os.close(fd)
+                self.assertEqual(os.read(r, 3), b'out')
+
+            daemon._send_message(client, {'action': 'stop'})
+            self.assertEqual(daemon._recv_message(server, max_fds=len(daemon._STDIO_FDS)), ({'action': 'stop'}, []))
+        finally:
+            client.close()
+            server.close()
+            for r, w in pipes:
+                os.close(r)
+                os.close(w)
+
+    def test_daemon_declines_requests_it_cannot_serve(self):
+        thread = self._start_daemon(fingerprints=[[1], [2]])
+
+        # a request without the stdio descriptors is declined and the daemon keeps serving
+        with daemon._connect(self.socket_path) as sock:
+            daemon._send_message(sock, {'action': 'invoke', 'args': ['version'], 'cwd': os.getcwd(), 'env': {}})
+            self.assertEqual(daemon._recv_int(sock), daemon._DECLINED)
+
+        # once the CLI installation changed, the request is declined, so the caller runs it, and the daemon exits
+        with mock.patch.dict(os.environ, {'AZURE_CONFIG_DIR': self.config_dir, 'AZURE_CORE_USE_DAEMON': 'true'}), \
+                mock.patch.object(daemon, '_spawn_daemon', autospec=True) as spawn_daemon:
+            self.assertIsNone(daemon.invoke_with_daemon(['version']))
+        spawn_daemon.assert_not_called()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_daemon_replaces_stale_socket(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+        self.assertTrue(os.path.exists(self.socket_path))
+
+        thread = self._start_daemon()
+        # a second daemon finds the first one listening and exits without warming up
+        daemon.run_daemon(self.socket_path, 0)
+        daemon._warm_up.assert_called_once_with()
+        self._stop_daemon(thread)
+
+    @mock.patch('os._exit', autospec=True)
+    @mock.patch('atexit._run_exitfuncs', autospec=True)
+    @mock.patch('azure.cli.core.get_default_cli', autospec=True)
+    def test_child_reports_exit_code_after_exit_handlers(self, get_default_cli, run_exitfuncs, exit_process):
+        handlers = (signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM))
+        self.addCleanup(signal.signal, signal.SIGINT, handlers[0])
+        self.addCleanup(signal.signal, signal.SIGTERM, handlers[1])
+        telemetry = mock.patch.multiple('azure.cli.core.telemetry', set_application=mock.DEFAULT, start=mock.DEFAULT,
+                                        set_failure=mock.DEFAULT, set_success=mock.DEFAULT, conclude=mock.DEFAULT)
+        telemetry.start()
+        self.addCleanup(telemetry.stop)
+
+        for result, expected in [(3, 3), (SystemExit(2), 2), (None, 0)]:
+            get_default_cli.return_value.invoke.side_effect = result if isinstance(result, SystemExit) else None
+            get_default_cli.return_value.invoke.return_value = result
+            run_exitfuncs.reset_mock()
+            exit_process.reset_mock()
+            conn, caller = socket.socketpair()
+            with conn, caller:
+                # the session files and the token cache are written before the caller learns the command is done
+                sent_before_exit_handlers = []
+                run_exitfuncs.side_effect = lambda: sent_before_exit_handlers.append(caller.recv(64))
+                request = {'args': ['group', 'list'], 'cwd': os.getcwd(), 'env': dict(os.environ)}
+                daemon._run_child(conn, request, [os.dup(fd) for fd in daemon._STDIO_FDS])
+
+                self.assertEqual(sent_before_exit_handlers, [daemon._RESULT.pack(os.getpid())])
+                self.assertEqual(daemon._recv_int(caller), expected)
+            get_default_cli.return_value.invoke.assert_called_with(['group', 'list'])
+            run_exitfuncs.assert_called_once_with()
+            exit_process.assert_called_once_with(0)
+
+
+if __name__ == '__main__':
+    unittest.main()